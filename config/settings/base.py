@@ -494,6 +494,8 @@ TEST_PATIENTS = env.list('TEST_PATIENT_QUESTIONNAIREDB_IDS', default=[])
 REPORT_SOURCE_SYSTEM = env.str('REPORT_SOURCE_SYSTEM')
 # Number assigned by the hospital for the generated PDF report
 REPORT_DOCUMENT_NUMBER = env.str('REPORT_DOCUMENT_NUMBER')
+# Whether the charts in questionnaire PDF reports are drawn as vector graphics instead of images rendered by a browser
+REPORT_VECTOR_CHARTS = env.bool('REPORT_VECTOR_CHARTS', default=False)
 
 # ORMS SETTINGS
 # Name of the group for the ORMS users
@@ -516,6 +518,8 @@ if IPS_ENABLED:
     FHIR_API_CLIENT_ID = env.str('FHIR_API_CLIENT_ID')
     # ensure that newlines are converted to actual newlines
     FHIR_API_PRIVATE_KEY = env.str('FHIR_API_PRIVATE_KEY').replace('\\n', '\n')
+    # number of resources per page requested from the FHIR API (the server's default if not set)
+    FHIR_API_PAGE_SIZE = env.int('FHIR_API_PAGE_SIZE', default=None)
 
     IPS_STORAGE_BACKEND = env.str('IPS_STORAGE_BACKEND')
     IPS_PUBLIC_BASE_URL = env.url('IPS_PUBLIC_BASE_URL').geturl()
@@ -11,7 +11,6 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.mail import send_mail
 from django.db import transaction
-from django.db.models.functions import SHA512
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.translation import gettext, override
@@ -66,7 +65,6 @@ class GetRegistrationEncryptionInfoView(RetrieveAPIView[RegistrationCode]):
         .prefetch_related(
             'relationship__patient__hospital_patients',
         )
-        .annotate(code_sha512=SHA512('code'))
         .filter(status=RegistrationCodeStatus.NEW)
     )
     permission_classes = (IsRegistrationListener,)
@@ -0,0 +1,44 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Collection of managers for the caregivers app."""
+
+from typing import TYPE_CHECKING, Any
+
+from django.db import models
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from .models import RegistrationCode
+
+
+class RegistrationCodeQuerySet(models.QuerySet['RegistrationCode']):
+    """Custom QuerySet class for the `RegistrationCode` model."""
+
+    def bulk_create(
+        self,
+        objs: Iterable[RegistrationCode],
+        *args: Any,
+        **kwargs: Any,
+    ) -> list[RegistrationCode]:
+        """
+        Insert the registration codes with their SHA-512 hash.
+
+        The hash is set here since `bulk_create` does not call the `save()` method of the model.
+
+        Args:
+            objs: the registration codes to insert
+            args: additional arguments
+            kwargs: additional keyword arguments
+
+        Returns:
+            the inserted registration codes
+        """
+        registration_codes = list(objs)
+
+        for registration_code in registration_codes:
+            registration_code.code_sha512 = registration_code.hash_code(registration_code.code)
+
+        return super().bulk_create(registration_codes, *args, **kwargs)
@@ -0,0 +1,47 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+from typing import TYPE_CHECKING
+
+from django.db import migrations, models
+from django.db.models.functions import SHA512
+
+if TYPE_CHECKING:
+    from django.apps.registry import Apps
+    from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+
+
+def populate_code_sha512(apps: Apps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    """Populate the SHA-512 hash of the code of all existing registration codes with one query."""
+    RegistrationCode = apps.get_model('caregivers', 'RegistrationCode')
+
+    RegistrationCode.objects.update(code_sha512=SHA512('code'))
+
+
+class Migration(migrations.Migration):
+    """Add the indexed `code_sha512` field to the registration code model to look up codes by their hash."""
+
+    dependencies = [
+        ('caregivers', '0009_alter_registrationcode_creation_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registrationcode',
+            name='code_sha512',
+            field=models.CharField(blank=True, editable=False, max_length=128, null=True, verbose_name='Code SHA-512'),
+        ),
+        migrations.RunPython(populate_code_sha512, reverse_code=migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='registrationcode',
+            name='code_sha512',
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=128,
+                unique=True,
+                verbose_name='Code SHA-512',
+            ),
+        ),
+    ]
@@ -4,6 +4,8 @@
 
 """Module providing models for the caregivers app."""
 
+from hashlib import sha512
+from typing import Any
 from uuid import uuid4
 
 from django.core.validators import MinLengthValidator, MinValueValidator
@@ -12,6 +14,8 @@ from django.utils.translation import gettext_lazy as _
 
 from opal.users.models import User
 
+from .managers import RegistrationCodeQuerySet
+
 
 class CaregiverProfile(models.Model):
     """Profile for caregiver users."""
@@ -209,6 +213,16 @@ class RegistrationCode(models.Model):
         unique=True,
     )
 
+    # persisted hash of the code to look up a registration code by its hash via an index
+    # it is set when saving, therefore it may be blank when validating a new instance
+    code_sha512 = models.CharField(
+        verbose_name=_('Code SHA-512'),
+        max_length=128,
+        unique=True,
+        blank=True,
+        editable=False,
+    )
+
     status = models.CharField(
         verbose_name=_('Status'),
         choices=RegistrationCodeStatus,
@@ -226,6 +240,8 @@ class RegistrationCode(models.Model):
         default=0,
     )
 
+    objects = models.Manager.from_queryset(RegistrationCodeQuerySet)()
+
     class Meta:
         verbose_name = _('Registration Code')
         verbose_name_plural = _('Registration Codes')
@@ -246,6 +262,39 @@ class RegistrationCode(models.Model):
         """
         return self.code
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Save the current instance.
+
+        The SHA-512 hash of the code is updated from the code.
+
+        Args:
+            args: additional arguments
+            kwargs: additional keyword arguments
+        """
+        self.code_sha512 = self.hash_code(self.code)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'code' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'code_sha512'}
+
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def hash_code(code: str) -> str:
+        """
+        Return the SHA-512 hash of a registration code.
+
+        The hash is equal to the one calculated by the database (see `django.db.models.functions.SHA512`).
+
+        Args:
+            code: the registration code
+
+        Returns:
+            the hexadecimal SHA-512 hash of the code
+        """
+        return sha512(code.encode()).hexdigest()
+
 
 class EmailVerification(models.Model):
     """A model to save verification codes along with its properties."""
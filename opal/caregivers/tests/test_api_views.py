@@ -13,7 +13,8 @@ from typing import TYPE_CHECKING, Any
 
 from django.core import mail
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import OperationalError
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
@@ -297,6 +298,26 @@ def test_registration_encryption_invalid_hash(api_client: APIClient, admin_user:
     assert response.status_code == HTTPStatus.NOT_FOUND
 
 
+def test_registration_encryption_lookup_query(api_client: APIClient, admin_user: User) -> None:
+    """Ensure the registration code is looked up by its stored hash instead of hashing every code."""
+    api_client.force_login(user=admin_user)
+    registration_code = caregiver_factories.RegistrationCode.create()
+    patient_factories.HospitalPatient.create(patient=registration_code.relationship.patient)
+    caregiver_factories.RegistrationCode.create(relationship=registration_code.relationship, code='code87654321')
+    request_hash = sha512(registration_code.code.encode()).hexdigest()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(reverse('api:registration-by-hash', kwargs={'hash': request_hash}))
+
+    assert response.status_code == HTTPStatus.OK
+    lookup_queries = [
+        query['sql'] for query in queries if caregiver_models.RegistrationCode._meta.db_table in query['sql']
+    ]
+    assert lookup_queries
+    assert f"`code_sha512` = '{request_hash}'" in lookup_queries[0]
+    assert 'SHA2' not in lookup_queries[0]
+
+
 def test_device_unauthenticated_unauthorized(api_client: APIClient, user: User) -> None:
     """Test that unauthenticated and unauthorized requests get rejected."""
     url = reverse('api:devices-update-or-create', kwargs={'device_id': '123456'})
@@ -3,10 +3,12 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
 import datetime
+from hashlib import sha512
 
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
 from django.db.models.deletion import ProtectedError
+from django.db.models.functions import SHA512
 from django.db.utils import DataError
 from django.utils import timezone
 
@@ -16,7 +18,7 @@ from pytest_django.asserts import assertRaisesMessage
 from opal.users import factories as user_factories
 
 from .. import factories
-from ..models import CaregiverProfile, Device, DeviceType, EmailVerification
+from ..models import CaregiverProfile, Device, DeviceType, EmailVerification, RegistrationCode
 
 pytestmark = pytest.mark.django_db
 
@@ -282,6 +284,52 @@ def test_registrationcode_codes_length_lt_min() -> None:
         registration_code.clean_fields()
 
 
+def test_registrationcode_code_sha512() -> None:
+    """Ensure the SHA-512 hash of the code is stored when creating a registration code."""
+    registration_code = factories.RegistrationCode.create()
+
+    assert registration_code.code_sha512 == sha512(b'code12345678').hexdigest()
+
+
+def test_registrationcode_code_sha512_matches_database() -> None:
+    """Ensure the stored hash is equal to the hash calculated by the database."""
+    registration_code = factories.RegistrationCode.create()
+
+    database_hash = RegistrationCode.objects.annotate(database_hash=SHA512('code')).get().database_hash
+
+    assert registration_code.code_sha512 == database_hash
+
+
+def test_registrationcode_code_sha512_updated() -> None:
+    """Ensure the stored hash is updated when the code changes."""
+    registration_code = factories.RegistrationCode.create()
+    registration_code.code = 'code87654321'
+    registration_code.save(update_fields=['code'])
+
+    registration_code.refresh_from_db()
+    assert registration_code.code_sha512 == sha512(b'code87654321').hexdigest()
+
+
+def test_registrationcode_code_sha512_bulk_create() -> None:
+    """Ensure the stored hash is set when creating multiple registration codes at once."""
+    relationship = factories.RegistrationCode.create().relationship
+
+    RegistrationCode.objects.bulk_create([
+        RegistrationCode(relationship=relationship, code='code00000001'),
+        RegistrationCode(relationship=relationship, code='code00000002'),
+    ])
+
+    assert RegistrationCode.objects.get(code_sha512=sha512(b'code00000002').hexdigest()).code == 'code00000002'
+
+
+def test_registrationcode_full_clean_before_save() -> None:
+    """Ensure a new registration code passes validation before its hash is set."""
+    relationship = factories.RegistrationCode.create().relationship
+    registration_code = RegistrationCode(relationship=relationship, code='code00000001')
+
+    registration_code.full_clean()
+
+
 def test_registrationcode_creation_date_is_today() -> None:
     """Ensure the created at datetime is the current datetime when creating a new registration code."""
     registration_code = factories.RegistrationCode.create()
@@ -22,6 +22,7 @@ from rest_framework.test import APIClient
 from structlog.testing import LogCapture
 
 from opal.core import constants
+from opal.hospital_settings.utils import clear_site_cache
 from opal.legacy import factories as legacy_factories
 from opal.legacy_questionnaires import factories
 
@@ -288,6 +289,12 @@ def set_orms_enabled(settings: LazySettings) -> None:
     settings.ORMS_HOST = 'http://localhost:8086'
 
 
+@pytest.fixture(autouse=True)
+def clear_sites() -> None:
+    """Fixture clearing the cached sites to avoid sites of rolled back tests leaking between tests."""
+    clear_site_cache()
+
+
 @pytest.fixture
 def set_orms_disabled(settings: LazySettings) -> None:
     """
@@ -616,6 +623,7 @@ def enable_ips(settings: LazySettings) -> None:
     settings.FHIR_API_OAUTH_URL = ''
     settings.FHIR_API_CLIENT_ID = ''
     settings.FHIR_API_PRIVATE_KEY = ''
+    settings.FHIR_API_PAGE_SIZE = None
 
     settings.IPS_STORAGE_BACKEND = 'django.core.files.storage.FileSystemStorage'
     settings.IPS_PUBLIC_BASE_URL = 'http://localhost:8000/media/'
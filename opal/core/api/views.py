@@ -9,7 +9,6 @@ from typing import TYPE_CHECKING, Any, TypeVar
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db.models import Model
-from django.shortcuts import get_object_or_404
 
 from drf_spectacular.utils import extend_schema
 from rest_framework import serializers, status
@@ -19,14 +18,12 @@ from rest_framework.views import APIView
 
 from opal.core.drf_parsers.hl7_parser import HL7Parser
 from opal.core.drf_permissions import IsRegistrationListener
-from opal.hospital_settings.models import Site
 from opal.patients.models import Patient
+from opal.patients.utils import get_patient_by_mrn_sites
 
 from .serializers import LanguageSerializer
 
 if TYPE_CHECKING:
-    import uuid
-
     from django.http import HttpRequest
 
     from rest_framework.request import Request
@@ -92,7 +89,9 @@ class HL7CreateView(CreateAPIView[_Model]):
         Returns:
             API Response with code and headers
         """
-        if not self._validate_uuid_matches_pid_segment(request.data, self.kwargs['uuid']):
+        patient = self._get_pid_patient(request.data)
+
+        if patient.uuid != self.kwargs['uuid']:
             return Response(
                 {
                     'status': 'error',
@@ -100,46 +99,28 @@ class HL7CreateView(CreateAPIView[_Model]):
                 },
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        patient: Patient = get_object_or_404(Patient, uuid=self.kwargs['uuid'])
         request.data['patient'] = patient
         return super().post(request, *args, **kwargs)
 
-    def _validate_uuid_matches_pid_segment(
-        self,
-        parsed_data: dict[str, Any],
-        url_uuid: uuid.UUID,
-    ) -> bool:
+    def _get_pid_patient(self, parsed_data: dict[str, Any]) -> Patient:
         """
-        Ensure the PID segment parsed from the message matches the uuid from the url.
+        Return the patient identified by the PID segment parsed from the message.
+
+        The patient is resolved with a single query using the cached sites (see `get_patient_by_mrn_sites`).
 
         Args:
             parsed_data: segmented dictionary parsed from the HL7 request data
-            url_uuid: UUID string passed in the endpoint url kwarg
 
         Returns:
-            True if the patient identified in the PID segment exists in the database and matches the UUID
+            the patient identified in the PID segment
 
         Raises:
             ValidationError: If no patient could be found at all, or multiple are found
         """
-        # Filter out invalid sites from the raw site list given by the hospital (e.g `HNAM_PERSONID`)
-        valid_sites = {site_tuple[0] for site_tuple in Site.objects.all().values_list('acronym')}
-        valid_pid_mrn_sites = [
-            mrn_site for mrn_site in parsed_data.get('PID', [])['mrn_sites'] if mrn_site[1] in valid_sites
-        ]
         try:
-            patient = Patient.objects.get_patient_by_site_mrn_list(
-                site_mrn_list=[
-                    {
-                        'site': {'acronym': site},
-                        'mrn': mrn,
-                    }
-                    for mrn, site in valid_pid_mrn_sites
-                ],
-            )
+            return get_patient_by_mrn_sites(parsed_data.get('PID', [])['mrn_sites'])
         except Patient.DoesNotExist, Patient.MultipleObjectsReturned:
             raise ValidationError('Patient identified by HL7 PID could not be uniquely found in database.') from None
-        return url_uuid == patient.uuid
 
 
 class EmptyResponseSerializer(serializers.Serializer[Any]):
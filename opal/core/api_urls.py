@@ -28,9 +28,9 @@ from opal.legacy.api.views.app_general import AppGeneralView
 from opal.legacy.api.views.app_home import AppHomeView
 from opal.legacy.api.views.caregiver_permissions import CaregiverPermissionsView
 from opal.legacy.api.views.orms_auth import ORMSLoginView, ORMSValidateView
-from opal.legacy.api.views.questionnaires_report import QuestionnairesReportView
+from opal.legacy.api.views.questionnaires_report import QuestionnairesReportJobView, QuestionnairesReportView
 from opal.patients.api import views as patient_views
-from opal.pharmacy.api.views import CreatePrescriptionView
+from opal.pharmacy.api.views import CreatePrescriptionBatchView, CreatePrescriptionView
 from opal.test_results.api.views import CreatePathologyView
 from opal.users.api import views as user_views
 from opal.users.api import viewsets as user_viewsets
@@ -175,6 +175,11 @@ urlpatterns = [
         CreatePrescriptionView.as_view(),
         name='patient-pharmacy-create',
     ),
+    path(
+        'pharmacy/batch/',
+        CreatePrescriptionBatchView.as_view(),
+        name='pharmacy-batch-create',
+    ),
     # databank consent instances for patients
     path(
         'patients/<uuid:uuid>/databank/consent/',
@@ -209,6 +214,11 @@ urlpatterns = [
         QuestionnairesReportView.as_view(),
         name='questionnaires-reviewed',
     ),
+    path(
+        'questionnaires/reviewed/<uuid:uuid>/',
+        QuestionnairesReportJobView.as_view(),
+        name='questionnaires-reviewed-job',
+    ),
     # REGISTRATION ENDPOINTS
     path(
         'registration/by-hash/<str:hash>/',
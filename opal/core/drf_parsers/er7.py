@@ -0,0 +1,399 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""
+Module which provides a lightweight tokenizer for ER7-encoded HL7v2 messages.
+
+hl7apy builds the complete element tree of a message (every segment, field, component and subcomponent)
+before a single value can be read.
+This tokenizer splits the message on the separators declared in its MSH segment instead
+and only materializes the fields, components and subcomponents that are accessed.
+
+The elements support the subset of the hl7apy element API used by the segment parsers,
+i.e., `segment.pid_5.pid_5_2.to_er7()` and iterating over the repetitions of a field,
+and return the same ER7 representation as hl7apy does:
+values are escaped or normalized (e.g., `NM` values) according to their datatype in the message's HL7 version.
+
+Elements that hl7apy represents differently (e.g., a field with more components than its datatype defines)
+are not supported and raise an `UnsupportedER7Error` so that the message can be parsed with hl7apy instead.
+"""
+
+import functools
+import re
+from typing import TYPE_CHECKING, Any
+
+from hl7apy import check_version, get_default_validation_level, get_default_version, load_library, load_reference
+from hl7apy.base_datatypes import TextualDataType
+from hl7apy.exceptions import ChildNotFound
+from hl7apy.factories import datatype_factory
+from hl7apy.parser import get_message_info
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+# names of elements, e.g., `pid_5` or `orc_7_1_2`
+ELEMENT_NAME_PATTERN = re.compile(r'^[a-z0-9]{3}(_\d+)+$', re.IGNORECASE)
+
+type Reference = tuple[Any, ...] | list[Any]
+
+
+class UnsupportedER7Error(Exception):
+    """Exception raised when an element cannot be represented the same way as hl7apy does."""
+
+
+class ER7Message:
+    """
+    An ER7-encoded HL7v2 message split into its segments.
+
+    The encoding characters and the HL7 version are determined from the MSH segment the same way hl7apy does.
+    """
+
+    def __init__(self, message: str) -> None:
+        """
+        Determine the encoding characters and the HL7 version of the message.
+
+        Invalid messages and unsupported HL7 versions raise the same errors as when parsing them with hl7apy.
+
+        Args:
+            message: the ER7-encoded message with segments separated by a carriage return
+        """
+        self._message = message.lstrip()
+        self.encoding_chars, _, version = get_message_info(self._message)
+        self.version: str = version or get_default_version()
+        check_version(self.version)
+
+        self.validation_level = get_default_validation_level()
+        # the separators of the children of fields (components) and of components (subcomponents)
+        self.separators = (
+            self.encoding_chars['COMPONENT'],
+            self.encoding_chars['SUBCOMPONENT'],
+        )
+        escape = re.escape(self.encoding_chars['ESCAPE'])
+        # same as `TextualDataType._get_escape_char_regex`: escape characters that are not part of an escape sequence
+        self._escape_pattern = re.compile(rf'(?<!{escape}[HNFSTRE]){escape}(?![HNFSTRE]{escape})')
+        self._escaped_escape = '{esc}E{esc}'.format(esc=self.encoding_chars['ESCAPE'])
+
+    @property
+    def segments(self) -> Iterator[ER7Segment]:
+        """
+        Iterate over the segments of the message.
+
+        The fields of a segment are only split once they are accessed.
+
+        Yields:
+            the segments of the message
+        """
+        for text in self._message.split(self.encoding_chars['SEGMENT']):
+            if text:
+                yield ER7Segment(self, text.strip())
+
+    def leaf_to_er7(self, datatype: str, value: str) -> str:
+        """
+        Return the ER7 representation of a value of a base datatype.
+
+        Textual values have their lone escape characters escaped,
+        other values (numbers, dates and times) are converted by hl7apy's datatype factory.
+
+        Args:
+            datatype: the base datatype of the value, e.g., `ST`
+            value: the value as it appears in the message
+
+        Returns:
+            the ER7 representation of the value
+
+        Raises:
+            UnsupportedER7Error: if the datatype is not a base datatype
+        """
+        if not value:
+            return ''
+
+        if datatype in _get_textual_datatypes(self.version):
+            if self.encoding_chars['ESCAPE'] not in value:
+                return value
+
+            return self._escape_pattern.sub(lambda _: self._escaped_escape, value)
+
+        if datatype not in _get_base_datatypes(self.version):
+            raise UnsupportedER7Error(f'Unsupported datatype: {datatype}')
+
+        converted_value = datatype_factory(datatype, value, self.version, self.validation_level)
+        return str(converted_value.to_er7(self.encoding_chars))
+
+
+class ER7Segment:
+    """A segment of an ER7-encoded HL7v2 message whose fields are accessed as attributes, e.g., `segment.pid_5`."""
+
+    def __init__(self, message: ER7Message, text: str) -> None:
+        """
+        Initialize the segment.
+
+        Args:
+            message: the message containing the segment
+            text: the ER7-encoded segment
+        """
+        self.message = message
+        self.name = text[:3]
+        self._text = text
+        self._fields: list[str] | None = None
+
+    def __getattr__(self, name: str) -> ER7Field:
+        """
+        Return the field with the given name, e.g., `pid_5`.
+
+        Args:
+            name: the name of the field
+
+        Returns:
+            the field (an empty field if it is not present in the segment)
+
+        Raises:
+            AttributeError: if the name is not the name of an element
+            UnsupportedER7Error: if the name is not the name of a field of this segment
+        """
+        if not ELEMENT_NAME_PATTERN.match(name):
+            raise AttributeError(name)
+
+        segment_name, _, index = name.upper().partition('_')
+
+        # the first fields of the MSH segment contain the encoding characters which hl7apy handles separately
+        if segment_name != self.name or segment_name == 'MSH' or not index.isdigit():
+            raise UnsupportedER7Error(f'Unsupported element of segment {self.name}: {name}')
+
+        if self._fields is None:
+            self._fields = self._text[4:].split(self.message.encoding_chars['FIELD'])
+
+        position = int(index) - 1
+        text = self._fields[position] if position < len(self._fields) else ''
+
+        return ER7Field(
+            self.message, f'{self.name}_{index}', _get_field_reference(self.name, index, self.message.version), text
+        )
+
+
+class ER7Element:
+    """A field, component or subcomponent of a segment whose children are accessed as attributes."""
+
+    def __init__(self, message: ER7Message, name: str, reference: Reference, text: str, level: int) -> None:
+        """
+        Initialize the element.
+
+        Args:
+            message: the message containing the element
+            name: the name of the element, e.g., `PID_5_1`
+            reference: the hl7apy reference of the element's structure
+            text: the ER7-encoded element
+            level: the level of the element within its field (0: field, 1: component, 2: subcomponent)
+        """
+        self.message = message
+        self.name = name
+        self.reference = reference
+        self.text = text
+        self.level = level
+
+    def __getattr__(self, name: str) -> ER7Element:
+        """
+        Return the descendant element with the given name, e.g., `pid_5_2` or `orc_7_1_2` of the field `orc_7`.
+
+        Args:
+            name: the name of the descendant element
+
+        Returns:
+            the descendant element
+
+        Raises:
+            AttributeError: if the name is not the name of an element
+            UnsupportedER7Error: if the name is not the name of a descendant of this element
+        """
+        if not ELEMENT_NAME_PATTERN.match(name):
+            raise AttributeError(name)
+
+        prefix, _, indexes = name.upper().partition(f'{self.name}_')
+
+        if prefix or not indexes:
+            raise UnsupportedER7Error(f'Unsupported element of {self.name}: {name}')
+
+        element = self
+        for index in indexes.split('_'):
+            element = element.child(int(index))
+
+        return element
+
+    def child(self, index: int) -> ER7Element:
+        """
+        Return the child element at the given position.
+
+        Args:
+            index: the position of the child (starting at 1)
+
+        Returns:
+            the child element (an empty element if it is not present)
+        """
+        return self._child(index, None if self.reference[0] == 'leaf' else self._split())
+
+    def to_er7(self) -> str:
+        """
+        Return the ER7 representation of the element as hl7apy does.
+
+        Returns:
+            the ER7 representation of the element
+
+        Raises:
+            UnsupportedER7Error: if hl7apy would not interpret the element according to its datatype
+        """
+        kind, children, datatype = self.reference[:3]
+
+        if kind == 'leaf':
+            if any(separator in self.text for separator in self.message.separators[self.level :]):
+                raise UnsupportedER7Error(f'Element {self.name} of a base datatype contains separators')
+
+            return self.message.leaf_to_er7(datatype, self.text)
+
+        children_text = self._split()
+
+        if len(children_text) > len(children):
+            raise UnsupportedER7Error(f'Element {self.name} has more children than its datatype {datatype}')
+
+        # like hl7apy, trailing blank children are omitted
+        while children_text and not children_text[-1].strip():
+            children_text.pop()
+
+        return self.message.separators[self.level].join(
+            self._child(index, children_text).to_er7() for index in range(1, len(children_text) + 1)
+        )
+
+    def _child(self, index: int, children_text: list[str] | None) -> ER7Element:
+        """
+        Return the child element at the given position.
+
+        Args:
+            index: the position of the child (starting at 1)
+            children_text: the ER7-encoded children of the element, `None` if it is of a base datatype
+
+        Returns:
+            the child element (an empty element if it is not present)
+
+        Raises:
+            UnsupportedER7Error: if the element does not have a child at this position
+        """
+        children = self.reference[1]
+        name = f'{self.name}_{index}'
+
+        if children_text is None:
+            # hl7apy gives access to the value of a field of a base datatype as its first child
+            if self.level == 0 and index == 1:
+                return ER7Element(self.message, name, self.reference, self.text, self.level)
+
+            raise UnsupportedER7Error(f'Element {self.name} of a base datatype has no children')
+
+        if index > len(children):
+            raise UnsupportedER7Error(f'Element {self.name} has no child at position {index}')
+
+        text = children_text[index - 1] if index <= len(children_text) else ''
+
+        # like hl7apy, blank children are omitted
+        return ER7Element(self.message, name, children[index - 1][1], text if text.strip() else '', self.level + 1)
+
+    def _split(self) -> list[str]:
+        """
+        Split the element into the text of its children.
+
+        Returns:
+            the ER7-encoded children
+
+        Raises:
+            UnsupportedER7Error: if the element is a subcomponent
+        """
+        if self.level >= len(self.message.separators):
+            raise UnsupportedER7Error(f'Element {self.name} cannot have children')
+
+        return self.text.split(self.message.separators[self.level])
+
+
+class ER7Field(ER7Element):
+    """
+    A field of a segment.
+
+    Accessing its children or its ER7 representation uses the first repetition of the field like hl7apy does.
+    Iterating over the field yields each of its repetitions.
+    """
+
+    def __init__(self, message: ER7Message, name: str, reference: Reference, text: str) -> None:
+        """
+        Initialize the field.
+
+        Args:
+            message: the message containing the field
+            name: the name of the field, e.g., `PID_5`
+            reference: the hl7apy reference of the field's structure
+            text: the ER7-encoded field including all its repetitions
+        """
+        # like hl7apy, a blank field has no repetitions
+        self.repetitions = text.split(message.encoding_chars['REPETITION']) if text.strip() else []
+        super().__init__(message, name, reference, self.repetitions[0] if self.repetitions else '', 0)
+
+    def __iter__(self) -> Iterator[ER7Element]:
+        """
+        Iterate over the repetitions of the field.
+
+        Yields:
+            each repetition of the field
+        """
+        for text in self.repetitions:
+            yield ER7Element(self.message, self.name, self.reference, text, self.level)
+
+
+@functools.cache
+def _get_field_reference(segment_name: str, index: str, version: str) -> Reference:
+    """
+    Return the hl7apy reference of the structure of a field.
+
+    Args:
+        segment_name: the name of the segment, e.g., `PID`
+        index: the position of the field in the segment
+        version: the HL7 version
+
+    Returns:
+        the reference of the field
+
+    Raises:
+        UnsupportedER7Error: if the segment does not define the field
+    """
+    try:
+        reference: Reference = load_reference(f'{segment_name}_{index}', 'Field', version)
+    except ChildNotFound as exc:
+        raise UnsupportedER7Error(f'Unknown field {segment_name}_{index}') from exc
+
+    return reference
+
+
+@functools.cache
+def _get_base_datatypes(version: str) -> frozenset[str]:
+    """
+    Return the base datatypes of an HL7 version.
+
+    Args:
+        version: the HL7 version
+
+    Returns:
+        the names of the base datatypes
+    """
+    return frozenset(load_library(version).get_base_datatypes())
+
+
+@functools.cache
+def _get_textual_datatypes(version: str) -> frozenset[str]:
+    """
+    Return the textual base datatypes of an HL7 version whose values are only escaped.
+
+    Args:
+        version: the HL7 version
+
+    Returns:
+        the names of the textual base datatypes
+    """
+    return frozenset(
+        name
+        for name, datatype in load_library(version).get_base_datatypes().items()
+        if issubclass(datatype, TextualDataType)
+    )
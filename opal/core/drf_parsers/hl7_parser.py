@@ -5,25 +5,34 @@
 """Module which provides HL7-parsing into JSON data for any generic HL7 segment-structured message."""
 
 from collections import defaultdict
-from collections.abc import Callable, Mapping
+from collections.abc import Callable, Iterable, Mapping
 from datetime import datetime
 from typing import IO, Any
 
 from django.utils import timezone
 
+import structlog
 from hl7apy.core import Segment
 from hl7apy.parser import parse_message
 from rest_framework import exceptions
 from rest_framework.parsers import BaseParser
 
-type ParserFunction = Callable[[Segment], dict[str, Any]]
+from .er7 import ER7Message, ER7Segment, UnsupportedER7Error
+
+type HL7Segment = Segment | ER7Segment
+type ParserFunction = Callable[[HL7Segment], dict[str, Any]]
+
+LOGGER = structlog.get_logger()
+
+# segments wrapping the messages of a batch file
+BATCH_SEGMENTS = frozenset(('FHS', 'FTS', 'BHS', 'BTS'))
 
 FORMAT_DATE = '%Y%m%d'
 FORMAT_DATETIME_SHORT = '%Y%m%d%H%M'
 FORMAT_DATETIME_COMPLETE = '%Y%m%d%H%M%S'
 
 
-def parse_pid_segment(segment: Segment) -> dict[str, Any]:
+def parse_pid_segment(segment: HL7Segment) -> dict[str, Any]:
     """
     Extract patient data from an HL7v2 PID segment.
 
@@ -57,7 +66,7 @@ def parse_pid_segment(segment: Segment) -> dict[str, Any]:
     }
 
 
-def parse_pv1_segment(segment: Segment) -> dict[str, Any]:
+def parse_pv1_segment(segment: HL7Segment) -> dict[str, Any]:
     """
     Extract patient visit data from an HL7v2 PV1 segment.
 
@@ -78,7 +87,7 @@ def parse_pv1_segment(segment: Segment) -> dict[str, Any]:
     }
 
 
-def parse_orc_segment(segment: Segment) -> dict[str, Any]:
+def parse_orc_segment(segment: HL7Segment) -> dict[str, Any]:
     """
     Extract common order data from an HL7v2 ORC segment.
 
@@ -116,7 +125,7 @@ def parse_orc_segment(segment: Segment) -> dict[str, Any]:
     }
 
 
-def parse_rxe_segment(segment: Segment) -> dict[str, Any]:
+def parse_rxe_segment(segment: HL7Segment) -> dict[str, Any]:
     """
     Extract pharmacy encoding data from an HL7v2 RXE segment.
 
@@ -162,7 +171,7 @@ def parse_rxe_segment(segment: Segment) -> dict[str, Any]:
     }
 
 
-def parse_rxc_segment(segment: Segment) -> dict[str, Any]:
+def parse_rxc_segment(segment: HL7Segment) -> dict[str, Any]:
     """
     Extract pharmacy component data from an HL7v2 RXC segment.
 
@@ -187,7 +196,7 @@ def parse_rxc_segment(segment: Segment) -> dict[str, Any]:
     }
 
 
-def parse_rxr_segment(segment: Segment) -> dict[str, Any]:
+def parse_rxr_segment(segment: HL7Segment) -> dict[str, Any]:
     """
     Extract pharmacy route data from an HL7v2 RXR segment.
 
@@ -217,7 +226,7 @@ def parse_rxr_segment(segment: Segment) -> dict[str, Any]:
     }
 
 
-def parse_nte_segment(segment: Segment) -> dict[str, Any]:
+def parse_nte_segment(segment: HL7Segment) -> dict[str, Any]:
     """
     Extract note and comment data from an HL7v2 NTE segment.
 
@@ -264,7 +273,12 @@ def fix_breaking_characters(field: str) -> str:
 
 
 class HL7Parser(BaseParser):
-    """Parse HL7-v2 messages and return dictionary data."""
+    """
+    Parse HL7-v2 messages and return dictionary data.
+
+    By default, messages are split with the lightweight ER7 tokenizer which only materializes the parsed segments.
+    Messages containing elements that the tokenizer does not support are parsed with hl7apy instead.
+    """
 
     media_type = 'application/hl7-v2+er7'
     segment_parsers: dict[str, ParserFunction] = {
@@ -276,6 +290,8 @@ class HL7Parser(BaseParser):
         'RXR': parse_rxr_segment,
         'NTE': parse_nte_segment,
     }
+    #: whether to use the ER7 tokenizer instead of building the complete hl7apy element tree of the message
+    use_er7_tokenizer = True
 
     def parse(
         self,
@@ -293,13 +309,51 @@ class HL7Parser(BaseParser):
 
         Returns:
             dictionary object containing the parsed HL7v2 message
+        """
+        hl7_message = self._read_stream(stream)
+        # Check for a parser context which defines specific segments to be parsed
+        segments_to_parse = parser_context.get('segments_to_parse') if parser_context else None
+
+        return self.parse_er7_message(hl7_message, segments_to_parse)
+
+    def parse_er7_message(
+        self,
+        hl7_message: str,
+        segments_to_parse: Iterable[str] | None = None,
+    ) -> dict[Any, list[dict[str, Any]]]:
+        """
+        Parse an ER7-encoded HL7v2 message with segments separated by a carriage return.
+
+        Args:
+            hl7_message: the ER7-encoded message
+            segments_to_parse: the names of the segments to parse, all segments if not set
+
+        Returns:
+            dictionary object containing the parsed HL7v2 message
+        """
+        if self.use_er7_tokenizer:
+            try:
+                return self._parse_segments(ER7Message(hl7_message).segments, segments_to_parse)
+            except UnsupportedER7Error:
+                LOGGER.debug('The HL7 message is not supported by the ER7 tokenizer, parsing it with hl7apy')
+
+        # Use hl7apy to parse the message, find_groups=False disables the higher level segment grouping
+        # For example, find_groups would typically bundles PID and PV1 into their own 'RDE_O01_PATIENT' grouping)
+        return self._parse_segments(parse_message(hl7_message, find_groups=False).children, segments_to_parse)
+
+    def _read_stream(self, stream: IO[Any]) -> str:
+        """
+        Read the incoming bytestream and normalize its line endings to carriage returns.
+
+        Args:
+            stream: Incoming byte stream of request data
+
+        Returns:
+            the decoded HL7v2 data
 
         Raises:
             ParseError: If the data passed is not a StringIO stream
         """
-        # Initialize the message_dict to hold parsed data
-        message_dict: dict[str, Any] = defaultdict(list)
-
         # Read the incoming stream into a string
         try:
             raw_data_bytes = stream.read()
@@ -313,13 +367,27 @@ class HL7Parser(BaseParser):
             raise exceptions.ParseError(f'Error decoding HL7 message: {err}') from err
 
         # Normalize line endings to CR
-        hl7_message = raw_data_str.replace('\r\n', '\r').replace('\n', '\r')
-        # Check for a parser context which defines specific segments to be parsed
-        segments_to_parse = parser_context.get('segments_to_parse') if parser_context else None
+        return str(raw_data_str.replace('\r\n', '\r').replace('\n', '\r'))
 
-        # Use hl7apy to parse the message, find_groups=False disables the higher level segment grouping
-        # For example, find_groups would typically bundles PID and PV1 into their own 'RDE_O01_PATIENT' grouping)
-        for segment in parse_message(hl7_message, find_groups=False).children:
+    def _parse_segments(
+        self,
+        segments: Iterable[HL7Segment],
+        segments_to_parse: Iterable[str] | None,
+    ) -> dict[Any, list[dict[str, Any]]]:
+        """
+        Parse the segments of an HL7v2 message that have a parsing function.
+
+        Args:
+            segments: the segments of the message
+            segments_to_parse: the names of the segments to parse, all segments if not set
+
+        Returns:
+            dictionary object containing the parsed segments by segment name
+        """
+        # Initialize the message_dict to hold parsed data
+        message_dict: dict[str, Any] = defaultdict(list)
+
+        for segment in segments:
             segment_name = segment.name
 
             # Skip parsing this segment if segments_to_parse is set and does not request this segment
@@ -337,3 +405,102 @@ class HL7Parser(BaseParser):
                 message_dict[segment_name].append(parse_function(segment))
 
         return message_dict
+
+
+class HL7BatchParser(HL7Parser):
+    """
+    Parse HL7-v2 batch files and return the dictionary data of each message.
+
+    A batch file either wraps the messages in batch (BHS/BTS) and file (FHS/FTS) header and trailer segments
+    or contains the messages one after the other (e.g., separated by empty lines).
+    Each message is parsed separately so that an invalid message does not prevent parsing the other messages.
+    """
+
+    def parse(  # type: ignore[override]
+        self,
+        stream: IO[Any],
+        media_type: str | None = None,
+        parser_context: Mapping[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Parse the incoming bytestream as an HL7v2 batch file.
+
+        Args:
+            stream: Incoming byte stream of request data
+            media_type: Acceptable data/media type
+            parser_context: Additional request metadata to specify parsing functionality
+
+        Returns:
+            for each message, its control ID (MSH-10) and either its parsed `data` or its parsing `error`
+        """
+        hl7_batch = self._read_stream(stream)
+        segments_to_parse = parser_context.get('segments_to_parse') if parser_context else None
+        messages = []
+
+        for hl7_message in split_hl7_batch(hl7_batch):
+            message: dict[str, Any] = {'control_id': get_message_control_id(hl7_message)}
+
+            try:
+                message['data'] = self.parse_er7_message(hl7_message, segments_to_parse)
+            # Catch any error to report it for this message and continue with the other messages of the batch
+            except Exception as exc:  # noqa: BLE001
+                LOGGER.warning('Failed to parse the HL7 message %s of a batch: %s', message['control_id'], exc)
+                message['error'] = f'Error parsing HL7 message: {exc}'
+
+            messages.append(message)
+
+        return messages
+
+
+def split_hl7_batch(hl7_batch: str) -> list[str]:
+    """
+    Split an HL7v2 batch file into its messages.
+
+    Each message starts with an MSH segment.
+    The batch and file header and trailer segments as well as empty lines are omitted.
+
+    Args:
+        hl7_batch: the HL7v2 batch file with segments separated by a carriage return
+
+    Returns:
+        the ER7-encoded messages with segments separated by a carriage return
+
+    Raises:
+        ParseError: if the batch file contains segments outside of a message
+    """
+    messages: list[list[str]] = []
+
+    for segment in hl7_batch.split('\r'):
+        segment_name = segment.strip()[:3]
+
+        if not segment_name or segment_name in BATCH_SEGMENTS:
+            continue
+
+        if segment_name == 'MSH':
+            messages.append([segment.strip()])
+        elif messages:
+            messages[-1].append(segment.strip())
+        else:
+            raise exceptions.ParseError(f'HL7 batch file contains a {segment_name} segment outside of a message')
+
+    return ['\r'.join(message) for message in messages]
+
+
+def get_message_control_id(hl7_message: str) -> str:
+    """
+    Return the message control ID (MSH-10) of an ER7-encoded HL7v2 message.
+
+    Args:
+        hl7_message: the ER7-encoded message starting with its MSH segment
+
+    Returns:
+        the message control ID, an empty string if the message does not have one
+    """
+    msh = hl7_message.split('\r', 1)[0]
+    # the character after the segment name is the field separator (MSH-1)
+    field_separator = msh[3:4]
+
+    try:
+        return msh.split(field_separator)[9] if field_separator else ''
+    except IndexError:
+        return ''
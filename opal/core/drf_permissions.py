@@ -8,10 +8,14 @@ This module provides custom permissions for the Django REST framework.
 These permissions are provided for the project and intended to be reused.
 """
 
+import hashlib
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Exists, OuterRef
 
 from rest_framework import exceptions, permissions
 
@@ -20,11 +24,17 @@ from opal.core import constants
 from opal.patients.models import Patient, Relationship, RelationshipStatus, RoleType
 
 if TYPE_CHECKING:
-    from django.db.models import QuerySet
-
     from rest_framework.request import Request
     from rest_framework.views import APIView
 
+#: Prefix of the cache keys of the accesses of caregivers to the data of patients
+PERMISSIONS_CACHE_PREFIX = 'core:permissions:caregiver-patient'
+#: Cache key of the generation of the cached accesses which is changed to invalidate all of them
+PERMISSIONS_CACHE_GENERATION_KEY = f'{PERMISSIONS_CACHE_PREFIX}:generation'
+#: Number of seconds the access of a caregiver to the data of a patient is cached
+#: (the maximum time another process keeps granting a revoked access, see `get_caregiver_patient_access`)
+PERMISSIONS_CACHE_TIMEOUT = 10
+
 
 class FullDjangoModelPermissions(permissions.DjangoModelPermissions):
     """
@@ -158,11 +168,17 @@ class CaregiverPatientPermissions(permissions.BasePermission):
     """
     Global permission check that validates the permission of a caregiver trying to access a patient's data.
 
+    The access of the caregiver to the patient is determined with a single query
+    and cached for a short time (see `get_caregiver_patient_access`).
+
     Requirements:
         request.headers['Appuserid']: The caregiver's username.
         legacy_id (from the view's kwargs): The patient's legacy ID.
     """
 
+    #: Whether the caregiver needs a SELF relationship with the patient
+    require_self_relationship = False
+
     def has_permission(self, request: Request, view: APIView) -> bool:
         """
         Permission check that looks for a confirmed relationship between a caregiver and a patient.
@@ -176,16 +192,36 @@ class CaregiverPatientPermissions(permissions.BasePermission):
 
         Returns:
             True if the caregiver has a confirmed relationship with the patient.
+
+        Raises:
+            PermissionDenied: If the caregiver is not found, the patient is deceased,
+                or the caregiver does not have the required relationship with the patient.
         """
         # Read and validate the input parameters
         caregiver_username = self._get_caregiver_username(request)
         patient_legacy_id = self._get_patient_legacy_id(view)
 
         # Perform the permission checks
-        caregiver_profile = self._check_caregiver_exists(caregiver_username)
-        self._check_patient_not_deceased(patient_legacy_id)
-        relationships_with_target = self._check_has_relationship_with_target(caregiver_profile, patient_legacy_id)
-        self._check_has_valid_relationship(relationships_with_target)
+        access = get_caregiver_patient_access(caregiver_username, patient_legacy_id)
+
+        if not access.caregiver_exists:
+            raise exceptions.PermissionDenied('Caregiver not found.')
+
+        if access.patient_deceased:
+            raise exceptions.PermissionDenied('Patient has a date of death recorded')
+
+        if not access.has_relationship:
+            raise exceptions.PermissionDenied('Caregiver does not have a relationship with the patient.')
+
+        if not access.has_confirmed_relationship:
+            raise exceptions.PermissionDenied(
+                "Caregiver has a relationship with the patient, but its status is not CONFIRMED ('CON')."
+            )
+
+        if self.require_self_relationship and not access.has_self_relationship:
+            raise exceptions.PermissionDenied(
+                'Caregiver has a confirmed relationship with the patient, but its role type is not SELF.'
+            )
 
         return True
 
@@ -231,137 +267,133 @@ class CaregiverPatientPermissions(permissions.BasePermission):
             )
         return patient_legacy_id
 
-    def _check_caregiver_exists(self, caregiver_username: str | None) -> CaregiverProfile:
-        """
-        Validate the existence of a CaregiverProfile matching the input caregiver username, and return it if found.
 
-        Args:
-            caregiver_username: The caregiver username used to search for a matching CaregiverProfile.
+class CaregiverSelfPermissions(CaregiverPatientPermissions):
+    """
+    Global permission check that validates the permission of a caregiver trying to access a patient's data.
 
-        Returns:
-            The CaregiverProfile.
+    Additionally, this check returns True only if the caregiver has a self relationshiptype role with the patient.
 
-        Raises:
-            PermissionDenied: If the caregiver is not found.
-        """
-        caregiver_profile = CaregiverProfile.objects.filter(user__username=caregiver_username).first()
-        if not caregiver_profile:
-            raise exceptions.PermissionDenied('Caregiver not found.')
-        return caregiver_profile
+    Requirements:
+        request.headers['Appuserid']: The caregiver's username.
+        legacy_id (from the view's kwargs): The patient's legacy ID.
+    """
 
-    def _check_has_relationship_with_target(
-        self,
-        caregiver_profile: CaregiverProfile,
-        patient_legacy_id: int,
-    ) -> QuerySet[Relationship]:
-        """
-        Validate the existence of one or more Relationships between a caregiver and a patient, and return them if found.
+    require_self_relationship = True
 
-        Args:
-            caregiver_profile: The caregiver profile used to search for Relationships.
-            patient_legacy_id: The patient legacy id representing the patient who should be part of the Relationship(s).
 
-        Returns:
-            The set of relationships between the caregiver and patient.
+@dataclass(frozen=True)
+class CaregiverPatientAccess:
+    """
+    The access of a caregiver to the data of a patient.
 
-        Raises:
-            PermissionDenied: If the caregiver has no relationships with the patient.
-        """
-        relationships_with_target = caregiver_profile.relationships.filter(
-            patient__legacy_id=patient_legacy_id,
-        )
-        if not relationships_with_target:
-            raise exceptions.PermissionDenied('Caregiver does not have a relationship with the patient.')
-        return relationships_with_target
+    - caregiver_exists: whether a caregiver profile exists for the caregiver's username
+    - patient_deceased: whether the patient has a date of death recorded
+    - has_relationship: whether the caregiver has any relationship with the patient
+    - has_confirmed_relationship: whether the caregiver has a CONFIRMED relationship with the patient
+    - has_self_relationship: whether the caregiver has a relationship with the patient with the SELF role type
+    """
 
-    def _check_patient_not_deceased(self, patient_legacy_id: int) -> None:
-        """
-        Validate that the patient is not deceased.
+    caregiver_exists: bool
+    patient_deceased: bool
+    has_relationship: bool
+    has_confirmed_relationship: bool
+    has_self_relationship: bool
 
-        Args:
-            patient_legacy_id: the patient's legacy_id whose data is requested access for
 
-        Raises:
-            PermissionDenied: if the patient is deceased
-        """
-        patient = Patient.objects.filter(legacy_id=patient_legacy_id).first()
+def get_caregiver_patient_access(caregiver_username: str, patient_legacy_id: int) -> CaregiverPatientAccess:
+    """
+    Return the access of a caregiver to the data of a patient.
 
-        if patient and patient.date_of_death is not None:
-            raise exceptions.PermissionDenied('Patient has a date of death recorded')
+    The access is determined with a single query and cached for `PERMISSIONS_CACHE_TIMEOUT` seconds.
+    Saving or deleting a relationship, patient or caregiver profile invalidates the cached accesses
+    (see `clear_caregiver_permissions_cache`), but only in the process that made the change
+    since the cache is local to each process (e.g., each worker).
+    Changes that do not send these signals (e.g., bulk updates) do not invalidate the cached accesses either.
+    The timeout is therefore the actual bound on how long a revoked access is still granted and is kept short.
 
-    def _check_has_valid_relationship(self, relationships_with_target: QuerySet[Relationship]) -> None:
-        """
-        Validate whether at least one of the relationships between a patient and caregiver has a CONFIRMED status.
+    Args:
+        caregiver_username: the username of the caregiver
+        patient_legacy_id: the legacy ID of the patient
 
-        Return all such relationships from the list if found.
+    Returns:
+        the access of the caregiver to the patient's data
+    """
+    key = _get_access_key(caregiver_username, patient_legacy_id)
+    access: CaregiverPatientAccess | None = cache.get(key)
 
-        Args:
-            relationships_with_target: The list of relationships between the caregiver and patient to check.
+    if access is None:
+        access = _query_caregiver_patient_access(caregiver_username, patient_legacy_id)
+        cache.set(key, access, PERMISSIONS_CACHE_TIMEOUT)
 
-        Raises:
-            PermissionDenied: If none of the provided relationships have a confirmed status.
-        """
-        valid_relationships = relationships_with_target.filter(status=RelationshipStatus.CONFIRMED)
-        if not valid_relationships.exists():
-            raise exceptions.PermissionDenied(
-                "Caregiver has a relationship with the patient, but its status is not CONFIRMED ('CON')."
-            )
+    return access
 
 
-class CaregiverSelfPermissions(CaregiverPatientPermissions):
+def clear_caregiver_permissions_cache() -> None:
     """
-    Global permission check that validates the permission of a caregiver trying to access a patient's data.
-
-    Additionally, this check returns True only if the caregiver has a self relationshiptype role with the patient.
+    Invalidate all cached accesses of caregivers to the data of patients.
 
-    Requirements:
-        request.headers['Appuserid']: The caregiver's username.
-        legacy_id (from the view's kwargs): The patient's legacy ID.
+    Only the cached accesses of the current process are invalidated when the cache is local to each process.
+    The cached accesses of other processes expire after `PERMISSIONS_CACHE_TIMEOUT` seconds.
     """
+    # the cached accesses are keyed by the generation which is changed instead of deleting each of them
+    cache.add(PERMISSIONS_CACHE_GENERATION_KEY, 0, timeout=None)
+    cache.incr(PERMISSIONS_CACHE_GENERATION_KEY)
 
-    def has_permission(self, request: Request, view: APIView) -> bool:
-        """
-        Permission check that looks for a confirmed self relationship between a caregiver and a patient.
 
-        If found, the permission is granted, otherwise, it's rejected with a detailed message.
-        Requirements (input parameters) expected by this function are described in the class-level docstring above.
+def _query_caregiver_patient_access(caregiver_username: str, patient_legacy_id: int) -> CaregiverPatientAccess:
+    """
+    Determine the access of a caregiver to the data of a patient with a single query.
 
-        Args:
-            request: The http request to allow or deny.
-            view: The view through which the request was made.
+    Args:
+        caregiver_username: the username of the caregiver
+        patient_legacy_id: the legacy ID of the patient
 
-        Returns:
-            True if the caregiver has a confirmed relationship with the patient.
-        """
-        super().has_permission(request, view)
+    Returns:
+        the access of the caregiver to the patient's data
+    """
+    relationships_with_target = Relationship.objects.filter(
+        caregiver=OuterRef('pk'),
+        patient__legacy_id=patient_legacy_id,
+    )
+    access = (
+        CaregiverProfile.objects
+        .filter(user__username=caregiver_username)
+        .annotate(
+            patient_deceased=Exists(Patient.objects.filter(legacy_id=patient_legacy_id, date_of_death__isnull=False)),
+            has_relationship=Exists(relationships_with_target),
+            has_confirmed_relationship=Exists(relationships_with_target.filter(status=RelationshipStatus.CONFIRMED)),
+            has_self_relationship=Exists(relationships_with_target.filter(type__role_type=RoleType.SELF)),
+        )
+        .values('patient_deceased', 'has_relationship', 'has_confirmed_relationship', 'has_self_relationship')
+        .first()
+    )
+
+    if access is None:
+        return CaregiverPatientAccess(
+            caregiver_exists=False,
+            patient_deceased=False,
+            has_relationship=False,
+            has_confirmed_relationship=False,
+            has_self_relationship=False,
+        )
 
-        # TODO: redoing this adds extra queries.
-        # Future improvement: add an attribute `require_self_relationship` to the first class which is False by default
-        # this permission sets it to true, everything else is done in the main permission
-        # Read and validate the input parameters
-        caregiver_username = self._get_caregiver_username(request)
-        patient_legacy_id = self._get_patient_legacy_id(view)
+    return CaregiverPatientAccess(caregiver_exists=True, **access)
 
-        # Perform the permission checks
-        caregiver_profile = self._check_caregiver_exists(caregiver_username)
-        relationships_with_target = self._check_has_relationship_with_target(caregiver_profile, patient_legacy_id)
-        self._check_has_valid_relationship(relationships_with_target)  # Has confirmed relationships
-        self._check_has_self_relationship_type(relationships_with_target)  # Has confirmed, SELF relationship(s)
 
-        return True
+def _get_access_key(caregiver_username: str, patient_legacy_id: int) -> str:
+    """
+    Build the cache key of the access of a caregiver to the data of a patient.
 
-    def _check_has_self_relationship_type(self, relationships_with_target: QuerySet[Relationship]) -> None:
-        """
-        Validate whether at least one of the relationships between a patient and caregiver has a SELF role type.
+    Args:
+        caregiver_username: the username of the caregiver
+        patient_legacy_id: the legacy ID of the patient
 
-        Args:
-            relationships_with_target: The list of relationships between the caregiver and patient to check.
+    Returns:
+        the cache key of the access for the current generation of cached accesses
+    """
+    generation = cache.get_or_set(PERMISSIONS_CACHE_GENERATION_KEY, 0, timeout=None)
+    # the username is hashed since cache keys are restricted to certain characters and lengths
+    digest = hashlib.sha256(caregiver_username.encode()).hexdigest()
 
-        Raises:
-            PermissionDenied: If none of the provided relationships have a SELF status.
-        """
-        valid_relationships = [rel for rel in relationships_with_target if rel.type.role_type == RoleType.SELF]
-        if not valid_relationships:
-            raise exceptions.PermissionDenied(
-                'Caregiver has a confirmed relationship with the patient, but its role type is not SELF.'
-            )
+    return f'{PERMISSIONS_CACHE_PREFIX}:{generation}:{patient_legacy_id}:{digest}'
@@ -6,11 +6,17 @@
 
 from typing import TYPE_CHECKING, Any
 
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 import structlog
 from django_structlog import signals
 
+from opal.caregivers.models import CaregiverProfile
+from opal.patients.models import Patient, Relationship
+
+from .drf_permissions import clear_caregiver_permissions_cache
+
 if TYPE_CHECKING:
     import logging
 
@@ -29,3 +35,19 @@ def bind_app_user(request: HttpRequest, logger: logging.Logger, **kwargs: Any) -
     """
     if 'Appuserid' in request.headers:
         structlog.contextvars.bind_contextvars(app_user=request.headers.get('Appuserid'))
+
+
+@receiver(signal=post_save, sender=Relationship)
+@receiver(signal=post_delete, sender=Relationship)
+@receiver(signal=post_save, sender=Patient)
+@receiver(signal=post_delete, sender=Patient)
+@receiver(signal=post_save, sender=CaregiverProfile)
+@receiver(signal=post_delete, sender=CaregiverProfile)
+def caregiver_patient_access_changed(**kwargs: Any) -> None:
+    """
+    Invalidate the cached accesses of caregivers to the data of patients when the data they depend on changes.
+
+    Args:
+        kwargs: additional keyword arguments of the signal
+    """
+    clear_caregiver_permissions_cache()
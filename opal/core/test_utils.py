@@ -72,6 +72,31 @@ class RequestMockerTest:
 
         return mock_post
 
+    @classmethod
+    def mock_requests_session_post(
+        cls,
+        mocker: MockerFixture,
+        response_data: dict[str, Any],
+    ) -> MockType:
+        """
+        Mock an HTTP POST call to a web service made via a `requests.Session`.
+
+        Args:
+            mocker: object that provides the same interface to functions in the mock module
+            response_data: generated mock response data
+
+        Returns:
+            object that mocks HTTP post request of a session to the web service
+        """
+        mock_post = mocker.patch('requests.Session.post')
+        response = requests.Response()
+        response.status_code = HTTPStatus.OK
+
+        response._content = json.dumps(response_data).encode()  # noqa: SLF001
+        mock_post.return_value = response
+
+        return mock_post
+
     @classmethod
     def mock_requests_get(
         cls,
@@ -5,6 +5,7 @@
 from typing import TYPE_CHECKING, Any
 
 from django.contrib.auth.models import Group
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.http import HttpRequest
 from django.test import RequestFactory
@@ -24,7 +25,9 @@ from opal.users.models import User
 from .. import drf_permissions
 
 if TYPE_CHECKING:
+    from pytest_django import DjangoAssertNumQueries
     from pytest_django.fixtures import SettingsWrapper
+    from pytest_mock import MockerFixture
 
 pytestmark = pytest.mark.django_db(databases=['default'])
 
@@ -196,6 +199,129 @@ class TestCaregiverSelfPermissions:
         self.view = APIView()
 
 
+class TestCaregiverPatientAccess:
+    """Class wrapper for the tests of determining and caching the access of caregivers to patients."""
+
+    @pytest.fixture(autouse=True)
+    def _before_each(self) -> None:
+        """Clear the cached accesses before each test."""
+        cache.clear()
+
+    def test_single_query(self, django_assert_num_queries: DjangoAssertNumQueries) -> None:
+        """Ensure the access is determined with a single query and then cached."""
+        relationship = patient_factories.Relationship.create(
+            status=RelationshipStatus.CONFIRMED,
+            type=RelationshipType.objects.self_type(),
+        )
+        username = relationship.caregiver.user.username
+        legacy_id = relationship.patient.legacy_id
+
+        with django_assert_num_queries(1):
+            access = drf_permissions.get_caregiver_patient_access(username, legacy_id)
+
+        assert access == drf_permissions.CaregiverPatientAccess(
+            caregiver_exists=True,
+            patient_deceased=False,
+            has_relationship=True,
+            has_confirmed_relationship=True,
+            has_self_relationship=True,
+        )
+
+        with django_assert_num_queries(0):
+            assert drf_permissions.get_caregiver_patient_access(username, legacy_id) == access
+
+    def test_cached_access_expires(self, mocker: MockerFixture) -> None:
+        """Ensure the access is only cached for a short time so that other processes pick up revoked accesses."""
+        mock_cache = mocker.patch('opal.core.drf_permissions.cache')
+        mock_cache.get.return_value = None
+        mock_cache.get_or_set.return_value = 0
+        relationship = patient_factories.Relationship.create(status=RelationshipStatus.CONFIRMED)
+        username = relationship.caregiver.user.username
+        legacy_id = relationship.patient.legacy_id
+
+        access = drf_permissions.get_caregiver_patient_access(username, legacy_id)
+
+        mock_cache.set.assert_called_once_with(
+            drf_permissions._get_access_key(username, legacy_id),
+            access,
+            drf_permissions.PERMISSIONS_CACHE_TIMEOUT,
+        )
+
+    def test_caregiver_not_found(self) -> None:
+        """Ensure the access of an unknown caregiver is denied."""
+        patient = patient_factories.Patient.create()
+
+        access = drf_permissions.get_caregiver_patient_access('wrong_username', patient.legacy_id)
+
+        assert not access.caregiver_exists
+        assert not access.has_relationship
+
+    def test_other_patient(self) -> None:
+        """Ensure relationships with other patients do not grant access."""
+        relationship = patient_factories.Relationship.create(status=RelationshipStatus.CONFIRMED)
+        other_patient = patient_factories.Patient.create(ramq='SIMM86600199')
+
+        access = drf_permissions.get_caregiver_patient_access(
+            relationship.caregiver.user.username,
+            other_patient.legacy_id,
+        )
+
+        assert access.caregiver_exists
+        assert not access.has_relationship
+
+    def test_relationship_changed(self) -> None:
+        """Ensure a cached access is invalidated when the relationship is changed or deleted."""
+        relationship = patient_factories.Relationship.create(status=RelationshipStatus.PENDING)
+        username = relationship.caregiver.user.username
+        legacy_id = relationship.patient.legacy_id
+        assert not drf_permissions.get_caregiver_patient_access(username, legacy_id).has_confirmed_relationship
+
+        relationship.status = RelationshipStatus.CONFIRMED
+        relationship.save()
+        assert drf_permissions.get_caregiver_patient_access(username, legacy_id).has_confirmed_relationship
+
+        relationship.delete()
+        assert not drf_permissions.get_caregiver_patient_access(username, legacy_id).has_relationship
+
+    def test_patient_changed(self) -> None:
+        """Ensure a cached access is invalidated when the patient is changed."""
+        relationship = patient_factories.Relationship.create(status=RelationshipStatus.CONFIRMED)
+        username = relationship.caregiver.user.username
+        patient = relationship.patient
+        assert not drf_permissions.get_caregiver_patient_access(username, patient.legacy_id).patient_deceased
+
+        patient.date_of_death = timezone.now()
+        patient.save()
+
+        assert drf_permissions.get_caregiver_patient_access(username, patient.legacy_id).patient_deceased
+
+    def test_caregiver_profile_deleted(self) -> None:
+        """Ensure a cached access is invalidated when the caregiver profile is deleted."""
+        relationship = patient_factories.Relationship.create(status=RelationshipStatus.CONFIRMED)
+        username = relationship.caregiver.user.username
+        legacy_id = relationship.patient.legacy_id
+        assert drf_permissions.get_caregiver_patient_access(username, legacy_id).caregiver_exists
+
+        relationship.caregiver.delete()
+
+        assert not drf_permissions.get_caregiver_patient_access(username, legacy_id).caregiver_exists
+
+    def test_permissions_share_cached_access(self, django_assert_num_queries: DjangoAssertNumQueries) -> None:
+        """Ensure both caregiver permissions use the same cached access."""
+        relationship = patient_factories.Relationship.create(
+            status=RelationshipStatus.CONFIRMED,
+            type=RelationshipType.objects.self_type(),
+        )
+        request = HttpRequest()
+        request.META['HTTP_Appuserid'] = relationship.caregiver.user.username
+        view = APIView()
+        view.kwargs = {'legacy_id': relationship.patient.legacy_id}
+
+        with django_assert_num_queries(1):
+            assert drf_permissions.CaregiverPatientPermissions().has_permission(Request(request), view)
+            assert drf_permissions.CaregiverSelfPermissions().has_permission(Request(request), view)
+
+
 class _ModelView(generics.ListAPIView[User]):
     model = User
     queryset = User.objects.none()
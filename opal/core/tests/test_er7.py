@@ -0,0 +1,136 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+from typing import Any
+
+import pytest
+from hl7apy.parser import parse_message
+
+from opal.core.drf_parsers.er7 import ER7Message, ER7Segment, UnsupportedER7Error
+
+MSH = 'MSH|^~\\&|RxTFC|RVH|rcv|RVH|20231206131640||RDE^O01|RDE-199247252|P|2.3.1\r'
+
+
+def _get_segments(segment: str) -> tuple[ER7Segment, Any]:
+    """
+    Tokenize a segment and parse it with hl7apy.
+
+    Args:
+        segment: the ER7-encoded segment
+
+    Returns:
+        the tokenized segment and the segment parsed by hl7apy
+    """
+    message = MSH + segment
+    tokenized = list(ER7Message(message).segments)
+    parsed = parse_message(message, find_groups=False).children
+
+    assert [segment.name for segment in tokenized] == [segment.name for segment in parsed]
+
+    return tokenized[1], parsed[1]
+
+
+@pytest.mark.parametrize(
+    ('path', 'expected'),
+    [
+        # composite field, trailing components are omitted
+        ('pid_5', 'SIMPSON^MARGE'),
+        ('pid_5.pid_5_2', 'MARGE'),
+        # blank components are omitted
+        ('pid_11', '742 EVERGREEN^^SPRINGFIELD'),
+        ('pid_11.pid_11_2', ''),
+        # lone escape characters are escaped, escape sequences are kept
+        ('pid_13.pid_13_1', 'a\\E\\.br\\E\\b\\F\\c'),
+        # the first repetition is used
+        ('pid_3.pid_3_1', '1111111'),
+        # missing fields are empty
+        ('pid_30.pid_30_1', ''),
+    ],
+)
+def test_to_er7_same_as_hl7apy(path: str, expected: str) -> None:
+    """Ensure the ER7 representation of elements is the same as hl7apy's."""
+    tokenized: Any
+    tokenized, parsed = _get_segments(
+        'PID|1||1111111^^^MGH~2222222^^^MCH||SIMPSON^MARGE^^^||||||742 EVERGREEN^ ^SPRINGFIELD||a\\.br\\b\\F\\c',
+    )
+
+    for name in path.split('.'):
+        tokenized = getattr(tokenized, name)
+        parsed = getattr(parsed, name)
+
+    assert tokenized.to_er7() == expected
+    assert parsed.to_er7() == expected
+
+
+def test_to_er7_numeric() -> None:
+    """Ensure numeric values are normalized like hl7apy does."""
+    tokenized, parsed = _get_segments('RXE|1^&mg^Q1H|DIN^Text|.17|000.00|mg|||||||0010')
+
+    assert tokenized.rxe_3.rxe_3_1.to_er7() == parsed.rxe_3.rxe_3_1.to_er7() == '0.17'
+    assert tokenized.rxe_4.rxe_4_1.to_er7() == parsed.rxe_4.rxe_4_1.to_er7() == '0.00'
+    assert tokenized.rxe_12.rxe_12_1.to_er7() == parsed.rxe_12.rxe_12_1.to_er7() == '10'
+    # the subcomponent of a component (the units of the quantity)
+    assert tokenized.rxe_1.rxe_1_2_2.to_er7() == parsed.rxe_1.rxe_1_2_2.to_er7() == 'mg'
+
+
+def test_repetitions() -> None:
+    """Ensure iterating over a field yields its repetitions."""
+    tokenized, parsed = _get_segments('PID|1||1111111^^^MGH~ ~~2222222^^^MCH|')
+
+    expected = [('1111111', 'MGH'), ('', ''), ('', ''), ('2222222', 'MCH')]
+    assert [(mrn.pid_3_1.to_er7(), mrn.pid_3_4.to_er7()) for mrn in tokenized.pid_3] == expected
+    assert [(mrn.pid_3_1.to_er7(), mrn.pid_3_4.to_er7()) for mrn in parsed.pid_3] == expected
+    assert not list(tokenized.pid_4)
+
+
+def test_fields_only_split_when_accessed() -> None:
+    """Ensure only the segment name is determined until a field is accessed."""
+    segment = next(segment for segment in ER7Message(MSH + 'PID|1||1111111^^^MGH').segments if segment.name == 'PID')
+
+    assert segment._fields is None
+    assert segment.pid_3.pid_3_4.to_er7() == 'MGH'
+    assert segment._fields == ['1', '', '1111111^^^MGH']
+
+
+@pytest.mark.parametrize(
+    ('segment', 'path'),
+    [
+        # hl7apy ignores the datatype of a field of a base datatype containing components or subcomponents
+        ('PID|1|||||||F^X', 'pid_8'),
+        ('PID|1|||||||F&X', 'pid_8'),
+        # more components than defined by the datatype
+        ('PID|1||||A^B^C^D^E^F^G^H^I^J', 'pid_5'),
+        # children of a base datatype
+        ('PID|1|||||||F', 'pid_8.pid_8_2'),
+        # elements of another segment or field
+        ('PID|1', 'pv1_3'),
+        ('PID|1', 'pid_5.pid_6_1'),
+    ],
+)
+def test_unsupported(segment: str, path: str) -> None:
+    """Ensure elements that hl7apy represents differently are not supported."""
+    tokenized: Any
+    tokenized, _ = _get_segments(segment)
+
+    with pytest.raises(UnsupportedER7Error):  # noqa: PT012
+        for name in path.split('.'):
+            tokenized = getattr(tokenized, name)
+
+        tokenized.to_er7()
+
+
+def test_unsupported_msh_fields() -> None:
+    """Ensure the fields of the MSH segment are not supported."""
+    msh = next(ER7Message(MSH).segments)
+
+    with pytest.raises(UnsupportedER7Error):
+        msh.msh_9  # noqa: B018
+
+
+def test_not_an_element() -> None:
+    """Ensure attributes that are not element names raise an AttributeError."""
+    tokenized, _ = _get_segments('PID|1')
+
+    assert not hasattr(tokenized, 'first_name')
+    assert not hasattr(tokenized.pid_5, '__deepcopy__')
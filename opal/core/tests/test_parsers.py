@@ -6,12 +6,16 @@ import re
 from collections import defaultdict
 from io import BytesIO, StringIO
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import pytest
 from rest_framework import exceptions
 
-from opal.core.drf_parsers.hl7_parser import HL7Parser
+from opal.core.drf_parsers import hl7_parser
+from opal.core.drf_parsers.hl7_parser import HL7BatchParser, HL7Parser, get_message_control_id, split_hl7_batch
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
 
 pytestmark = pytest.mark.django_db(databases=['default'])
 FIXTURES_DIR = Path(__file__).resolve().parent.joinpath('fixtures')
@@ -263,6 +267,30 @@ class TestHL7Parser:
             "There should be two line breaks in marge's RXE provider_administration_instruction"
         )
 
+    @pytest.mark.parametrize('filename', sorted(path.name for path in FIXTURES_DIR.glob('*.hl7v2')))
+    def test_er7_tokenizer_same_as_hl7apy(self, filename: str, mocker: MockerFixture) -> None:
+        """Ensure the ER7 tokenizer returns the same data as hl7apy without parsing the message with hl7apy."""
+        spy_parse_message = mocker.spy(hl7_parser, 'parse_message')
+        hl7apy_parser = HL7Parser()
+        hl7apy_parser.use_er7_tokenizer = False
+
+        parsed_data = self.parser.parse(self._load_hl7_fixture(filename))
+
+        spy_parse_message.assert_not_called()
+        assert parsed_data == hl7apy_parser.parse(self._load_hl7_fixture(filename))
+
+    def test_er7_tokenizer_unsupported_message(self, mocker: MockerFixture) -> None:
+        """Ensure a message that the ER7 tokenizer does not support is parsed with hl7apy."""
+        spy_parse_message = mocker.spy(hl7_parser, 'parse_message')
+        stream = self._load_hl7_fixture('marge_PID.hl7v2')
+        # hl7apy ignores the datatype (IS) of a field containing subcomponents
+        stream = BytesIO(stream.read().replace(b'|F|||', b'|F&X|||'))
+
+        parsed_data = self.parser.parse(stream)
+
+        spy_parse_message.assert_called_once()
+        assert parsed_data['PID']['sex'] == 'F&X'
+
     def _assert_segment_data(
         self,
         segment_data: defaultdict[Any, list[dict[str, Any]]],
@@ -290,3 +318,92 @@ class TestHL7Parser:
         """
         with (FIXTURES_DIR / filename).open('rb') as file:
             return BytesIO(file.read())
+
+
+class TestHL7BatchParser:
+    """Class wrapper for HL7BatchParser tests."""
+
+    @pytest.fixture(autouse=True)
+    def _before_each(self) -> None:
+        """Fixture for creating an HL7BatchParser instance."""
+        self.parser = HL7BatchParser()
+
+    def test_parse_wrapped_batch(self) -> None:
+        """Ensure the messages of a batch wrapped in file and batch header and trailer segments are parsed."""
+        marge = _read_hl7_fixture('marge_pharmacy.hl7v2')
+        homer = _read_hl7_fixture('homer_pharmacy.hl7v2')
+        batch = f'FHS|^~\\&|RxTFC|RVH\nBHS|^~\\&|RxTFC|RVH\n{marge}\n{homer}\nBTS|2\nFTS|1\n'
+
+        parsed_messages = self.parser.parse(BytesIO(batch.encode()))
+
+        assert [message['control_id'] for message in parsed_messages] == ['RDE-199247252', 'RDE-199247237']
+        assert parsed_messages[0]['data'] == HL7Parser().parse(BytesIO(marge.encode()))
+        assert parsed_messages[1]['data'] == HL7Parser().parse(BytesIO(homer.encode()))
+
+    def test_parse_newline_delimited_batch(self) -> None:
+        """Ensure the messages of a batch separated by empty lines are parsed with the segments of the context."""
+        marge = _read_hl7_fixture('marge_pharmacy.hl7v2')
+        batch = f'{marge}\r\n\r\n{marge}\r\n'
+
+        parsed_messages = self.parser.parse(
+            BytesIO(batch.encode()),
+            parser_context={'segments_to_parse': ['PID']},
+        )
+
+        assert len(parsed_messages) == 2
+        for message in parsed_messages:
+            assert list(message['data']) == ['PID']
+            assert message['data']['PID']['first_name'] == 'MARGE'
+
+    def test_parse_invalid_message(self) -> None:
+        """Ensure an invalid message is reported without preventing the other messages from being parsed."""
+        marge = _read_hl7_fixture('marge_pharmacy.hl7v2')
+        batch = f'MSH|^~\\&|RxTFC|RVH|rcv|RVH|20231206131640||RDE^O01|RDE-1|P|9.9\n{marge}'
+
+        parsed_messages = self.parser.parse(BytesIO(batch.encode()))
+
+        assert len(parsed_messages) == 2
+        assert parsed_messages[0]['control_id'] == 'RDE-1'
+        assert parsed_messages[0]['error'].startswith('Error parsing HL7 message:')
+        assert 'data' not in parsed_messages[0]
+        assert parsed_messages[1]['data']['PID']['first_name'] == 'MARGE'
+
+    def test_parse_wrong_stream_type(self) -> None:
+        """Ensure the batch parser raises the same error as the HL7Parser for the wrong stream type."""
+        with pytest.raises(exceptions.ParseError, match='Error decoding HL7 message'):
+            self.parser.parse(StringIO(_read_hl7_fixture('marge_pharmacy.hl7v2')))
+
+    def test_split_hl7_batch(self) -> None:
+        """Ensure a batch is split into its messages without the batch segments and empty lines."""
+        batch = 'FHS|^~\\&\rBHS|^~\\&\rMSH|^~\\&|1\rPID|1\r\r  \rMSH|^~\\&|2\rBTS|2\rFTS|1\r'
+
+        assert split_hl7_batch(batch) == ['MSH|^~\\&|1\rPID|1', 'MSH|^~\\&|2']
+        assert not split_hl7_batch('FHS|^~\\&\rFTS|0\r')
+
+    def test_split_hl7_batch_segment_outside_message(self) -> None:
+        """Ensure a segment before the first message is rejected."""
+        with pytest.raises(exceptions.ParseError, match='PID segment outside of a message'):
+            split_hl7_batch('BHS|^~\\&\rPID|1\rMSH|^~\\&|1')
+
+    @pytest.mark.parametrize(
+        ('msh', 'control_id'),
+        [
+            ('MSH|^~\\&|RxTFC|RVH|rcv|RVH|20231206131640||RDE^O01|RDE-199247252|P|2.3', 'RDE-199247252'),
+            ('MSH#^~\\&#RxTFC#RVH#rcv#RVH#20231206131640##RDE^O01#RDE-1#P#2.3', 'RDE-1'),
+            ('MSH|^~\\&|RxTFC', ''),
+            ('MSH', ''),
+        ],
+    )
+    def test_get_message_control_id(self, msh: str, control_id: str) -> None:
+        """Ensure the control ID is taken from MSH-10 using the field separator of the message."""
+        assert get_message_control_id(f'{msh}\rPID|1') == control_id
+
+
+def _read_hl7_fixture(filename: str) -> str:
+    """
+    Read a HL7 fixture as a string.
+
+    Returns:
+        the fixture data
+    """
+    return (FIXTURES_DIR / filename).read_text().strip()
@@ -5,7 +5,7 @@
 import datetime as dt
 import io
 import zipfile
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from django.utils import timezone
 from django.utils.text import Truncator
@@ -14,6 +14,9 @@ from openpyxl import load_workbook
 
 from .. import utils
 
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
 # Sample file contents
 file_contents = {
     'file1.txt': b'Hello, this is file 1.',
@@ -485,3 +488,93 @@ def test_dict_to_xlsx_tzinfo_removed() -> None:
     dt_value_second_row = sheet_no_tz.cell(row=2, column=1).value
     assert isinstance(dt_value_second_row, dt.datetime), 'Cell should contain a datetime object'
     assert dt_value_second_row.tzinfo is None, 'tzinfo should be None since it was naive already'
+
+
+def test_iter_csv_matches_dict_to_csv() -> None:
+    """Ensure iter_csv streams the same CSV content as dict_to_csv."""
+    input_list: list[dict[str, Any]] = [
+        {'name': 'Alice', 'age': 30, 'city': 'New York'},
+        {'name': 'Bob', 'age': None, 'city': 'value "with quotes"'},
+    ]
+
+    assert b''.join(utils.iter_csv(input_list)) == utils.dict_to_csv(input_list)
+
+
+def test_iter_csv_empty() -> None:
+    """Ensure iter_csv streams a CSV with an empty header for no rows."""
+    assert b''.join(utils.iter_csv([])) == b'\r\n'
+
+
+def test_iter_csv_consumes_rows_lazily() -> None:
+    """Ensure iter_csv consumes the rows in chunks rather than all at once."""
+    consumed_rows = 0
+
+    def rows() -> Iterator[dict[str, Any]]:
+        nonlocal consumed_rows
+        for index in range(100_000):
+            consumed_rows += 1
+            yield {'index': index, 'value': 'x' * 10}
+
+    chunks = utils.iter_csv(rows())
+    first_chunk = next(chunks)
+
+    assert len(first_chunk) >= utils.STREAMING_CHUNK_SIZE
+    assert consumed_rows < 100_000
+
+
+def test_iter_zip_contains_files_contents() -> None:
+    """Ensure iter_zip streams a ZIP file with all file contents."""
+    files = ((filename, iter([content[:5], content[5:]])) for filename, content in file_contents.items())
+
+    zip_bytes = b''.join(utils.iter_zip(files))
+
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_file:
+        assert zip_file.testzip() is None
+        assert set(zip_file.namelist()) == set(file_contents)
+        for filename, content in file_contents.items():
+            assert zip_file.read(filename) == content
+
+
+def test_iter_zip_empty() -> None:
+    """Ensure iter_zip creates a valid ZIP file without files."""
+    zip_bytes = b''.join(utils.iter_zip([]))
+
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_file:
+        assert not zip_file.namelist()
+
+
+def test_iter_xlsx_multiple_sheets() -> None:
+    """Ensure iter_xlsx streams a workbook with the sheets, headers and rows in write-only mode."""
+    sheets = [
+        ('Employees', iter([{'Name': 'Alice', 'Age': 30}, {'Name': 'Bob', 'Age': 35}])),
+        ('Empty', iter([])),
+        ('Sheet/With:Forbidden*Characters', iter([{'Product': 'Widget'}])),
+    ]
+
+    xlsx_bytes = b''.join(utils.iter_xlsx(sheets))
+
+    workbook = load_workbook(io.BytesIO(xlsx_bytes))
+    assert workbook.sheetnames == ['Employees', 'Empty', 'SheetWithForbiddenCharacters']
+    rows = [[cell.value for cell in row] for row in workbook['Employees'].iter_rows()]
+    assert rows == [['Name', 'Age'], ['Alice', 30], ['Bob', 35]]
+    assert workbook['Empty'].max_row <= 1
+
+
+def test_iter_xlsx_empty_workbook() -> None:
+    """Ensure iter_xlsx creates a workbook with one sheet for no data."""
+    xlsx_bytes = b''.join(utils.iter_xlsx([]))
+
+    workbook = load_workbook(io.BytesIO(xlsx_bytes))
+    assert len(workbook.sheetnames) == 1
+
+
+def test_iter_xlsx_tzinfo_removed() -> None:
+    """Ensure iter_xlsx converts timezone-aware datetimes to naive UTC datetimes."""
+    xlsx_bytes = b''.join(utils.iter_xlsx(workbook_data_with_tz.items()))
+
+    workbook = load_workbook(io.BytesIO(xlsx_bytes))
+    value = workbook['SheetWithTZ'].cell(row=3, column=1).value
+    assert isinstance(value, dt.datetime)
+    assert value.tzinfo is None
+    # 13:30 at UTC-5 is converted to 18:30 UTC
+    assert value.hour == 18
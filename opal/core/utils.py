@@ -11,9 +11,11 @@ import random
 import re
 import secrets
 import string
+import tempfile
 import uuid
 import zipfile
-from collections.abc import Mapping, Sequence
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from itertools import chain
 from typing import TYPE_CHECKING, Any
 
 from django.utils.text import Truncator
@@ -29,9 +31,12 @@ if TYPE_CHECKING:
 RowData = Mapping[str, Any]
 SheetData = Sequence[RowData]
 WorkbookData = Mapping[str, SheetData]
+StreamingSheetData = Iterable[RowData]
 
 FORBIDDEN_CHARACTERS = r'[\/\\\?\*\:\[\]]'
 SHEET_TITLE_MAX_LENGTH = 31
+#: Size (in bytes) of the chunks of streamed files
+STREAMING_CHUNK_SIZE = 64 * 1024
 
 
 def generate_random_number(length: int) -> str:
@@ -198,10 +203,7 @@ def _add_sheet_to_workbook(workbook: Workbook, sheet_name: str, rows: SheetData)
         sheet_name: the name of the sheet.
         rows: the data rows to add to the sheet.
     """
-    sheet_name = re.sub(FORBIDDEN_CHARACTERS, '', sheet_name)
-    truncator = Truncator(sheet_name)
-    sheet_name = truncator.chars(num=SHEET_TITLE_MAX_LENGTH)
-    worksheet = workbook.create_sheet(title=sheet_name)
+    worksheet = workbook.create_sheet(title=_get_sheet_title(sheet_name))
     # If sheet data is empty, continue to next sheet
     if not rows:
         return
@@ -223,11 +225,218 @@ def _add_rows_to_worksheet(worksheet: Worksheet, rows: SheetData) -> None:
     worksheet.append(headers)
 
     for row_data in rows:
-        converted_row: list[Any] = []
-        for header in headers:
-            value = row_data.get(header, '')
-            # Convert any tz-aware datetime to naive UTC so Excel handles it properly
-            if isinstance(value, dt.datetime) and value.tzinfo is not None:
-                value = value.astimezone(dt.UTC).replace(tzinfo=None)
-            converted_row.append(value)
-        worksheet.append(converted_row)
+        worksheet.append(_convert_xlsx_row(row_data, headers))
+
+
+def _get_sheet_title(sheet_name: str) -> str:
+    """
+    Return a valid worksheet title for the given sheet name.
+
+    The forbidden symbols are removed and the title is truncated to 31 characters.
+
+    Args:
+        sheet_name: the name of the sheet
+
+    Returns:
+        the worksheet title
+    """
+    sheet_name = re.sub(FORBIDDEN_CHARACTERS, '', sheet_name)
+    truncator = Truncator(sheet_name)
+    return truncator.chars(num=SHEET_TITLE_MAX_LENGTH)
+
+
+def _convert_xlsx_row(row_data: RowData, headers: list[str]) -> list[Any]:
+    """
+    Convert a data row to the list of cell values of a worksheet row.
+
+    All datetime objects are converted to UTC and made naive (tzinfo=None) to ensure Excel handles them properly.
+
+    Args:
+        row_data: the data row
+        headers: the headers of the worksheet
+
+    Returns:
+        the cell values in the order of the headers
+    """
+    converted_row: list[Any] = []
+    for header in headers:
+        value = row_data.get(header, '')
+        # Convert any tz-aware datetime to naive UTC so Excel handles it properly
+        if isinstance(value, dt.datetime) and value.tzinfo is not None:
+            value = value.astimezone(dt.UTC).replace(tzinfo=None)
+        converted_row.append(value)
+    return converted_row
+
+
+def iter_csv(rows: StreamingSheetData) -> Iterator[bytes]:
+    """
+    Convert dictionaries to a CSV in byte format one chunk at a time.
+
+    The rows are consumed lazily, i.e., only one chunk of the CSV is kept in memory at a time.
+    As for `dict_to_csv`, the CSV header is determined by the keys of the first dictionary.
+
+    Args:
+        rows: iterable of dictionaries with string keys and values of any type
+
+    Yields:
+        chunks of the CSV data
+    """
+    rows_iterator = iter(rows)
+    first_row = next(rows_iterator, None)
+    headers = list(first_row.keys()) if first_row is not None else []
+    writer = csv.DictWriter(_EchoBuffer(), fieldnames=headers, extrasaction='ignore')
+
+    lines = chain(
+        [writer.writeheader()],
+        (writer.writerow(row) for row in chain([first_row], rows_iterator) if row is not None),
+    )
+
+    yield from _chunk_bytes(line.encode() for line in lines)
+
+
+def iter_xlsx(sheets: Iterable[tuple[str, StreamingSheetData]]) -> Iterator[bytes]:
+    """
+    Create an XLSX file from sheets of dictionaries and return it one chunk at a time.
+
+    The workbook is written in the openpyxl write-only mode which writes the rows to temporary files
+    instead of keeping them in memory.
+    The rows are consumed lazily, one sheet after the other.
+
+    As for `dict_to_xlsx`, the sheet header is determined by the keys of the first dictionary of a sheet
+    and the sheet names are truncated and stripped of forbidden symbols.
+
+    Args:
+        sheets: pairs of sheet name and the dictionaries representing the rows of the sheet
+
+    Yields:
+        chunks of the XLSX file content
+    """
+    workbook = Workbook(write_only=True)
+
+    for sheet_name, rows in sheets:
+        worksheet = workbook.create_sheet(title=_get_sheet_title(sheet_name))
+        rows_iterator = iter(rows)
+        first_row = next(rows_iterator, None)
+
+        if first_row is None:
+            continue
+
+        headers = list(first_row.keys())
+        worksheet.append(headers)
+
+        for row_data in chain([first_row], rows_iterator):
+            worksheet.append(_convert_xlsx_row(row_data, headers))
+
+    # a workbook needs at least one sheet
+    if not workbook.worksheets:
+        workbook.create_sheet()
+
+    with tempfile.TemporaryFile() as output_file:
+        workbook.save(output_file)
+        output_file.seek(0)
+
+        while chunk := output_file.read(STREAMING_CHUNK_SIZE):
+            yield chunk
+
+
+def iter_zip(files: Iterable[tuple[str, Iterable[bytes]]]) -> Iterator[bytes]:
+    """
+    Create a ZIP file from files provided in chunks and return it one chunk at a time.
+
+    The content of every file is consumed lazily and compressed while the ZIP file is being streamed.
+
+    Args:
+        files: pairs of filename and the chunks of the file content
+
+    Yields:
+        chunks of the ZIP file
+    """
+    buffer = _StreamBuffer()
+
+    with zipfile.ZipFile(file=buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as zip_file:
+        for filename, file_chunks in files:
+            # the file size is not known in advance
+            with zip_file.open(filename, mode='w', force_zip64=True) as zip_entry:
+                for chunk in file_chunks:
+                    zip_entry.write(chunk)
+
+                    if buffer.size >= STREAMING_CHUNK_SIZE:
+                        yield buffer.consume()
+
+    yield buffer.consume()
+
+
+def _chunk_bytes(parts: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Combine small parts of bytes to chunks of about `STREAMING_CHUNK_SIZE` bytes.
+
+    Args:
+        parts: the parts of bytes
+
+    Yields:
+        the combined chunks
+    """
+    buffer = _StreamBuffer()
+
+    for part in parts:
+        buffer.write(part)
+
+        if buffer.size >= STREAMING_CHUNK_SIZE:
+            yield buffer.consume()
+
+    if buffer.size:
+        yield buffer.consume()
+
+
+class _EchoBuffer:
+    """Pseudo buffer that returns the written value instead of storing it (used to stream CSV rows)."""
+
+    def write(self, value: str) -> str:
+        """
+        Return the written value.
+
+        Args:
+            value: the value to write
+
+        Returns:
+            the given value
+        """
+        return value
+
+
+class _StreamBuffer:
+    """Write-only (non-seekable) file-like object keeping the written bytes until they are consumed."""
+
+    def __init__(self) -> None:
+        """Initialize the empty buffer."""
+        self._chunks: list[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        """
+        Store the written bytes.
+
+        Args:
+            data: the bytes to write
+
+        Returns:
+            the number of written bytes
+        """
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        """Do nothing since the written bytes are kept until they are consumed."""
+
+    def consume(self) -> bytes:
+        """
+        Return the bytes written since the last call and empty the buffer.
+
+        Returns:
+            the written bytes
+        """
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
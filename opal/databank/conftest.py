@@ -0,0 +1,124 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""This module is used to provide configuration, fixtures, and plugins for pytest within the databank app."""
+
+import contextlib
+import json
+import threading
+import time
+from collections import deque
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+
+class StubSourceSystem:
+    """
+    Local HTTP server standing in for the source system.
+
+    Every POST request is recorded and answered with the next queued response.
+    Once the queue is empty, requests are answered with `200 OK` and an empty JSON object.
+    """
+
+    def __init__(self) -> None:
+        """Start the server on a free local port."""
+        self.received: list[Any] = []
+        self.responses: deque[tuple[HTTPStatus, dict[str, Any], float]] = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._create_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        """
+        Return the base URL of the server.
+
+        Returns:
+            the base URL of the server
+        """
+        host, port = self._server.server_address[:2]
+        return f'http://{host!s}:{port}'
+
+    def add_response(self, status: HTTPStatus, data: dict[str, Any], delay: float = 0) -> None:
+        """
+        Queue a response.
+
+        Args:
+            status: the status code of the response
+            data: the JSON content of the response
+            delay: the number of seconds to wait before responding
+        """
+        self.responses.append((status, data, delay))
+
+    def stop(self) -> None:
+        """Stop the server."""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _next_response(self, body: bytes) -> tuple[HTTPStatus, dict[str, Any], float]:
+        """
+        Record a request and return the response to it.
+
+        Args:
+            body: the content of the request
+
+        Returns:
+            the status code, JSON content and delay of the response
+        """
+        with self._lock:
+            self.received.append(json.loads(body))
+            return self.responses.popleft() if self.responses else (HTTPStatus.OK, {}, 0)
+
+    def _create_handler(self) -> type[BaseHTTPRequestHandler]:
+        """
+        Create the request handler class of the server.
+
+        Returns:
+            the request handler class
+        """
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                status, data, delay = stub._next_response(body)
+                time.sleep(delay)
+                content = json.dumps(data).encode()
+
+                # the client might have given up waiting (timeout)
+                with contextlib.suppress(BrokenPipeError, ConnectionResetError):
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(content)))
+                    self.end_headers()
+                    self.wfile.write(content)
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                # keep the test output clean
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def stub_source_system() -> Generator[StubSourceSystem]:
+    """
+    Fixture providing a local HTTP server standing in for the source system.
+
+    Tests using this fixture need to allow connections to the local host (`@pytest.mark.allow_hosts(['127.0.0.1'])`).
+
+    Yields:
+        the running stub server
+    """
+    stub = StubSourceSystem()
+    yield stub
+    stub.stop()
@@ -0,0 +1,207 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""
+Module providing the dispatch of databank payloads to the source system.
+
+The payloads are sent concurrently over a pooled `requests.Session`.
+Requests failing with a server error (5xx), a connection error or a timeout are retried with an exponential backoff.
+The latency of every request (including its retries) is recorded.
+"""
+
+import json
+import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any, Self
+
+import requests
+import structlog
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from types import TracebackType
+
+    from requests.auth import HTTPBasicAuth
+
+LOGGER = structlog.get_logger()
+
+#: Response status codes of the source system for which a request is retried
+RETRY_STATUS_CODES = frozenset({
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+})
+
+type DatabankPayload = dict[str, Any]
+
+
+@dataclass(frozen=True)
+class DispatchResult:
+    """The outcome of sending one databank payload to the source system."""
+
+    payload: DatabankPayload
+    response: requests.Response | None
+    error: requests.RequestException | None
+    latency: float
+
+
+class DatabankDispatcher:
+    """
+    Send databank payloads to the source system concurrently over a pooled session.
+
+    The dispatcher should be used as a context manager so that the pooled connections are closed.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        url: str,
+        auth: HTTPBasicAuth,
+        timeout: float,
+        *,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+    ) -> None:
+        """
+        Initialize the pooled session.
+
+        Args:
+            url: the databank endpoint of the source system
+            auth: the credentials for the source system
+            timeout: maximum number of seconds to wait for a response per attempt
+            max_workers: maximum number of requests in flight at the same time
+            max_retries: maximum number of retries of a failing request
+            backoff_factor: factor of the exponential backoff between retries (in seconds)
+        """
+        self.url = url
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.latencies: list[float] = []
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            # POST requests are not retried by default since they are not idempotent
+            allowed_methods=frozenset({'POST'}),
+            # return the last response instead of raising an error once the retries are exhausted
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.auth = auth
+        self.session.headers.update({'Content-Type': 'application/json'})
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def __enter__(self) -> Self:
+        """
+        Enter the runtime context of the dispatcher.
+
+        Returns:
+            the dispatcher
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """
+        Close the pooled connections when leaving the runtime context.
+
+        Args:
+            exc_type: the type of the exception raised within the context, if any
+            exc_value: the exception raised within the context, if any
+            traceback: the traceback of the exception raised within the context, if any
+        """
+        self.session.close()
+
+    def send(self, payload: DatabankPayload) -> DispatchResult:
+        """
+        Send one payload to the source system.
+
+        Args:
+            payload: the databank data to send
+
+        Returns:
+            the response or the error of the request and its latency
+        """
+        response: requests.Response | None = None
+        error: requests.RequestException | None = None
+        start = time.perf_counter()
+
+        try:
+            response = self.session.post(
+                url=self.url,
+                data=json.dumps(payload, default=str),
+                timeout=self.timeout,
+            )
+        except requests.RequestException as exc:
+            error = exc
+
+        latency = time.perf_counter() - start
+        self.latencies.append(latency)
+        LOGGER.debug(
+            'Databank request completed in %.3f seconds with status %s',
+            latency,
+            response.status_code if response is not None else None,
+        )
+
+        return DispatchResult(payload=payload, response=response, error=error, latency=latency)
+
+    def dispatch(self, payloads: Iterable[DatabankPayload]) -> Iterator[DispatchResult]:
+        """
+        Send the payloads to the source system concurrently.
+
+        At most `max_workers` requests are in flight at the same time.
+        The payloads are consumed lazily, i.e., the next payload is only requested once a request slot is free.
+        The results are yielded in the order the requests complete.
+
+        Args:
+            payloads: the databank data to send
+
+        Yields:
+            the result of each request
+        """
+        payloads_iterator = iter(payloads)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight: set[Future[DispatchResult]] = set()
+
+            while True:
+                while len(in_flight) < self.max_workers and (payload := next(payloads_iterator, None)) is not None:
+                    in_flight.add(executor.submit(self.send, payload))
+
+                if not in_flight:
+                    break
+
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def get_latency_statistics(self) -> dict[str, float]:
+        """
+        Return statistics about the latency of the requests sent so far.
+
+        Returns:
+            the number of requests and their mean, median and maximum latency (in seconds)
+        """
+        if not self.latencies:
+            return {'count': 0, 'mean': 0.0, 'median': 0.0, 'max': 0.0}
+
+        return {
+            'count': len(self.latencies),
+            'mean': statistics.fmean(self.latencies),
+            'median': statistics.median(self.latencies),
+            'max': max(self.latencies),
+        }
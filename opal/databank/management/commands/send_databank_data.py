@@ -4,19 +4,20 @@
 
 """Command for sending data to the Databank."""
 
-import json
 from collections import defaultdict
 from http import HTTPStatus
+from itertools import batched
 from typing import TYPE_CHECKING, Any, cast
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
 from django.db.models import Model, QuerySet
 from django.utils import timezone
 
-import requests
 from requests.auth import HTTPBasicAuth
 
+from opal.databank.dispatch import DatabankDispatcher, DatabankPayload, DispatchResult
 from opal.databank.models import DatabankConsent, DataModuleType, SharedData
 from opal.legacy.managers import (
     DatabankAppointmentData,
@@ -28,6 +29,7 @@ from opal.legacy.models import LegacyAppointment, LegacyDiagnosis, LegacyPatient
 from opal.legacy_questionnaires.models import LegacyAnswerQuestionnaire
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping, Sequence
     from datetime import datetime
 
 type CombinedModuleData = list[dict[str, Any]]
@@ -37,9 +39,16 @@ type DatabankQuerySet = (
     | QuerySet[LegacyPatient, DatabankPatientData]
     | QuerySet[LegacyDiagnosis, DatabankDiagnosisData]
     | QuerySet[LegacyPatientTestResult, DatabankLabData]
+    | list[DatabankAppointmentData]
+    | list[DatabankPatientData]
+    | list[DatabankDiagnosisData]
+    | list[DatabankLabData]
     | CombinedModuleData
 )
 
+#: Maximum number of SharedData instances inserted per query
+SHARED_DATA_BATCH_SIZE = 1000
+
 
 class Command(BaseCommand):
     """Command to send the data of consenting databank patients to the external databank."""
@@ -53,6 +62,8 @@ class Command(BaseCommand):
         - called_at is the time when this command was called
         - patient_data_success_tracker will have an entry for each patient
           with the value being a dictionary of booleans for each DataModuleType
+        - databank_consents is the lookup table of the consent instances by GUID
+        - shared_data collects the `SharedData` instances of the data received by the databank
 
         We only update the databank_patient.last_synchronized if all data type booleans are true for that patient.
         This is required to know when we have to re-send failed data in the next cron run.
@@ -60,6 +71,8 @@ class Command(BaseCommand):
         super().__init__()
         self.patient_data_success_tracker: dict[str, dict[DataModuleType, bool]] = {}
         self.called_at: datetime = timezone.now()
+        self.databank_consents: dict[str, DatabankConsent] = {}
+        self.shared_data: list[SharedData] = []
 
     def add_arguments(self, parser: CommandParser) -> None:
         """
@@ -75,6 +88,33 @@ class Command(BaseCommand):
             default=120,
             help='Specify maximum wait time per API call to the databank [seconds]. Default 120.',
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            required=False,
+            default=500,
+            help=(
+                'Specify the number of patients whose data is retrieved together and sent in one API call '
+                + 'to the databank. Default 500.'
+            ),
+        )
+        parser.add_argument(
+            '--max-workers',
+            type=int,
+            required=False,
+            default=4,
+            help='Specify the maximum number of concurrent API calls to the databank. Default 4.',
+        )
+        parser.add_argument(
+            '--max-retries',
+            type=int,
+            required=False,
+            default=3,
+            help=(
+                'Specify the maximum number of retries of an API call that failed with a server error, '
+                + 'a connection error or a timeout. Default 3.'
+            ),
+        )
 
     def handle(self, *args: Any, **options: Any) -> None:
         """
@@ -95,42 +135,76 @@ class Command(BaseCommand):
         }
 
         request_timeout: int = options.get('request_timeout', 120)
+        chunk_size: int = options.get('chunk_size', 500)
         self.stdout.write(
             f'Sending databank data with {request_timeout} seconds timeout for source system response.',
         )
+        dispatcher = DatabankDispatcher(
+            url=f'{settings.SOURCE_SYSTEM_HOST}/databank/post',
+            auth=HTTPBasicAuth(settings.SOURCE_SYSTEM_USER, settings.SOURCE_SYSTEM_PASSWORD),
+            timeout=request_timeout,
+            max_workers=options.get('max_workers', 4),
+            max_retries=options.get('max_retries', 3),
+        )
+        with dispatcher:
+            # The payloads of all modules are sent concurrently while the next ones are being retrieved.
+            # The responses are handled in this thread as they arrive.
+            payloads = self._iter_databank_payloads(consenting_patients_querysets, chunk_size)
+            for result in dispatcher.dispatch(payloads):
+                aggregate_response = self._handle_dispatch_result(result)
+                if aggregate_response:
+                    self._parse_aggregate_databank_response(aggregate_response, result.payload['patientList'])
+
+            latency = dispatcher.get_latency_statistics()
+            if latency['count']:
+                self.stdout.write(
+                    f'Sent {latency["count"]} databank requests, latency (seconds): '
+                    + f'mean {latency["mean"]:.3f}, median {latency["median"]:.3f}, max {latency["max"]:.3f}',
+                )
+        # Finally, store the shared data and update last_synchronization time for all patients
+        with transaction.atomic():
+            self._store_shared_data()
+            self._update_patients_last_synchronization()
+
+    def _iter_databank_payloads(
+        self,
+        consenting_patients_querysets: Mapping[DataModuleType, QuerySet[DatabankConsent]],
+        chunk_size: int,
+    ) -> Iterator[DatabankPayload]:
+        """
+        Retrieve the databank data of each module for chunks of consenting patients.
+
+        Args:
+            consenting_patients_querysets: the consenting patients per databank module
+            chunk_size: the number of patients whose data is retrieved together and sent in one payload
+
+        Yields:
+            the payload with the data of one module for a chunk of patients
+        """
         for module, queryset in consenting_patients_querysets.items():
-            patients_list = list(queryset.iterator())
+            patients_list = list(queryset.select_related('patient').iterator())
             patients_count = len(patients_list)
 
             if patients_count > 0:
                 self.stdout.write(
-                    f'Number of {DataModuleType(module).label}-consenting patients is: {queryset.count()}',
+                    f'Number of {DataModuleType(module).label}-consenting patients is: {patients_count}',
                 )
 
-                # Retrieve patient data for each module type and send all at once
-                combined_module_data: CombinedModuleData = []
-                for databank_patient in patients_list:
-                    databank_data = self._retrieve_databank_data_for_patient(databank_patient, module)
-                    if databank_data:
-                        nested_databank_data = self._nest_and_serialize_queryset(
-                            databank_patient.guid,
-                            databank_data,
+                # Retrieve the module data for a chunk of patients at once and send it in one request
+                for patients_chunk in batched(patients_list, chunk_size, strict=False):
+                    combined_module_data: CombinedModuleData = [
+                        self._nest_and_serialize_queryset(guid, databank_data, module)
+                        for guid, databank_data in self._retrieve_databank_data_for_patients(
+                            patients_chunk,
                             module,
-                        )
-                        combined_module_data.append(nested_databank_data)
-                if combined_module_data:
-                    aggregate_response = self._request_and_handle_response(
-                        {'patientList': combined_module_data},
-                        request_timeout,
-                    )
-                    if aggregate_response:
-                        self._parse_aggregate_databank_response(aggregate_response, combined_module_data)
+                        ).items()
+                    ]
+                    if combined_module_data:
+                        yield {'patientList': combined_module_data}
             else:
                 self.stdout.write(
                     f'No patients found consenting to {DataModuleType(module).label} data donation.',
                 )
-        # Finally, update last_synchronization time for all patients
-        self._update_patients_last_synchronization()
 
     def _retrieve_databank_data_for_patient(
         self,
@@ -145,52 +219,78 @@ class Command(BaseCommand):
             module: databank data module enum type
 
         Returns:
-            JSON string of the patient's databank information for this module
+            the patient's databank information for this module, None if there is none
+        """
+        return self._retrieve_databank_data_for_patients([databank_patient], module).get(databank_patient.guid)
+
+    def _retrieve_databank_data_for_patients(
+        self,
+        databank_patients: Sequence[DatabankConsent],
+        module: DataModuleType,
+    ) -> dict[str, DatabankQuerySet]:
+        """
+        Use model managers to retrieve databank data for multiple consenting patients with one query per module.
+
+        Args:
+            databank_patients: Patients consenting for this databank module
+            module: databank data module enum type
+
+        Returns:
+            the patients' databank information for this module per patient GUID (patients without data are omitted)
 
         Raises:
             ValueError: If an invalid DateModuleType value is provided or if a patient is missing the legacy id
         """
-        databank_data: DatabankQuerySet | None = None
-        if not databank_patient.patient.legacy_id:
-            raise ValueError('Legacy ID missing from Databank Patient.')
+        legacy_ids: list[int] = []
+        for databank_patient in databank_patients:
+            if not databank_patient.patient.legacy_id:
+                raise ValueError('Legacy ID missing from Databank Patient.')
+            legacy_ids.append(databank_patient.patient.legacy_id)
+            self.databank_consents[databank_patient.guid] = databank_patient
+
+        last_synchronized_by_patient: dict[int, datetime] = {
+            legacy_id: databank_patient.last_synchronized
+            for legacy_id, databank_patient in zip(legacy_ids, databank_patients, strict=True)
+        }
+
+        data_by_patient: dict[int, Any]
         match module:
             case DataModuleType.APPOINTMENTS:
-                databank_data = LegacyAppointment.objects.get_databank_data_for_patient(
-                    patient_ser_num=databank_patient.patient.legacy_id,
-                    last_synchronized=databank_patient.last_synchronized,
+                data_by_patient = LegacyAppointment.objects.get_databank_data_for_patients(
+                    last_synchronized_by_patient,
                 )
             case DataModuleType.DIAGNOSES:
-                databank_data = LegacyDiagnosis.objects.get_databank_data_for_patient(
-                    patient_ser_num=databank_patient.patient.legacy_id,
-                    last_synchronized=databank_patient.last_synchronized,
+                data_by_patient = LegacyDiagnosis.objects.get_databank_data_for_patients(
+                    last_synchronized_by_patient,
                 )
             case DataModuleType.DEMOGRAPHICS:
-                databank_data = LegacyPatient.objects.get_databank_data_for_patient(
-                    patient_ser_num=databank_patient.patient.legacy_id,
-                    last_synchronized=databank_patient.last_synchronized,
+                data_by_patient = LegacyPatient.objects.get_databank_data_for_patients(
+                    last_synchronized_by_patient,
                 )
             case DataModuleType.LABS:
-                databank_data = LegacyPatientTestResult.objects.get_databank_data_for_patient(
-                    patient_ser_num=databank_patient.patient.legacy_id,
-                    last_synchronized=databank_patient.last_synchronized,
+                data_by_patient = LegacyPatientTestResult.objects.get_databank_data_for_patients(
+                    last_synchronized_by_patient,
                 )
             case DataModuleType.QUESTIONNAIRES:
-                databank_data = LegacyAnswerQuestionnaire.objects.get_databank_data_for_patient(
-                    patient_ser_num=databank_patient.patient.legacy_id,
-                    last_synchronized=databank_patient.last_synchronized,
+                data_by_patient = LegacyAnswerQuestionnaire.objects.get_databank_data_for_patients(
+                    last_synchronized_by_patient,
                 )
             case _:
                 raise ValueError(f'{module} not a valid databank data type.')
 
-        if databank_data:
-            # Return the data for this patient
-            self.stdout.write(
-                f'{len(databank_data)} instances of {DataModuleType(module).label} found for {databank_patient.patient}',
-            )
-        else:
-            self.stdout.write(
-                f'No {DataModuleType(module).label} data found for {databank_patient.patient}',
-            )
+        databank_data: dict[str, DatabankQuerySet] = {}
+        for legacy_id, databank_patient in zip(legacy_ids, databank_patients, strict=True):
+            patient_data = data_by_patient.get(legacy_id)
+            if patient_data:
+                self.stdout.write(
+                    f'{len(patient_data)} instances of {DataModuleType(module).label} found for '
+                    + f'{databank_patient.patient}',
+                )
+                databank_data[databank_patient.guid] = patient_data
+            else:
+                self.stdout.write(
+                    f'No {DataModuleType(module).label} data found for {databank_patient.patient}',
+                )
 
         return databank_data
 
@@ -260,37 +360,25 @@ class Command(BaseCommand):
             ]
         return {'GUID': guid, nesting_key: data}
 
-    def _request_and_handle_response(
-        self,
-        data: dict[str, CombinedModuleData],
-        request_timeout: int,
-    ) -> dict[str, Any] | None:
+    def _handle_dispatch_result(self, result: DispatchResult) -> dict[str, Any] | None:
         """
-        Send databank dataset to the source system and handle immediate response from source system.
+        Handle immediate response from source system to a databank dataset.
 
         This function should handle status and errors between Django and source system only.
         The `_parse_aggregate_databank_response` function handles the status
         and errors between source system and Databank.
 
         Args:
-            data: Databank dictionary of one of the five module types.
-            request_timeout: Maximum seconds to wait for response per api call to the source system
+            result: the result of sending the databank dataset to the source system
 
         Returns:
             Any: json object containing response for each individual patient message, or empty if send failed
         """
-        try:
-            response = requests.post(
-                url=f'{settings.SOURCE_SYSTEM_HOST}/databank/post',
-                auth=HTTPBasicAuth(settings.SOURCE_SYSTEM_USER, settings.SOURCE_SYSTEM_PASSWORD),
-                data=json.dumps(data, default=str),
-                headers={'Content-Type': 'application/json'},
-                timeout=request_timeout,
-            )
-        except requests.exceptions.RequestException as exc:
+        response = result.response
+        if response is None:
             # Connection details for source system might be misconfigured
             self.stderr.write(
-                f'Source system connection Error: {exc}',
+                f'Source system connection Error: {result.error}',
             )
             return None
 
@@ -318,6 +406,11 @@ class Command(BaseCommand):
             aggregate_response: JSON object with a response code & message for each patient data
             original_data_sent: list of data originally sent to source system
         """
+        sent_data_by_guid = {item['GUID']: item for item in original_data_sent}
+        databank_consents = self._get_databank_consents(
+            identifier.split('_', 1)[-1] for identifier in aggregate_response
+        )
+
         for identifier, response_object in aggregate_response.items():
             status_code, message = response_object
             # Extract the data type and patient guid from the response identifier string
@@ -335,11 +428,9 @@ class Command(BaseCommand):
 
             # Handle response codes
             if status_code in {HTTPStatus.OK, HTTPStatus.CREATED}:
-                # Grab the data for this specific patient using a generator expression and matching on the patient GUID
-                synced_patient_data = next((item for item in original_data_sent if item['GUID'] == patient_guid), None)
                 self._update_databank_patient_shared_data(
-                    DatabankConsent.objects.get(guid=patient_guid),
-                    synced_patient_data,
+                    databank_consents[patient_guid],
+                    sent_data_by_guid.get(patient_guid),
                     message.strip('[]"'),
                 )
             else:
@@ -348,6 +439,26 @@ class Command(BaseCommand):
                     f'{status_code} error for patient {patient_guid}: ' + message.strip('[]"'),
                 )
 
+    def _get_databank_consents(self, guids: Iterable[str]) -> dict[str, DatabankConsent]:
+        """
+        Return the lookup table of the consent instances by GUID containing the given GUIDs.
+
+        The consent instances that were not retrieved yet are fetched in one query.
+
+        Args:
+            guids: the GUIDs of the consent instances needed
+
+        Returns:
+            the consent instances by GUID
+        """
+        missing_guids = {guid for guid in guids if guid not in self.databank_consents}
+        if missing_guids:
+            self.databank_consents.update(
+                DatabankConsent.objects.select_related('patient').in_bulk(missing_guids, field_name='guid'),
+            )
+
+        return self.databank_consents
+
     def _update_databank_patient_shared_data(
         self,
         databank_patient: DatabankConsent,
@@ -355,7 +466,9 @@ class Command(BaseCommand):
         message: str | None = None,
     ) -> None:
         """
-        Create `SharedData` instances for a given patient.
+        Collect the `SharedData` instances for a given patient.
+
+        The instances are stored at the end of the run (see `_store_shared_data`).
 
         Args:
             databank_patient: Consent instance to be updated
@@ -367,11 +480,7 @@ class Command(BaseCommand):
         # Extract data ids depending on module and save to SharedData instances
         if DataModuleType.DEMOGRAPHICS in synced_data:
             sent_patient_id = synced_data.get(DataModuleType.DEMOGRAPHICS)[0].get('patient_id')
-            SharedData.objects.create(
-                databank_consent=databank_patient,
-                data_id=sent_patient_id,
-                data_type=DataModuleType.DEMOGRAPHICS,
-            )
+            self._create_shared_data_instances(databank_patient, DataModuleType.DEMOGRAPHICS, [sent_patient_id])
         elif DataModuleType.LABS in synced_data:
             sent_test_result_ids = [
                 component['test_result_id']
@@ -408,23 +517,28 @@ class Command(BaseCommand):
         id_list: list[Any],
     ) -> None:
         """
-        Bulk create SharedData instances given the module type and id list.
+        Collect SharedData instances given the module type and id list.
 
         Args:
             databank_patient: The consent instance whose data was successfully synced with LORIS
             data_module_type: The data type
             id_list: The list of specific ids of module data that was successfully synced
         """
-        shared_data_instances = [
+        self.shared_data.extend(
             SharedData(databank_consent=databank_patient, data_id=data_id, data_type=data_module_type)
             for data_id in id_list
-        ]
-        SharedData.objects.bulk_create(shared_data_instances)
+        )
+
+    def _store_shared_data(self) -> None:
+        """Bulk create all SharedData instances collected during the run."""
+        SharedData.objects.bulk_create(self.shared_data, batch_size=SHARED_DATA_BATCH_SIZE)
+        self.shared_data = []
 
     def _update_patients_last_synchronization(self) -> None:
         """Update the `databank_patient.last_synchronized` for all patients based on the success tracker."""
-        for guid, module_successes in self.patient_data_success_tracker.items():
-            consent_instance = DatabankConsent.objects.get(guid=guid)
-            if all(module_successes.values()):
-                consent_instance.last_synchronized = self.called_at
-                consent_instance.save()
+        synchronized_guids = [
+            guid
+            for guid, module_successes in self.patient_data_success_tracker.items()
+            if all(module_successes.values())
+        ]
+        DatabankConsent.objects.filter(guid__in=synchronized_guids).update(last_synchronized=self.called_at)
@@ -2,6 +2,7 @@
 #
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
+import json
 from datetime import datetime, timedelta
 from http import HTTPStatus
 from typing import TYPE_CHECKING, Any
@@ -11,6 +12,7 @@ from django.utils import timezone
 import pytest
 import requests
 from pytest_django.asserts import assertRaisesMessage
+from requests.auth import HTTPBasicAuth
 
 from opal.core.test_utils import CommandTestMixin, RequestMockerTest
 from opal.databank import factories as databank_factories
@@ -20,11 +22,17 @@ from opal.legacy.models import LegacyPatientTestResult
 from opal.legacy_questionnaires import factories as legacy_questionnaire_factories
 from opal.patients import factories as patient_factories
 
+from ..dispatch import DatabankDispatcher
 from ..management.commands import send_databank_data
 
 if TYPE_CHECKING:
+    from django.conf import LazySettings
+
+    from pytest_django import DjangoAssertNumQueries
     from pytest_mock.plugin import MockerFixture
 
+    from ..conftest import StubSourceSystem
+
 pytestmark = pytest.mark.django_db(databases=['default', 'legacy', 'questionnaire'])
 
 
@@ -199,11 +207,11 @@ class TestSendDatabankDataMigration(CommandTestMixin):
                 'message': 'No connection adapters were found for HOST',
             },
         }
-        mock_post = RequestMockerTest.mock_requests_post(mocker, generated_data)
+        mock_post = RequestMockerTest.mock_requests_session_post(mocker, generated_data)
         mock_post.side_effect = requests.RequestException('No connection adapters were found for HOST')
         mock_post.return_value.status_code = HTTPStatus.BAD_GATEWAY
         command = send_databank_data.Command()
-        command._request_and_handle_response({}, 60)
+        command._handle_dispatch_result(self._create_dispatcher().send({}))
         captured = capsys.readouterr()
         assert 'Source system connection Error: No connection adapters were found for HOST' in captured.err
 
@@ -244,10 +252,10 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             ],
         }
         response_data = {'message': 'Bad Gateway'}
-        mock_post = RequestMockerTest.mock_requests_post(mocker, response_data)
+        mock_post = RequestMockerTest.mock_requests_session_post(mocker, response_data)
         mock_post.return_value.status_code = HTTPStatus.BAD_GATEWAY
         command = send_databank_data.Command()
-        command._request_and_handle_response(databank_data_to_send, 60)
+        command._handle_dispatch_result(self._create_dispatcher().send(databank_data_to_send))
         captured = capsys.readouterr()
         assert '502 source system response error' in captured.err
         assert 'Bad Gateway' in captured.err
@@ -289,10 +297,10 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             ],
         }
         response_data = {'message': 'Resource not found'}
-        mock_post = RequestMockerTest.mock_requests_post(mocker, response_data)
+        mock_post = RequestMockerTest.mock_requests_session_post(mocker, response_data)
         mock_post.return_value.status_code = HTTPStatus.NOT_FOUND
         command = send_databank_data.Command()
-        command._request_and_handle_response(databank_data_to_send, 60)
+        command._handle_dispatch_result(self._create_dispatcher().send(databank_data_to_send))
         captured = capsys.readouterr()
         assert '404 source system response error' in captured.err
         assert 'Resource not found' in captured.err
@@ -324,7 +332,7 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             has_labs=False,
             last_synchronized=last_sync,
         )
-        RequestMockerTest.mock_requests_post(
+        RequestMockerTest.mock_requests_session_post(
             mocker,
             response_data=self._create_custom_source_system_response(databank_models.DataModuleType.DEMOGRAPHICS),
         )
@@ -366,7 +374,7 @@ class TestSendDatabankDataMigration(CommandTestMixin):
         legacy_factories.LegacyPatientTestResultFactory.create(patient_ser_num=legacy_pat2)
         legacy_factories.LegacyPatientTestResultFactory.create(patient_ser_num=legacy_pat2)
         legacy_factories.LegacyPatientTestResultFactory.create(patient_ser_num=legacy_pat2)
-        response = RequestMockerTest.mock_requests_post(
+        response = RequestMockerTest.mock_requests_session_post(
             mocker,
             response_data=self._create_custom_source_system_response(databank_models.DataModuleType.LABS),
         )
@@ -378,6 +386,84 @@ class TestSendDatabankDataMigration(CommandTestMixin):
         assert databank_models.SharedData.objects.all().count() == 6
         assert not error
 
+    def test_labs_sent_in_patient_chunks(self, mocker: MockerFixture) -> None:
+        """Ensure the data of each chunk of patients is retrieved and sent in its own request."""
+        django_pat1 = patient_factories.Patient.create(ramq='SIMM12345678', legacy_id=51)
+        legacy_pat1 = legacy_factories.LegacyPatientFactory.create(patientsernum=django_pat1.legacy_id)
+        django_pat2 = patient_factories.Patient.create(ramq='SIMH12345678', legacy_id=52)
+        legacy_pat2 = legacy_factories.LegacyPatientFactory.create(patientsernum=django_pat2.legacy_id)
+        last_sync = datetime(2022, 1, 1, tzinfo=timezone.get_current_timezone())
+        guids = (
+            'a12c171c8cee87343f14eaae2b034b5a0499abe1f61f1a4bd57d51229bce4274',
+            '93265ef54c8026a70a9e385b0ada9f30b5daaa06eb39d2ec0d4e092255f9380d',
+        )
+        for django_patient, guid in zip((django_pat1, django_pat2), guids, strict=True):
+            databank_factories.DatabankConsent.create(
+                patient=django_patient,
+                guid=guid,
+                has_appointments=False,
+                has_diagnoses=False,
+                has_demographics=False,
+                has_questionnaires=False,
+                has_labs=True,
+                last_synchronized=last_sync,
+            )
+        legacy_factories.LegacyPatientTestResultFactory.create(patient_ser_num=legacy_pat1)
+        legacy_factories.LegacyPatientTestResultFactory.create(patient_ser_num=legacy_pat2)
+        legacy_factories.LegacyPatientTestResultFactory.create(patient_ser_num=legacy_pat2)
+
+        mock_post = RequestMockerTest.mock_requests_session_post(mocker, response_data={})
+        responses = []
+        for guid in guids:
+            response = requests.Response()
+            response.status_code = HTTPStatus.OK
+            response._content = json.dumps({f'labs_{guid}': [201, '["labs inserted"]']}).encode()
+            responses.append(response)
+        mock_post.side_effect = responses
+
+        # a single worker so that the mocked responses are returned in the order of the requests
+        message, error = self._call_command('send_databank_data', '--chunk-size', '1', '--max-workers', '1')
+
+        assert mock_post.call_count == 2
+        sent_patients = [json.loads(call.kwargs['data'])['patientList'] for call in mock_post.call_args_list]
+        assert all(len(patient_list) == 1 for patient_list in sent_patients)
+        assert {patient_list[0]['GUID'] for patient_list in sent_patients} == set(guids)
+        assert 'Number of Labs-consenting patients is: 2' in message
+        assert databank_models.SharedData.objects.all().count() == 3
+        assert not error
+
+    @pytest.mark.allow_hosts(['127.0.0.1'])
+    def test_demographics_sent_to_stub_source_system(
+        self,
+        settings: LazySettings,
+        stub_source_system: StubSourceSystem,
+    ) -> None:
+        """Ensure the data is sent to the source system and a server error is retried."""
+        settings.SOURCE_SYSTEM_HOST = stub_source_system.url
+        django_pat1 = patient_factories.Patient.create(ramq='SIMM12345678', legacy_id=51)
+        legacy_factories.LegacyPatientFactory.create(patientsernum=django_pat1.legacy_id)
+        guid = 'a12c171c8cee87343f14eaae2b034b5a0499abe1f61f1a4bd57d51229bce4274'
+        databank_factories.DatabankConsent.create(
+            patient=django_pat1,
+            guid=guid,
+            has_appointments=False,
+            has_diagnoses=False,
+            has_demographics=True,
+            has_questionnaires=False,
+            has_labs=False,
+            last_synchronized=datetime(2022, 1, 1, tzinfo=timezone.get_current_timezone()),
+        )
+        stub_source_system.add_response(HTTPStatus.SERVICE_UNAVAILABLE, {})
+        stub_source_system.add_response(HTTPStatus.OK, {f'demo_{guid}': [201, '[]']})
+
+        message, error = self._call_command('send_databank_data')
+
+        assert len(stub_source_system.received) == 2
+        assert stub_source_system.received[0]['patientList'][0]['GUID'] == guid
+        assert databank_models.SharedData.objects.all().count() == 1
+        assert 'Sent 1 databank requests, latency (seconds): mean ' in message
+        assert not error
+
     def test_unrecognized_module_prefix_in_source_system_response(self, mocker: MockerFixture) -> None:
         """Ensure an error is logged when the data type is unrecognized in the response data."""
         django_pat1 = patient_factories.Patient.create(ramq='SIMM12345678', legacy_id=51)
@@ -394,7 +480,7 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             last_synchronized=last_sync,
         )
         legacy_factories.LegacyPatientTestResultFactory.create(patient_ser_num=legacy_pat1)
-        RequestMockerTest.mock_requests_post(
+        RequestMockerTest.mock_requests_session_post(
             mocker,
             response_data={
                 'INVALIDTYPE_a12c171c8cee87343f14eaae2b034b5a0499abe1f61f1a4bd57d51229bce4274': [200, '[]'],
@@ -430,7 +516,7 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             has_labs=False,
             last_synchronized=last_sync,
         )
-        RequestMockerTest.mock_requests_post(
+        RequestMockerTest.mock_requests_session_post(
             mocker,
             response_data=self._create_custom_source_system_response(databank_models.DataModuleType.DEMOGRAPHICS),
         )
@@ -467,7 +553,7 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             last_synchronized=last_sync,
         )
         # Make patient1 a failed response
-        RequestMockerTest.mock_requests_post(
+        RequestMockerTest.mock_requests_session_post(
             mocker,
             response_data={
                 'demo_a12c171c8cee87343f14eaae2b034b5a0499abe1f61f1a4bd57d51229bce4274': [400, '[]'],
@@ -510,7 +596,7 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             last_synchronized=last_sync,
         )
         # Make patient1 a failed response
-        RequestMockerTest.mock_requests_post(
+        RequestMockerTest.mock_requests_session_post(
             mocker,
             response_data={
                 'demo_a12c171c8cee87343f14eaae2b034b5a0499abe1f61f1a4bd57d51229bce4274': [
@@ -561,7 +647,7 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             last_synchronized=last_sync,
         )
         # Make patient1 a failed response
-        RequestMockerTest.mock_requests_post(
+        RequestMockerTest.mock_requests_session_post(
             mocker,
             response_data={
                 'demo_a12c171c8cee87343f14eaae2b034b5a0499abe1f61f1a4bd57d51229bce4274': [
@@ -686,6 +772,7 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             },
             original_data_sent=sent_data,
         )
+        command._store_shared_data()
         # Check if SharedData instance is created for lab data
         shared_data_count = databank_models.SharedData.objects.filter(
             databank_consent=mock_databank_patient,
@@ -823,6 +910,7 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             },
             original_data_sent=sent_lab_data,
         )
+        command._store_shared_data()
         # Check if SharedData instance is created for lab data
         shared_data_count = databank_models.SharedData.objects.filter(
             databank_consent=mock_databank_patient,
@@ -844,6 +932,44 @@ class TestSendDatabankDataMigration(CommandTestMixin):
         )
         assert shared_data.data_id == 124
 
+    def test_reconciliation_fixed_number_of_queries(
+        self,
+        django_assert_num_queries: DjangoAssertNumQueries,
+    ) -> None:
+        """Ensure the responses of any number of patients are reconciled and stored with a fixed number of queries."""
+        guids = [f'{index:064x}' for index in range(5)]
+        for index, guid in enumerate(guids):
+            databank_factories.DatabankConsent.create(
+                patient=patient_factories.Patient.create(ramq=f'SIMM1234567{index}', legacy_id=51 + index),
+                guid=guid,
+                last_synchronized=datetime(2022, 1, 1, tzinfo=timezone.get_current_timezone()),
+            )
+        sent_lab_data = [
+            {
+                'GUID': guid,
+                databank_models.DataModuleType.LABS: [
+                    {'components': [{'test_result_id': 2 * index}, {'test_result_id': 2 * index + 1}]},
+                ],
+            }
+            for index, guid in enumerate(guids)
+        ]
+        command = send_databank_data.Command()
+
+        # one query to fetch the consents, one to create the shared data and one to update the consents
+        with django_assert_num_queries(3):
+            command._parse_aggregate_databank_response(
+                aggregate_response={f'labs_{guid}': [201, '["2 labs inserted"]'] for guid in guids},
+                original_data_sent=sent_lab_data,
+            )
+            command._store_shared_data()
+            command._update_patients_last_synchronization()
+
+        assert databank_models.SharedData.objects.count() == 10
+        assert not command.shared_data
+        assert set(
+            databank_models.DatabankConsent.objects.values_list('last_synchronized', flat=True),
+        ) == {command.called_at}
+
     def test_update_metadata_with_diagnosis_data(self) -> None:
         """Test just the isolated creation of diagnosis-type SharedData instances."""
         sent_diagnoses_data = [
@@ -905,6 +1031,7 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             },
             original_data_sent=sent_diagnoses_data,
         )
+        command._store_shared_data()
         # Check if SharedData instance is created for diagnosis data
         shared_data_count1 = databank_models.SharedData.objects.filter(
             databank_consent=mock_databank_patient1,
@@ -978,6 +1105,7 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             },
             original_data_sent=sent_appointments_data,
         )
+        command._store_shared_data()
         # Check if SharedData instance is created for appointments data
         shared_data_count1 = databank_models.SharedData.objects.filter(
             databank_consent=mock_databank_patient1,
@@ -1045,6 +1173,7 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             },
             original_data_sent=sent_questionnaires_data,
         )
+        command._store_shared_data()
         # Check if SharedData instance is created for questionnaires data
         shared_data_count1 = databank_models.SharedData.objects.filter(
             databank_consent=mock_databank_patient1,
@@ -1084,7 +1213,7 @@ class TestSendDatabankDataMigration(CommandTestMixin):
             has_labs=False,
             last_synchronized=last_sync,
         )
-        RequestMockerTest.mock_requests_post(
+        RequestMockerTest.mock_requests_session_post(
             mocker,
             response_data={},
         )
@@ -1248,6 +1377,19 @@ class TestSendDatabankDataMigration(CommandTestMixin):
                 for key2 in inner_keys:
                     assert key2 in answer
 
+    def _create_dispatcher(self) -> DatabankDispatcher:
+        """
+        Create a dispatcher for the databank endpoint of the source system.
+
+        Returns:
+            the dispatcher
+        """
+        return DatabankDispatcher(
+            url='http://localhost/databank/post',
+            auth=HTTPBasicAuth('user', 'password'),
+            timeout=60,
+        )
+
     def _create_custom_source_system_response(self, module: databank_models.DataModuleType) -> dict[str, list[Any]]:
         """
         Prepare a response message according to module and success/failure.
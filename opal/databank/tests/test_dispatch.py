@@ -0,0 +1,172 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+from http import HTTPStatus
+from typing import TYPE_CHECKING
+
+import pytest
+import requests
+from requests.auth import HTTPBasicAuth
+
+from ..dispatch import DatabankDispatcher
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from ..conftest import StubSourceSystem
+
+pytestmark = pytest.mark.allow_hosts(['127.0.0.1'])
+
+
+def _create_dispatcher(
+    stub: StubSourceSystem,
+    timeout: float = 5,
+    max_workers: int = 4,
+    max_retries: int = 3,
+) -> DatabankDispatcher:
+    """
+    Create a dispatcher for the stub source system without backoff between retries.
+
+    Args:
+        stub: the stub source system
+        timeout: maximum number of seconds to wait for a response per attempt
+        max_workers: maximum number of requests in flight at the same time
+        max_retries: maximum number of retries of a failing request
+
+    Returns:
+        the dispatcher
+    """
+    return DatabankDispatcher(
+        url=f'{stub.url}/databank/post',
+        auth=HTTPBasicAuth('user', 'password'),
+        timeout=timeout,
+        max_workers=max_workers,
+        max_retries=max_retries,
+        backoff_factor=0,
+    )
+
+
+def test_send_success(stub_source_system: StubSourceSystem) -> None:
+    """Ensure a payload is sent and the response is returned with its latency."""
+    stub_source_system.add_response(HTTPStatus.OK, {'demo_guid': [201, '[]']})
+
+    with _create_dispatcher(stub_source_system) as dispatcher:
+        result = dispatcher.send({'patientList': [{'GUID': 'guid'}]})
+
+    assert result.error is None
+    assert result.response is not None
+    assert result.response.status_code == HTTPStatus.OK
+    assert result.response.json() == {'demo_guid': [201, '[]']}
+    assert result.latency > 0
+    assert stub_source_system.received == [{'patientList': [{'GUID': 'guid'}]}]
+    assert dispatcher.latencies == [result.latency]
+
+
+def test_send_retries_server_errors(stub_source_system: StubSourceSystem) -> None:
+    """Ensure a request failing with a server error is retried."""
+    stub_source_system.add_response(HTTPStatus.SERVICE_UNAVAILABLE, {})
+    stub_source_system.add_response(HTTPStatus.BAD_GATEWAY, {})
+    stub_source_system.add_response(HTTPStatus.OK, {'result': 'ok'})
+
+    with _create_dispatcher(stub_source_system) as dispatcher:
+        result = dispatcher.send({'patientList': []})
+
+    assert result.response is not None
+    assert result.response.status_code == HTTPStatus.OK
+    assert len(stub_source_system.received) == 3
+
+
+def test_send_retries_exhausted(stub_source_system: StubSourceSystem) -> None:
+    """Ensure the last response is returned once the retries are exhausted."""
+    for _ in range(3):
+        stub_source_system.add_response(HTTPStatus.INTERNAL_SERVER_ERROR, {'message': 'error'})
+
+    with _create_dispatcher(stub_source_system, max_retries=1) as dispatcher:
+        result = dispatcher.send({'patientList': []})
+
+    assert result.response is not None
+    assert result.response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+    assert len(stub_source_system.received) == 2
+
+
+def test_send_client_errors_not_retried(stub_source_system: StubSourceSystem) -> None:
+    """Ensure a request failing with a client error is not retried."""
+    stub_source_system.add_response(HTTPStatus.NOT_FOUND, {'message': 'Resource not found'})
+
+    with _create_dispatcher(stub_source_system) as dispatcher:
+        result = dispatcher.send({'patientList': []})
+
+    assert result.response is not None
+    assert result.response.status_code == HTTPStatus.NOT_FOUND
+    assert len(stub_source_system.received) == 1
+
+
+def test_send_retries_timeouts(stub_source_system: StubSourceSystem) -> None:
+    """Ensure a request timing out is retried."""
+    stub_source_system.add_response(HTTPStatus.OK, {}, delay=1)
+    stub_source_system.add_response(HTTPStatus.OK, {'result': 'ok'})
+
+    with _create_dispatcher(stub_source_system, timeout=0.25) as dispatcher:
+        result = dispatcher.send({'patientList': []})
+
+    assert result.response is not None
+    assert result.response.json() == {'result': 'ok'}
+    assert len(stub_source_system.received) == 2
+
+
+def test_send_connection_error() -> None:
+    """Ensure a connection error is returned instead of being raised."""
+    # no server is listening on port 9 (discard) of the local host
+    dispatcher = DatabankDispatcher(
+        url='http://127.0.0.1:9/databank/post',
+        auth=HTTPBasicAuth('user', 'password'),
+        timeout=1,
+        max_retries=0,
+    )
+
+    with dispatcher:
+        result = dispatcher.send({'patientList': []})
+
+    assert result.response is None
+    assert isinstance(result.error, requests.ConnectionError)
+
+
+def test_dispatch_all_payloads(stub_source_system: StubSourceSystem) -> None:
+    """Ensure all payloads are sent concurrently and a result is yielded for each of them."""
+    payloads = [{'patientList': [{'GUID': str(index)}]} for index in range(5)]
+
+    with _create_dispatcher(stub_source_system, max_workers=2) as dispatcher:
+        results = list(dispatcher.dispatch(payloads))
+
+    assert sorted(result.payload['patientList'][0]['GUID'] for result in results) == ['0', '1', '2', '3', '4']
+    assert all(result.response is not None for result in results)
+    assert len(stub_source_system.received) == 5
+    assert dispatcher.get_latency_statistics()['count'] == 5
+
+
+def test_dispatch_consumes_payloads_lazily(stub_source_system: StubSourceSystem) -> None:
+    """Ensure no more payloads than request slots are requested before the first result."""
+    requested: list[int] = []
+
+    def payloads() -> Iterator[dict[str, list[int]]]:
+        for index in range(5):
+            requested.append(index)
+            yield {'patientList': [index]}
+
+    with _create_dispatcher(stub_source_system, max_workers=2) as dispatcher:
+        results = dispatcher.dispatch(payloads())
+        next(results)
+
+        assert requested == [0, 1]
+
+        remaining_results = list(results)
+
+    assert len(remaining_results) == 4
+    assert requested == [0, 1, 2, 3, 4]
+
+
+def test_latency_statistics_no_requests() -> None:
+    """Ensure the latency statistics are empty when no request was sent."""
+    with DatabankDispatcher(url='http://127.0.0.1', auth=HTTPBasicAuth('user', 'password'), timeout=1) as dispatcher:
+        assert dispatcher.get_latency_statistics() == {'count': 0, 'mean': 0.0, 'median': 0.0, 'max': 0.0}
@@ -15,3 +15,9 @@ class HospitalSettingsConfig(AppConfig):
     name = 'opal.hospital_settings'
 
     verbose_name = _('Hospital Settings')
+
+    def ready(self) -> None:
+        """Perform initialization tasks."""
+        # Implicitly connect signal handlers decorated with @receiver.
+        # See: https://docs.djangoproject.com/en/dev/topics/signals/#connecting-receiver-functions
+        from . import signals  # noqa: F401, PLC0415
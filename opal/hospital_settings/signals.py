@@ -0,0 +1,25 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Module consisting of signals of the hospital settings app."""
+
+from typing import Any
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Site
+from .utils import clear_site_cache
+
+
+@receiver(signal=post_save, sender=Site)
+@receiver(signal=post_delete, sender=Site)
+def site_changed_signal_handler(**kwargs: Any) -> None:
+    """
+    Clear the cached sites when a site is saved or deleted.
+
+    Args:
+        kwargs: additional keyword arguments of the signal
+    """
+    clear_site_cache()
@@ -0,0 +1,60 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from .. import factories, utils
+
+if TYPE_CHECKING:
+    from pytest_django import DjangoAssertNumQueries
+    from pytest_mock import MockerFixture
+
+pytestmark = pytest.mark.django_db()
+
+
+def test_get_site_ids_by_acronym_cached(django_assert_num_queries: DjangoAssertNumQueries) -> None:
+    """Ensure the sites are only queried once."""
+    rvh = factories.Site.create(acronym='RVH')
+    mgh = factories.Site.create(acronym='MGH')
+
+    with django_assert_num_queries(1):
+        assert utils.get_site_ids_by_acronym() == {'RVH': rvh.pk, 'MGH': mgh.pk}
+        assert utils.get_site_ids_by_acronym() == {'RVH': rvh.pk, 'MGH': mgh.pk}
+
+
+def test_get_site_ids_by_acronym_expire(mocker: MockerFixture) -> None:
+    """Ensure the sites are only cached for a limited time so that other processes pick up changed sites."""
+    mock_cache = mocker.patch('opal.hospital_settings.utils.cache')
+    mock_cache.get.return_value = None
+    site = factories.Site.create(acronym='RVH')
+
+    assert utils.get_site_ids_by_acronym() == {'RVH': site.pk}
+
+    mock_cache.set.assert_called_once_with(utils.SITE_CACHE_KEY, {'RVH': site.pk}, utils.SITE_CACHE_TIMEOUT)
+
+
+def test_get_site_ids_by_acronym_read_only() -> None:
+    """Ensure the cached sites cannot be modified."""
+    factories.Site.create(acronym='RVH')
+
+    with pytest.raises(TypeError):
+        utils.get_site_ids_by_acronym()['MGH'] = 1  # type: ignore[index]
+
+
+def test_get_site_ids_by_acronym_site_changed() -> None:
+    """Ensure the cached sites are cleared when a site is created, updated or deleted."""
+    site = factories.Site.create(acronym='RVH')
+    assert utils.get_site_ids_by_acronym() == {'RVH': site.pk}
+
+    other_site = factories.Site.create(acronym='MGH')
+    assert utils.get_site_ids_by_acronym() == {'RVH': site.pk, 'MGH': other_site.pk}
+
+    site.acronym = 'RV'
+    site.save()
+    assert utils.get_site_ids_by_acronym() == {'RV': site.pk, 'MGH': other_site.pk}
+
+    other_site.delete()
+    assert utils.get_site_ids_by_acronym() == {'RV': site.pk}
@@ -0,0 +1,46 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Module providing utility functions for the hospital settings app."""
+
+from types import MappingProxyType
+from typing import TYPE_CHECKING
+
+from django.core.cache import cache
+
+from .models import Site
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+#: Cache key of the IDs of the sites by their acronym
+SITE_CACHE_KEY = 'hospital_settings:site-ids-by-acronym'
+#: Number of seconds the sites are cached
+SITE_CACHE_TIMEOUT = 60
+
+
+def get_site_ids_by_acronym() -> Mapping[str, int]:
+    """
+    Return the ID of each site by its acronym.
+
+    The sites rarely change but are needed to validate the sites of every incoming HL7 message.
+    They are therefore cached for `SITE_CACHE_TIMEOUT` seconds,
+    which bounds how long a process that did not save the site (e.g., another worker) keeps outdated sites.
+    The cached sites are cleared when a site is saved or deleted (see `signals`).
+
+    Returns:
+        the read-only mapping of site acronyms to site IDs
+    """
+    site_ids: dict[str, int] | None = cache.get(SITE_CACHE_KEY)
+
+    if site_ids is None:
+        site_ids = dict(Site.objects.values_list('acronym', 'pk'))
+        cache.set(SITE_CACHE_KEY, site_ids, SITE_CACHE_TIMEOUT)
+
+    return MappingProxyType(site_ids)
+
+
+def clear_site_cache() -> None:
+    """Clear the cached sites."""
+    cache.delete(SITE_CACHE_KEY)
@@ -10,6 +10,7 @@ from rest_framework import serializers
 
 from opal.core.api.serializers import DynamicFieldsSerializer
 from opal.legacy.models import LegacyAlias, LegacyAppointment, LegacyHospitalMap, LegacyPatient
+from opal.questionnaires.models import QuestionnaireReportJob
 
 
 class LegacyAliasSerializer(DynamicFieldsSerializer[LegacyAlias]):
@@ -177,6 +178,15 @@ class QuestionnaireReportRequestSerializer(serializers.Serializer[tuple[str, str
     )  # TODO: min_length?
 
 
+class QuestionnaireReportJobSerializer(serializers.ModelSerializer[QuestionnaireReportJob]):
+    """Serializer for the `QuestionnaireReportJob` model to poll the status of a questionnaire report request."""
+
+    class Meta:
+        model = QuestionnaireReportJob
+        fields = ['uuid', 'mrn', 'site', 'status', 'error', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+
+
 class UnreadCountSerializer(serializers.Serializer[dict[str, Any]]):
     """Serializer a dictionary having several key-value pairs."""
 
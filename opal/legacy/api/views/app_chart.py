@@ -11,8 +11,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from opal.core.drf_permissions import IsListener
-from opal.legacy import models
-from opal.legacy_questionnaires.models import LegacyQuestionnaire
+from opal.legacy import utils
 
 from ..serializers import UnreadCountSerializer
 
@@ -44,6 +43,7 @@ class AppChartView(APIView):
 
         The function provides the number of unread values for the user
         and will provide them for the selected patient instead until the profile selector is finished.
+        The unread values are counted with one query per legacy database (see `get_unread_counts`).
 
         Args:
             request: http request used to get username making the request
@@ -53,58 +53,6 @@ class AppChartView(APIView):
         Returns:
             Http response with the data needed to display the chart view.
         """
-        legacy_id = kwargs['legacy_id']
-        username = request.headers['Appuserid']
-        unread_count = {
-            'unread_appointment_count': models.LegacyAppointment.objects.get_unread_queryset(
-                legacy_id,
-                username,
-            ).count(),
-            'unread_lab_result_count': models.LegacyPatientTestResult.objects.get_unread_queryset(
-                legacy_id,
-                username,
-            ).count(),
-            'unread_document_count': models.LegacyDocument.objects.get_unread_queryset(
-                legacy_id,
-                username,
-            ).count(),
-            'unread_txteammessage_count': models.LegacyTxTeamMessage.objects.get_unread_queryset(
-                legacy_id,
-                username,
-            ).count(),
-            'unread_educationalmaterial_count': models.LegacyEducationalMaterial.objects
-            .get_unread_queryset(
-                legacy_id,
-                username,
-            )
-            .filter(
-                educationalmaterialcontrolsernum__educationalmaterialcategoryid__title_en='Clinical',
-            )
-            .count(),
-            'unread_questionnaire_count': LegacyQuestionnaire.objects.new_questionnaires(
-                legacy_id,
-                username,
-                1,
-            ).count(),
-            'unread_research_reference_count': models.LegacyEducationalMaterial.objects
-            .get_unread_queryset(
-                legacy_id,
-                username,
-            )
-            .filter(
-                educationalmaterialcontrolsernum__educationalmaterialcategoryid__title_en='Research',
-            )
-            .count(),
-            'unread_research_questionnaire_count': LegacyQuestionnaire.objects.new_questionnaires(
-                legacy_id,
-                username,
-                2,
-            ).count(),
-            'unread_consent_questionnaire_count': LegacyQuestionnaire.objects.new_questionnaires(
-                legacy_id,
-                username,
-                4,
-            ).count(),
-        }
+        unread_counts = utils.get_unread_counts(kwargs['legacy_id'], request.headers['Appuserid'])
 
-        return Response(UnreadCountSerializer(unread_count).data)
+        return Response(UnreadCountSerializer(unread_counts).data)
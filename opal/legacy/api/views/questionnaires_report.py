@@ -2,32 +2,31 @@
 #
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
-"""Collection of api views used to send questionnaire PDF reports to the source system."""
+"""
+Collection of api views used to send questionnaire PDF reports to the source system.
+
+The reports are generated asynchronously: a request queues a job which is processed by the
+`process_questionnaire_reports` command. The status of the job can be polled.
+"""
 
-import base64
-import logging
 from typing import TYPE_CHECKING, Any
 
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 
-from fpdf import FPDFException
-from rest_framework import exceptions, response, views
+from rest_framework import exceptions, generics, response, status, views
 
 from opal.core.drf_permissions import IsORMSUser
-from opal.legacy.utils import generate_questionnaire_report, get_questionnaire_data
 from opal.patients.models import Patient
-from opal.services.integration import hospital
+from opal.questionnaires.models import QuestionnaireReportJob
 
-from ..serializers import QuestionnaireReportRequestSerializer
+from ..serializers import QuestionnaireReportJobSerializer, QuestionnaireReportRequestSerializer
 
 if TYPE_CHECKING:
     from rest_framework.request import Request
 
-LOGGER = logging.getLogger(__name__)
-
 
 class QuestionnairesReportView(views.APIView):
-    """View to generate a questionnaires PDF report."""
+    """View to request the generation of a questionnaires PDF report."""
 
     permission_classes = (IsORMSUser,)
     serializer_class = QuestionnaireReportRequestSerializer
@@ -39,7 +38,9 @@ class QuestionnairesReportView(views.APIView):
         **kwargs: Any,
     ) -> response.Response:
         """
-        Generate questionnaire PDF report and submit to the source system.
+        Queue the generation of the questionnaire PDF report and its submission to the source system.
+
+        If a report is already pending for the patient, the existing job is returned instead of queueing another one.
 
         Args:
             request: HTTP request that initiates report generation
@@ -47,11 +48,10 @@ class QuestionnairesReportView(views.APIView):
             kwargs: varied amount of keyword arguments
 
         Returns:
-            HTTP `Response` with results of report generation
+            HTTP `Response` (`202 Accepted`) with the queued job
 
         Raises:
             ParseError: if the patient can not be found
-            APIException: if the report generation fails
         """
         serializer = QuestionnaireReportRequestSerializer(data=request.data)
         # Validate received data. Return a 400 response if the data was invalid.
@@ -61,7 +61,7 @@ class QuestionnairesReportView(views.APIView):
         site = serializer.validated_data.get('site')
 
         try:
-            patient = Patient.objects.get_patient_by_site_mrn_list(
+            Patient.objects.get_patient_by_site_mrn_list(
                 [
                     {
                         'site': {'acronym': site},
@@ -74,24 +74,17 @@ class QuestionnairesReportView(views.APIView):
                 detail='Could not find `Patient` record with the provided MRN and site acronym.',
             ) from error
 
-        # Generate questionnaire report
-        try:
-            pdf_report = generate_questionnaire_report(patient, get_questionnaire_data(patient))
-        except FPDFException as exc:
-            LOGGER.exception('An error occurred during questionnaire report generation')
-            raise exceptions.APIException(detail='An error occurred during questionnaire report generation.') from exc
+        job, _created = QuestionnaireReportJob.objects.enqueue(mrn, site)
 
-        encoded_report = base64.b64encode(pdf_report)
+        return response.Response(QuestionnaireReportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
-        try:
-            hospital.add_questionnaire_report(mrn, site, encoded_report)
-        except hospital.NonOKResponseError as exc:
-            LOGGER.exception('An error occurred while exporting a PDF report to the source system')
-            raise exceptions.APIException(
-                detail='An error occurred while exporting a PDF report to the source system'
-            ) from exc
-        except hospital.PatientNotFoundError as exc:
-            LOGGER.exception('The patient was not found in the source system')
-            raise exceptions.APIException(detail='The patient was not found in the source system') from exc
-
-        return response.Response()
+
+class QuestionnairesReportJobView(generics.RetrieveAPIView[QuestionnaireReportJob]):
+    """View to poll the status of a questionnaires PDF report request."""
+
+    queryset = QuestionnaireReportJob.objects.all()
+    permission_classes = (IsORMSUser,)
+    serializer_class = QuestionnaireReportJobSerializer
+
+    lookup_url_kwarg = 'uuid'
+    lookup_field = 'uuid'
@@ -4,6 +4,8 @@
 
 from typing import TYPE_CHECKING
 
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 import pytest
@@ -266,6 +268,56 @@ class TestAppChartView:
         assert response.data['unread_research_questionnaire_count'] == 1
         assert response.data['unread_consent_questionnaire_count'] == 1
 
+    @pytest.mark.parametrize(
+        'clear_questionnairedb',
+        [['answerQuestionnaire', 'questionnaire', 'purpose']],
+        indirect=True,
+    )
+    def test_get_chart_data_queries(self, clear_questionnairedb: None, admin_api_client: APIClient) -> None:
+        """Ensure the unread counts are retrieved with a single query per legacy database."""
+        factories.LegacyAppointmentFactory.create(patientsernum=self.patient)
+        factories.LegacyDocumentFactory.create(patientsernum=self.patient, readby=self.user.username)
+        factories.LegacyTxTeamMessageFactory.create(patientsernum=self.patient)
+        self._get_new_clinical_material(patient=self.patient)
+        self._get_new_research_material(patient=self.patient)
+        self._get_new_research_material(patient=self.patient)
+        respondent = questionnaires_factories.LegacyRespondentFactory.create(
+            title__content='Patient', title__language_id=2
+        )
+        questionnaires_factories.LegacyAnswerQuestionnaireFactory.create(
+            questionnaire__purpose=questionnaires_factories.LegacyPurposeFactory.create(id=2),
+            questionnaire__respondent=respondent,
+            patient__external_id=self.patient.patientsernum,
+        )
+
+        with (
+            CaptureQueriesContext(connections['legacy']) as legacy_queries,
+            CaptureQueriesContext(connections['questionnaire']) as questionnaire_queries,
+        ):
+            response = self._call_chart_data_request(admin_api_client, self.patient.patientsernum, self.user.username)
+
+        assert len(legacy_queries) == 1
+        assert len(questionnaire_queries) == 1
+        assert response.data == {
+            'unread_appointment_count': 1,
+            'unread_lab_result_count': 0,
+            'unread_document_count': 0,
+            'unread_txteammessage_count': 1,
+            'unread_educationalmaterial_count': 1,
+            'unread_questionnaire_count': 0,
+            'unread_research_reference_count': 2,
+            'unread_research_questionnaire_count': 1,
+            'unread_consent_questionnaire_count': 0,
+        }
+
+    def test_get_chart_data_no_relationship(self, admin_api_client: APIClient) -> None:
+        """Ensure the questionnaire database is not queried if the user has no relationship with the patient."""
+        with CaptureQueriesContext(connections['questionnaire']) as questionnaire_queries:
+            response = self._call_chart_data_request(admin_api_client, self.patient.patientsernum, 'unknown')
+
+        assert not questionnaire_queries
+        assert set(response.data.values()) == {0}
+
     @pytest.fixture(autouse=True)
     def _before_each(self) -> None:
         """Create patient and user objects for each test."""
@@ -2,24 +2,20 @@
 #
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
-import base64
-from http import HTTPStatus
+import uuid
 from typing import TYPE_CHECKING
 
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 from django.urls import reverse
-from django.utils import timezone
 from django.utils.crypto import get_random_string
 
 import pytest
-from fpdf import FPDFException
 from pytest_django.asserts import assertRaisesMessage
 from rest_framework import status
 
-from opal.hospital_settings import factories as hospital_settings_factories
 from opal.patients import factories as patient_factories
-from opal.services.integration.hospital import NonOKResponseError, PatientNotFoundError
-from opal.services.integration.tests.test_hospital import _MockResponse
+from opal.questionnaires import factories as questionnaire_factories
+from opal.questionnaires.models import QuestionnaireReportJob
 
 if TYPE_CHECKING:
     from pytest_mock.plugin import MockerFixture
@@ -180,209 +176,70 @@ class TestQuestionnairesReportView:
         assert response.data == error_response
         assertRaisesMessage(MultipleObjectsReturned, message)
 
-    @pytest.mark.django_db(databases=['default', 'questionnaire'])
-    def test_report_generation_error(
-        self,
-        api_client: APIClient,
-        admin_user: User,
-        mocker: MockerFixture,
-        questionnaire_data: None,
-        caplog: pytest.LogCaptureFixture,
-    ) -> None:
-        """Ensure that unsuccessful report generation is handled properly and does not cause any exceptions."""
-        hospital_settings_factories.Institution.create(pk=1)
-        patient = patient_factories.Patient.create(legacy_id=51)
-        hospital_patient = patient_factories.HospitalPatient.create(
-            patient=patient,
-            site=patient_factories.Site.create(acronym='RVH'),
-        )
-
-        message = 'An error occurred during questionnaire report generation.'
-        error_response = {'detail': message}
-
-        mock_generate = mocker.patch(
-            'opal.services.reports.questionnaire.generate_pdf',
-            side_effect=FPDFException('some PDF error'),
-        )
-
-        response = self.make_request(api_client, admin_user, hospital_patient.site.acronym, hospital_patient.mrn)
-
-        mock_generate.assert_called_once()
-        assert caplog.records[1].message == 'An error occurred during questionnaire report generation'
-        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-        assert response.data == error_response
-
-    @pytest.mark.django_db(databases=['default', 'questionnaire'])
-    def test_report_export_error(
-        self,
-        api_client: APIClient,
-        admin_user: User,
-        mocker: MockerFixture,
-        questionnaire_data: None,
-        caplog: pytest.LogCaptureFixture,
-    ) -> None:
-        """Ensure that unsuccessful PDF report exporting is handled properly and does not cause any exceptions."""
-        hospital_settings_factories.Institution.create(pk=1)
-        patient = patient_factories.Patient.create(legacy_id=51)
+    def test_report_queued(self, api_client: APIClient, admin_user: User) -> None:
+        """Ensure a request queues a report job and returns it without generating the report."""
         hospital_patient = patient_factories.HospitalPatient.create(
-            patient=patient,
             site=patient_factories.Site.create(acronym='RVH'),
         )
 
-        message = 'An error occurred while exporting a PDF report to the source system'
-        error_response = {'detail': message}
-
-        # mock an actual call to the legacy report generation service to raise a request error
-        mock_generate = mocker.patch(
-            'opal.services.reports.questionnaire.generate_pdf',
-            return_value=b'pdf',
-        )
-
-        error_data = {
-            'status': HTTPStatus.BAD_REQUEST.value,
-            'message': 'some error',
-        }
-
-        mock_export_pdf_report = mocker.patch(
-            'opal.services.integration.hospital.add_questionnaire_report',
-            side_effect=NonOKResponseError(_MockResponse(HTTPStatus.BAD_REQUEST, error_data)),
-        )
-
-        document_date = timezone.now().replace(microsecond=0)
-        mocker.patch(
-            'django.utils.timezone.now',
-            return_value=document_date,
-        )
-
         response = self.make_request(api_client, admin_user, hospital_patient.site.acronym, hospital_patient.mrn)
 
-        mock_export_pdf_report.assert_called_once()
-        mock_generate.assert_called_once()
-        assert caplog.records[1].message == message
-        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-        assert response.data == error_response
+        job = QuestionnaireReportJob.objects.get()
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['uuid'] == str(job.uuid)
+        assert response.data['status'] == QuestionnaireReportJob.Status.PENDING
+        assert job.mrn == hospital_patient.mrn
+        assert job.site == 'RVH'
 
-    @pytest.mark.django_db(databases=['default', 'questionnaire'])
-    def test_report_export_error_patient(
-        self,
-        api_client: APIClient,
-        admin_user: User,
-        mocker: MockerFixture,
-        questionnaire_data: None,
-        caplog: pytest.LogCaptureFixture,
-    ) -> None:
-        """Ensure that unsuccessful PDF report exporting is handled properly and does not cause any exceptions."""
-        hospital_settings_factories.Institution.create(pk=1)
-        patient = patient_factories.Patient.create(legacy_id=51)
+    def test_report_already_queued(self, api_client: APIClient, admin_user: User) -> None:
+        """Ensure a second request for the same patient returns the pending job instead of queueing another one."""
         hospital_patient = patient_factories.HospitalPatient.create(
-            patient=patient,
             site=patient_factories.Site.create(acronym='RVH'),
         )
 
-        message = 'The patient was not found in the source system'
-        error_response = {'detail': message}
-
-        # mock an actual call to the legacy report generation service to raise a request error
-        mock_generate = mocker.patch(
-            'opal.services.reports.questionnaire.generate_pdf',
-            return_value=b'pdf',
-        )
-
-        mock_export_pdf_report = mocker.patch(
-            'opal.services.integration.hospital.add_questionnaire_report',
-            side_effect=PatientNotFoundError(),
-        )
-
-        document_date = timezone.now().replace(microsecond=0)
-        mocker.patch(
-            'django.utils.timezone.now',
-            return_value=document_date,
-        )
+        first_response = self.make_request(api_client, admin_user, 'RVH', hospital_patient.mrn)
+        second_response = self.make_request(api_client, admin_user, 'RVH', hospital_patient.mrn)
 
-        response = self.make_request(api_client, admin_user, hospital_patient.site.acronym, hospital_patient.mrn)
+        assert second_response.status_code == status.HTTP_202_ACCEPTED
+        assert second_response.data['uuid'] == first_response.data['uuid']
+        assert QuestionnaireReportJob.objects.count() == 1
 
-        mock_export_pdf_report.assert_called_once()
-        mock_generate.assert_called_once()
-        assert caplog.records[1].message == message
-        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-        assert response.data == error_response
 
-    @pytest.mark.django_db(databases=['default', 'questionnaire'])
-    def test_post_report_export(
-        self,
-        api_client: APIClient,
-        admin_user: User,
-        mocker: MockerFixture,
-        questionnaire_data: None,
-    ) -> None:
-        """Test PDF report export request sent to the source system."""
-        hospital_settings_factories.Institution.create(pk=1)
-        patient = patient_factories.Patient.create(legacy_id=51)
-        hospital_patient = patient_factories.HospitalPatient.create(
-            patient=patient,
-            site=patient_factories.Site.create(acronym='RVH'),
-        )
+class TestQuestionnairesReportJobView:
+    """Class wrapper for the `QuestionnairesReportJobView` tests."""
 
-        # mock an actual call to the legacy report generation service to raise a request error
-        mocker.patch(
-            'opal.services.reports.questionnaire.generate_pdf',
-            return_value=b'pdf',
-        )
+    def test_unauthenticated_unauthorized(self, api_client: APIClient, user: User) -> None:
+        """Test the request while unauthenticated and without permission."""
+        job = questionnaire_factories.QuestionnaireReportJob.create()
+        url = reverse('api:questionnaires-reviewed-job', kwargs={'uuid': job.uuid})
 
-        mock_export_pdf_report = mocker.patch(
-            'opal.services.integration.hospital.add_questionnaire_report',
-        )
+        response = api_client.get(url)
 
-        document_date = timezone.now().replace(microsecond=0)
-        mocker.patch(
-            'django.utils.timezone.now',
-            return_value=document_date,
-        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
 
-        response = self.make_request(api_client, admin_user, hospital_patient.site.acronym, hospital_patient.mrn)
+        api_client.force_login(user)
+        response = api_client.get(url)
 
-        mock_export_pdf_report.assert_called_once_with(
-            hospital_patient.mrn,
-            hospital_patient.site.acronym,
-            base64.b64encode(b'pdf'),
-        )
-        assert response.status_code == status.HTTP_200_OK
-        assert response.data is None
-
-    # Marking this slow since the test uses chromium
-    @pytest.mark.slow
-    # Allow hosts to make the test work for Windows, Linux and Unix-based environments
-    @pytest.mark.allow_hosts(['127.0.0.1'])
-    @pytest.mark.django_db(databases=['default', 'questionnaire'])
-    def test_pdf_generation(
-        self,
-        api_client: APIClient,
-        admin_user: User,
-        mocker: MockerFixture,
-        questionnaire_data: None,
-    ) -> None:
-        """Test that PDF report is created successfully."""
-        hospital_settings_factories.Institution.create(pk=1)
-        patient = patient_factories.Patient.create(legacy_id=51)
-        hospital_patient = patient_factories.HospitalPatient.create(
-            patient=patient,
-            site=patient_factories.Site.create(acronym='RVH'),
-        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
 
-        mock_export_pdf_report = mocker.patch(
-            'opal.services.integration.hospital.add_questionnaire_report',
-        )
+    def test_job_status(self, api_client: APIClient, orms_user: User) -> None:
+        """Ensure the status of a finished job can be polled."""
+        job = questionnaire_factories.QuestionnaireReportJob.create()
+        job.fail('The patient was not found in the source system')
+        api_client.force_login(orms_user)
 
-        response = self.make_request(api_client, admin_user, hospital_patient.site.acronym, hospital_patient.mrn)
+        response = api_client.get(reverse('api:questionnaires-reviewed-job', kwargs={'uuid': job.uuid}))
 
         assert response.status_code == status.HTTP_200_OK
-        assert response.data is None
-        calls = mock_export_pdf_report.call_args_list
+        assert response.data['uuid'] == str(job.uuid)
+        assert response.data['status'] == QuestionnaireReportJob.Status.FAILED
+        assert response.data['error'] == 'The patient was not found in the source system'
+        assert response.data['finished_at'] is not None
 
-        assert len(calls) == 1
-        encoded_pdf = calls[0].args[2]
+    def test_job_not_found(self, api_client: APIClient, orms_user: User) -> None:
+        """Ensure polling an unknown job returns a 404."""
+        api_client.force_login(orms_user)
 
-        assert encoded_pdf
-        base64_pdf = base64.b64decode(encoded_pdf)
+        response = api_client.get(reverse('api:questionnaires-reviewed-job', kwargs={'uuid': uuid.uuid4()}))
 
-        assert base64_pdf.startswith(b'%PDF-')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,217 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Command for processing the queued questionnaire report jobs."""
+
+import base64
+import datetime as dt
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import DatabaseError, close_old_connections, connections
+from django.utils import timezone
+
+import requests
+import structlog
+from fpdf import FPDFException
+
+from opal.legacy.utils import generate_questionnaire_report, get_questionnaire_data
+from opal.patients.models import Patient
+from opal.questionnaires.models import QuestionnaireReportJob
+from opal.services.integration import hospital
+
+LOGGER = structlog.get_logger()
+
+# the number of seconds between checks of each worker for abandoned jobs
+REQUEUE_STALE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    """
+    Command to process the queued questionnaire report jobs.
+
+    Every worker claims the oldest pending job, generates the questionnaire report of the patient
+    and exports it to the source system.
+    The outcome is recorded on the job so that it can be polled via the API.
+    """
+
+    help = (
+        'Generate the queued questionnaire reports and export them to the source system'
+        + '\nBy default the command keeps polling for new jobs; use --exit-when-empty to stop once the queue is empty'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Add arguments to the command.
+
+        Args:
+            parser: the command parser to add arguments to
+        """
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Number of threads processing jobs concurrently, each with its own DB connections (default: 2)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5,
+            help='Number of seconds to wait before polling again when the queue is empty (default: 5)',
+        )
+        parser.add_argument(
+            '--exit-when-empty',
+            action='store_true',
+            default=False,
+            help='Stop once there are no pending jobs instead of polling for new jobs (default: false)',
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=30,
+            help=(
+                'Number of minutes after which a running job is considered abandoned'
+                + ' (e.g., due to a terminated worker) and queued again (default: 30)'
+            ),
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """
+        Process the queued questionnaire report jobs.
+
+        Args:
+            args: input arguments
+            options: additional keyword arguments
+        """
+        self.poll_interval = options['poll_interval']
+        self.exit_when_empty = options['exit_when_empty']
+        self.stale_after = dt.timedelta(minutes=options['stale_after'])
+        workers = options['workers']
+
+        self._requeue_stale()
+
+        if workers > 1:
+            # Each worker runs in its own thread and therefore uses its own DB connections
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._work_in_thread) for _ in range(workers)]
+                processed = sum(future.result() for future in futures)
+        else:
+            processed = self._work()
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully processed {processed} questionnaire report job(s)'))
+
+    def _work(self) -> int:
+        """
+        Claim and process jobs until the queue is empty (with `--exit-when-empty`) or forever.
+
+        Returns:
+            the number of processed jobs
+        """
+        processed = 0
+        next_requeue = time.monotonic() + REQUEUE_STALE_INTERVAL
+
+        while True:
+            # discard connections that were closed by the DB server while waiting for new jobs
+            close_old_connections()
+
+            # jobs can be abandoned at any time (e.g., by a terminated worker of another command)
+            if time.monotonic() >= next_requeue:
+                self._requeue_stale()
+                next_requeue = time.monotonic() + REQUEUE_STALE_INTERVAL
+
+            job = QuestionnaireReportJob.objects.claim_next()
+
+            if job is None:
+                if self.exit_when_empty:
+                    return processed
+
+                time.sleep(self.poll_interval)
+                continue
+
+            try:
+                self._process_job(job)
+            # Broad except: an unexpected error must not stop the worker and leave the job running
+            except Exception:
+                LOGGER.exception('An unexpected error occurred while processing questionnaire report job %s', job.uuid)
+                self._fail_job(job, 'An unexpected error occurred while processing the questionnaire report.')
+
+            processed += 1
+
+    def _work_in_thread(self) -> int:
+        """
+        Claim and process jobs in a worker thread.
+
+        Django opens separate DB connections per thread, they are closed once the worker is done.
+
+        Returns:
+            the number of processed jobs
+        """
+        try:
+            return self._work()
+        finally:
+            connections.close_all()
+
+    def _requeue_stale(self) -> None:
+        """Queue running jobs again that were abandoned, i.e., started more than `--stale-after` minutes ago."""
+        requeued = QuestionnaireReportJob.objects.requeue_stale(started_before=timezone.now() - self.stale_after)
+
+        if requeued:
+            LOGGER.warning('Queued %s abandoned questionnaire report job(s) again', requeued)
+
+    def _fail_job(self, job: QuestionnaireReportJob, error: str) -> None:
+        """
+        Mark a job as failed after an unexpected error.
+
+        If the job cannot be updated (e.g., the DB connection was lost) it is queued again once it is stale.
+
+        Args:
+            job: the job that failed
+            error: the reason of the failure
+        """
+        try:
+            job.fail(error)
+        except DatabaseError:
+            LOGGER.exception('Could not mark questionnaire report job %s as failed', job.uuid)
+
+    def _process_job(self, job: QuestionnaireReportJob) -> None:
+        """
+        Generate the questionnaire report of the job's patient and export it to the source system.
+
+        Args:
+            job: the claimed job
+        """
+        start = time.perf_counter()
+
+        try:
+            patient = Patient.objects.get_patient_by_site_mrn_list([{'site': {'acronym': job.site}, 'mrn': job.mrn}])
+        except ObjectDoesNotExist, MultipleObjectsReturned:
+            LOGGER.exception('Could not find the patient of questionnaire report job %s', job.uuid)
+            job.fail('Could not find `Patient` record with the provided MRN and site acronym.')
+            return
+
+        try:
+            pdf_report = generate_questionnaire_report(patient, get_questionnaire_data(patient))
+        except FPDFException:
+            LOGGER.exception('An error occurred during questionnaire report generation')
+            job.fail('An error occurred during questionnaire report generation.')
+            return
+
+        encoded_report = base64.b64encode(pdf_report)
+
+        try:
+            hospital.add_questionnaire_report(job.mrn, job.site, encoded_report)
+        except hospital.NonOKResponseError, requests.RequestException:
+            LOGGER.exception('An error occurred while exporting a PDF report to the source system')
+            job.fail('An error occurred while exporting a PDF report to the source system')
+            return
+        except hospital.PatientNotFoundError:
+            LOGGER.exception('The patient was not found in the source system')
+            job.fail('The patient was not found in the source system')
+            return
+
+        job.complete()
+        LOGGER.info('Processed questionnaire report job %s in %.3f seconds', job.uuid, time.perf_counter() - start)
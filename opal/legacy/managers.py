@@ -16,7 +16,8 @@ See tutorial: https://www.pythontutorial.net/python-oop/python-mixin/
 """
 
 import logging
-from typing import TYPE_CHECKING, Any, Final, TypedDict, TypeVar
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Final, TypedDict, TypeVar, cast
 
 from django.apps import apps
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
@@ -27,6 +28,7 @@ from opal.patients.models import Relationship, RelationshipStatus
 
 if TYPE_CHECKING:
     import datetime as dt
+    from collections.abc import Iterable, Mapping
 
 
 class DatabankAppointmentData(TypedDict):
@@ -107,6 +109,59 @@ _Model = TypeVar('_Model', bound=models.Model)
 logger = logging.getLogger(__name__)
 
 LOGIN_ACTIVITY_FILTER: Final = models.Q(request='Log', parameters__contains='"Activity":"Login"')
+#: Name of the annotation containing the legacy patient ser num of a databank data row
+DATABANK_PATIENT_KEY: Final = 'databank_patient_ser_num'
+
+
+def _get_databank_synchronized_filter(
+    patient_field: str,
+    last_synchronized_by_patient: Mapping[int, dt.datetime],
+) -> models.Q:
+    """
+    Build the filter for the data of the given patients that was updated since their last synchronization.
+
+    The patients are grouped by their last synchronization time to keep the number of conditions low,
+    since most patients are synchronized during the same run of the databank command.
+
+    Args:
+        patient_field: name of the field referencing the legacy patient
+        last_synchronized_by_patient: last synchronization time per legacy patient ser num
+
+    Returns:
+        the filter for the data of the given patients
+    """
+    patients_by_last_synchronized: defaultdict[dt.datetime, list[int]] = defaultdict(list)
+    for patient_ser_num, last_synchronized in last_synchronized_by_patient.items():
+        patients_by_last_synchronized[last_synchronized].append(patient_ser_num)
+
+    # start with a filter matching nothing so that no patients result in no data
+    synchronized_filter = models.Q(pk__in=[])
+    for last_synchronized, patient_ser_nums in patients_by_last_synchronized.items():
+        synchronized_filter |= models.Q(
+            **{f'{patient_field}__in': patient_ser_nums},
+            last_updated__gt=last_synchronized,
+        )
+
+    return synchronized_filter
+
+
+def _group_databank_data_by_patient(rows: Iterable[dict[str, Any]]) -> dict[int, list[Any]]:
+    """
+    Group the databank data rows by their legacy patient ser num.
+
+    The `DATABANK_PATIENT_KEY` is removed from each row.
+
+    Args:
+        rows: databank data rows containing the `DATABANK_PATIENT_KEY`
+
+    Returns:
+        the databank data rows per legacy patient ser num
+    """
+    data_by_patient: defaultdict[int, list[Any]] = defaultdict(list)
+    for row in rows:
+        data_by_patient[row.pop(DATABANK_PATIENT_KEY)].append(row)
+
+    return dict(data_by_patient)
 
 
 class UnreadQuerySetMixin(models.Manager[_Model]):
@@ -250,6 +305,39 @@ class LegacyAppointmentManager(models.Manager['LegacyAppointment']):
             Appointment data
 
         """
+        return self._get_databank_queryset({patient_ser_num: last_synchronized})
+
+    def get_databank_data_for_patients(
+        self,
+        last_synchronized_by_patient: Mapping[int, dt.datetime],
+    ) -> dict[int, list[DatabankAppointmentData]]:
+        """
+        Retrieve the latest de-identified appointment data for multiple consenting DataBank patients in one query.
+
+        Args:
+            last_synchronized_by_patient: Last successful synchronization time per legacy OpalDB patient ser num
+
+        Returns:
+            Appointment data per legacy OpalDB patient ser num (patients without data are omitted)
+        """
+        rows = self._get_databank_queryset(last_synchronized_by_patient, DATABANK_PATIENT_KEY)
+        return _group_databank_data_by_patient(cast('Iterable[dict[str, Any]]', rows))
+
+    def _get_databank_queryset(
+        self,
+        last_synchronized_by_patient: Mapping[int, dt.datetime],
+        *extra_fields: str,
+    ) -> models.QuerySet[LegacyAppointment, DatabankAppointmentData]:
+        """
+        Build the query of the de-identified appointment data of consenting DataBank patients.
+
+        Args:
+            last_synchronized_by_patient: Last successful synchronization time per legacy OpalDB patient ser num
+            extra_fields: additional fields to return (e.g., the `DATABANK_PATIENT_KEY`)
+
+        Returns:
+            Appointment data
+        """
         return (
             self
             .select_related(
@@ -258,9 +346,8 @@ class LegacyAppointmentManager(models.Manager['LegacyAppointment']):
                 'patientsernum',
             )
             .filter(
+                _get_databank_synchronized_filter('patientsernum', last_synchronized_by_patient),
                 checkin=1,
-                patientsernum__patientsernum=patient_ser_num,
-                last_updated__gt=last_synchronized,
             )
             .annotate(
                 appointment_id=models.F('appointmentsernum'),
@@ -271,6 +358,7 @@ class LegacyAppointmentManager(models.Manager['LegacyAppointment']):
                 source_db_appointment_id=models.F('source_system_id'),
                 alias_name=models.F('aliasexpressionsernum__aliassernum__aliasname_en'),
                 scheduled_start_time=models.F('scheduledstarttime'),
+                **{DATABANK_PATIENT_KEY: models.F('patientsernum')},
             )
             .values(
                 'appointment_id',
@@ -283,6 +371,7 @@ class LegacyAppointmentManager(models.Manager['LegacyAppointment']):
                 'scheduled_start_time',
                 'scheduled_end_time',
                 'last_updated',
+                *extra_fields,
             )
         )
 
@@ -419,11 +508,43 @@ class LegacyPatientManager(models.Manager['LegacyPatient']):
             Demographics data
 
         """
+        return self._get_databank_queryset({patient_ser_num: last_synchronized})
+
+    def get_databank_data_for_patients(
+        self,
+        last_synchronized_by_patient: Mapping[int, dt.datetime],
+    ) -> dict[int, list[DatabankPatientData]]:
+        """
+        Retrieve the latest de-identified demographics data for multiple consenting DataBank patients in one query.
+
+        Args:
+            last_synchronized_by_patient: Last successful synchronization time per legacy OpalDB patient ser num
+
+        Returns:
+            Demographics data per legacy OpalDB patient ser num (patients without data are omitted)
+        """
+        rows = self._get_databank_queryset(last_synchronized_by_patient, DATABANK_PATIENT_KEY)
+        return _group_databank_data_by_patient(cast('Iterable[dict[str, Any]]', rows))
+
+    def _get_databank_queryset(
+        self,
+        last_synchronized_by_patient: Mapping[int, dt.datetime],
+        *extra_fields: str,
+    ) -> models.QuerySet[LegacyPatient, DatabankPatientData]:
+        """
+        Build the query of the de-identified demographics data of consenting DataBank patients.
+
+        Args:
+            last_synchronized_by_patient: Last successful synchronization time per legacy OpalDB patient ser num
+            extra_fields: additional fields to return (e.g., the `DATABANK_PATIENT_KEY`)
+
+        Returns:
+            Demographics data
+        """
         return (
             self
             .filter(
-                patientsernum=patient_ser_num,
-                last_updated__gt=last_synchronized,
+                _get_databank_synchronized_filter('patientsernum', last_synchronized_by_patient),
             )
             .exclude(
                 sex='Unknown',
@@ -435,6 +556,7 @@ class LegacyPatientManager(models.Manager['LegacyPatient']):
                 patient_dob=models.F('date_of_birth'),
                 patient_primary_language=models.F('language'),
                 patient_death_date=models.F('death_date'),
+                **{DATABANK_PATIENT_KEY: models.F('patientsernum')},
             )
             .values(
                 'patient_id',
@@ -444,6 +566,7 @@ class LegacyPatientManager(models.Manager['LegacyPatient']):
                 'patient_primary_language',
                 'patient_death_date',
                 'last_updated',
+                *extra_fields,
             )
         )
 
@@ -473,20 +596,55 @@ class LegacyDiagnosisManager(models.Manager['LegacyDiagnosis']):
             patient_ser_num: Legacy OpalDB patient ser num
             last_synchronized: Last time the cron process to send databank data ran successfully
 
+        Returns:
+            Diagnosis data
+        """
+        return self._get_databank_queryset({patient_ser_num: last_synchronized})
+
+    def get_databank_data_for_patients(
+        self,
+        last_synchronized_by_patient: Mapping[int, dt.datetime],
+    ) -> dict[int, list[DatabankDiagnosisData]]:
+        """
+        Retrieve the latest de-identified diagnosis data for multiple consenting DataBank patients in one query.
+
+        See `get_databank_data_for_patient` for the limitations of the diagnosis data.
+
+        Args:
+            last_synchronized_by_patient: Last successful synchronization time per legacy OpalDB patient ser num
+
+        Returns:
+            Diagnosis data per legacy OpalDB patient ser num (patients without data are omitted)
+        """
+        rows = self._get_databank_queryset(last_synchronized_by_patient, DATABANK_PATIENT_KEY)
+        return _group_databank_data_by_patient(cast('Iterable[dict[str, Any]]', rows))
+
+    def _get_databank_queryset(
+        self,
+        last_synchronized_by_patient: Mapping[int, dt.datetime],
+        *extra_fields: str,
+    ) -> models.QuerySet[LegacyDiagnosis, DatabankDiagnosisData]:
+        """
+        Build the query of the de-identified diagnosis data of consenting DataBank patients.
+
+        Args:
+            last_synchronized_by_patient: Last successful synchronization time per legacy OpalDB patient ser num
+            extra_fields: additional fields to return (e.g., the `DATABANK_PATIENT_KEY`)
+
         Returns:
             Diagnosis data
         """
         return (
             self
             .filter(
-                patient_ser_num=patient_ser_num,
-                last_updated__gt=last_synchronized,
+                _get_databank_synchronized_filter('patient_ser_num', last_synchronized_by_patient),
             )
             .annotate(
                 diagnosis_id=models.F('diagnosis_ser_num'),
                 date_created=models.F('creation_date'),
                 source_system_code=models.F('diagnosis_code'),
                 source_system_code_description=models.F('description_en'),
+                **{DATABANK_PATIENT_KEY: models.F('patient_ser_num')},
             )
             .values(
                 'diagnosis_id',
@@ -494,6 +652,7 @@ class LegacyDiagnosisManager(models.Manager['LegacyDiagnosis']):
                 'source_system_code',
                 'source_system_code_description',
                 'last_updated',
+                *extra_fields,
             )
         )
 
@@ -513,6 +672,39 @@ class LegacyPatientTestResultManager(models.Manager['LegacyPatientTestResult']):
             patient_ser_num: Legacy OpalDB patient ser num
             last_synchronized: Last time the cron process to send databank data ran successfully
 
+        Returns:
+            Lab data
+        """
+        return self._get_databank_queryset({patient_ser_num: last_synchronized})
+
+    def get_databank_data_for_patients(
+        self,
+        last_synchronized_by_patient: Mapping[int, dt.datetime],
+    ) -> dict[int, list[DatabankLabData]]:
+        """
+        Retrieve the latest de-identified labs data for multiple consenting DataBank patients in one query.
+
+        Args:
+            last_synchronized_by_patient: Last successful synchronization time per legacy OpalDB patient ser num
+
+        Returns:
+            Lab data per legacy OpalDB patient ser num (patients without data are omitted)
+        """
+        rows = self._get_databank_queryset(last_synchronized_by_patient, DATABANK_PATIENT_KEY)
+        return _group_databank_data_by_patient(cast('Iterable[dict[str, Any]]', rows))
+
+    def _get_databank_queryset(
+        self,
+        last_synchronized_by_patient: Mapping[int, dt.datetime],
+        *extra_fields: str,
+    ) -> models.QuerySet[LegacyPatientTestResult, DatabankLabData]:
+        """
+        Build the query of the de-identified labs data of consenting DataBank patients.
+
+        Args:
+            last_synchronized_by_patient: Last successful synchronization time per legacy OpalDB patient ser num
+            extra_fields: additional fields to return (e.g., the `DATABANK_PATIENT_KEY`)
+
         Returns:
             Lab data
         """
@@ -525,8 +717,7 @@ class LegacyPatientTestResultManager(models.Manager['LegacyPatientTestResult']):
                 'test_expression_ser_num__source_database',
             )
             .filter(
-                patient_ser_num=patient_ser_num,
-                last_updated__gt=last_synchronized,
+                _get_databank_synchronized_filter('patient_ser_num', last_synchronized_by_patient),
             )
             .annotate(
                 test_result_id=models.F('patient_test_result_ser_num'),
@@ -541,6 +732,7 @@ class LegacyPatientTestResultManager(models.Manager['LegacyPatientTestResult']):
                 max_norm_range=models.F('normal_range_max'),
                 min_norm_range=models.F('normal_range_min'),
                 source_system=models.F('test_expression_ser_num__source_database__source_database_name'),
+                **{DATABANK_PATIENT_KEY: models.F('patient_ser_num')},
             )
             .values(
                 'test_result_id',
@@ -557,6 +749,7 @@ class LegacyPatientTestResultManager(models.Manager['LegacyPatientTestResult']):
                 'abnormal_flag',
                 'source_system',
                 'last_updated',
+                *extra_fields,
             )
             .order_by('component_result_date', 'test_group_indicator', 'test_component_sequence')
         )
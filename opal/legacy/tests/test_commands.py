@@ -2,6 +2,8 @@
 #
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
+import base64
+import datetime as dt
 import uuid
 from datetime import date, datetime
 from http import HTTPStatus
@@ -14,6 +16,7 @@ from django.utils import timezone
 
 import pytest
 import requests
+from fpdf import FPDFException
 
 from opal.caregivers import factories as caregiver_factories
 from opal.caregivers.models import SecurityAnswer, SecurityQuestion
@@ -23,6 +26,9 @@ from opal.legacy import factories as legacy_factories
 from opal.legacy import models as legacy_models
 from opal.patients import factories as patient_factories
 from opal.patients import models as patient_models
+from opal.questionnaires.models import QuestionnaireReportJob
+from opal.services.integration.hospital import NonOKResponseError, PatientNotFoundError
+from opal.services.integration.tests.test_hospital import _MockResponse
 from opal.usage_statistics.models import DailyPatientDataReceived, DailyUserAppActivity, DailyUserPatientActivity
 from opal.users import factories as user_factories
 from opal.users.models import ClinicalStaff
@@ -32,6 +38,7 @@ from ..management.commands import migrate_caregivers
 if TYPE_CHECKING:
     from pytest_django import DjangoDbBlocker
     from pytest_mock.plugin import MockerFixture
+    from structlog.testing import LogCapture
 
 pytestmark = pytest.mark.django_db(databases=['default', 'legacy', 'questionnaire'])
 
@@ -1623,3 +1630,207 @@ class TestMigrateLegacyUsageStatisticsMigration(CommandTestMixin):
             caregiver=caregiver,
             type=relationship_type,
         )
+
+
+class TestProcessQuestionnaireReportsCommand(CommandTestMixin):
+    """Test class for the `process_questionnaire_reports` command."""
+
+    def _create_job(self) -> QuestionnaireReportJob:
+        """
+        Create the patient with questionnaire data and queue a report job for them.
+
+        Returns:
+            the queued job
+        """
+        hospital_settings_factories.Institution.create(pk=1)
+        patient = patient_factories.Patient.create(legacy_id=51)
+        hospital_patient = patient_factories.HospitalPatient.create(
+            patient=patient,
+            site=patient_factories.Site.create(acronym='RVH'),
+        )
+        job, _created = QuestionnaireReportJob.objects.enqueue(hospital_patient.mrn, 'RVH')
+
+        return job
+
+    def test_no_jobs(self) -> None:
+        """Ensure the command stops when there are no pending jobs."""
+        message, error = self._call_command('process_questionnaire_reports', '--exit-when-empty', '--workers=1')
+
+        assert message == 'Successfully processed 0 questionnaire report job(s)\n'
+        assert not error
+
+    def test_report_export(self, mocker: MockerFixture, questionnaire_data: None) -> None:
+        """Ensure the report of a queued job is generated and exported to the source system."""
+        job = self._create_job()
+        mocker.patch('opal.services.reports.questionnaire.generate_pdf', return_value=b'pdf')
+        mock_export_pdf_report = mocker.patch('opal.services.integration.hospital.add_questionnaire_report')
+
+        message, _error = self._call_command('process_questionnaire_reports', '--exit-when-empty', '--workers=1')
+
+        mock_export_pdf_report.assert_called_once_with(job.mrn, 'RVH', base64.b64encode(b'pdf'))
+        job.refresh_from_db()
+        assert job.status == QuestionnaireReportJob.Status.COMPLETED
+        assert job.active_key is None
+        assert message == 'Successfully processed 1 questionnaire report job(s)\n'
+
+    def test_patient_not_found(self) -> None:
+        """Ensure the job fails if the patient no longer exists."""
+        job, _created = QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+
+        self._call_command('process_questionnaire_reports', '--exit-when-empty', '--workers=1')
+
+        job.refresh_from_db()
+        assert job.status == QuestionnaireReportJob.Status.FAILED
+        assert job.error == 'Could not find `Patient` record with the provided MRN and site acronym.'
+
+    def test_report_generation_error(
+        self,
+        mocker: MockerFixture,
+        questionnaire_data: None,
+        structlog_output: LogCapture,
+    ) -> None:
+        """Ensure that unsuccessful report generation fails the job."""
+        job = self._create_job()
+        mock_generate = mocker.patch(
+            'opal.services.reports.questionnaire.generate_pdf',
+            side_effect=FPDFException('some PDF error'),
+        )
+        mock_export_pdf_report = mocker.patch('opal.services.integration.hospital.add_questionnaire_report')
+
+        self._call_command('process_questionnaire_reports', '--exit-when-empty', '--workers=1')
+
+        mock_generate.assert_called_once()
+        mock_export_pdf_report.assert_not_called()
+        job.refresh_from_db()
+        assert job.status == QuestionnaireReportJob.Status.FAILED
+        assert job.error == 'An error occurred during questionnaire report generation.'
+        assert 'An error occurred during questionnaire report generation' in [
+            entry['event'] for entry in structlog_output.entries
+        ]
+
+    def test_report_export_error(self, mocker: MockerFixture, questionnaire_data: None) -> None:
+        """Ensure that unsuccessful PDF report exporting fails the job."""
+        job = self._create_job()
+        mocker.patch('opal.services.reports.questionnaire.generate_pdf', return_value=b'pdf')
+        mocker.patch(
+            'opal.services.integration.hospital.add_questionnaire_report',
+            side_effect=NonOKResponseError(
+                _MockResponse(HTTPStatus.BAD_REQUEST, {'status': HTTPStatus.BAD_REQUEST.value, 'message': 'error'}),
+            ),
+        )
+
+        self._call_command('process_questionnaire_reports', '--exit-when-empty', '--workers=1')
+
+        job.refresh_from_db()
+        assert job.status == QuestionnaireReportJob.Status.FAILED
+        assert job.error == 'An error occurred while exporting a PDF report to the source system'
+
+    def test_report_export_error_patient(self, mocker: MockerFixture, questionnaire_data: None) -> None:
+        """Ensure that the job fails if the patient is not found in the source system."""
+        job = self._create_job()
+        mocker.patch('opal.services.reports.questionnaire.generate_pdf', return_value=b'pdf')
+        mocker.patch(
+            'opal.services.integration.hospital.add_questionnaire_report',
+            side_effect=PatientNotFoundError(),
+        )
+
+        self._call_command('process_questionnaire_reports', '--exit-when-empty', '--workers=1')
+
+        job.refresh_from_db()
+        assert job.status == QuestionnaireReportJob.Status.FAILED
+        assert job.error == 'The patient was not found in the source system'
+
+    def test_report_export_timeout(self, mocker: MockerFixture, questionnaire_data: None) -> None:
+        """Ensure that a request error while exporting the PDF report fails the job."""
+        job = self._create_job()
+        mocker.patch('opal.services.reports.questionnaire.generate_pdf', return_value=b'pdf')
+        mocker.patch(
+            'opal.services.integration.hospital.add_questionnaire_report',
+            side_effect=requests.Timeout('timed out'),
+        )
+
+        self._call_command('process_questionnaire_reports', '--exit-when-empty', '--workers=1')
+
+        job.refresh_from_db()
+        assert job.status == QuestionnaireReportJob.Status.FAILED
+        assert job.error == 'An error occurred while exporting a PDF report to the source system'
+        assert job.active_key is None
+
+    def test_unexpected_error(self, mocker: MockerFixture, structlog_output: LogCapture) -> None:
+        """Ensure that an unexpected error fails the job and the worker continues with the next job."""
+        job = self._create_job()
+        other_job, _created = QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+        mocker.patch(
+            'opal.legacy.management.commands.process_questionnaire_reports.get_questionnaire_data',
+            side_effect=RuntimeError('unexpected'),
+        )
+
+        message, _error = self._call_command('process_questionnaire_reports', '--exit-when-empty', '--workers=1')
+
+        job.refresh_from_db()
+        assert job.status == QuestionnaireReportJob.Status.FAILED
+        assert job.error == 'An unexpected error occurred while processing the questionnaire report.'
+        assert job.active_key is None
+        other_job.refresh_from_db()
+        assert other_job.status == QuestionnaireReportJob.Status.FAILED
+        assert message == 'Successfully processed 2 questionnaire report job(s)\n'
+        assert 'An unexpected error occurred while processing questionnaire report job %s' in [
+            entry['event'] for entry in structlog_output.entries
+        ]
+
+    def test_stale_jobs_requeued_periodically(self, mocker: MockerFixture) -> None:
+        """Ensure the workers queue abandoned jobs again while processing jobs, not only on startup."""
+        mocker.patch(
+            'opal.legacy.management.commands.process_questionnaire_reports.REQUEUE_STALE_INTERVAL',
+            0,
+        )
+        mock_requeue_stale = mocker.spy(QuestionnaireReportJob.objects, 'requeue_stale')
+        QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+
+        self._call_command('process_questionnaire_reports', '--exit-when-empty', '--workers=1')
+
+        # on startup and before claiming the job and checking for more jobs
+        assert mock_requeue_stale.call_count == 3
+
+    def test_stale_job_requeued(self) -> None:
+        """Ensure a job abandoned by a terminated worker is processed again."""
+        QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+        job = QuestionnaireReportJob.objects.claim_next()
+        assert job is not None
+        QuestionnaireReportJob.objects.filter(pk=job.pk).update(
+            started_at=timezone.now() - dt.timedelta(minutes=31),
+        )
+
+        message, _error = self._call_command('process_questionnaire_reports', '--exit-when-empty', '--workers=1')
+
+        job.refresh_from_db()
+        # the patient does not exist but the job was processed again
+        assert job.status == QuestionnaireReportJob.Status.FAILED
+        assert message == 'Successfully processed 1 questionnaire report job(s)\n'
+
+    def test_running_job_not_requeued(self) -> None:
+        """Ensure a job that is still being processed by another worker is not processed again."""
+        QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+        job = QuestionnaireReportJob.objects.claim_next()
+        assert job is not None
+
+        message, _error = self._call_command('process_questionnaire_reports', '--exit-when-empty', '--workers=1')
+
+        job.refresh_from_db()
+        assert job.status == QuestionnaireReportJob.Status.RUNNING
+        assert message == 'Successfully processed 0 questionnaire report job(s)\n'
+
+    # Marking this slow since the test uses chromium
+    @pytest.mark.slow
+    # Allow hosts to make the test work for Windows, Linux and Unix-based environments
+    @pytest.mark.allow_hosts(['127.0.0.1'])
+    def test_pdf_generation(self, mocker: MockerFixture, questionnaire_data: None) -> None:
+        """Test that the PDF report is created successfully."""
+        self._create_job()
+        mock_export_pdf_report = mocker.patch('opal.services.integration.hospital.add_questionnaire_report')
+
+        self._call_command('process_questionnaire_reports', '--exit-when-empty', '--workers=1')
+
+        calls = mock_export_pdf_report.call_args_list
+        assert len(calls) == 1
+        assert base64.b64decode(calls[0].args[2]).startswith(b'%PDF-')
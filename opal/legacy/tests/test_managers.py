@@ -169,6 +169,66 @@ def test_get_labs_databank_data() -> None:
     assert databank_data.count() == 3
 
 
+def test_get_databank_data_for_patients_grouped_by_patient() -> None:
+    """Ensure the databank data of multiple patients is fetched in one query and grouped by patient."""
+    patient_one = factories.LegacyPatientFactory.create()
+    patient_two = factories.LegacyPatientFactory.create(patientsernum=52)
+    patient_without_data = factories.LegacyPatientFactory.create(patientsernum=53)
+    factories.LegacyPatientTestResultFactory.create(patient_ser_num=patient_one)
+    factories.LegacyPatientTestResultFactory.create(patient_ser_num=patient_one)
+    factories.LegacyPatientTestResultFactory.create(patient_ser_num=patient_two)
+    factories.LegacyPatientTestResultFactory.create(patient_ser_num=patient_without_data)
+    last_cron_sync_time = dt.datetime(2023, 1, 1, 0, 0, 5, tzinfo=timezone.get_current_timezone())
+    # the data of the second patient was already synchronized
+    future_sync_time = timezone.now() + dt.timedelta(days=1)
+
+    databank_data = legacy_models.LegacyPatientTestResult.objects.get_databank_data_for_patients({
+        patient_one.patientsernum: last_cron_sync_time,
+        patient_two.patientsernum: future_sync_time,
+    })
+
+    assert list(databank_data) == [patient_one.patientsernum]
+    assert len(databank_data[patient_one.patientsernum]) == 2
+    expected_data = legacy_models.LegacyPatientTestResult.objects.get_databank_data_for_patient(
+        patient_ser_num=patient_one.patientsernum,
+        last_synchronized=last_cron_sync_time,
+    )
+    assert databank_data[patient_one.patientsernum] == list(expected_data)
+
+
+def test_get_databank_data_for_patients_all_modules() -> None:
+    """Ensure the databank data of each module is grouped by patient without exposing the patient ser num."""
+    patient_one = factories.LegacyPatientFactory.create()
+    patient_two = factories.LegacyPatientFactory.create(patientsernum=52)
+    for patient in (patient_one, patient_two):
+        factories.LegacyAppointmentFactory.create(checkin=1, patientsernum=patient)
+        factories.LegacyDiagnosisFactory.create(patient_ser_num=patient)
+    last_cron_sync_time = dt.datetime(2023, 1, 1, 0, 0, 5, tzinfo=timezone.get_current_timezone())
+    last_synchronized_by_patient = {
+        patient_one.patientsernum: last_cron_sync_time,
+        patient_two.patientsernum: last_cron_sync_time,
+    }
+
+    for manager in (
+        legacy_models.LegacyAppointment.objects,
+        legacy_models.LegacyDiagnosis.objects,
+        legacy_models.LegacyPatient.objects,
+    ):
+        databank_data = manager.get_databank_data_for_patients(last_synchronized_by_patient)
+
+        assert set(databank_data) == {patient_one.patientsernum, patient_two.patientsernum}
+        for patient_data in databank_data.values():
+            assert len(patient_data) == 1
+            assert 'databank_patient_ser_num' not in patient_data[0]
+
+
+def test_get_databank_data_for_patients_no_patients() -> None:
+    """Ensure no databank data is returned when no patients are provided."""
+    factories.LegacyPatientTestResultFactory.create()
+
+    assert legacy_models.LegacyPatientTestResult.objects.get_databank_data_for_patients({}) == {}
+
+
 def test_create_pathology_document_success() -> None:
     """Ensure a new pathology PDF document record inserted successfully to the OpalDB.Document table."""
     legacy_patient = LegacyPatientFactory.create()
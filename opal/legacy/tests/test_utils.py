@@ -21,9 +21,12 @@ from opal.legacy_questionnaires import factories as questionnaire_factories
 from opal.legacy_questionnaires import models as questionnaire_models
 from opal.patients import factories as patient_factories
 from opal.patients.models import RelationshipType
+from opal.services.reports.charts import ChartFormat
 from opal.services.reports.questionnaire import Question, QuestionnaireData, QuestionType
 
 if TYPE_CHECKING:
+    from django.conf import LazySettings
+
     from pytest_mock.plugin import MockerFixture
 
 pytestmark = pytest.mark.django_db(databases=['default', 'legacy', 'questionnaire'])
@@ -854,6 +857,22 @@ def test_generate_questionnaire_report(mocker: MockerFixture) -> None:
         )
     ]
 
+    assert args['chart_format'] == ChartFormat.RASTER
+
     # Verify pdf generation
     assert isinstance(result, bytearray), 'Output'
     assert result, 'PDF should not be empty'
+
+
+def test_generate_questionnaire_report_vector_charts(mocker: MockerFixture, settings: LazySettings) -> None:
+    """Ensure the charts of the questionnaire report are drawn as vector graphics if enabled."""
+    settings.REPORT_VECTOR_CHARTS = True
+    patient = patient_factories.Patient.create()
+    patient_factories.HospitalPatient.create(patient=patient)
+
+    mock_generate_pdf = mocker.patch('opal.services.reports.questionnaire.generate_pdf', autospec=True)
+    mock_generate_pdf.return_value = bytearray(b'fake-pdf-bytearray')
+    legacy_utils.generate_questionnaire_report(patient, questionnaire_data_mock())
+
+    mock_generate_pdf.assert_called_once()
+    assert mock_generate_pdf.call_args.kwargs['chart_format'] == ChartFormat.VECTOR
@@ -22,18 +22,23 @@ from opal.legacy_questionnaires.models import LegacyQuestionnaire as QDB_LegacyQ
 from opal.patients.models import DataAccessType, Patient, Relationship, SexType
 from opal.services.reports import questionnaire
 from opal.services.reports.base import InstitutionData, PatientData
+from opal.services.reports.charts import ChartFormat
 
 from .models import (
     LegacyAccessLevel,
+    LegacyAppointment,
+    LegacyDocument,
     LegacyEducationalMaterial,
     LegacyEducationalMaterialControl,
     LegacyLanguage,
     LegacyPatient,
     LegacyPatientControl,
     LegacyPatientHospitalIdentifier,
+    LegacyPatientTestResult,
     LegacyQuestionnaire,
     LegacyQuestionnaireControl,
     LegacySexType,
+    LegacyTxTeamMessage,
     LegacyUsers,
     LegacyUserType,
 )
@@ -55,6 +60,19 @@ ACCESS_LEVEL_MAPPING = MappingProxyType({
     DataAccessType.NEED_TO_KNOW.value: LegacyAccessLevel.NEED_TO_KNOW,
 })
 
+#: Mapping from the unread count of educational materials to the title of their category
+UNREAD_EDUCATIONAL_MATERIAL_CATEGORIES = MappingProxyType({
+    'unread_educationalmaterial_count': 'Clinical',
+    'unread_research_reference_count': 'Research',
+})
+
+#: Mapping from the unread count of questionnaires to the ID of their purpose in the QuestionnaireDB
+UNREAD_QUESTIONNAIRE_PURPOSES = MappingProxyType({
+    'unread_questionnaire_count': 1,  # clinical
+    'unread_research_questionnaire_count': 2,
+    'unread_consent_questionnaire_count': 4,
+})
+
 type DatabankControlRecords = (
     tuple[
         LegacyEducationalMaterialControl,
@@ -91,6 +109,34 @@ def get_patient_sernum(username: str) -> int:
     return 0
 
 
+def get_unread_counts(patient_sernum: int, username: str) -> dict[str, int]:
+    """
+    Get the number of unread records of a patient for a given user (e.g., to display badges in the app's chart).
+
+    All unread counts of the OpalDB are retrieved with a single query
+    and the new questionnaires of all purposes are counted with a single grouped query on the QuestionnaireDB.
+
+    Args:
+        patient_sernum: the legacy patient sernum
+        username: Firebase username making the request
+
+    Returns:
+        the unread counts (see `UnreadCountSerializer`)
+    """
+    unread_counts = _count_unread_records(patient_sernum, username)
+    purpose_counts = QDB_LegacyQuestionnaire.objects.count_new_questionnaires_by_purpose(
+        patient_sernum,
+        username,
+        UNREAD_QUESTIONNAIRE_PURPOSES.values(),
+    )
+
+    unread_counts.update({
+        name: purpose_counts[purpose_id] for name, purpose_id in UNREAD_QUESTIONNAIRE_PURPOSES.items()
+    })
+
+    return unread_counts
+
+
 def create_patient(  # noqa: PLR0913, PLR0917
     first_name: str,
     last_name: str,
@@ -524,6 +570,56 @@ def get_questionnaire_data(patient: Patient) -> list[questionnaire.Questionnaire
     return _process_questionnaire_data(data_list)
 
 
+def _count_unread_records(patient_sernum: int, username: str) -> dict[str, int]:
+    """
+    Count the unread records of a patient in the OpalDB with a single query.
+
+    The count of each kind of record is computed by its own aggregate and the counts are combined with `UNION ALL`.
+
+    Args:
+        patient_sernum: the legacy patient sernum
+        username: Firebase username making the request
+
+    Returns:
+        the unread counts of appointments, lab results, documents, treating team messages and educational materials
+    """
+    category_field = 'educationalmaterialcontrolsernum__educationalmaterialcategoryid__title_en'
+    unread_querysets: list[models.QuerySet[Any, dict[str, Any]]] = [
+        queryset.order_by().values(name=models.Value(name)).annotate(count=models.Count('pk'))
+        for name, queryset in (
+            ('unread_appointment_count', LegacyAppointment.objects.get_unread_queryset(patient_sernum, username)),
+            ('unread_lab_result_count', LegacyPatientTestResult.objects.get_unread_queryset(patient_sernum, username)),
+            ('unread_document_count', LegacyDocument.objects.get_unread_queryset(patient_sernum, username)),
+            ('unread_txteammessage_count', LegacyTxTeamMessage.objects.get_unread_queryset(patient_sernum, username)),
+        )
+    ]
+    # one count per category of educational material
+    unread_querysets.append(
+        LegacyEducationalMaterial.objects
+        .get_unread_queryset(patient_sernum, username)
+        .filter(**{f'{category_field}__in': list(UNREAD_EDUCATIONAL_MATERIAL_CATEGORIES.values())})
+        .order_by()
+        .values(
+            name=models.Case(
+                *(
+                    models.When(**{category_field: category}, then=models.Value(name))
+                    for name, category in UNREAD_EDUCATIONAL_MATERIAL_CATEGORIES.items()
+                ),
+                output_field=models.CharField(),
+            ),
+        )
+        .annotate(count=models.Count('pk')),
+    )
+
+    # categories without unread educational materials have no row
+    unread_counts = dict.fromkeys(UNREAD_EDUCATIONAL_MATERIAL_CATEGORIES, 0)
+    unread_counts.update(
+        (row['name'], row['count']) for row in unread_querysets[0].union(*unread_querysets[1:], all=True)
+    )
+
+    return unread_counts
+
+
 def _fetch_questionnaires_from_db(
     legacy_patient_id: int,
 ) -> list[dict[str, Any] | list[dict[str, Any]]]:
@@ -682,4 +778,5 @@ def generate_questionnaire_report(
             ),
         ),
         questionnaires=questionnaire_data_list,
+        chart_format=ChartFormat.VECTOR if settings.REPORT_VECTOR_CHARTS else ChartFormat.RASTER,
     )
@@ -9,15 +9,17 @@ Each manager in this module should be prefixed with `Legacy`
 """
 
 import logging
+from collections import defaultdict
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
 from django.db import connections, models, transaction
 from django.utils import timezone
 
-from opal.patients.models import RelationshipType
+from opal.patients.models import RelationshipType, RoleType
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
     from datetime import datetime
 
     from django.db.backends.utils import CursorWrapper
@@ -27,6 +29,9 @@ if TYPE_CHECKING:
 # Logger instance declared at the module level
 logger = logging.getLogger(__name__)
 
+#: Name of the column containing the patient's external id of a databank data row
+DATABANK_PATIENT_KEY = 'databank_patient_ser_num'
+
 
 class LegacyQuestionnaireManager(models.Manager['LegacyQuestionnaire']):
     """legacy questionnaire manager."""
@@ -55,27 +60,102 @@ class LegacyQuestionnaireManager(models.Manager['LegacyQuestionnaire']):
         Returns:
             Queryset of new questionnaires.
         """
+        return self._filter_new_questionnaires(
+            patient_sernum,
+            self.get_respondent_contents(patient_sernum, username),
+        ).filter(
+            # questionnaire purpose
+            purpose=purpose_id,
+        )
+
+    def count_new_questionnaires_by_purpose(
+        self,
+        patient_sernum: int,
+        username: str,
+        purpose_ids: Iterable[int],
+    ) -> dict[int, int]:
+        """
+        Count the new questionnaires for a given user per purpose with a single grouped query.
+
+        The counts are the same as the ones of `new_questionnaires` for each purpose.
+        The respondents the user can answer for are only determined once for all purposes.
+
+        Args:
+            patient_sernum: OpalDB.Patient.PatientSerNum
+            username: login user name
+            purpose_ids: the purposes to count the new questionnaires for (see `new_questionnaires`)
+
+        Returns:
+            the number of new questionnaires by purpose ID (0 for purposes without new questionnaires)
+        """
+        purpose_counts = dict.fromkeys(purpose_ids, 0)
+        respondent_contents = self.get_respondent_contents(patient_sernum, username)
+
+        # without a relationship to the patient there cannot be any new questionnaires for the user
+        if respondent_contents:
+            purpose_counts.update(
+                self
+                ._filter_new_questionnaires(patient_sernum, respondent_contents)
+                .filter(purpose__in=purpose_counts.keys())
+                .values('purpose')
+                .annotate(count=models.Count('pk'))
+                .values_list('purpose', 'count')
+                .order_by(),
+            )
+
+        return purpose_counts
+
+    def get_respondent_contents(self, patient_sernum: int, username: str) -> list[str]:
+        """
+        Get the respondents of the questionnaires that a user can answer for a given patient.
+
+        The roles of the user's relationships with the patient are retrieved with a single query.
+
+        Args:
+            patient_sernum: OpalDB.Patient.PatientSerNum
+            username: login user name
+
+        Returns:
+            the (English) titles of the respondents, empty if the user has no relationship with the patient
+        """
         respondent_contents = []
-        relationship_types = RelationshipType.objects.filter(
-            relationship__caregiver__user__username=username,
-            relationship__patient__legacy_id=patient_sernum,
+        role_types = set(
+            RelationshipType.objects.filter(
+                relationship__caregiver__user__username=username,
+                relationship__patient__legacy_id=patient_sernum,
+            ).values_list('role_type', flat=True),
         )
 
-        if relationship_types:
+        if role_types:
             # Always include patient questionnaires, whether the user is the patient themselves or a caregiver.
             respondent_contents.append('Patient')
 
             # A caregiver user can also access respondent=CAREGIVER questionnaires.
-            if relationship_types.exclude(role_type='SELF'):
+            if role_types - {RoleType.SELF}:
                 respondent_contents.append('Caregiver')
 
+        return respondent_contents
+
+    def _filter_new_questionnaires(
+        self,
+        patient_sernum: int,
+        respondent_contents: list[str],
+    ) -> models.QuerySet[LegacyQuestionnaire]:
+        """
+        Get the queryset of new questionnaires of a patient for the given respondents.
+
+        Args:
+            patient_sernum: OpalDB.Patient.PatientSerNum
+            respondent_contents: the (English) titles of the respondents
+
+        Returns:
+            Queryset of new questionnaires.
+        """
         return self.filter(
             # 0 = New questionnaires
             legacyanswerquestionnaire__status=0,
             legacyanswerquestionnaire__deleted=0,
             legacyanswerquestionnaire__patient__external_id=patient_sernum,
-            # questionnaire purpose
-            purpose=purpose_id,
             respondent__title__content__in=respondent_contents,
             respondent__title__language_id=2,  # set English as default
         )
@@ -84,7 +164,6 @@ class LegacyQuestionnaireManager(models.Manager['LegacyQuestionnaire']):
 class LegacyAnswerQuestionnaireManager(models.Manager['LegacyAnswerQuestionnaire']):
     """LegacyAnswerQuestionnaire manager."""
 
-    @transaction.atomic
     def get_databank_data_for_patient(
         self,
         patient_ser_num: int,
@@ -101,19 +180,53 @@ class LegacyAnswerQuestionnaireManager(models.Manager['LegacyAnswerQuestionnaire
             Questionnaire answer data
 
         """
-        # First sql file contains construction of the temporary questionnaire details table
+        return self.get_databank_data_for_patients({patient_ser_num: last_synchronized}).get(patient_ser_num, [])
+
+    @transaction.atomic
+    def get_databank_data_for_patients(
+        self,
+        last_synchronized_by_patient: Mapping[int, datetime],
+    ) -> dict[int, list[dict[str, Any]]]:
+        """
+        Retrieve the latest de-identified questionnaire data for multiple consenting DataBank patients at once.
+
+        The patients are stored in a temporary table which is joined by the questionnaire details query.
+
+        Args:
+            last_synchronized_by_patient: Last successful synchronization time per legacy QuestionnaireDB external_id
+
+        Returns:
+            Questionnaire answer data per legacy QuestionnaireDB external_id (patients without data are omitted)
+        """
+        if not last_synchronized_by_patient:
+            return {}
+
+        # First sql file contains construction of the temporary patients table
+        query_dir_patients = Path(__file__).parent / 'sql/databank_questionnaires_patients.sql'
+        # Second sql file contains construction of the temporary questionnaire details table
         query_dir_details = Path(__file__).parent / 'sql/databank_questionnaires_details.sql'
-        # Second sql file queries from the temp table in conjunction with the 7 answer type tables
+        # Third sql file queries from the temp table in conjunction with the 7 answer type tables
         query_dir_answer = Path(__file__).parent / 'sql/databank_questionnaires_answer.sql'
 
         # Execute SQL contents
         with connections['questionnaire'].cursor() as conn:
-            conn.execute(
-                self._read_local_sql(query_dir_details),
-                [patient_ser_num, timezone.make_naive(last_synchronized)],
+            conn.execute(self._read_local_sql(query_dir_patients))
+            conn.executemany(
+                'INSERT INTO tempDatabankPatients (external_id, last_synchronized) VALUES (%s, %s)',
+                [
+                    (patient_ser_num, timezone.make_naive(last_synchronized))
+                    for patient_ser_num, last_synchronized in last_synchronized_by_patient.items()
+                ],
             )
+            conn.execute(self._read_local_sql(query_dir_details))
             conn.execute(self._read_local_sql(query_dir_answer))
-            return self._fetch_all_as_dict(conn)
+            rows = self._fetch_all_as_dict(conn)
+
+        data_by_patient: defaultdict[int, list[dict[str, Any]]] = defaultdict(list)
+        for row in rows:
+            data_by_patient[row.pop(DATABANK_PATIENT_KEY)].append(row)
+
+        return dict(data_by_patient)
 
     def _fetch_all_as_dict(self, cursor: CursorWrapper) -> list[dict[str, Any]]:
         """
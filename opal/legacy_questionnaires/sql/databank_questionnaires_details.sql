@@ -16,7 +16,8 @@ CREATE TEMPORARY TABLE tempAnswerDetails(
 	   A.typeId AS question_type_id,
       d.content AS question_type_text,
 	   A.ID as question_answer_id,
-	   AQ.lastUpdated AS last_updated
+	   AQ.lastUpdated AS last_updated,
+	   p.externalId AS databank_patient_ser_num
 	FROM
 	   answerQuestionnaire AQ,
 	   dictionary d,
@@ -27,6 +28,7 @@ CREATE TEMPORARY TABLE tempAnswerDetails(
 	   section S,
 	   question Q,
 	   patient p,
+	   tempDatabankPatients dp,
 	   `type` t
 	WHERE
 	   AQ.questionnaireId=qstnr.ID
@@ -34,9 +36,9 @@ CREATE TEMPORARY TABLE tempAnswerDetails(
 	   AND qs.sectionId = S.ID
 	   AND Q.ID=qs.questionId
 	   AND AQ.patientId=p.ID
-	   AND p.externalId=%s
+	   AND p.externalId=dp.external_id
 	   AND AQ.`status` = 2
-	   AND AQ.lastUpdated>%s
+	   AND AQ.lastUpdated>dp.last_synchronized
 	   AND AQ.ID = aSection.answerQuestionnaireId
 	   AND aSection.ID = A.answerSectionId
 	   AND A.deleted = 0
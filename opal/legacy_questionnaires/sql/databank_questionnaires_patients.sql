@@ -0,0 +1,10 @@
+-- SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+--
+-- SPDX-License-Identifier: AGPL-3.0-or-later
+
+-- Temp patients table contains the consenting patients and the time their data was last synchronized
+DROP TABLE IF EXISTS `tempDatabankPatients`;
+CREATE TEMPORARY TABLE tempDatabankPatients(
+	external_id BIGINT NOT NULL PRIMARY KEY,
+	last_synchronized DATETIME NOT NULL
+);
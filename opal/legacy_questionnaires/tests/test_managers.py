@@ -5,6 +5,8 @@
 import re
 from datetime import datetime
 
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 import pytest
@@ -69,6 +71,27 @@ def test_get_questionnaire_databank_data(questionnaire_data: None) -> None:
     assert len(databank_data) == 7
 
 
+def test_get_questionnaire_databank_data_for_patients(questionnaire_data: None) -> None:
+    """
+    Ensure questionnaire data for databank is returned for multiple patients at once and grouped by patient.
+
+    See opal/tests/sql/test_QuestionnaireDB.sql for the hard coded test data.
+    """
+    non_consenting_patient = factories.LegacyQuestionnairePatientFactory.create(external_id=52)
+    consenting_patient = factories.LegacyQuestionnairePatientFactory.create(external_id=51)
+    last_cron_sync_time = datetime(2023, 1, 1, 0, 0, 5, tzinfo=timezone.get_current_timezone())
+
+    databank_data = LegacyAnswerQuestionnaire.objects.get_databank_data_for_patients({
+        non_consenting_patient.external_id: last_cron_sync_time,
+        consenting_patient.external_id: last_cron_sync_time,
+    })
+
+    assert list(databank_data) == [consenting_patient.external_id]
+    assert len(databank_data[consenting_patient.external_id]) == 7
+    for questionnaire_answer in databank_data[consenting_patient.external_id]:
+        assert 'databank_patient_ser_num' not in questionnaire_answer
+
+
 def test_new_questionnaires_patient_caregiver() -> None:
     """
     Ensure LegacyQuestionnaireManager function 'new_questionnaires' is working.
@@ -203,6 +226,112 @@ def test_new_questionnaires_return_empty_without_respondent_matching() -> None:
     assert not new_questionnaires
 
 
+def test_count_new_questionnaires_by_purpose() -> None:
+    """Ensure the new questionnaires are counted per purpose the same way as `new_questionnaires` does."""
+    caregiver_profile = caregiver_factories.CaregiverProfile.create(user__username='test_new_questionnaires')
+    legacy_patient = factories.LegacyQuestionnairePatientFactory.create()
+    patient = patient_factories.Patient.create(legacy_id=legacy_patient.external_id)
+    patient_factories.Relationship.create(
+        type=patient_factories.RelationshipType.create(role_type='GRDNCAREGIVER'),
+        caregiver=caregiver_profile,
+        patient=patient,
+    )
+    clinical_purpose = factories.LegacyPurposeFactory.create()
+    research_purpose = factories.LegacyPurposeFactory.create()
+    consent_purpose = factories.LegacyPurposeFactory.create()
+    purpose_ids = [clinical_purpose.id, research_purpose.id, consent_purpose.id]
+    patient_respondent = factories.LegacyRespondentFactory.create(title__content='Patient', title__language_id=2)
+    caregiver_respondent = factories.LegacyRespondentFactory.create(title__content='Caregiver', title__language_id=2)
+
+    for purpose, respondent in (
+        (clinical_purpose, patient_respondent),
+        (clinical_purpose, caregiver_respondent),
+        (research_purpose, caregiver_respondent),
+    ):
+        factories.LegacyAnswerQuestionnaireFactory.create(
+            questionnaire__purpose=purpose,
+            questionnaire__respondent=respondent,
+            patient=legacy_patient,
+        )
+
+    # questionnaires in progress and deleted questionnaires are not new
+    factories.LegacyAnswerQuestionnaireFactory.create(
+        questionnaire__purpose=research_purpose,
+        questionnaire__respondent=patient_respondent,
+        patient=legacy_patient,
+        status=1,
+    )
+    factories.LegacyAnswerQuestionnaireFactory.create(
+        questionnaire__purpose=research_purpose,
+        questionnaire__respondent=patient_respondent,
+        patient=legacy_patient,
+        deleted=1,
+    )
+
+    # the roles are retrieved from the default database and the questionnaires are counted with one query
+    with (
+        CaptureQueriesContext(connections['default']) as queries,
+        CaptureQueriesContext(connections['questionnaire']) as questionnaire_queries,
+    ):
+        counts = LegacyQuestionnaire.objects.count_new_questionnaires_by_purpose(
+            legacy_patient.external_id,
+            'test_new_questionnaires',
+            purpose_ids,
+        )
+
+    assert len(queries) == 1
+    assert len(questionnaire_queries) == 1
+    assert counts == {clinical_purpose.id: 2, research_purpose.id: 1, consent_purpose.id: 0}
+    assert counts == {
+        purpose_id: LegacyQuestionnaire.objects.new_questionnaires(
+            legacy_patient.external_id,
+            'test_new_questionnaires',
+            purpose_id,
+        ).count()
+        for purpose_id in purpose_ids
+    }
+
+
+def test_count_new_questionnaires_by_purpose_no_relationship() -> None:
+    """Ensure there are no new questionnaires for a user without a relationship with the patient."""
+    legacy_patient = factories.LegacyQuestionnairePatientFactory.create()
+    answer_questionnaire = factories.LegacyAnswerQuestionnaireFactory.create(
+        questionnaire__respondent__title__content='Patient',
+        questionnaire__respondent__title__language_id=2,
+        patient=legacy_patient,
+    )
+    purpose_id = answer_questionnaire.questionnaire.purpose.id
+
+    with CaptureQueriesContext(connections['questionnaire']) as questionnaire_queries:
+        counts = LegacyQuestionnaire.objects.count_new_questionnaires_by_purpose(
+            legacy_patient.external_id,
+            'test_wrong_username',
+            [purpose_id],
+        )
+
+    assert not questionnaire_queries
+    assert counts == {purpose_id: 0}
+
+
+def test_get_respondent_contents() -> None:
+    """Ensure the respondents depend on the roles of the user's relationships with the patient."""
+    caregiver_profile = caregiver_factories.CaregiverProfile.create(user__username='test')
+    patient = patient_factories.Patient.create(legacy_id=51)
+    relationship = patient_factories.Relationship.create(
+        type=RelationshipType.objects.self_type(),
+        caregiver=caregiver_profile,
+        patient=patient,
+    )
+
+    assert not LegacyQuestionnaire.objects.get_respondent_contents(51, 'test_wrong_username')
+    assert LegacyQuestionnaire.objects.get_respondent_contents(51, 'test') == ['Patient']
+
+    relationship.type = patient_factories.RelationshipType.create(role_type='CAREGIVER')
+    relationship.save()
+
+    assert LegacyQuestionnaire.objects.get_respondent_contents(51, 'test') == ['Patient', 'Caregiver']
+
+
 def test_new_questionnaires_exclude_deleted() -> None:
     """Ensure LegacyQuestionnaireManager function 'new_questionnaires' excludes deleted questionnaires."""
     caregiver_profile = caregiver_factories.CaregiverProfile.create(user__username='test')
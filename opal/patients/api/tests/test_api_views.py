@@ -1140,7 +1140,7 @@ class TestPatientSummaryView:
         payload_decoded = base64.b64decode(payload_base64).decode('utf-8')
         payload = json.loads(payload_decoded)
         # verify payload conforms to SH Link spec: https://docs.smarthealthit.org/smart-health-links/spec/#construct-a-shlink-payload
-        assert payload['url'] == f'{settings.IPS_PUBLIC_BASE_URL}/{ips_uuid}'
+        assert payload['url'] == f'{settings.IPS_PUBLIC_BASE_URL}/{Path(spy_storage_save.spy_return).stem}'
         assert payload['flag'] == 'L'
         encryption_key = payload['key']
         # 256 bits when base64 decoded
@@ -1200,6 +1200,73 @@ class TestPatientSummaryView:
             social_history=social_history,
         )
 
+    def test_summary_cached(
+        self,
+        api_client: APIClient,
+        listener_user: User,
+        mocker: MockerFixture,
+        settings: LazySettings,
+    ) -> None:
+        """Ensure a repeated request reuses the IPS bundle but encrypts it with a new key into a new file."""
+        api_client.force_login(listener_user)
+
+        settings.IPS_STORAGE_BACKEND = 'django.core.files.storage.FileSystemStorage'
+        spy_storage_save = mocker.spy(django.core.files.storage.FileSystemStorage, 'save')
+
+        data = 'this is a secret patient summary'
+        mock_retrieve = mocker.patch('opal.patients.api.views.retrieve_patient_summary', return_value=(data, uuid4()))
+
+        patient_uuid = uuid4()
+        Patient.create(uuid=patient_uuid, ramq='OTES12345678')
+
+        responses = [api_client.get(reverse('api:patient-summary', kwargs={'uuid': patient_uuid})) for _ in range(2)]
+
+        assert [response.status_code for response in responses] == [status.HTTP_200_OK, status.HTTP_200_OK]
+        mock_retrieve.assert_called_once()
+        assert spy_storage_save.call_count == 2
+
+        payloads = [json.loads(base64.b64decode(response.json()['payload'])) for response in responses]
+        assert payloads[0]['url'] != payloads[1]['url']
+        assert payloads[0]['key'] != payloads[1]['key']
+
+        for payload in payloads:
+            file_name = f'{payload["url"].rsplit("/", maxsplit=1)[1]}.ips'
+            saved_data = (Path(settings.MEDIA_ROOT) / file_name).read_text(encoding='utf-8')
+            key = jwk.OctKey.import_key(util.urlsafe_b64decode(payload['key'].encode('utf-8')))
+            decrypted_data = jwe.decrypt_compact(saved_data, key)
+
+            assert decrypted_data.plaintext is not None
+            assert decrypted_data.plaintext.decode('utf-8') == data
+
+    def test_summary_cache_social_history_changed(
+        self,
+        api_client: APIClient,
+        listener_user: User,
+        mocker: MockerFixture,
+        settings: LazySettings,
+    ) -> None:
+        """Ensure the IPS bundle is built again when the patient-reported social history changes."""
+        api_client.force_login(listener_user)
+
+        settings.IPS_STORAGE_BACKEND = 'django.core.files.storage.FileSystemStorage'
+        mocker.patch('django.core.files.storage.FileSystemStorage.save', return_value='test.ips')
+        mock_retrieve = mocker.patch('opal.patients.api.views.retrieve_patient_summary', return_value=('test', uuid4()))
+
+        patient_uuid = uuid4()
+        patient = Patient.create(uuid=patient_uuid, ramq='OTES12345678')
+        patient_reported_data = PatientReportedData.objects.create(
+            patient=patient,
+            social_history=[{'alcohol_use': '1/wk'}],
+        )
+
+        api_client.get(reverse('api:patient-summary', kwargs={'uuid': patient_uuid}))
+        patient_reported_data.social_history = [{'alcohol_use': '2/wk'}]
+        patient_reported_data.save()
+        response = api_client.get(reverse('api:patient-summary', kwargs={'uuid': patient_uuid}))
+
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert mock_retrieve.call_count == 2
+
     def test_summary_no_health_identifier(self, api_client: APIClient, listener_user: User) -> None:
         """Ensure the endpoint raises a ValidationError when the patient has no health identification number."""
         api_client.force_login(listener_user)
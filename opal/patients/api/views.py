@@ -6,6 +6,7 @@
 
 import base64
 import json
+import uuid as uuid_lib
 from io import BytesIO
 from typing import TYPE_CHECKING, Any
 
@@ -40,6 +41,7 @@ from opal.services.fhir.utils import (
     retrieve_patient_summary,
 )
 
+from .. import ips_cache
 from ..api.serializers import (
     CaregiverRelationshipSerializer,
     HospitalPatientSerializer,
@@ -324,6 +326,8 @@ class PatientSummaryView(APIView):
 
         Assemble the data needed to build a Smart Health Link that can be read by an IPS viewer.
         The IPS data is encrypted and stored using the configured storage backend.
+        The IPS bundle is reused from the cache if the patient requested it recently,
+        but it is always encrypted with a new key and stored in a new file.
 
         Args:
             request: HTTP request
@@ -348,14 +352,16 @@ class PatientSummaryView(APIView):
             fhir_url=settings.FHIR_API_URL,
             client_id=settings.FHIR_API_CLIENT_ID,
             private_key=settings.FHIR_API_PRIVATE_KEY,
+            page_size=settings.FHIR_API_PAGE_SIZE,
         )
 
         # Request and assemble IPS data into a bundle
         try:
-            ips, ips_uuid = retrieve_patient_summary(
-                fhir_settings,
+            ips = ips_cache.get_patient_summary(
+                patient.uuid,
                 patient.ramq,
-                social_history=social_history,
+                social_history,
+                lambda: retrieve_patient_summary(fhir_settings, patient.ramq, social_history=social_history)[0],
             )
         except FHIRDataRetrievalError as exc:
             LOGGER.exception('Error retrieving IPS data from FHIR server for patient %s', uuid)
@@ -366,7 +372,9 @@ class PatientSummaryView(APIView):
 
             storage_backend_class: type = import_string(settings.IPS_STORAGE_BACKEND)
             storage_backend = storage_backend_class()
-            file_name = f'{ips_uuid}.ips'
+            # a cached bundle is stored again with a new key, use a new file to not break previously shared links
+            file_uuid = uuid_lib.uuid4()
+            file_name = f'{file_uuid}.ips'
 
             LOGGER.debug(
                 'Saving IPS bundle for patient %s to %s using storage backend %s',
@@ -388,10 +396,11 @@ class PatientSummaryView(APIView):
                 raise ValidationError('Error saving IPS bundle to storage backend') from exc
             else:
                 LOGGER.debug('Successfully saved IPS bundle for patient %s to %s', uuid, actual_file_name)
+                LOGGER.info('IPS bundle cache statistics', **ips_cache.get_ips_cache_statistics())
 
                 # See: https://docs.smarthealthit.org/smart-health-links/spec/#construct-a-shlink-payload
                 link_content = {
-                    'url': f'{settings.IPS_PUBLIC_BASE_URL}/{ips_uuid}',
+                    'url': f'{settings.IPS_PUBLIC_BASE_URL}/{file_uuid}',
                     'flag': 'L',
                     'key': encryption_key,
                     'label': 'Opal-App IPS Demo',
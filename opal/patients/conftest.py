@@ -7,6 +7,7 @@
 from typing import TYPE_CHECKING
 
 from django.contrib.auth.models import Permission
+from django.core.cache import cache
 
 import pytest
 
@@ -16,6 +17,12 @@ if TYPE_CHECKING:
     from opal.users.models import User
 
 
+@pytest.fixture(autouse=True)
+def clear_ips_cache() -> None:
+    """Fixture clearing the cache to avoid IPS bundles and counters leaking between tests."""
+    cache.clear()
+
+
 @pytest.fixture
 def relationshiptype_user(client: Client, django_user_model: User) -> Client:
     """
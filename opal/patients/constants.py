@@ -36,3 +36,8 @@ RELATIONSHIP_MIN_AGE: Final = 0
 #: Choices for the type of users
 # TODO: we might refactor this constant name for more clarity
 TYPE_USERS: Final = ((0, _('New Opal User')), (1, _('Existing Opal User')))
+
+# If this value is changed, please also update the instructions in the app (ips-preview-share.html)
+# The value of 1 hour was chosen as the easiest way to comply with the SHL specification: https://docs.smarthealthit.org/smart-health-links/spec/#fileslocation-links
+#: The number of hours after which IPS bundles will be deleted
+IPS_EXPIRY_HOURS: Final = 1
@@ -0,0 +1,125 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""
+Cache of the International Patient Summary (IPS) bundles.
+
+Building an IPS bundle requires several requests to the FHIR server.
+The built bundles are therefore cached for as long as the shared bundle files are kept (`IPS_EXPIRY_HOURS`)
+so that a patient requesting their summary again shortly after only needs the bundle to be encrypted and stored.
+
+A cached bundle is keyed by the patient and a hash of the data the bundle is built from
+that is known before retrieving it from the FHIR server, i.e., the health insurance number and the social history.
+Changes to the patient-reported social history therefore lead to a new bundle right away.
+"""
+
+import hashlib
+import json
+from typing import TYPE_CHECKING, Any
+
+from django.core.cache import cache
+
+import structlog
+
+from .constants import IPS_EXPIRY_HOURS
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+    from uuid import UUID
+
+LOGGER = structlog.get_logger()
+
+#: Prefix of the cache keys of the IPS bundles
+IPS_CACHE_PREFIX = 'patients:ips'
+#: Number of seconds an IPS bundle is kept in the cache
+IPS_CACHE_TIMEOUT = IPS_EXPIRY_HOURS * 60 * 60
+#: Cache key of the counter of the IPS bundles served from the cache
+IPS_CACHE_HITS_KEY = f'{IPS_CACHE_PREFIX}:hits'
+#: Cache key of the counter of the IPS bundles that had to be built
+IPS_CACHE_MISSES_KEY = f'{IPS_CACHE_PREFIX}:misses'
+
+
+def get_patient_summary(
+    patient_uuid: UUID,
+    identifier: str,
+    social_history: Sequence[dict[str, Any]],
+    build_summary: Callable[[], str],
+) -> str:
+    """
+    Return the IPS bundle of a patient from the cache or build and cache it.
+
+    Bundles that fail to be built are not cached.
+
+    Args:
+        patient_uuid: the UUID of the patient
+        identifier: the patient identifier used to retrieve the patient's data (usually the health insurance number)
+        social_history: the patient-reported social history included in the bundle
+        build_summary: the function building the bundle as a JSON string
+
+    Returns:
+        the IPS bundle as a JSON string
+    """
+    key = _get_summary_key(patient_uuid, identifier, social_history)
+    cached_summary: str | None = cache.get(key)
+
+    if cached_summary is not None:
+        _increment_counter(IPS_CACHE_HITS_KEY)
+        LOGGER.debug('IPS bundle cache hit for patient %s', patient_uuid)
+        return cached_summary
+
+    _increment_counter(IPS_CACHE_MISSES_KEY)
+    LOGGER.debug('IPS bundle cache miss for patient %s', patient_uuid)
+    summary = build_summary()
+    cache.set(key, summary, IPS_CACHE_TIMEOUT)
+
+    return summary
+
+
+def get_ips_cache_statistics() -> dict[str, float]:
+    """
+    Return the number of IPS bundles served from the cache (hits), the number of bundles built (misses) and the hit rate.
+
+    Returns:
+        the hit and miss counters and the hit rate (between 0 and 1) of the IPS cache
+    """
+    counters: dict[str, Any] = cache.get_many([IPS_CACHE_HITS_KEY, IPS_CACHE_MISSES_KEY])
+    hits: int = counters.get(IPS_CACHE_HITS_KEY, 0)
+    misses: int = counters.get(IPS_CACHE_MISSES_KEY, 0)
+
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+    }
+
+
+def _get_summary_key(patient_uuid: UUID, identifier: str, social_history: Sequence[dict[str, Any]]) -> str:
+    """
+    Build the cache key of the IPS bundle of a patient.
+
+    Args:
+        patient_uuid: the UUID of the patient
+        identifier: the patient identifier used to retrieve the patient's data
+        social_history: the patient-reported social history included in the bundle
+
+    Returns:
+        the cache key of the IPS bundle
+    """
+    # the key is derived from a hash to not expose the health insurance number
+    content = json.dumps([identifier, social_history], sort_keys=True)
+    digest = hashlib.sha256(content.encode()).hexdigest()
+
+    return f'{IPS_CACHE_PREFIX}:{patient_uuid}:{digest}'
+
+
+def _increment_counter(key: str) -> None:
+    """
+    Increment a counter of the IPS cache.
+
+    Args:
+        key: the cache key of the counter
+    """
+    # the counters are kept until they are explicitly cleared
+    cache.add(key, 0, timeout=None)
+    cache.incr(key)
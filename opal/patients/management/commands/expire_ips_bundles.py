@@ -6,22 +6,52 @@
 
 import datetime
 import ftplib
+import os
 import re
-from typing import Any
+from typing import Any, Protocol
 
 from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.core.management.base import BaseCommand, CommandParser
 from django.utils import timezone
+from django.utils.module_loading import import_string
 
 import structlog
 from storages.backends.ftp import FTPStorage, FTPStorageException
 
+from opal.patients.constants import IPS_EXPIRY_HOURS
+
 LOGGER = structlog.get_logger()
 
-# The number of hours after which IPS bundles will be deleted
-# If this value is changed, please also update the instructions in the app (ips-preview-share.html)
-# The value of 1 hour was chosen as the easiest way to comply with the SHL specification: https://docs.smarthealthit.org/smart-health-links/spec/#fileslocation-links
-IPS_EXPIRY_HOURS = 1
+
+class ModifiedTimesStorage(Protocol):
+    """
+    Storage backend that can list the files of a directory together with their last modified times.
+
+    Storage backends need to implement this interface to be supported by the command.
+    """
+
+    def list_modified_times(self, path: str) -> dict[str, datetime.datetime | None]:
+        """
+        List the files of a directory with their last modified times (as a datetime) in one request.
+
+        Args:
+            path: the path of the directory
+
+        Returns:
+            the last modified time of each file by its name, `None` if it is not available
+        """
+
+    def delete(self, name: str) -> None:
+        """
+        Delete the specified file from the storage system.
+
+        Args:
+            name: the name of the file
+        """
+
+    def disconnect(self) -> None:
+        """Close the connection to the storage system, if any."""
 
 
 class FTPStorageWithModifiedTime(FTPStorage):
@@ -79,9 +109,109 @@ class FTPStorageWithModifiedTime(FTPStorage):
         last_modified_string = self._get_dir_last_modified_details(name)
         return self._datetime_from_string(last_modified_string)
 
+    def list_modified_times(self, path: str) -> dict[str, datetime.datetime | None]:
+        """
+        List the files of a directory with their last modified times using a single `MLSD` command.
+
+        Args:
+            path: the path of the directory
+
+        Returns:
+            the last modified time of each file by its name,
+            `None` if the `modify` fact is missing or not in the expected format
+
+        Raises:
+            FTPStorageException: if the directory listing fails
+        """
+        self._start_connection()
+
+        try:
+            # For more about MLSD, see: https://datatracker.ietf.org/doc/html/rfc3659#section-7
+            entries = list(self._connection.mlsd(path, facts=['type', 'modify']))
+        except ftplib.all_errors as error:
+            raise FTPStorageException(f'Error getting directory listing of {path}') from error
+
+        return {name: self._parse_modify_fact(facts) for name, facts in entries if facts.get('type') == 'file'}
+
+    def delete(self, name: str) -> None:
+        """
+        Delete the specified file over the open connection.
+
+        Unlike `FTPStorage.delete`, the existence of the file is not checked first
+        since the files to delete are taken from the directory listing.
+        This avoids listing the directory again (`NLST`) for every deleted file.
+
+        Args:
+            name: the name of the file
+
+        Raises:
+            FTPStorageException: if the file cannot be deleted
+        """
+        self._start_connection()
+
+        try:
+            self._connection.delete(name)
+        except ftplib.all_errors as error:
+            raise FTPStorageException(f'Error when removing {name}') from error
+
+    def disconnect(self) -> None:
+        """Close the connection to the FTP server if it is open."""
+        if self._connection is not None:
+            super().disconnect()
+
+    def _parse_modify_fact(self, facts: dict[str, str]) -> datetime.datetime | None:
+        if 'modify' not in facts:
+            return None
+
+        # the time value may contain fractions of a second, e.g., `20251028155020.123`
+        try:
+            return self._datetime_from_string(facts['modify'].split('.')[0])
+        except ValueError:
+            return None
+
+
+class FileSystemStorageWithModifiedTime(FileSystemStorage):
+    """Subclass of FileSystemStorage that can list the files of a directory with their last modified datetimes."""
+
+    def list_modified_times(self, path: str) -> dict[str, datetime.datetime | None]:
+        """
+        List the files of a directory with their last modified times using a single directory scan.
+
+        Args:
+            path: the path of the directory relative to the storage location
+
+        Returns:
+            the last modified time of each file by its name
+        """
+        try:
+            with os.scandir(self.path(path)) as entries:
+                return {
+                    entry.name: datetime.datetime.fromtimestamp(entry.stat().st_mtime, tz=datetime.UTC)
+                    for entry in entries
+                    if entry.is_file()
+                }
+        except FileNotFoundError:
+            # the directory is only created once the first file is saved
+            return {}
+
+    def disconnect(self) -> None:
+        """Nothing to disconnect from, the files are accessed directly."""
+
+
+#: Storage backends with built-in support by their import path, with the class to use and the directory of the bundles
+STORAGE_BACKENDS: dict[str, tuple[type[ModifiedTimesStorage], str]] = {
+    'storages.backends.ftp.FTPStorage': (FTPStorageWithModifiedTime, '../bundles'),
+    'django.core.files.storage.FileSystemStorage': (FileSystemStorageWithModifiedTime, ''),
+}
+
 
 class Command(BaseCommand):
-    """Command for deleting IPS bundles after a certain amount of time has elapsed since their creation."""
+    """
+    Command for deleting IPS bundles after a certain amount of time has elapsed since their creation.
+
+    The bundles and their last modified times are obtained with a single directory listing
+    and the expired bundles are deleted over the same connection.
+    """
 
     help = 'Delete expired IPS bundles from their storage location.'
 
@@ -112,78 +242,93 @@ class Command(BaseCommand):
         num_deleted = 0
         num_errors = 0
 
-        if settings.IPS_STORAGE_BACKEND != 'storages.backends.ftp.FTPStorage':
-            raise NotImplementedError(
-                f'The expire_ips_bundles command currently only supports storages.backends.ftp.FTPStorage (see IPS_STORAGE_BACKEND); current value: {settings.IPS_STORAGE_BACKEND}'
-            )
+        storage_backend, directory = self._get_storage_backend()
 
         if dry_run:
             LOGGER.info('Running command in dry-run mode; no files will be deleted')
 
-        storage_backend = FTPStorageWithModifiedTime()
+        try:
+            modified_times = storage_backend.list_modified_times(directory)
+            bundles = {name: modified for name, modified in modified_times.items() if re.match(r'^.+\.ips$', name)}
+
+            LOGGER.info(
+                'Checking %s file%s to clean up expired IPS bundles (from storage backend: %s)',
+                len(bundles),
+                '' if len(bundles) == 1 else 's',
+                settings.IPS_STORAGE_BACKEND,
+            )
 
-        file_list = storage_backend.listdir('../bundles')[1]
-        file_list = [name for name in file_list if re.match(r'^.+\.ips$', name)]
+            for file_name, last_modified in bundles.items():
+                # Calculate the bundle's validity based on the time since it was last modified
+                # Note that last modified is used instead of creation time (not available); it offers the same result, since bundle files aren't updated
+                if last_modified is None:
+                    LOGGER.error(
+                        'ERROR - Bundle "%s" last modified information is missing or not in the expected format',
+                        file_name,
+                    )
+                    num_errors += 1
+                    continue
 
-        LOGGER.info(
-            'Checking %s file%s to clean up expired IPS bundles (from storage backend: %s)',
-            len(file_list),
-            '' if len(file_list) == 1 else 's',
-            settings.IPS_STORAGE_BACKEND,
-        )
+                now = timezone.now()  # UTC
+                delta = now - last_modified
+                expired = delta >= datetime.timedelta(hours=IPS_EXPIRY_HOURS)
 
-        for file_name in file_list:
-            # Calculate the bundle's validity based on the time since it was last modified
-            # Note that last modified is used instead of creation time (not available); it offers the same result, since bundle files aren't updated
-            try:
-                last_modified = storage_backend.get_modified_time(file_name)
-            except FTPStorageException:
-                LOGGER.exception(
-                    'ERROR - Bundle "%s" last modified information failed to be retrieved from the server',
+                LOGGER.debug(
+                    '%s - Bundle "%s" last modified %s ago (%s UTC)',
+                    'DELETE' if expired else 'KEEP',
                     file_name,
+                    delta,
+                    last_modified,
                 )
-                num_errors += 1
-                continue
-            except ValueError:
-                LOGGER.exception(
-                    'ERROR - Bundle "%s" last modified date is not in the expected format',
-                    file_name,
-                )
-                num_errors += 1
-                continue
-
-            now = timezone.now()  # UTC
-            delta = now - last_modified
-            expired = delta >= datetime.timedelta(hours=IPS_EXPIRY_HOURS)
-
-            LOGGER.debug(
-                '%s - Bundle "%s" last modified %s ago (%s UTC)',
-                'DELETE' if expired else 'KEEP',
-                file_name,
-                delta,
-                last_modified,
-            )
 
-            if expired:
-                try:
-                    if not dry_run:
-                        storage_backend.delete(file_name)
+                if expired:
+                    try:
+                        if not dry_run:
+                            storage_backend.delete(file_name)
 
-                    num_deleted += 1
-                # Bare except: catch any possible error here in order to properly log it and continue
-                except:  # noqa: E722
-                    # Example of a one-off error: PermissionError: [WinError 10013] An attempt was made to access a socket in a way forbidden by its access permissions
-                    LOGGER.exception('ERROR - Failed to delete IPS bundle "%s"', file_name)
-                    num_errors += 1
+                        num_deleted += 1
+                    # Bare except: catch any possible error here in order to properly log it and continue
+                    except:  # noqa: E722
+                        # Example of a one-off error: PermissionError: [WinError 10013] An attempt was made to access a socket in a way forbidden by its access permissions
+                        LOGGER.exception('ERROR - Failed to delete IPS bundle "%s"', file_name)
+                        num_errors += 1
+        finally:
+            storage_backend.disconnect()
 
         LOGGER.info(
             '%s IPS bundle%s out of %s %s deleted (%s error%s)',
             num_deleted,
             '' if num_deleted == 1 else 's',
-            len(file_list),
+            len(bundles),
             'would be' if dry_run else 'was' if num_deleted == 1 else 'were',
             num_errors,
             '' if num_errors == 1 else 's',
         )
 
-        storage_backend.disconnect()
+    def _get_storage_backend(self) -> tuple[ModifiedTimesStorage, str]:
+        """
+        Return the storage backend listing the IPS bundles with their last modified times and the bundles' directory.
+
+        The FTP and file system storages are supported out of the box.
+        Other storage backends are supported if they implement the `ModifiedTimesStorage` interface.
+
+        Returns:
+            the storage backend and the directory containing the IPS bundles
+
+        Raises:
+            NotImplementedError: if the configured storage backend cannot list files with their last modified times
+        """
+        if settings.IPS_STORAGE_BACKEND in STORAGE_BACKENDS:
+            storage_backend_class, directory = STORAGE_BACKENDS[settings.IPS_STORAGE_BACKEND]
+            return storage_backend_class(), directory
+
+        storage_backend_class = import_string(settings.IPS_STORAGE_BACKEND)
+
+        if not hasattr(storage_backend_class, 'list_modified_times'):
+            raise NotImplementedError(
+                'The expire_ips_bundles command requires a storage backend that can list files with their last'
+                + f' modified times (see ModifiedTimesStorage); current value: {settings.IPS_STORAGE_BACKEND}'
+            )
+
+        storage_backend: ModifiedTimesStorage = storage_backend_class()
+        return storage_backend, ''
@@ -4,12 +4,14 @@
 
 import datetime
 import ftplib
+import os
 from datetime import date
 from ftplib import FTP
-from typing import TYPE_CHECKING, Any
+from itertools import starmap
+from typing import TYPE_CHECKING, Any, ClassVar, cast
 
 import pytest
-from storages.backends.ftp import FTPStorage
+from storages.backends.ftp import FTPStorageException
 
 from opal.core.test_utils import CommandTestMixin
 from opal.patients import factories as patient_factories
@@ -17,6 +19,9 @@ from opal.patients.management.commands.expire_ips_bundles import FTPStorageWithM
 from opal.patients.models import Patient, Relationship, RelationshipStatus
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
     from django.conf import LazySettings
 
     from pytest_mock import MockerFixture, MockType
@@ -26,6 +31,8 @@ pytestmark = pytest.mark.django_db(databases=['default'])
 
 
 calculate_age_original = Patient.calculate_age
+# the delete method is mocked for most tests
+ftp_delete_original = FTPStorageWithModifiedTime.delete
 
 
 def calculate_age_fixed_date(date_of_birth: date) -> int:
@@ -41,6 +48,36 @@ def calculate_age_fixed_date(date_of_birth: date) -> int:
     return calculate_age_original(date_of_birth=date_of_birth, reference_date=date(2014, 1, 15))
 
 
+class InMemoryModifiedTimesStorage:
+    """Storage backend implementing the interface required by the expire_ips_bundles command."""
+
+    files: ClassVar[dict[str, datetime.datetime | None]] = {}
+
+    def list_modified_times(self, path: str) -> dict[str, datetime.datetime | None]:
+        """
+        List the stored files with their last modified times.
+
+        Args:
+            path: the path of the directory (ignored)
+
+        Returns:
+            the last modified time of each file by its name
+        """
+        return dict(self.files)
+
+    def delete(self, name: str) -> None:
+        """
+        Delete a stored file.
+
+        Args:
+            name: the name of the file
+        """
+        del self.files[name]
+
+    def disconnect(self) -> None:
+        """Nothing to disconnect from."""
+
+
 class TestExpireIPSBundlesCommand(CommandTestMixin):
     """Test class for expire_ips_bundles management command."""
 
@@ -74,66 +111,47 @@ class TestExpireIPSBundlesCommand(CommandTestMixin):
         mocker.patch.object(FTP, 'quit')
         mocker.patch.object(FTPStorageWithModifiedTime, 'delete')
 
-    def _mock_files(self, mocker: MockerFixture, file_timestamps: dict[str, str], **kwargs: Any) -> None:
+    def _mock_files(self, mocker: MockerFixture, file_timestamps: dict[str, str], **kwargs: Any) -> MockType:
         # Can be used to test what happens if the modify attribute is missing
         hide_modify = kwargs.get('hide_modify')
 
-        # Metadata info line for a given file
-        def format_info_line(file_name: str, date_str: str) -> str:
-            modify_part = '' if hide_modify else f'modify={date_str}'
-            return (
-                # This line starts with one space on purpose; this is part of the format
-                f' type=test;size=0;{modify_part};UNIX.mode=0000;UNIX.uid=1;UNIX.gid=1;unique=123456789ab; {file_name}'
-            )
-
-        # The complete response given when requesting a file's metadata
-        def info_lines(file_name: str) -> str:
-            return '\n'.join([
-                '250-Begin',
-                format_info_line(file_name, file_timestamps[file_name]) if file_name in file_timestamps else ' ',
-                '250 End.',
-            ])
-
-        # Function used to mock a file metadata command, which extracts the file name from the command and returns the metadata
-        def mock_sendcmd(command: str) -> str:
-            if 'MLST ' in command:
-                file_name = command.split('MLST ')[1]
-
-                if file_name in file_timestamps:
-                    return info_lines(file_name)
-                raise ftplib.error_perm("550 Can't check for file existence")
-
-            # Treat any other commands as successful
-            return '200'
+        # Metadata line of a given file in the directory listing
+        def format_entry_line(file_name: str, date_str: str, file_type: str = 'file') -> str:
+            modify_part = '' if hide_modify else f'modify={date_str};'
+            return f'type={file_type};size=0;{modify_part}UNIX.mode=0000;UNIX.uid=1;UNIX.gid=1;unique=123456789ab; {file_name}'
 
-        # Mock the directory listing
-        all_files = ['.htaccess', *file_timestamps.keys()]
-        mocker.patch.object(
-            FTPStorage,
-            '_get_dir_details',
-            return_value=((
-                {'.': 0, '..': 0},
-                {**dict.fromkeys(all_files, 0)},
-            )),
-        )
+        lines = [
+            format_entry_line('.', '20250101000000', file_type='cdir'),
+            format_entry_line('..', '20250101000000', file_type='pdir'),
+            format_entry_line('.htaccess', '20250101000000'),
+            *starmap(format_entry_line, file_timestamps.items()),
+        ]
+
+        # Function used to mock the transfer of the directory listing, which passes each line to the callback
+        def mock_retrlines(command: str, callback: Callable[[str], None]) -> str:
+            for line in lines:
+                callback(line)
 
-        # Mock the command to request a file's metadata
-        mocker.patch.object(FTP, 'sendcmd', side_effect=mock_sendcmd)
+            return '226 Transfer complete.'
+
+        # Treat any other commands as successful
+        mocker.patch.object(FTP, 'sendcmd', return_value='200')
+
+        # Mock the directory listing
+        return mocker.patch.object(FTP, 'retrlines', side_effect=mock_retrlines)
 
     def _get_logs(self, structlog_output: LogCapture) -> list[str]:
         """Gets log data as a list of strings from a structlog LogCapture fixture."""
         return [entry['event'] for entry in structlog_output.entries]
 
-    def test_non_ftp_storage(self, settings: LazySettings) -> None:
-        """Raises a NotImplementedError when using a different storage backend than FTPStorage."""
-        settings.IPS_STORAGE_BACKEND = 'django.core.files.storage.FileSystemStorage'
+    def test_unsupported_storage(self, settings: LazySettings) -> None:
+        """Raises a NotImplementedError when using a storage backend that cannot list files with modified times."""
+        settings.IPS_STORAGE_BACKEND = 'django.core.files.storage.InMemoryStorage'
 
         with pytest.raises(NotImplementedError) as error:
             self._call_command('expire_ips_bundles')
 
-        assert 'The expire_ips_bundles command currently only supports storages.backends.ftp.FTPStorage' in str(
-            error.value
-        )
+        assert 'The expire_ips_bundles command requires a storage backend that can list files' in str(error.value)
 
     def test_no_bundles(self, mocker: MockerFixture, structlog_output: LogCapture) -> None:
         """No effect when there are no bundles."""
@@ -149,6 +167,27 @@ class TestExpireIPSBundlesCommand(CommandTestMixin):
             in logs
         )
 
+    def test_single_listing(self, mocker: MockerFixture) -> None:
+        """The bundles are listed with a single MLSD command over a single connection instead of one MLST per file."""
+        mock_retrlines = self._mock_files(
+            mocker,
+            {
+                '1304efc5-9961-4249-bfa5-68af94cb0982.ips': '20260101074500',
+                'bd7c9cdc-1605-4839-9473-8109f488c1fd.ips': '20260101081500',
+                '3f1c8a56-2a4b-4bde-8e5f-9b0f6f1a2c3d.ips': '20260101070000',
+            },
+        )
+        delete_spy = mocker.spy(FTPStorageWithModifiedTime, 'delete')
+
+        self._call_command('expire_ips_bundles')
+
+        mock_retrlines.assert_called_once()
+        assert mock_retrlines.call_args.args[0] == 'MLSD ../bundles'
+        assert not any('MLST ' in call.args[0] for call in cast('MockType', FTP.sendcmd).call_args_list)
+        cast('MockType', FTP.connect).assert_called_once()
+        cast('MockType', FTP.quit).assert_called_once()
+        assert delete_spy.call_count == 2
+
     @pytest.mark.parametrize(
         'timestamp',
         [
@@ -179,6 +218,7 @@ class TestExpireIPSBundlesCommand(CommandTestMixin):
         [
             '20260101074500',  # Average bundle, last modified 1h 15m ago
             '20260101080000',  # Bundle just expired, last updated 1h ago
+            '20260101074500.123',  # Timestamp with fractions of a second
         ],
     )
     def test_delete(self, mocker: MockerFixture, structlog_output: LogCapture, timestamp: str) -> None:
@@ -230,32 +270,15 @@ class TestExpireIPSBundlesCommand(CommandTestMixin):
         logs = self._get_logs(structlog_output)
         assert '1 IPS bundle out of 1 would be deleted (0 errors)' in logs
 
-    def test_file_not_found(self, mocker: MockerFixture, structlog_output: LogCapture) -> None:
-        """Log an error and continue if information about a file is missing from the server."""
-        self._mock_files(
-            mocker,
-            {
-                '1304efc5-9961-4249-bfa5-68af94cb0982.ips': '20260101074500',
-            },
-        )
-        # Overwrite the directory listing with an additional file that doesn't have metadata like a last modified time
-        mocker.patch.object(
-            FTPStorageWithModifiedTime,
-            'listdir',
-            return_value=(
-                ['.', '..'],
-                ['.htaccess', 'bd7c9cdc-1605-4839-9473-8109f488c1fd.ips', '1304efc5-9961-4249-bfa5-68af94cb0982.ips'],
-            ),
-        )
+    def test_listing_error(self, mocker: MockerFixture) -> None:
+        """Raise an error and disconnect if the directory listing fails."""
+        self._mock_files(mocker, {})
+        mocker.patch.object(FTP, 'retrlines', side_effect=ftplib.error_perm('550 No such directory'))
 
-        self._call_command('expire_ips_bundles')
+        with pytest.raises(FTPStorageException, match=r'Error getting directory listing of \.\./bundles'):
+            self._call_command('expire_ips_bundles')
 
-        logs = self._get_logs(structlog_output)
-        assert (
-            'ERROR - Bundle "bd7c9cdc-1605-4839-9473-8109f488c1fd.ips" last modified information failed to be retrieved from the server'
-            in logs
-        )
-        assert '1 IPS bundle out of 2 was deleted (1 error)' in logs
+        cast('MockType', FTP.quit).assert_called_once()
 
     def test_file_delete_error(self, mocker: MockerFixture, structlog_output: LogCapture) -> None:
         """Log an error and continue if a file fails to be deleted."""
@@ -275,6 +298,17 @@ class TestExpireIPSBundlesCommand(CommandTestMixin):
         assert 'ERROR - Failed to delete IPS bundle "1304efc5-9961-4249-bfa5-68af94cb0982.ips"' in logs
         assert '1 IPS bundle out of 2 was deleted (1 error)' in logs
 
+    def test_ftp_delete_without_existence_check(self, mocker: MockerFixture) -> None:
+        """Delete a listed file directly without listing the directory again to check whether it exists."""
+        mocker.patch.object(FTPStorageWithModifiedTime, '_start_connection')
+        storage = FTPStorageWithModifiedTime()
+        storage._connection = mocker.Mock(spec=FTP)
+
+        ftp_delete_original(storage, '1304efc5-9961-4249-bfa5-68af94cb0982.ips')
+
+        storage._connection.delete.assert_called_once_with('1304efc5-9961-4249-bfa5-68af94cb0982.ips')
+        storage._connection.nlst.assert_not_called()
+
     def test_file_date_format_error(self, mocker: MockerFixture, structlog_output: LogCapture) -> None:
         """Log an error and continue if a file's metadata for last modified time isn't in the expected format."""
         self._mock_files(
@@ -289,7 +323,7 @@ class TestExpireIPSBundlesCommand(CommandTestMixin):
 
         logs = self._get_logs(structlog_output)
         assert (
-            'ERROR - Bundle "1304efc5-9961-4249-bfa5-68af94cb0982.ips" last modified date is not in the expected format'
+            'ERROR - Bundle "1304efc5-9961-4249-bfa5-68af94cb0982.ips" last modified information is missing or not in the expected format'
             in logs
         )
         assert '1 IPS bundle out of 2 was deleted (1 error)' in logs
@@ -308,7 +342,7 @@ class TestExpireIPSBundlesCommand(CommandTestMixin):
 
         logs = self._get_logs(structlog_output)
         assert (
-            'ERROR - Bundle "1304efc5-9961-4249-bfa5-68af94cb0982.ips" last modified information failed to be retrieved from the server'
+            'ERROR - Bundle "1304efc5-9961-4249-bfa5-68af94cb0982.ips" last modified information is missing or not in the expected format'
             in logs
         )
         assert '0 IPS bundles out of 1 were deleted (1 error)' in logs
@@ -330,6 +364,64 @@ class TestExpireIPSBundlesCommand(CommandTestMixin):
             in logs
         )
 
+    def test_file_system_storage(
+        self,
+        settings: LazySettings,
+        tmp_path: Path,
+        structlog_output: LogCapture,
+    ) -> None:
+        """Delete the expired bundles stored with the file system storage."""
+        settings.IPS_STORAGE_BACKEND = 'django.core.files.storage.FileSystemStorage'
+        settings.MEDIA_ROOT = str(tmp_path)
+        expired_bundle = tmp_path / '1304efc5-9961-4249-bfa5-68af94cb0982.ips'
+        valid_bundle = tmp_path / 'bd7c9cdc-1605-4839-9473-8109f488c1fd.ips'
+        other_file = tmp_path / 'other.txt'
+
+        for path, modified in (
+            (expired_bundle, datetime.datetime(2026, 1, 1, 7, 45, tzinfo=datetime.UTC)),
+            (valid_bundle, datetime.datetime(2026, 1, 1, 8, 15, tzinfo=datetime.UTC)),
+            (other_file, datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)),
+        ):
+            path.write_text('bundle', encoding='utf-8')
+            os.utime(path, (modified.timestamp(), modified.timestamp()))
+
+        self._call_command('expire_ips_bundles')
+
+        assert not expired_bundle.exists()
+        assert valid_bundle.exists()
+        assert other_file.exists()
+        logs = self._get_logs(structlog_output)
+        assert '1 IPS bundle out of 2 was deleted (0 errors)' in logs
+
+    def test_file_system_storage_no_directory(
+        self,
+        settings: LazySettings,
+        tmp_path: Path,
+        structlog_output: LogCapture,
+    ) -> None:
+        """No effect when the storage directory of the file system storage does not exist yet."""
+        settings.IPS_STORAGE_BACKEND = 'django.core.files.storage.FileSystemStorage'
+        settings.MEDIA_ROOT = str(tmp_path / 'media')
+
+        self._call_command('expire_ips_bundles')
+
+        logs = self._get_logs(structlog_output)
+        assert '0 IPS bundles out of 0 were deleted (0 errors)' in logs
+
+    def test_pluggable_storage(self, settings: LazySettings, structlog_output: LogCapture) -> None:
+        """Support other storage backends implementing the `ModifiedTimesStorage` interface."""
+        settings.IPS_STORAGE_BACKEND = 'opal.patients.tests.test_commands.InMemoryModifiedTimesStorage'
+        InMemoryModifiedTimesStorage.files = {
+            '1304efc5-9961-4249-bfa5-68af94cb0982.ips': datetime.datetime(2026, 1, 1, 7, 45, tzinfo=datetime.UTC),
+            'bd7c9cdc-1605-4839-9473-8109f488c1fd.ips': None,
+        }
+
+        self._call_command('expire_ips_bundles')
+
+        assert InMemoryModifiedTimesStorage.files == {'bd7c9cdc-1605-4839-9473-8109f488c1fd.ips': None}
+        logs = self._get_logs(structlog_output)
+        assert '1 IPS bundle out of 2 was deleted (1 error)' in logs
+
 
 class TestExpireRelationshipsCommand(CommandTestMixin):
     """Test class for expire_relationships management command."""
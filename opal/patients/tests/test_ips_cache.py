@@ -0,0 +1,87 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+import pytest
+
+from opal.patients import ips_cache
+from opal.services.fhir.utils import FHIRDataRetrievalError
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+PATIENT_UUID = uuid4()
+SOCIAL_HISTORY = [{'alcohol_use': '1/wk'}]
+
+
+def test_get_patient_summary_miss_and_hit(mocker: MockerFixture) -> None:
+    """Ensure that the IPS bundle of a patient is only built once."""
+    build_summary = mocker.MagicMock(return_value='{"resourceType": "Bundle"}')
+
+    first_summary = ips_cache.get_patient_summary(PATIENT_UUID, 'OTES12345678', SOCIAL_HISTORY, build_summary)
+    second_summary = ips_cache.get_patient_summary(PATIENT_UUID, 'OTES12345678', SOCIAL_HISTORY, build_summary)
+
+    assert first_summary == second_summary == '{"resourceType": "Bundle"}'
+    build_summary.assert_called_once()
+    assert ips_cache.get_ips_cache_statistics() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_get_patient_summary_key_parameters(mocker: MockerFixture) -> None:
+    """Ensure that the IPS bundles of different patients or source data are cached separately."""
+    build_summary = mocker.MagicMock(return_value='{}')
+
+    ips_cache.get_patient_summary(PATIENT_UUID, 'OTES12345678', SOCIAL_HISTORY, build_summary)
+    ips_cache.get_patient_summary(uuid4(), 'OTES12345678', SOCIAL_HISTORY, build_summary)
+    ips_cache.get_patient_summary(PATIENT_UUID, 'OTES87654321', SOCIAL_HISTORY, build_summary)
+    ips_cache.get_patient_summary(PATIENT_UUID, 'OTES12345678', [{'alcohol_use': '2/wk'}], build_summary)
+    ips_cache.get_patient_summary(PATIENT_UUID, 'OTES12345678', [], build_summary)
+
+    assert build_summary.call_count == 5
+    assert ips_cache.get_ips_cache_statistics() == {'hits': 0, 'misses': 5, 'hit_rate': 0.0}
+
+
+def test_get_patient_summary_social_history_order(mocker: MockerFixture) -> None:
+    """Ensure that the order of the keys of the social history does not affect the cache key."""
+    build_summary = mocker.MagicMock(return_value='{}')
+
+    ips_cache.get_patient_summary(PATIENT_UUID, 'OTES12345678', [{'a': 1, 'b': 2}], build_summary)
+    ips_cache.get_patient_summary(PATIENT_UUID, 'OTES12345678', [{'b': 2, 'a': 1}], build_summary)
+
+    build_summary.assert_called_once()
+
+
+def test_get_patient_summary_error_not_cached(mocker: MockerFixture) -> None:
+    """Ensure that an error building the IPS bundle is raised and not cached."""
+    build_summary = mocker.MagicMock(side_effect=[FHIRDataRetrievalError('error'), '{}'])
+
+    with pytest.raises(FHIRDataRetrievalError, match='error'):
+        ips_cache.get_patient_summary(PATIENT_UUID, 'OTES12345678', SOCIAL_HISTORY, build_summary)
+
+    assert ips_cache.get_patient_summary(PATIENT_UUID, 'OTES12345678', SOCIAL_HISTORY, build_summary) == '{}'
+    assert build_summary.call_count == 2
+
+
+def test_get_patient_summary_timeout(mocker: MockerFixture) -> None:
+    """Ensure that the IPS bundles are kept in the cache as long as the IPS bundle files."""
+    mock_set = mocker.patch('django.core.cache.cache.set')
+
+    ips_cache.get_patient_summary(PATIENT_UUID, 'OTES12345678', SOCIAL_HISTORY, lambda: '{}')
+
+    mock_set.assert_called_once()
+    assert mock_set.call_args.args[2] == 3600
+
+
+def test_get_ips_cache_statistics_empty() -> None:
+    """Ensure that the statistics are empty when no IPS bundle was requested."""
+    assert ips_cache.get_ips_cache_statistics() == {'hits': 0, 'misses': 0, 'hit_rate': 0.0}
+
+
+def test_get_patient_summary_key_without_identifier() -> None:
+    """Ensure that the health insurance number is not part of the cache key."""
+    key = ips_cache._get_summary_key(PATIENT_UUID, 'OTES12345678', SOCIAL_HISTORY)
+
+    assert key.startswith(f'patients:ips:{PATIENT_UUID}:')
+    assert 'OTES12345678' not in key
@@ -53,6 +53,7 @@ from opal.users.factories import Caregiver, User
 from .. import utils
 
 if TYPE_CHECKING:
+    from pytest_django import DjangoAssertNumQueries
     from pytest_django.fixtures import SettingsWrapper
     from pytest_mock import MockerFixture
 
@@ -320,6 +321,52 @@ def test_get_patient_by_mrn_in_failed() -> None:
     assert utils.get_patient_by_ramq_or_mrn(ramq, mrn, site_code) is None
 
 
+def test_get_patient_by_mrn_sites(django_assert_num_queries: DjangoAssertNumQueries) -> None:
+    """Get the patient identified by MRN/site pairs with a single query, ignoring unknown sites."""
+    patient = patient_factories.Patient.create()
+    patient_factories.HospitalPatient.create(patient=patient, site=Site.create(acronym='RVH'), mrn='9999996')
+    patient_factories.HospitalPatient.create(patient=patient, site=Site.create(acronym='MGH'), mrn='1111111')
+    mrn_sites = [('9999996', 'RVH'), ('1111111', 'MGH'), ('12345678', 'HNAM_PERSONID'), ('0000000', 'RVH')]
+    # cache the sites
+    utils.get_patient_by_mrn_sites(mrn_sites)
+
+    with django_assert_num_queries(1):
+        assert utils.get_patient_by_mrn_sites(mrn_sites) == patient
+
+
+@pytest.mark.parametrize(
+    'mrn_sites',
+    [
+        [],
+        [('12345678', 'HNAM_PERSONID')],
+        [('0000000', 'RVH')],
+    ],
+)
+def test_get_patient_by_mrn_sites_not_found(mrn_sites: list[tuple[str, str]]) -> None:
+    """Ensure an error is raised if no patient is identified by the MRN/site pairs of known sites."""
+    patient_factories.HospitalPatient.create(site=Site.create(acronym='RVH'), mrn='9999996')
+
+    with pytest.raises(Patient.DoesNotExist):
+        utils.get_patient_by_mrn_sites(mrn_sites)
+
+
+def test_get_patient_by_mrn_sites_multiple() -> None:
+    """Ensure an error is raised if the MRN/site pairs identify different patients."""
+    patient_factories.HospitalPatient.create(
+        patient=patient_factories.Patient.create(ramq='SIMM86600199'),
+        site=Site.create(acronym='RVH'),
+        mrn='9999996',
+    )
+    patient_factories.HospitalPatient.create(
+        patient=patient_factories.Patient.create(ramq='SIMH83051299'),
+        site=Site.create(acronym='MGH'),
+        mrn='9999996',
+    )
+
+    with pytest.raises(Patient.MultipleObjectsReturned):
+        utils.get_patient_by_mrn_sites([('9999996', 'RVH'), ('9999996', 'MGH')])
+
+
 def test_create_patient() -> None:
     """A new patient can be created."""
     patient = utils.create_patient(
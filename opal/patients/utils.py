@@ -5,15 +5,19 @@
 """App patients util functions."""
 
 import logging
+import operator
+from functools import reduce
 from typing import TYPE_CHECKING, Final
 
 from django.conf import settings
 from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
 from opal.caregivers import models as caregiver_models
 from opal.core.utils import generate_random_registration_code, generate_random_uuid
 from opal.hospital_settings.models import Institution, Site
+from opal.hospital_settings.utils import get_site_ids_by_acronym
 from opal.legacy import utils as legacy_utils
 from opal.legacy.models import LegacyUserType
 from opal.services.integration import hospital
@@ -24,6 +28,7 @@ from opal.users.models import Caregiver, User
 from .models import HospitalPatient, Patient, Relationship, RelationshipStatus, RelationshipType, RoleType, SexType
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
     from datetime import date
     from uuid import UUID
 
@@ -219,6 +224,41 @@ def get_patient_by_ramq_or_mrn(ramq: str | None, mrn: str, site: str) -> Patient
     ).first()
 
 
+def get_patient_by_mrn_sites(mrn_sites: Iterable[tuple[str, str]]) -> Patient:
+    """
+    Get the `Patient` uniquely identified by the given MRN/site pairs (e.g., from the PID segment of an HL7 message).
+
+    Pairs of unknown sites (e.g., `HNAM_PERSONID`) are ignored.
+    The patient is retrieved with a single query using the unique index on the site and MRN of hospital patients.
+
+    Args:
+        mrn_sites: the MRN and site acronym pairs of the patient
+
+    Returns:
+        `Patient` object
+
+    Raises:
+        Patient.DoesNotExist: if no patient is found for the pairs of known sites
+        Patient.MultipleObjectsReturned: if the pairs identify different patients
+    """
+    site_ids = get_site_ids_by_acronym()
+    filters = [Q(site_id=site_ids[site], mrn=mrn) for mrn, site in mrn_sites if site in site_ids]
+
+    if not filters:
+        raise Patient.DoesNotExist('No MRN of a known site was provided to identify the patient.')
+
+    hospital_patients = HospitalPatient.objects.select_related('patient').filter(reduce(operator.or_, filters))
+    patients = {hospital_patient.patient_id: hospital_patient.patient for hospital_patient in hospital_patients}
+
+    if not patients:
+        raise Patient.DoesNotExist('No patient found for the given MRNs.')
+
+    if len(patients) > 1:
+        raise Patient.MultipleObjectsReturned('The given MRNs identify more than one patient.')
+
+    return next(iter(patients.values()))
+
+
 def create_caregiver_profile(first_name: str, last_name: str) -> caregiver_models.CaregiverProfile:
     """
     Create new caregiver and caregiver profile instances.
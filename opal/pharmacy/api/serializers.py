@@ -11,6 +11,7 @@ from rest_framework.validators import UniqueTogetherValidator
 
 from opal.core.api.serializers import DynamicFieldsSerializer
 
+from ..coded_elements import get_coded_element_key, resolve_coded_elements
 from ..models import CodedElement, PharmacyComponent, PharmacyEncodedOrder, PharmacyRoute, PhysicianPrescriptionOrder
 
 
@@ -220,8 +221,112 @@ class PharmacyEncodedOrderSerializer(serializers.ModelSerializer[PharmacyEncoded
         return super().to_internal_value(data)
 
 
+def create_physician_prescription_orders(validated_data: list[dict[str, Any]]) -> list[PhysicianPrescriptionOrder]:
+    """
+    Bulk create new `PhysicianPrescriptionOrder` instances and their related model instances.
+
+    The coded elements of all orders are resolved together (see `resolve_coded_elements`)
+    and the instances of each related model are created with a single bulk insert.
+
+    Args:
+        validated_data: a list of validated data dictionaries of prescription orders
+
+    Returns:
+        the list of created `PhysicianPrescriptionOrder` instances
+    """
+    pharmacy_encoded_orders_data = [data.pop('pharmacy_encoded_order') for data in validated_data]
+    coded_elements = resolve_coded_elements(
+        coded_element_data
+        for pharmacy_encoded_order_data in pharmacy_encoded_orders_data
+        for coded_element_data in (
+            pharmacy_encoded_order_data['give_code'],
+            pharmacy_encoded_order_data['give_dosage_form'],
+            pharmacy_encoded_order_data['pharmacy_route']['route'],
+            pharmacy_encoded_order_data['pharmacy_route']['administration_method'],
+            *(
+                component_data['component_code']
+                for component_data in pharmacy_encoded_order_data['pharmacy_components']
+            ),
+        )
+    )
+
+    def get_coded_element(coded_element_data: dict[str, Any] | None) -> CodedElement | None:
+        key = get_coded_element_key(coded_element_data)
+        return None if key is None else coded_elements[key]
+
+    # the primary keys of the created instances are set since MariaDB supports returning them on bulk inserts
+    physician_prescription_orders = PhysicianPrescriptionOrder.objects.bulk_create(
+        PhysicianPrescriptionOrder(**data) for data in validated_data
+    )
+
+    pharmacy_encoded_orders: list[PharmacyEncodedOrder] = []
+    pharmacy_routes: list[PharmacyRoute] = []
+    pharmacy_components: list[PharmacyComponent] = []
+
+    for physician_prescription_order, pharmacy_encoded_order_data in zip(
+        physician_prescription_orders,
+        pharmacy_encoded_orders_data,
+        strict=True,
+    ):
+        pharmacy_components_data = pharmacy_encoded_order_data.pop('pharmacy_components')
+        pharmacy_route_data = pharmacy_encoded_order_data.pop('pharmacy_route')
+
+        pharmacy_encoded_order = PharmacyEncodedOrder(
+            physician_prescription_order=physician_prescription_order,
+            give_code=get_coded_element(pharmacy_encoded_order_data.pop('give_code')),
+            give_dosage_form=get_coded_element(pharmacy_encoded_order_data.pop('give_dosage_form')),
+            **pharmacy_encoded_order_data,
+        )
+        pharmacy_encoded_orders.append(pharmacy_encoded_order)
+
+        pharmacy_routes.append(
+            PharmacyRoute(
+                pharmacy_encoded_order=pharmacy_encoded_order,
+                route=get_coded_element(pharmacy_route_data.pop('route')),
+                administration_method=get_coded_element(pharmacy_route_data.pop('administration_method')),
+                **pharmacy_route_data,
+            ),
+        )
+        pharmacy_components.extend(
+            PharmacyComponent(
+                pharmacy_encoded_order=pharmacy_encoded_order,
+                component_code=get_coded_element(component_data.pop('component_code')),
+                **component_data,
+            )
+            for component_data in pharmacy_components_data
+        )
+
+    # the related instances are assigned the primary keys of their parents during the bulk insert
+    PharmacyEncodedOrder.objects.bulk_create(pharmacy_encoded_orders)
+    PharmacyRoute.objects.bulk_create(pharmacy_routes)
+    PharmacyComponent.objects.bulk_create(pharmacy_components)
+
+    return physician_prescription_orders
+
+
+class PhysicianPrescriptionOrderListSerializer(serializers.ListSerializer[list[PhysicianPrescriptionOrder]]):
+    """List serializer supporting the bulk creation of multiple `PhysicianPrescriptionOrder` instances."""
+
+    def create(self, validated_data: list[dict[str, Any]]) -> list[PhysicianPrescriptionOrder]:
+        """
+        Bulk create new `PhysicianPrescriptionOrder` instances and their related model instances.
+
+        Args:
+            validated_data: a list of validated data dictionaries
+
+        Returns:
+            the list of created `PhysicianPrescriptionOrder` instances
+        """
+        return create_physician_prescription_orders(validated_data)
+
+
 class PhysicianPrescriptionOrderSerializer(serializers.ModelSerializer[PhysicianPrescriptionOrder]):
-    """Serializer for the `PhysicianPrescriptionOrder` model."""
+    """
+    Serializer for the `PhysicianPrescriptionOrder` model.
+
+    It supports the creation of multiple instances by passing a list of dictionaries using a list serializer.
+    See: https://www.django-rest-framework.org/api-guide/serializers/#customizing-listserializer-behavior
+    """
 
     pharmacy_encoded_order = PharmacyEncodedOrderSerializer(
         many=False,
@@ -251,75 +356,19 @@ class PhysicianPrescriptionOrderSerializer(serializers.ModelSerializer[Physician
             'ordered_by',
             'effective_at',
         )
+        # See: https://www.django-rest-framework.org/api-guide/serializers/#customizing-multiple-create
+        list_serializer_class = PhysicianPrescriptionOrderListSerializer
 
-    def create(self, validated_data: dict[str, Any]) -> PhysicianPrescriptionOrder:  # noqa: PLR0914
+    def create(self, validated_data: dict[str, Any]) -> PhysicianPrescriptionOrder:
         """
         Create new `PhysicianPrescriptionOrder` instance and related model instances.
 
+        The coded elements are resolved in bulk and the components are created with a single bulk insert.
+
         Args:
             validated_data: Formatted data from the HL7Parser
 
         Returns:
             Prescription order instance
         """
-        # Extract the nested data
-        pharmacy_encoded_order_data = validated_data.pop('pharmacy_encoded_order')
-        pharmacy_components_data = pharmacy_encoded_order_data.pop('pharmacy_components')
-        pharmacy_route_data = pharmacy_encoded_order_data.pop('pharmacy_route')
-
-        # Create the PhysicianPrescriptionOrder instance
-        physician_prescription_order_instance = PhysicianPrescriptionOrder.objects.create(**validated_data)
-
-        # Create the PharmacyEncodedOrder instance and its nested CodedElements
-        give_code_data = pharmacy_encoded_order_data.pop('give_code')
-        give_code_coded_element = None
-        if give_code_data:
-            give_code_coded_element, _ = CodedElement.objects.get_or_create(**give_code_data)
-
-        give_dosage_form_data = pharmacy_encoded_order_data.pop('give_dosage_form')
-        give_dosage_form_coded_element = None
-        if give_dosage_form_data:
-            give_dosage_form_coded_element, _ = CodedElement.objects.get_or_create(
-                **give_dosage_form_data,
-            )
-
-        pharmacy_encoded_order_instance = PharmacyEncodedOrder.objects.create(
-            physician_prescription_order=physician_prescription_order_instance,
-            give_code=give_code_coded_element,
-            give_dosage_form=give_dosage_form_coded_element,
-            **pharmacy_encoded_order_data,
-        )
-
-        # Create the PharmacyRoute, including route and administration_method CodedElements
-        route_data = pharmacy_route_data.pop('route')
-        route_coded_element = None
-        if route_data:
-            route_coded_element, _ = CodedElement.objects.get_or_create(**route_data)
-
-        administration_method_data = pharmacy_route_data.pop('administration_method')
-        administration_method_coded_element = None
-        if administration_method_data:
-            administration_method_coded_element, _ = CodedElement.objects.get_or_create(
-                **administration_method_data,
-            )
-
-        PharmacyRoute.objects.create(
-            pharmacy_encoded_order=pharmacy_encoded_order_instance,
-            route=route_coded_element,
-            administration_method=administration_method_coded_element,
-            **pharmacy_route_data,
-        )
-
-        # Handle the creation of PharmacyComponents
-        for component_data in pharmacy_components_data:
-            component_code_data = component_data.pop('component_code')
-            component_code_element = None
-            if component_code_data:
-                component_code_element, _ = CodedElement.objects.get_or_create(**component_code_data)
-            PharmacyComponent.objects.create(
-                pharmacy_encoded_order=pharmacy_encoded_order_instance,
-                component_code=component_code_element,
-                **component_data,
-            )
-
-        return physician_prescription_order_instance
+        return create_physician_prescription_orders([validated_data])[0]
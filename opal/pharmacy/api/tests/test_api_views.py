@@ -8,6 +8,8 @@ from pathlib import Path
 from typing import TYPE_CHECKING
 from uuid import uuid4
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 import pytest
@@ -20,6 +22,7 @@ from opal.patients import factories as patient_factories
 from opal.pharmacy import models
 
 if TYPE_CHECKING:
+    from pytest_django import DjangoCaptureOnCommitCallbacks
     from rest_framework.test import APIClient
 
     from opal.users.models import User
@@ -190,6 +193,66 @@ class TestCreatePrescriptionView:
         assert models.PharmacyRoute.objects.count() == 3
         assert models.PharmacyEncodedOrder.objects.count() == 3
 
+    def test_pharmacy_create_uuid_mismatch(
+        self,
+        api_client: APIClient,
+        interface_engine_user: User,
+    ) -> None:
+        """Ensure the endpoint returns an error if the PID segment identifies a different patient than the URL."""
+        patient_factories.HospitalPatient.create(
+            site=Site.objects.get(acronym='RVH'),
+            mrn='9999996',
+        )
+        other_patient = patient_factories.Patient.create(ramq='TEST01161973', uuid=PATIENT_UUID)
+        api_client.force_login(interface_engine_user)
+
+        response = api_client.post(
+            reverse('api:patient-pharmacy-create', kwargs={'uuid': str(other_patient.uuid)}),
+            data=self._load_hl7_fixture('marge_pharmacy.hl7v2'),
+            content_type='application/hl7-v2+er7',
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['message'] == 'PID segment data did not match uuid provided in url.'
+        assert not models.PhysicianPrescriptionOrder.objects.exists()
+
+    def test_pharmacy_create_queries(
+        self,
+        api_client: APIClient,
+        interface_engine_user: User,
+        django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+    ) -> None:
+        """Ensure the sites and coded elements are cached and the number of queries per message is fixed."""
+        patient = patient_factories.Patient.create(
+            ramq='TEST01161972',
+            uuid=PATIENT_UUID,
+        )
+        patient_factories.HospitalPatient.create(
+            patient=patient,
+            site=Site.objects.get(acronym='RVH'),
+            mrn='9999996',
+        )
+        api_client.force_login(interface_engine_user)
+        url = reverse('api:patient-pharmacy-create', kwargs={'uuid': str(patient.uuid)})
+        query_counts = []
+
+        for _ in range(3):
+            # the coded elements are cached once the request's transaction is committed
+            with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+                response = api_client.post(
+                    url,
+                    data=self._load_hl7_fixture('marge_pharmacy.hl7v2'),
+                    content_type='application/hl7-v2+er7',
+                )
+
+            assert response.status_code == status.HTTP_201_CREATED
+            query_counts.append(len(queries))
+
+        # the first message caches the sites and retrieves and creates the coded elements
+        assert query_counts[0] > query_counts[1]
+        # the following messages only resolve the patient and insert the prescription
+        assert query_counts[1] == query_counts[2]
+
     def test_pharmacy_route_to_internal_value(
         self,
         api_client: APIClient,
@@ -224,3 +287,270 @@ class TestCreatePrescriptionView:
         """
         with (FIXTURES_DIR / filename).open('r') as file:
             return file.read()
+
+
+class TestCreatePrescriptionBatchView:
+    """Class wrapper for pharmacy batch endpoint tests."""
+
+    @pytest.fixture(autouse=True)
+    def _before_each(self) -> None:
+        """Fixture for pre-creating the valid site acronyms and the patients of the fixtures."""
+        for acronym in ('RVH', 'MGH', 'MCH', 'LAC'):
+            hospital_factories.Site.create(acronym=acronym)
+
+        self.marge = patient_factories.Patient.create(ramq='TEST01161972')
+        patient_factories.HospitalPatient.create(
+            patient=self.marge,
+            site=Site.objects.get(acronym='RVH'),
+            mrn='9999996',
+        )
+        self.homer = patient_factories.Patient.create(ramq='TEST01161973')
+        patient_factories.HospitalPatient.create(
+            patient=self.homer,
+            site=Site.objects.get(acronym='MGH'),
+            mrn='9999998',
+        )
+
+    def test_pharmacy_batch_unauthorized(
+        self,
+        user_api_client: APIClient,
+    ) -> None:
+        """Ensure the endpoint returns a 403 error if the user is unauthorized."""
+        response = user_api_client.post(
+            reverse('api:pharmacy-batch-create'),
+            data=_load_hl7_fixture('marge_pharmacy.hl7v2'),
+            content_type='application/hl7-v2+er7',
+        )
+
+        assertContains(
+            response=response,
+            text='You do not have permission to perform this action.',
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+
+    def test_pharmacy_batch_wrapped_create_success(
+        self,
+        api_client: APIClient,
+        interface_engine_user: User,
+    ) -> None:
+        """Ensure the prescriptions of a batch wrapped in file and batch header and trailer segments are created."""
+        api_client.force_login(interface_engine_user)
+        batch = _build_batch('marge_pharmacy.hl7v2', 'homer_pharmacy.hl7v2', 'marge_pharmacy.hl7v2', wrapped=True)
+
+        response = api_client.post(
+            reverse('api:pharmacy-batch-create'),
+            data=batch,
+            content_type='application/hl7-v2+er7',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['created'] == 3
+        assert response.data['failed'] == 0
+        assert [result['control_id'] for result in response.data['results']] == [
+            'RDE-199247252',
+            'RDE-199247237',
+            'RDE-199247252',
+        ]
+        prescriptions = list(models.PhysicianPrescriptionOrder.objects.order_by('pk'))
+        assert [result['id'] for result in response.data['results']] == [
+            prescription.pk for prescription in prescriptions
+        ]
+        assert [prescription.patient for prescription in prescriptions] == [self.marge, self.homer, self.marge]
+        assert models.PharmacyEncodedOrder.objects.count() == 3
+        assert models.PharmacyRoute.objects.count() == 3
+        marge_components = models.PharmacyComponent.objects.filter(
+            pharmacy_encoded_order__physician_prescription_order__patient=self.marge,
+        )
+        assert marge_components.count() == 14
+        assert not models.PharmacyRoute.objects.get(
+            pharmacy_encoded_order__physician_prescription_order__patient=self.homer,
+        ).administration_method
+
+    def test_pharmacy_batch_same_as_single_requests(
+        self,
+        api_client: APIClient,
+        interface_engine_user: User,
+    ) -> None:
+        """Ensure a newline-delimited batch creates the same data as creating each prescription separately."""
+        api_client.force_login(interface_engine_user)
+
+        for filename, patient in (('marge_pharmacy.hl7v2', self.marge), ('homer_pharmacy.hl7v2', self.homer)):
+            response = api_client.post(
+                reverse('api:patient-pharmacy-create', kwargs={'uuid': str(patient.uuid)}),
+                data=_load_hl7_fixture(filename),
+                content_type='application/hl7-v2+er7',
+            )
+            assert response.status_code == status.HTTP_201_CREATED
+
+        single_counts = _count_pharmacy_data()
+        models.PhysicianPrescriptionOrder.objects.all().delete()
+        models.CodedElement.objects.all().delete()
+
+        response = api_client.post(
+            reverse('api:pharmacy-batch-create'),
+            data=_build_batch('marge_pharmacy.hl7v2', 'homer_pharmacy.hl7v2', wrapped=False),
+            content_type='application/hl7-v2+er7',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['created'] == 2
+        assert _count_pharmacy_data() == single_counts
+
+    def test_pharmacy_batch_partial_failure(
+        self,
+        api_client: APIClient,
+        interface_engine_user: User,
+    ) -> None:
+        """Ensure invalid messages are reported per message while the valid messages are created."""
+        api_client.force_login(interface_engine_user)
+        unknown_patient = _load_hl7_fixture('marge_pharmacy.hl7v2').replace('9999996^^^RVH', '0000000^^^RVH')
+        # only the MSH and PID segments
+        missing_segments = '\n'.join(_load_hl7_fixture('marge_pharmacy.hl7v2').splitlines()[:2])
+        unsupported_version = 'MSH|^~\\&|RxTFC|RVH|rcv|RVH|20231206131640||RDE^O01|RDE-3|P|9.9'
+        batch = '\n'.join((
+            _load_hl7_fixture('homer_pharmacy.hl7v2'),
+            unknown_patient,
+            missing_segments,
+            unsupported_version,
+        ))
+
+        response = api_client.post(
+            reverse('api:pharmacy-batch-create'),
+            data=batch,
+            content_type='application/hl7-v2+er7',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['created'] == 1
+        assert response.data['failed'] == 3
+        results = response.data['results']
+        assert [result['status'] for result in results] == ['created', 'error', 'error', 'error']
+        assert [result['index'] for result in results] == [0, 1, 2, 3]
+        assert results[1]['errors'] == ['Patient identified by HL7 PID could not be uniquely found in database.']
+        assert results[2]['control_id'] == 'RDE-199247252'
+        assert results[2]['errors'] == ['HL7 message is missing segments required for a prescription.']
+        assert results[3]['control_id'] == 'RDE-3'
+        assert results[3]['errors'][0].startswith('Error parsing HL7 message:')
+        assert models.PhysicianPrescriptionOrder.objects.get().patient == self.homer
+
+    def test_pharmacy_batch_patient_not_unique(
+        self,
+        api_client: APIClient,
+        interface_engine_user: User,
+    ) -> None:
+        """Ensure a message whose MRNs identify several patients is not created."""
+        api_client.force_login(interface_engine_user)
+        patient_factories.HospitalPatient.create(
+            patient=self.homer,
+            site=Site.objects.get(acronym='MCH'),
+            mrn='2222222',
+        )
+
+        response = api_client.post(
+            reverse('api:pharmacy-batch-create'),
+            data=_load_hl7_fixture('marge_pharmacy.hl7v2'),
+            content_type='application/hl7-v2+er7',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['failed'] == 1
+        assert not models.PhysicianPrescriptionOrder.objects.exists()
+
+    def test_pharmacy_batch_queries(
+        self,
+        api_client: APIClient,
+        interface_engine_user: User,
+    ) -> None:
+        """Ensure the patients, coded elements and prescription data are not queried or inserted for each message."""
+        api_client.force_login(interface_engine_user)
+        url = reverse('api:pharmacy-batch-create')
+        # create the coded elements first so that both batches only retrieve them
+        api_client.post(url, data=_build_batch('marge_pharmacy.hl7v2'), content_type='application/hl7-v2+er7')
+
+        with CaptureQueriesContext(connection) as single_message_queries:
+            api_client.post(url, data=_build_batch('marge_pharmacy.hl7v2'), content_type='application/hl7-v2+er7')
+
+        with CaptureQueriesContext(connection) as batch_queries:
+            response = api_client.post(
+                url,
+                data=_build_batch(*['marge_pharmacy.hl7v2'] * 10),
+                content_type='application/hl7-v2+er7',
+            )
+
+        assert response.data['created'] == 10
+        # only the validation of the patient's primary key by the serializer is done per message
+        assert len(batch_queries) <= len(single_message_queries) + 9
+
+    def test_pharmacy_batch_large(
+        self,
+        api_client: APIClient,
+        interface_engine_user: User,
+    ) -> None:
+        """Ensure a large wrapped batch of messages for different patients is created at once."""
+        api_client.force_login(interface_engine_user)
+        filenames = ['marge_pharmacy.hl7v2', 'homer_pharmacy.hl7v2'] * 100
+
+        response = api_client.post(
+            reverse('api:pharmacy-batch-create'),
+            data=_build_batch(*filenames, wrapped=True),
+            content_type='application/hl7-v2+er7',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['created'] == len(filenames)
+        assert models.PhysicianPrescriptionOrder.objects.count() == len(filenames)
+
+
+def _load_hl7_fixture(filename: str) -> str:
+    """
+    Load a HL7 fixture for testing.
+
+    Returns:
+        string of the fixture data
+    """
+    with (FIXTURES_DIR / filename).open('r') as file:
+        return file.read().strip()
+
+
+def _build_batch(*filenames: str, wrapped: bool = False) -> str:
+    """
+    Build an HL7 batch file of the given fixtures.
+
+    Args:
+        filenames: the fixtures of the messages of the batch
+        wrapped: whether to wrap the messages in file and batch header and trailer segments
+
+    Returns:
+        the batch file with the messages separated by empty lines, or wrapped in batch segments
+    """
+    messages = [_load_hl7_fixture(filename) for filename in filenames]
+
+    if not wrapped:
+        return '\n\n'.join(messages)
+
+    return '\n'.join((
+        'FHS|^~\\&|RxTFC|RVH|rcv|RVH|20231206131640',
+        'BHS|^~\\&|RxTFC|RVH|rcv|RVH|20231206131640',
+        *messages,
+        f'BTS|{len(messages)}',
+        'FTS|1',
+    ))
+
+
+def _count_pharmacy_data() -> dict[str, int]:
+    """
+    Count the instances of the pharmacy models.
+
+    Returns:
+        the number of instances of each pharmacy model
+    """
+    return {
+        model.__name__: model.objects.count()
+        for model in (
+            models.PhysicianPrescriptionOrder,
+            models.PharmacyEncodedOrder,
+            models.PharmacyRoute,
+            models.PharmacyComponent,
+            models.CodedElement,
+        )
+    }
@@ -4,22 +4,42 @@
 
 """Module providing API views for the `pharmacy` app."""
 
+import operator
+from collections import defaultdict
+from functools import reduce
+from itertools import batched
 from typing import TYPE_CHECKING, Any
 
 from django.db import transaction
+from django.db.models import Q
 
+import structlog
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from opal.core.api.views import HL7CreateView
+from opal.core.drf_parsers.hl7_parser import HL7BatchParser
 from opal.core.drf_permissions import IsInterfaceEngine
+from opal.hospital_settings.utils import get_site_ids_by_acronym
+from opal.patients.models import HospitalPatient
 
 from ..models import PhysicianPrescriptionOrder
 from .serializers import PhysicianPrescriptionOrderSerializer
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from django.http import HttpRequest
+
     from rest_framework.request import Request
 
+LOGGER = structlog.get_logger()
+
+# the number of MRN/site pairs looked up per query when resolving the patients of a batch
+MRN_SITES_CHUNK_SIZE = 500
+
 
 class CreatePrescriptionView(HL7CreateView[PhysicianPrescriptionOrder]):
     """`HL7CreateView` for handling POST requests to create prescription pharmacy data."""
@@ -42,7 +62,7 @@ class CreatePrescriptionView(HL7CreateView[PhysicianPrescriptionOrder]):
             API Response with code and headers
         """
         patient = request.data.pop('patient')
-        transformed_data = self._transform_parsed_to_serializer_structure(request.data)
+        transformed_data = transform_prescription_data(request.data)
         transformed_data['patient'] = patient.pk
         serializer = self.get_serializer(data=transformed_data)
         serializer.is_valid(raise_exception=True)
@@ -50,117 +70,292 @@ class CreatePrescriptionView(HL7CreateView[PhysicianPrescriptionOrder]):
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
-    def _transform_parsed_to_serializer_structure(self, parsed_data: dict[str, Any]) -> dict[str, Any]:
+
+class CreatePrescriptionBatchView(APIView):
+    """
+    `APIView` for handling POST requests with an HL7 batch file of pharmacy messages to create prescriptions.
+
+    This allows replaying many messages (e.g., after an outage of the interface engine) in a single request.
+    The patients of all messages are resolved together
+    and the prescriptions of all valid messages are created with bulk inserts in a single transaction.
+    The response contains the result of each message in the order of the batch file.
+    """
+
+    parser_classes = (HL7BatchParser,)
+    permission_classes = (IsInterfaceEngine,)
+    segments_to_parse = CreatePrescriptionView.segments_to_parse
+
+    def get_parser_context(self, http_request: HttpRequest) -> dict[str, Any]:
         """
-        Transform the parsed segment data dictionary into the expected structure for the serializer.
+        Append the list of HL7 segments to be parsed to the dictionary of parser context data.
 
         Args:
-            parsed_data: segmented dictionary parsed from the HL7 request data
+            http_request: The incoming request
 
         Returns:
-            formatted dictionary for internal representation serializer
+            parser context for the HL7BatchParser.parse() method
         """
-        order_data = parsed_data['ORC'][0]
-        patient_visit_data = parsed_data['PV1'][0]
-        pharmacy_encoded_data = parsed_data['RXE'][0]
-        note_data = parsed_data['NTE'][0]
-        components = parsed_data['RXC']
-        route = parsed_data['RXR'][0]
-        return {
-            'quantity': order_data['order_quantity'],
-            'unit': order_data['order_quantity_unit'],
-            'interval_pattern': order_data['order_interval_pattern'],
-            'interval_duration': order_data['order_interval_duration'],
-            'duration': order_data['order_duration'],
-            'service_start': order_data['order_start_datetime'],
-            'service_end': order_data['order_end_datetime'],
-            'priority': order_data['order_priority'],
-            'visit_number': patient_visit_data['visit_number'],
-            'trigger_event': order_data['order_control'],
-            'filler_order_number': order_data['filler_order_number'],
-            'order_status': order_data['order_status'],
-            'entered_at': order_data['entered_at'],
-            'entered_by': (
-                order_data['entered_by_given_name']
-                + f'_{order_data["entered_by_family_name"]}'
-                + f'_{order_data["entered_by_id"]}'
-            ),
-            'verified_by': (
-                order_data['verified_by_given_name']
-                + f'_{order_data["verified_by_family_name"]}'
-                + f'_{order_data["verified_by_id"]}'
-            ),
-            'ordered_by': (
-                order_data['order_by_given_name']
-                + f'_{order_data["order_by_family_name"]}'
-                + f'_{order_data["ordered_by_id"]}'
+        context = super().get_parser_context(http_request)
+        context['segments_to_parse'] = self.segments_to_parse
+        return context
+
+    def post(self, request: Request) -> Response:
+        """
+        Create the prescriptions of all valid messages of the batch file.
+
+        Args:
+            request: The http request object
+
+        Returns:
+            API Response with the number of created and failed messages and the result of each message
+        """
+        messages: list[dict[str, Any]] = request.data
+        patient_resolver = _BatchPatientResolver(
+            mrn_site for message in messages for mrn_site in self._get_mrn_sites(message.get('data', {}))
+        )
+        results: list[dict[str, Any]] = []
+        valid_messages: list[tuple[dict[str, Any], dict[str, Any]]] = []
+
+        for index, message in enumerate(messages):
+            result: dict[str, Any] = {'index': index, 'control_id': message['control_id']}
+            results.append(result)
+
+            try:
+                valid_messages.append((result, self._validate_message(message, patient_resolver)))
+            except ValidationError as exc:
+                result.update(status='error', errors=exc.detail)
+
+        with transaction.atomic():
+            prescriptions = PhysicianPrescriptionOrderSerializer(many=True).create([data for _, data in valid_messages])
+
+        for (result, _), prescription in zip(valid_messages, prescriptions, strict=True):
+            result.update(status='created', id=prescription.pk)
+
+        LOGGER.info(
+            'Created the prescriptions of %s out of %s HL7 messages of a batch',
+            len(valid_messages),
+            len(messages),
+        )
+
+        return Response(
+            {
+                'created': len(valid_messages),
+                'failed': len(messages) - len(valid_messages),
+                'results': results,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def _validate_message(self, message: dict[str, Any], patient_resolver: _BatchPatientResolver) -> dict[str, Any]:
+        """
+        Validate the prescription of a parsed message of the batch.
+
+        Args:
+            message: the parsed message
+            patient_resolver: the resolver of the patients of the batch
+
+        Returns:
+            the validated data of the prescription
+
+        Raises:
+            ValidationError: if the message could not be parsed, the patient could not be uniquely found
+                or the prescription data is invalid
+        """
+        if 'error' in message:
+            raise ValidationError(message['error'])
+
+        patient_id = patient_resolver.resolve(self._get_mrn_sites(message['data']))
+
+        if patient_id is None:
+            raise ValidationError('Patient identified by HL7 PID could not be uniquely found in database.')
+
+        try:
+            prescription_data = transform_prescription_data(message['data'])
+        except KeyError, IndexError:
+            raise ValidationError('HL7 message is missing segments required for a prescription.') from None
+
+        prescription_data['patient'] = patient_id
+        serializer = PhysicianPrescriptionOrderSerializer(data=prescription_data)
+        serializer.is_valid(raise_exception=True)
+
+        return dict(serializer.validated_data)
+
+    def _get_mrn_sites(self, parsed_data: dict[str, Any]) -> list[tuple[str, str]]:
+        """
+        Return the MRN/site pairs of the PID segment of a parsed message.
+
+        Args:
+            parsed_data: segmented dictionary parsed from the HL7 message
+
+        Returns:
+            the MRN/site pairs of the patient, empty if the message does not have a PID segment
+        """
+        pid_data = parsed_data.get('PID') or {}
+        mrn_sites: list[tuple[str, str]] = pid_data.get('mrn_sites', [])
+        return mrn_sites
+
+
+class _BatchPatientResolver:
+    """
+    Resolve the patients of the messages of a batch.
+
+    The patients of all MRN/site pairs of the batch are retrieved at once instead of querying them for each message.
+    """
+
+    def __init__(self, mrn_sites: Iterable[tuple[str, str]]) -> None:
+        """
+        Retrieve the patients of the MRN/site pairs of valid sites.
+
+        Args:
+            mrn_sites: the MRN/site pairs of all messages of the batch
+        """
+        # Filter out invalid sites from the raw site list given by the hospital (e.g `HNAM_PERSONID`)
+        self.site_ids = get_site_ids_by_acronym()
+        self.patient_ids: defaultdict[tuple[str, int], set[int]] = defaultdict(set)
+        valid_mrn_sites = {(mrn, self.site_ids[site]) for mrn, site in mrn_sites if site in self.site_ids}
+
+        for mrn_sites_chunk in batched(valid_mrn_sites, MRN_SITES_CHUNK_SIZE, strict=False):
+            query = reduce(operator.or_, (Q(mrn=mrn, site_id=site_id) for mrn, site_id in mrn_sites_chunk))
+            hospital_patients = HospitalPatient.objects.filter(query).values_list('mrn', 'site_id', 'patient_id')
+
+            for mrn, site_id, patient_id in hospital_patients:
+                self.patient_ids[mrn, site_id].add(patient_id)
+
+    def resolve(self, mrn_sites: Iterable[tuple[str, str]]) -> int | None:
+        """
+        Return the ID of the patient identified by the MRN/site pairs of a message.
+
+        Like `get_patient_by_mrn_sites`, the pairs of invalid sites are ignored
+        and the remaining pairs need to identify exactly one patient.
+
+        Args:
+            mrn_sites: the MRN/site pairs of the message
+
+        Returns:
+            the ID of the patient, `None` if no patient or several patients are identified
+        """
+        patient_ids = set[int]().union(
+            *(
+                self.patient_ids.get((mrn, self.site_ids[site]), set())
+                for mrn, site in mrn_sites
+                if site in self.site_ids
             ),
-            'effective_at': order_data['effective_at'],
-            'pharmacy_encoded_order': {
-                'quantity': pharmacy_encoded_data['pharmacy_quantity'],
-                'unit': pharmacy_encoded_data['pharmacy_quantity_unit'],
-                'interval_pattern': pharmacy_encoded_data['pharmacy_interval_pattern'],
-                'interval_duration': pharmacy_encoded_data['pharmacy_interval_duration'],
-                'duration': pharmacy_encoded_data['pharmacy_duration'],
-                'service_start': pharmacy_encoded_data['pharmacy_start_datetime'],
-                'service_end': pharmacy_encoded_data['pharmacy_end_datetime'],
-                'priority': pharmacy_encoded_data['pharmacy_priority'],
-                'give_code': {
-                    'identifier': pharmacy_encoded_data['give_identifier'],
-                    'text': pharmacy_encoded_data['give_text'],
-                    'coding_system': pharmacy_encoded_data['give_coding_system'],
-                    'alternate_identifier': pharmacy_encoded_data['give_alt_identifier'],
-                    'alternate_text': pharmacy_encoded_data['give_alt_text'],
-                    'alternate_coding_system': pharmacy_encoded_data['give_alt_coding_system'],
-                },
-                'give_amount_maximum': pharmacy_encoded_data['give_amount_maximum'],
-                'give_amount_minimum': pharmacy_encoded_data['give_amount_minimum'],
-                'give_units': pharmacy_encoded_data['give_units'],
-                'give_dosage_form': {
-                    'identifier': pharmacy_encoded_data['give_dosage_identifier'],
-                    'text': pharmacy_encoded_data['give_dosage_text'],
-                    'coding_system': pharmacy_encoded_data['give_dosage_coding_system'],
+        )
+
+        return patient_ids.pop() if len(patient_ids) == 1 else None
+
+
+def transform_prescription_data(parsed_data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Transform the parsed segment data dictionary into the expected structure for the serializer.
+
+    Args:
+        parsed_data: segmented dictionary parsed from the HL7 request data
+
+    Returns:
+        formatted dictionary for internal representation serializer
+    """
+    order_data = parsed_data['ORC'][0]
+    patient_visit_data = parsed_data['PV1'][0]
+    pharmacy_encoded_data = parsed_data['RXE'][0]
+    note_data = parsed_data['NTE'][0]
+    components = parsed_data['RXC']
+    route = parsed_data['RXR'][0]
+    return {
+        'quantity': order_data['order_quantity'],
+        'unit': order_data['order_quantity_unit'],
+        'interval_pattern': order_data['order_interval_pattern'],
+        'interval_duration': order_data['order_interval_duration'],
+        'duration': order_data['order_duration'],
+        'service_start': order_data['order_start_datetime'],
+        'service_end': order_data['order_end_datetime'],
+        'priority': order_data['order_priority'],
+        'visit_number': patient_visit_data['visit_number'],
+        'trigger_event': order_data['order_control'],
+        'filler_order_number': order_data['filler_order_number'],
+        'order_status': order_data['order_status'],
+        'entered_at': order_data['entered_at'],
+        'entered_by': (
+            order_data['entered_by_given_name']
+            + f'_{order_data["entered_by_family_name"]}'
+            + f'_{order_data["entered_by_id"]}'
+        ),
+        'verified_by': (
+            order_data['verified_by_given_name']
+            + f'_{order_data["verified_by_family_name"]}'
+            + f'_{order_data["verified_by_id"]}'
+        ),
+        'ordered_by': (
+            order_data['order_by_given_name']
+            + f'_{order_data["order_by_family_name"]}'
+            + f'_{order_data["ordered_by_id"]}'
+        ),
+        'effective_at': order_data['effective_at'],
+        'pharmacy_encoded_order': {
+            'quantity': pharmacy_encoded_data['pharmacy_quantity'],
+            'unit': pharmacy_encoded_data['pharmacy_quantity_unit'],
+            'interval_pattern': pharmacy_encoded_data['pharmacy_interval_pattern'],
+            'interval_duration': pharmacy_encoded_data['pharmacy_interval_duration'],
+            'duration': pharmacy_encoded_data['pharmacy_duration'],
+            'service_start': pharmacy_encoded_data['pharmacy_start_datetime'],
+            'service_end': pharmacy_encoded_data['pharmacy_end_datetime'],
+            'priority': pharmacy_encoded_data['pharmacy_priority'],
+            'give_code': {
+                'identifier': pharmacy_encoded_data['give_identifier'],
+                'text': pharmacy_encoded_data['give_text'],
+                'coding_system': pharmacy_encoded_data['give_coding_system'],
+                'alternate_identifier': pharmacy_encoded_data['give_alt_identifier'],
+                'alternate_text': pharmacy_encoded_data['give_alt_text'],
+                'alternate_coding_system': pharmacy_encoded_data['give_alt_coding_system'],
+            },
+            'give_amount_maximum': pharmacy_encoded_data['give_amount_maximum'],
+            'give_amount_minimum': pharmacy_encoded_data['give_amount_minimum'],
+            'give_units': pharmacy_encoded_data['give_units'],
+            'give_dosage_form': {
+                'identifier': pharmacy_encoded_data['give_dosage_identifier'],
+                'text': pharmacy_encoded_data['give_dosage_text'],
+                'coding_system': pharmacy_encoded_data['give_dosage_coding_system'],
+            },
+            'provider_administration_instruction': pharmacy_encoded_data['provider_administration_instruction'],
+            'dispense_amount': pharmacy_encoded_data['dispense_amount'],
+            'dispense_units': pharmacy_encoded_data['dispense_units'],
+            'refills': pharmacy_encoded_data['refills'],
+            'formulary_status': note_data['note_comment_text'],
+            'pharmacy_route': {
+                'route': {
+                    'identifier': route['route_identifier'],
+                    'text': route['route_text'],
+                    'coding_system': route['route_coding_system'],
+                    'alternate_identifier': route['route_alt_identifier'],
+                    'alternate_text': route['route_alt_text'],
+                    'alternate_coding_system': route['route_alt_coding_system'],
                 },
-                'provider_administration_instruction': pharmacy_encoded_data['provider_administration_instruction'],
-                'dispense_amount': pharmacy_encoded_data['dispense_amount'],
-                'dispense_units': pharmacy_encoded_data['dispense_units'],
-                'refills': pharmacy_encoded_data['refills'],
-                'formulary_status': note_data['note_comment_text'],
-                'pharmacy_route': {
-                    'route': {
-                        'identifier': route['route_identifier'],
-                        'text': route['route_text'],
-                        'coding_system': route['route_coding_system'],
-                        'alternate_identifier': route['route_alt_identifier'],
-                        'alternate_text': route['route_alt_text'],
-                        'alternate_coding_system': route['route_alt_coding_system'],
-                    },
-                    'site': route['route_site'],
-                    'administration_device': route['route_administration_device'],
-                    'administration_method': {
-                        'identifier': route['route_administration_identifier'],
-                        'text': route['route_administration_text'],
-                        'coding_system': route['route_administration_coding_system'],
-                        'alternate_identifier': route['route_administration_alt_identifier'],
-                        'alternate_text': route['route_administration_alt_text'],
-                        'alternate_coding_system': route['route_administration_alt_coding_system'],
-                    },
+                'site': route['route_site'],
+                'administration_device': route['route_administration_device'],
+                'administration_method': {
+                    'identifier': route['route_administration_identifier'],
+                    'text': route['route_administration_text'],
+                    'coding_system': route['route_administration_coding_system'],
+                    'alternate_identifier': route['route_administration_alt_identifier'],
+                    'alternate_text': route['route_administration_alt_text'],
+                    'alternate_coding_system': route['route_administration_alt_coding_system'],
                 },
-                'pharmacy_components': [
-                    {
-                        'component_code': {
-                            'identifier': component['component_identifier'],
-                            'text': component['component_text'],
-                            'coding_system': component['component_coding_system'],
-                            'alternate_identifier': component['component_alt_identifier'],
-                            'alternate_text': component['component_alt_text'],
-                            'alternate_coding_system': component['component_alt_coding_system'],
-                        },
-                        'component_units': component['component_units'],
-                        'component_type': component['component_type'],
-                        'component_amount': component['component_amount'],
-                    }
-                    for component in components
-                ],
             },
-        }
+            'pharmacy_components': [
+                {
+                    'component_code': {
+                        'identifier': component['component_identifier'],
+                        'text': component['component_text'],
+                        'coding_system': component['component_coding_system'],
+                        'alternate_identifier': component['component_alt_identifier'],
+                        'alternate_text': component['component_alt_text'],
+                        'alternate_coding_system': component['component_alt_coding_system'],
+                    },
+                    'component_units': component['component_units'],
+                    'component_type': component['component_type'],
+                    'component_amount': component['component_amount'],
+                }
+                for component in components
+            ],
+        },
+    }
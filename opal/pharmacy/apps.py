@@ -0,0 +1,20 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""This module provides configuration for the pharmacy app."""
+
+from django.apps import AppConfig
+
+
+class PharmacyConfig(AppConfig):
+    """This class provides app configuration for the pharmacy app."""
+
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'opal.pharmacy'
+
+    def ready(self) -> None:
+        """Perform initialization tasks."""
+        # Implicitly connect signal handlers decorated with @receiver.
+        # See: https://docs.djangoproject.com/en/dev/topics/signals/#connecting-receiver-functions
+        from . import signals  # noqa: F401, PLC0415
@@ -0,0 +1,255 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""
+Module which resolves the coded elements (CE) of pharmacy orders in bulk.
+
+A pharmacy order references several coded elements (give code, dosage form, route, administration method
+and the code of each component).
+Instead of retrieving or creating each of them separately,
+all coded elements of one or more orders are retrieved with a single query and the missing ones are bulk created.
+
+Coded elements are identified by their identifier, text and coding system (see `CodedElement.Meta.unique_together`).
+Frequently used coded elements (e.g., routes and dosage forms) are kept in an in-process LRU cache
+so that most orders do not need to query them at all.
+Coded elements are only cached once the transaction resolving them is committed,
+so that the cache never contains coded elements whose creation was rolled back.
+Each process has its own cache, which is cleared when a coded element is saved or deleted in that process
+(see `signals`).
+Cached coded elements therefore expire after `CODED_ELEMENTS_CACHE_TIMEOUT` seconds,
+which bounds how long other processes (e.g., other workers) keep changed or deleted coded elements.
+"""
+
+import operator
+import threading
+import time
+from collections import OrderedDict
+from functools import partial, reduce
+from itertools import batched
+from typing import TYPE_CHECKING, Any
+
+from django.db import transaction
+from django.db.models import Q
+
+import structlog
+
+from .models import CodedElement
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+LOGGER = structlog.get_logger()
+
+#: Fields identifying a coded element
+CODED_ELEMENT_KEY_FIELDS = ('identifier', 'text', 'coding_system')
+#: Maximum number of coded elements kept in the in-process cache
+CODED_ELEMENTS_CACHE_SIZE = 1024
+#: Number of seconds coded elements are kept in the in-process cache
+CODED_ELEMENTS_CACHE_TIMEOUT = 60
+# the number of coded elements looked up per query
+CODED_ELEMENTS_CHUNK_SIZE = 500
+
+type CodedElementKey = tuple[str, ...]
+
+
+class CodedElementCache:
+    """Thread-safe least recently used (LRU) cache of coded elements by their key with expiring entries."""
+
+    def __init__(self, max_size: int, timeout: float) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: the maximum number of coded elements to keep
+            timeout: the number of seconds a coded element is kept
+        """
+        self.max_size = max_size
+        self.timeout = timeout
+        # the coded elements with the (monotonic) time at which they expire
+        self._coded_elements: OrderedDict[CodedElementKey, tuple[float, CodedElement]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: CodedElementKey) -> CodedElement | None:
+        """
+        Return the cached coded element with the given key and mark it as the most recently used.
+
+        Args:
+            key: the key of the coded element
+
+        Returns:
+            the coded element, `None` if it is not cached or expired
+        """
+        with self._lock:
+            entry = self._coded_elements.get(key)
+
+            if entry is None:
+                return None
+
+            expires_at, coded_element = entry
+
+            if expires_at <= time.monotonic():
+                del self._coded_elements[key]
+                return None
+
+            self._coded_elements.move_to_end(key)
+
+            return coded_element
+
+    def add(self, key: CodedElementKey, coded_element: CodedElement) -> None:
+        """
+        Add a coded element to the cache and evict the least recently used ones if the cache is full.
+
+        Args:
+            key: the key of the coded element
+            coded_element: the coded element
+        """
+        with self._lock:
+            self._coded_elements[key] = (time.monotonic() + self.timeout, coded_element)
+            self._coded_elements.move_to_end(key)
+
+            while len(self._coded_elements) > self.max_size:
+                self._coded_elements.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all coded elements from the cache."""
+        with self._lock:
+            self._coded_elements.clear()
+
+    def __len__(self) -> int:
+        """
+        Return the number of cached coded elements.
+
+        Returns:
+            the number of cached coded elements
+        """
+        return len(self._coded_elements)
+
+
+CODED_ELEMENTS_CACHE = CodedElementCache(CODED_ELEMENTS_CACHE_SIZE, CODED_ELEMENTS_CACHE_TIMEOUT)
+
+
+def get_coded_element_key(coded_element_data: dict[str, Any] | None) -> CodedElementKey | None:
+    """
+    Return the key identifying the coded element with the given data.
+
+    Args:
+        coded_element_data: the validated data of the coded element, `None` if there is no coded element
+
+    Returns:
+        the key of the coded element, `None` if there is no coded element
+    """
+    if not coded_element_data:
+        return None
+
+    return tuple(coded_element_data[field] for field in CODED_ELEMENT_KEY_FIELDS)
+
+
+def resolve_coded_elements(
+    coded_elements_data: Iterable[dict[str, Any] | None],
+) -> dict[CodedElementKey, CodedElement]:
+    """
+    Retrieve or create the coded elements with the given data.
+
+    Cached coded elements are not queried.
+    The other coded elements are retrieved with one query (per chunk) and the missing ones are bulk created.
+    Coded elements created concurrently by another request are retrieved after the bulk insert ignored them.
+    The retrieved and created coded elements are added to the cache once the current transaction is committed.
+
+    Args:
+        coded_elements_data: the validated data of the coded elements, `None` for an absent coded element
+
+    Returns:
+        the coded elements by their key (see `get_coded_element_key`)
+    """
+    coded_elements_by_key: dict[CodedElementKey, dict[str, Any]] = {}
+
+    for coded_element_data in coded_elements_data:
+        key = get_coded_element_key(coded_element_data)
+
+        if key is not None and coded_element_data is not None:
+            coded_elements_by_key.setdefault(key, coded_element_data)
+
+    coded_elements: dict[CodedElementKey, CodedElement] = {}
+
+    for key in coded_elements_by_key:
+        cached_coded_element = CODED_ELEMENTS_CACHE.get(key)
+
+        if cached_coded_element is not None:
+            coded_elements[key] = cached_coded_element
+
+    missing_keys = coded_elements_by_key.keys() - coded_elements.keys()
+
+    if missing_keys:
+        coded_elements.update(_retrieve_coded_elements(missing_keys))
+        keys_to_create = missing_keys - coded_elements.keys()
+
+        if keys_to_create:
+            # conflicts with coded elements created concurrently are ignored and these are retrieved below
+            CodedElement.objects.bulk_create(
+                (CodedElement(**coded_elements_by_key[key]) for key in keys_to_create),
+                ignore_conflicts=True,
+            )
+            coded_elements.update(_retrieve_coded_elements(keys_to_create))
+
+        for key in missing_keys:
+            if key not in coded_elements:
+                # the database considers the key equal to the one of an existing coded element
+                # (e.g., it only differs in case), which it does not match exactly
+                coded_elements[key] = CodedElement.objects.get(**dict(zip(CODED_ELEMENT_KEY_FIELDS, key, strict=True)))
+
+        # a rolled back transaction discards the callback, and with it the coded elements it created
+        transaction.on_commit(partial(_cache_coded_elements, {key: coded_elements[key] for key in missing_keys}))
+
+        LOGGER.debug(
+            'Resolved %s coded elements (%s cached, %s created)',
+            len(coded_elements),
+            len(coded_elements) - len(missing_keys),
+            len(keys_to_create),
+        )
+
+    return coded_elements
+
+
+def clear_coded_elements_cache() -> None:
+    """Remove all coded elements from the in-process cache."""
+    CODED_ELEMENTS_CACHE.clear()
+
+
+def _cache_coded_elements(coded_elements: dict[CodedElementKey, CodedElement]) -> None:
+    """
+    Add the given coded elements to the in-process cache.
+
+    Args:
+        coded_elements: the coded elements by their key
+    """
+    for key, coded_element in coded_elements.items():
+        CODED_ELEMENTS_CACHE.add(key, coded_element)
+
+
+def _retrieve_coded_elements(keys: Iterable[CodedElementKey]) -> dict[CodedElementKey, CodedElement]:
+    """
+    Retrieve the existing coded elements with the given keys.
+
+    Args:
+        keys: the keys of the coded elements
+
+    Returns:
+        the existing coded elements by their key
+    """
+    coded_elements: dict[CodedElementKey, CodedElement] = {}
+
+    for keys_chunk in batched(keys, CODED_ELEMENTS_CHUNK_SIZE, strict=False):
+        query = reduce(
+            operator.or_,
+            (Q(**dict(zip(CODED_ELEMENT_KEY_FIELDS, key, strict=True))) for key in keys_chunk),
+        )
+        requested_keys = set(keys_chunk)
+
+        for coded_element in CodedElement.objects.filter(query):
+            key = tuple(getattr(coded_element, field) for field in CODED_ELEMENT_KEY_FIELDS)
+
+            if key in requested_keys:
+                coded_elements[key] = coded_element
+
+    return coded_elements
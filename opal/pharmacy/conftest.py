@@ -0,0 +1,15 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""This module is used to provide configuration, fixtures, and plugins for pytest."""
+
+import pytest
+
+from opal.pharmacy.coded_elements import clear_coded_elements_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_coded_elements() -> None:
+    """Fixture clearing the in-process cache to avoid coded elements cached by a test leaking into other tests."""
+    clear_coded_elements_cache()
@@ -0,0 +1,25 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Module consisting of signals of the pharmacy app."""
+
+from typing import Any
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .coded_elements import clear_coded_elements_cache
+from .models import CodedElement
+
+
+@receiver(signal=post_save, sender=CodedElement)
+@receiver(signal=post_delete, sender=CodedElement)
+def coded_element_changed_signal_handler(**kwargs: Any) -> None:
+    """
+    Clear the cached coded elements when a coded element is saved or deleted.
+
+    Args:
+        kwargs: additional keyword arguments of the signal
+    """
+    clear_coded_elements_cache()
@@ -0,0 +1,163 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+from typing import TYPE_CHECKING, Any
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+
+from .. import coded_elements, factories
+from ..models import CodedElement
+
+if TYPE_CHECKING:
+    from pytest_django import DjangoCaptureOnCommitCallbacks
+    from pytest_mock import MockerFixture
+
+pytestmark = pytest.mark.django_db()
+
+
+def _coded_element_data(identifier: str, text: str = 'APIXABAN TAB 5 mg') -> dict[str, Any]:
+    """
+    Build the validated data of a coded element.
+
+    Args:
+        identifier: the identifier of the coded element
+        text: the text of the coded element
+
+    Returns:
+        the data of the coded element
+    """
+    return {
+        'identifier': identifier,
+        'text': text,
+        'coding_system': 'RXTFC',
+        'alternate_identifier': '',
+        'alternate_text': '',
+        'alternate_coding_system': '',
+    }
+
+
+def test_resolve_coded_elements() -> None:
+    """Ensure existing coded elements are retrieved and missing ones are created once."""
+    existing = factories.CodedElementFactory.create(**_coded_element_data('APIXA5'))
+
+    resolved = coded_elements.resolve_coded_elements([
+        _coded_element_data('APIXA5'),
+        _coded_element_data('PO'),
+        None,
+        _coded_element_data('PO'),
+    ])
+
+    assert set(resolved) == {('APIXA5', 'APIXABAN TAB 5 mg', 'RXTFC'), ('PO', 'APIXABAN TAB 5 mg', 'RXTFC')}
+    assert resolved['APIXA5', 'APIXABAN TAB 5 mg', 'RXTFC'] == existing
+    assert CodedElement.objects.count() == 2
+    assert CodedElement.objects.get(identifier='PO') == resolved['PO', 'APIXABAN TAB 5 mg', 'RXTFC']
+
+
+def test_resolve_coded_elements_queries(django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks) -> None:
+    """Ensure the coded elements are retrieved and created with a constant number of queries and then cached."""
+    data = [_coded_element_data(f'CE{index}') for index in range(50)]
+    factories.CodedElementFactory.create(**data[0])
+
+    with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+        resolved = coded_elements.resolve_coded_elements(data)
+
+    # retrieve the existing ones, create the missing ones and retrieve the created ones
+    assert len(queries) == 3
+    assert len(resolved) == 50
+
+    with CaptureQueriesContext(connection) as queries:
+        assert coded_elements.resolve_coded_elements(data) == resolved
+
+    assert not queries
+
+
+def test_resolve_coded_elements_concurrently_created(mocker: MockerFixture) -> None:
+    """Ensure a coded element created concurrently after the lookup is retrieved instead of failing."""
+    retrieve_coded_elements = coded_elements._retrieve_coded_elements
+
+    def retrieve_after_concurrent_creation(keys: Any) -> Any:
+        # the first lookup does not find the coded element which another request creates right after
+        if spy.call_count == 1:
+            factories.CodedElementFactory.create(**_coded_element_data('PO'))
+            return {}
+
+        return retrieve_coded_elements(keys)
+
+    spy = mocker.patch.object(
+        coded_elements,
+        '_retrieve_coded_elements',
+        side_effect=retrieve_after_concurrent_creation,
+    )
+
+    resolved = coded_elements.resolve_coded_elements([_coded_element_data('PO')])
+
+    assert resolved['PO', 'APIXABAN TAB 5 mg', 'RXTFC'] == CodedElement.objects.get()
+    assert spy.call_count == 2
+
+
+def test_resolve_coded_elements_rolled_back(
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    """Ensure coded elements are not cached if the transaction resolving them is rolled back."""
+    with django_capture_on_commit_callbacks(execute=True) as callbacks, transaction.atomic():
+        coded_elements.resolve_coded_elements([_coded_element_data('PO')])
+
+        # the coded elements are only cached once the transaction is committed
+        assert not len(coded_elements.CODED_ELEMENTS_CACHE)
+        transaction.set_rollback(True)
+
+    assert not callbacks
+    assert not len(coded_elements.CODED_ELEMENTS_CACHE)
+    assert not CodedElement.objects.exists()
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    """Ensure the cache evicts the least recently used coded elements once full."""
+    cache = coded_elements.CodedElementCache(max_size=2, timeout=60)
+    first, second, third = factories.CodedElementFactory.build_batch(3)
+
+    cache.add(('first',), first)
+    cache.add(('second',), second)
+    assert cache.get(('first',)) == first
+    cache.add(('third',), third)
+
+    assert len(cache) == 2
+    assert cache.get(('second',)) is None
+    assert cache.get(('first',)) == first
+    assert cache.get(('third',)) == third
+
+
+def test_cache_expires(mocker: MockerFixture) -> None:
+    """Ensure cached coded elements expire so that other processes pick up changed coded elements."""
+    mock_time = mocker.patch('opal.pharmacy.coded_elements.time')
+    mock_time.monotonic.return_value = 100
+    cache = coded_elements.CodedElementCache(max_size=2, timeout=60)
+    coded_element = factories.CodedElementFactory.build()
+
+    cache.add(('first',), coded_element)
+    mock_time.monotonic.return_value = 159
+    assert cache.get(('first',)) == coded_element
+
+    mock_time.monotonic.return_value = 160
+
+    assert cache.get(('first',)) is None
+    assert not len(cache)
+
+
+@pytest.mark.parametrize('change', ['save', 'delete'])
+def test_cache_cleared_when_coded_element_changed(
+    change: str,
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    """Ensure cached coded elements are discarded when a coded element is changed or deleted."""
+    with django_capture_on_commit_callbacks(execute=True):
+        resolved = coded_elements.resolve_coded_elements([_coded_element_data('PO')])
+    assert len(coded_elements.CODED_ELEMENTS_CACHE) == 1
+
+    getattr(resolved['PO', 'APIXABAN TAB 5 mg', 'RXTFC'], change)()
+
+    assert not len(coded_elements.CODED_ELEMENTS_CACHE)
@@ -9,3 +9,4 @@ from django.contrib import admin
 from . import models
 
 admin.site.register(models.QuestionnaireProfile, admin.ModelAdmin)
+admin.site.register(models.QuestionnaireReportJob, admin.ModelAdmin)
@@ -20,3 +20,13 @@ class QuestionnaireProfile(DjangoModelFactory[models.QuestionnaireProfile]):
 
     user = SubFactory(User)
     questionnaire_list = {'19': {'title': 'Opal Feedback Questionnaire', 'lastviewed': '2022-11-17'}}
+
+
+class QuestionnaireReportJob(DjangoModelFactory[models.QuestionnaireReportJob]):
+    """Model factory to create [opal.questionnaires.models.QuestionnaireReportJob][] models."""
+
+    class Meta:
+        model = models.QuestionnaireReportJob
+
+    mrn = '9999996'
+    site = 'RVH'
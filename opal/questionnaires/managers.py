@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Collection of managers for the questionnaires app."""
+
+from typing import TYPE_CHECKING
+
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+if TYPE_CHECKING:
+    import datetime as dt
+
+    from .models import QuestionnaireReportJob
+
+
+class QuestionnaireReportJobManager(models.Manager['QuestionnaireReportJob']):
+    """Manager class for the `QuestionnaireReportJob` model providing the operations of the job queue."""
+
+    def enqueue(self, mrn: str, site: str) -> tuple[QuestionnaireReportJob, bool]:
+        """
+        Queue a new job for a patient unless the patient already has a pending or running job.
+
+        Concurrent requests for the same patient are de-duplicated by the unique active key of the job.
+
+        Args:
+            mrn: the medical record number of the patient
+            site: the site code of the MRN
+
+        Returns:
+            the active job of the patient and whether it was created
+
+        Raises:
+            IntegrityError: if the job cannot be created for another reason than an existing active job
+        """
+        active_key = self.model.get_active_key(mrn, site)
+
+        try:
+            with transaction.atomic():
+                return self.create(mrn=mrn, site=site, active_key=active_key), True
+        except IntegrityError:
+            # another request created the active job in the meantime
+            existing_job = self.filter(active_key=active_key).first()
+            if existing_job is None:
+                # the active job finished in the meantime
+                raise
+            return existing_job, False
+
+    def claim_next(self) -> QuestionnaireReportJob | None:
+        """
+        Claim the oldest pending job for processing.
+
+        The job is locked while it is claimed.
+        Jobs locked by other workers are skipped so that multiple workers can claim jobs concurrently.
+
+        Returns:
+            the claimed job which is now running, `None` if there is no pending job
+        """
+        with transaction.atomic():
+            job = (
+                self
+                .select_for_update(skip_locked=True)
+                .filter(status=self.model.Status.PENDING)
+                .order_by('created_at')
+                .first()
+            )
+
+            if job is not None:
+                job.status = self.model.Status.RUNNING
+                job.started_at = timezone.now()
+                job.save(update_fields=['status', 'started_at'])
+
+        return job
+
+    def requeue_stale(self, started_before: dt.datetime) -> int:
+        """
+        Queue running jobs again which were started before the given time.
+
+        Running jobs are left behind if a worker is terminated while processing them.
+
+        Args:
+            started_before: the time before which running jobs are considered stale
+
+        Returns:
+            the number of jobs that were queued again
+        """
+        return self.filter(
+            status=self.model.Status.RUNNING,
+            started_at__lt=started_before,
+        ).update(status=self.model.Status.PENDING, started_at=None)
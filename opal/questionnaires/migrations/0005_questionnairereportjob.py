@@ -0,0 +1,69 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# Generated by Django 5.2 on 2026-10-16 12:00
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Add the `QuestionnaireReportJob` model for the queue of questionnaire report requests."""
+
+    dependencies = [
+        ('questionnaires', '0004_alter_questionnaireprofile_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionnaireReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'uuid',
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='UUID'),
+                ),
+                ('mrn', models.CharField(max_length=10, verbose_name='Medical Record Number')),
+                ('site', models.CharField(max_length=10, verbose_name='Site Code')),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[
+                            ('PENDING', 'Pending'),
+                            ('RUNNING', 'Running'),
+                            ('COMPLETED', 'Completed'),
+                            ('FAILED', 'Failed'),
+                        ],
+                        default='PENDING',
+                        max_length=9,
+                        verbose_name='Status',
+                    ),
+                ),
+                (
+                    'active_key',
+                    models.CharField(
+                        blank=True,
+                        editable=False,
+                        max_length=21,
+                        null=True,
+                        unique=True,
+                        verbose_name='Active Key',
+                    ),
+                ),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+            ],
+            options={
+                'verbose_name': 'Questionnaire Report Job',
+                'verbose_name_plural': 'Questionnaire Report Jobs',
+                'ordering': ('created_at',),
+                'indexes': [
+                    models.Index(fields=['status', 'created_at'], name='questionnaire_report_job_queue'),
+                ],
+            },
+        ),
+    ]
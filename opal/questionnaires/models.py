@@ -4,12 +4,16 @@
 
 """This module provides models for questionnaires."""
 
+from uuid import uuid4
+
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from opal.users.models import User
 
+from .managers import QuestionnaireReportJobManager
+
 
 class Questionnaire(models.Model):  # noqa: DJ008
     """
@@ -75,3 +79,129 @@ class QuestionnaireProfile(models.Model):
         elif qid in questionnaires_following.questionnaire_list:
             questionnaires_following.questionnaire_list.pop(qid)
         questionnaires_following.save()
+
+
+class QuestionnaireReportJobStatus(models.TextChoices):
+    """The processing status of a [opal.questionnaires.models.QuestionnaireReportJob][]."""
+
+    PENDING = 'PENDING', _('Pending')
+    RUNNING = 'RUNNING', _('Running')
+    COMPLETED = 'COMPLETED', _('Completed')
+    FAILED = 'FAILED', _('Failed')
+
+
+class QuestionnaireReportJob(models.Model):
+    """
+    Request to generate the questionnaire report of a patient and to export it to the source system.
+
+    The jobs are queued in the database and processed by the `process_questionnaire_reports` command.
+    While a job is pending or running, its `active_key` is set to the site and MRN of the patient.
+    Since the key is unique, there is at most one active job per patient site and MRN.
+    """
+
+    # define the choices as a class attribute for easier access
+    Status = QuestionnaireReportJobStatus
+
+    uuid = models.UUIDField(
+        verbose_name=_('UUID'),
+        unique=True,
+        default=uuid4,
+        editable=False,
+    )
+    mrn = models.CharField(
+        verbose_name=_('Medical Record Number'),
+        max_length=10,
+    )
+    site = models.CharField(
+        verbose_name=_('Site Code'),
+        max_length=10,
+    )
+    status = models.CharField(
+        verbose_name=_('Status'),
+        max_length=9,
+        choices=QuestionnaireReportJobStatus.choices,
+        default=QuestionnaireReportJobStatus.PENDING,
+    )
+    active_key = models.CharField(
+        verbose_name=_('Active Key'),
+        max_length=21,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    error = models.TextField(
+        verbose_name=_('Error'),
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        verbose_name=_('Created At'),
+        auto_now_add=True,
+    )
+    started_at = models.DateTimeField(
+        verbose_name=_('Started At'),
+        null=True,
+        blank=True,
+    )
+    finished_at = models.DateTimeField(
+        verbose_name=_('Finished At'),
+        null=True,
+        blank=True,
+    )
+
+    objects: QuestionnaireReportJobManager = QuestionnaireReportJobManager()
+
+    class Meta:
+        ordering = ('created_at',)
+        indexes = (models.Index(fields=('status', 'created_at'), name='questionnaire_report_job_queue'),)
+        verbose_name = _('Questionnaire Report Job')
+        verbose_name_plural = _('Questionnaire Report Jobs')
+
+    def __str__(self) -> str:
+        """
+        Return the textual representation of the job.
+
+        Returns:
+            the site and MRN of the patient and the status of the job
+        """
+        return f'{self.site}: {self.mrn} ({self.status})'
+
+    @staticmethod
+    def get_active_key(mrn: str, site: str) -> str:
+        """
+        Return the key identifying the active job of a patient.
+
+        Args:
+            mrn: the medical record number of the patient
+            site: the site code of the MRN
+
+        Returns:
+            the key of the active job
+        """
+        return f'{site}:{mrn}'
+
+    def complete(self) -> None:
+        """Mark the job as completed."""
+        self._finish(QuestionnaireReportJobStatus.COMPLETED)
+
+    def fail(self, error: str) -> None:
+        """
+        Mark the job as failed.
+
+        Args:
+            error: the reason of the failure
+        """
+        self.error = error
+        self._finish(QuestionnaireReportJobStatus.FAILED)
+
+    def _finish(self, status: QuestionnaireReportJobStatus) -> None:
+        """
+        Finish the job and release its active key so that a new job can be requested for the patient.
+
+        Args:
+            status: the final status of the job
+        """
+        self.status = status
+        self.active_key = None
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'active_key', 'error', 'finished_at'])
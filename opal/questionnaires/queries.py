@@ -14,12 +14,19 @@ from django.db.utils import DatabaseError
 from django.utils.translation import gettext_lazy as _
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
     from django.db.backends.utils import CursorWrapper
     from django.http.request import QueryDict
 
 # Logger instance declared at the module level
 logger = logging.getLogger(__name__)
 
+#: Columns of the temporary report table that the report rows can be ordered by
+TEMP_TABLE_ORDER_COLUMNS = frozenset(('patient_id', 'question_id', 'last_updated'))
+#: Number of rows fetched at once from the temporary report table
+TEMP_TABLE_FETCH_SIZE = 1000
+
 
 def set_test_account(debug: bool) -> str:
     """
@@ -387,9 +394,35 @@ def get_temp_table() -> list[dict[str, Any]]:
     Returns:
         List of all rows of the query as dictionaries.
     """
+    return list(iter_temp_table())
+
+
+def iter_temp_table(order_by: Sequence[str] = ('last_updated',)) -> Iterator[dict[str, Any]]:
+    """
+    Retrieve the previously generated report in the temporary table one row at a time.
+
+    The rows are fetched in batches of `TEMP_TABLE_FETCH_SIZE` rows
+    which allows to stream reports of any size.
+
+    Args:
+        order_by: the columns to order the rows by (ascending), see `TEMP_TABLE_ORDER_COLUMNS`
+
+    Yields:
+        the rows of the query as dictionaries
+
+    Raises:
+        ValueError: if the rows cannot be ordered by one of the given columns
+    """
+    unsupported_columns = set(order_by) - TEMP_TABLE_ORDER_COLUMNS
+    if unsupported_columns:
+        raise ValueError(f'The report cannot be ordered by: {sorted(unsupported_columns)}')
+
+    # the column names are validated above
+    order_clause = ', '.join(f'{column} ASC' for column in order_by)
+
     with connections['questionnaire'].cursor() as conn:
         conn.execute(
-            """
+            f"""
             SELECT
                 patientId as patient_id,
                 questionId as question_id,
@@ -399,8 +432,11 @@ def get_temp_table() -> list[dict[str, Any]]:
                 lastUpdated as last_updated
             FROM
                 tempC
-            ORDER BY last_updated ASC
-            """,
+            ORDER BY {order_clause}
+            """,  # noqa: S608
         )
+        columns = [col[0] for col in conn.description]
 
-        return _fetch_all_as_dict(conn)
+        while rows := conn.fetchmany(TEMP_TABLE_FETCH_SIZE):
+            for row in rows:
+                yield dict(zip(columns, row, strict=False))
@@ -2,6 +2,8 @@
 #
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
+from django.utils import timezone
+
 import pytest
 
 from .. import factories, models
@@ -51,3 +53,104 @@ def test_questionnaireprofile_toggle_off() -> None:
 
     assert not retrieve_profile.questionnaire_list
     assert not created
+
+
+def test_questionnairereportjob_factory() -> None:
+    """Ensure QuestionnaireReportJob factory builds properly."""
+    job = factories.QuestionnaireReportJob.create()
+    job.full_clean()
+
+    assert job.status == models.QuestionnaireReportJobStatus.PENDING
+    assert job.active_key is None
+
+
+def test_questionnairereportjob_str() -> None:
+    """Ensure the `__str__` method is defined for the `QuestionnaireReportJob` model."""
+    job = factories.QuestionnaireReportJob.create()
+
+    assert str(job) == 'RVH: 9999996 (PENDING)'
+
+
+def test_questionnairereportjob_enqueue() -> None:
+    """Ensure a pending job is created with the active key of the patient."""
+    job, created = models.QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+
+    assert created
+    assert job.status == models.QuestionnaireReportJobStatus.PENDING
+    assert job.active_key == 'RVH:9999996'
+
+
+def test_questionnairereportjob_enqueue_active_job_exists() -> None:
+    """Ensure the active job is returned instead of creating another job for the same patient."""
+    job, _created = models.QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+
+    existing_job, created = models.QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+
+    assert not created
+    assert existing_job == job
+    assert models.QuestionnaireReportJob.objects.count() == 1
+
+
+def test_questionnairereportjob_enqueue_after_finished() -> None:
+    """Ensure a new job can be queued for a patient once the previous job finished."""
+    job, _created = models.QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+    job.complete()
+
+    new_job, created = models.QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+
+    assert created
+    assert new_job != job
+    assert models.QuestionnaireReportJob.objects.count() == 2
+
+
+def test_questionnairereportjob_claim_next() -> None:
+    """Ensure the oldest pending job is claimed and marked as running."""
+    first_job, _created = models.QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+    models.QuestionnaireReportJob.objects.enqueue('9999997', 'RVH')
+
+    job = models.QuestionnaireReportJob.objects.claim_next()
+
+    assert job == first_job
+    assert job is not None
+    assert job.status == models.QuestionnaireReportJobStatus.RUNNING
+    assert job.started_at is not None
+    assert job.active_key == 'RVH:9999996'
+
+
+def test_questionnairereportjob_claim_next_empty() -> None:
+    """Ensure no job is claimed when there is no pending job."""
+    job, _created = models.QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+    job.fail('error')
+
+    assert models.QuestionnaireReportJob.objects.claim_next() is None
+
+
+def test_questionnairereportjob_fail() -> None:
+    """Ensure a failed job records the error and releases its active key."""
+    models.QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+    job = models.QuestionnaireReportJob.objects.claim_next()
+    assert job is not None
+
+    job.fail('some error')
+    job.refresh_from_db()
+
+    assert job.status == models.QuestionnaireReportJobStatus.FAILED
+    assert job.error == 'some error'
+    assert job.active_key is None
+    assert job.finished_at is not None
+
+
+def test_questionnairereportjob_requeue_stale() -> None:
+    """Ensure only running jobs started before the given time are queued again."""
+    models.QuestionnaireReportJob.objects.enqueue('9999996', 'RVH')
+    models.QuestionnaireReportJob.objects.enqueue('9999997', 'RVH')
+    stale_job = models.QuestionnaireReportJob.objects.claim_next()
+    assert stale_job is not None
+    cutoff = timezone.now()
+    models.QuestionnaireReportJob.objects.claim_next()
+
+    assert models.QuestionnaireReportJob.objects.requeue_stale(started_before=cutoff) == 1
+
+    stale_job.refresh_from_db()
+    assert stale_job.status == models.QuestionnaireReportJobStatus.PENDING
+    assert stale_job.started_at is None
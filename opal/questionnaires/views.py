@@ -6,22 +6,30 @@
 
 import logging
 from http import HTTPStatus
-from io import BytesIO, StringIO
+from itertools import groupby
+from operator import itemgetter
 from types import MappingProxyType
 from typing import TYPE_CHECKING, Any
 
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.dispatch import receiver
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.views.generic.base import TemplateView
 
-import pandas as pd
 import structlog
 from django_structlog import signals
 
+from opal.core.utils import iter_csv, iter_xlsx
+
 from .models import QuestionnaireProfile
-from .queries import get_all_questionnaires, get_questionnaire_detail, get_temp_table, make_temp_tables
+from .queries import (
+    get_all_questionnaires,
+    get_questionnaire_detail,
+    get_temp_table,
+    iter_temp_table,
+    make_temp_tables,
+)
 from .tables import ReportTable
 
 if TYPE_CHECKING:
@@ -232,32 +240,26 @@ class QuestionnaireReportDownloadCSVTemplateView(PermissionRequiredMixin, Templa
     logger = logging.getLogger(__name__)
     http_method_names = ['post']
 
-    def post(self, request: HttpRequest) -> HttpResponse:
+    def post(self, request: HttpRequest) -> StreamingHttpResponse:  # type: ignore[override]
         """
         Grab existing backend report and convert to csv.
 
-        This code first generates the desired csv by writing it to media folder within
-        the questionnaires app.
-        After this, that file is served to the client side with Openfile functionality.
+        The rows of the report are read from the temporary table in batches
+        and streamed to the client side as csv.
 
         Args:
             request: post request data.
 
         Returns:
-            original template.
+            streaming response with the csv report.
 
         """
         qid = request.POST.get('questionnaireid')
         datesuffix = timezone.now().date().isoformat()
         filename = f'questionnaire-{qid}-{datesuffix}.csv'
-        df_report = pd.DataFrame.from_records(
-            get_temp_table(),
-        )
 
-        buffer = StringIO()
-        df_report.to_csv(buffer, index=False, header=True)
-        return HttpResponse(
-            buffer.getvalue(),
+        return StreamingHttpResponse(
+            iter_csv(iter_temp_table()),
             content_type='text/csv',
             headers={'Content-Disposition': f'attachment; filename = {filename}'},
         )
@@ -272,55 +274,41 @@ class QuestionnaireReportDownloadXLSXTemplateView(PermissionRequiredMixin, Templ
     logger = logging.getLogger(__name__)
     http_method_names = ['post']
 
-    def post(self, request: HttpRequest) -> HttpResponse:
+    def post(self, request: HttpRequest) -> StreamingHttpResponse:  # type: ignore[override]
         """
         Grab existing backend report and convert to xlsx.
 
-        This code first generates the desired xlsx by writing it to media folder within
-        the questionnaires app.
-        After this, that file is served to the clientside with Openfile functionality.
+        The rows of the report are read from the temporary table in batches
+        and written to the xlsx in write-only mode before it is streamed to the client side.
+        The report can be split into one sheet per patient or per question.
 
         Args:
             request: post request data.
 
         Returns:
-            template rendered with updated context.
+            streaming response with the xlsx report.
 
         """
         qid = request.POST.get('questionnaireid')
         tabs = request.POST.get('tabs')
         date_suffix = timezone.now().date().isoformat()
         filename = f'questionnaire-{qid}-{date_suffix}.xlsx'
-        report_dict = get_temp_table()
-        df_report = pd.DataFrame.from_records(report_dict)
-        buffer = BytesIO()
 
-        if tabs == 'none' or df_report.empty:
-            # If df is empty return an empty download to avoid a potential key error
-            df_report.to_excel(buffer, sheet_name='Sheet1', index=False, header=True)
-        else:
-            # sort by patient or question id
+        if tabs in {'patients', 'questions'}:
+            # one sheet per patient or question id
             column_name = 'patient_id' if tabs == 'patients' else 'question_id'
             sheet_prefix = 'patient' if tabs == 'patients' else 'question_id'
             sort_rows_column = 'question_id' if tabs == 'patients' else 'patient_id'
-            ids = df_report[column_name].unique()
-            ids.sort()
-            with pd.ExcelWriter(buffer) as writer:
-                for current_id in ids:
-                    patient_rows = df_report.loc[df_report[column_name] == current_id]
-                    patient_rows = patient_rows.sort_values(
-                        by=['last_updated', sort_rows_column],
-                        ascending=[True, True],
-                    )
-                    patient_rows.to_excel(
-                        writer,
-                        sheet_name=f'{sheet_prefix}-{current_id}',
-                        index=False,
-                        header=True,
-                    )
-
-        return HttpResponse(
-            buffer.getvalue(),
+            rows = iter_temp_table(order_by=(column_name, 'last_updated', sort_rows_column))
+            sheets = (
+                (f'{sheet_prefix}-{current_id}', sheet_rows)
+                for current_id, sheet_rows in groupby(rows, key=itemgetter(column_name))
+            )
+        else:
+            sheets = iter([('Sheet1', iter_temp_table())])
+
+        return StreamingHttpResponse(
+            iter_xlsx(sheets),
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
             headers={'Content-Disposition': f'attachment; filename = {filename}'},
         )
@@ -0,0 +1,239 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""This module is used to provide configuration, fixtures, and plugins for pytest within the FHIR services."""
+
+import json
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from joserfc import jwk
+
+from .utils import FHIRConnectionSettings, clear_fhir_connectors
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+
+class StubFHIRServer:
+    """
+    Local HTTP server standing in for the OAuth2 and FHIR servers.
+
+    `POST /oauth/token` issues a new access token (`token-1`, `token-2`, ...) valid for `expires_in` seconds.
+    `GET /fhir/<resource type>?...` answers with the bundle registered for the resource type
+    (optionally with a delay or an error status) if the request is authorized with the latest access token.
+    The client port of every request is recorded to determine how many connections were opened.
+    """
+
+    def __init__(self, expires_in: int = 3600) -> None:
+        """
+        Start the server on a free local port.
+
+        Args:
+            expires_in: the number of seconds the issued access tokens are valid for
+        """
+        self.expires_in = expires_in
+        self.token_requests = 0
+        self.fhir_requests: list[str] = []
+        self.client_ports: set[int] = set()
+        self.bundles: dict[str, tuple[HTTPStatus, dict[str, Any], float]] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._create_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        """
+        Return the base URL of the server.
+
+        Returns:
+            the base URL of the server
+        """
+        host, port = self._server.server_address[:2]
+        return f'http://{host!s}:{port}'
+
+    @property
+    def current_token(self) -> str:
+        """
+        Return the latest access token issued by the server.
+
+        Returns:
+            the latest access token
+        """
+        return f'token-{self.token_requests}'
+
+    def add_bundle(
+        self,
+        resource_type: str,
+        bundle: dict[str, Any],
+        *,
+        status: HTTPStatus = HTTPStatus.OK,
+        delay: float = 0,
+    ) -> None:
+        """
+        Register the searchset bundle returned for a resource type.
+
+        Args:
+            resource_type: the FHIR resource type, e.g., `Patient`
+            bundle: the bundle to return
+            status: the status code of the response
+            delay: the number of seconds to wait before responding
+        """
+        self.bundles[resource_type] = (status, bundle, delay)
+
+    def stop(self) -> None:
+        """Stop the server."""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _issue_token(self, client_port: int) -> dict[str, Any]:
+        """
+        Record a token request and issue a new access token.
+
+        Args:
+            client_port: the port of the client connection
+
+        Returns:
+            the token response
+        """
+        with self._lock:
+            self.client_ports.add(client_port)
+            self.token_requests += 1
+
+            return {'access_token': self.current_token, 'token_type': 'Bearer', 'expires_in': self.expires_in}
+
+    def _search(self, path: str, authorization: str | None, client_port: int) -> tuple[HTTPStatus, dict[str, Any]]:
+        """
+        Record a FHIR search request and return the registered bundle.
+
+        Args:
+            path: the path and query of the request
+            authorization: the authorization header of the request
+            client_port: the port of the client connection
+
+        Returns:
+            the status code and JSON content of the response
+        """
+        with self._lock:
+            self.client_ports.add(client_port)
+            self.fhir_requests.append(path)
+
+            if authorization != f'Bearer {self.current_token}':
+                return HTTPStatus.UNAUTHORIZED, {'resourceType': 'OperationOutcome'}
+
+        resource_type = urlsplit(path).path.removeprefix('/fhir/')
+        status, bundle, delay = self.bundles.get(
+            resource_type,
+            (HTTPStatus.OK, {'resourceType': 'Bundle', 'type': 'searchset'}, 0),
+        )
+        time.sleep(delay)
+
+        return status, bundle
+
+    def _create_handler(self) -> type[BaseHTTPRequestHandler]:
+        """
+        Create the request handler class of the server.
+
+        Returns:
+            the request handler class
+        """
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # support persistent connections
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers['Content-Length'])).decode()
+                form = parse_qs(body)
+
+                if self.path != '/oauth/token' or form.get('grant_type') != ['client_credentials']:
+                    self._respond(HTTPStatus.BAD_REQUEST, {'error': 'invalid_request'})
+                    return
+
+                self._respond(HTTPStatus.OK, stub._issue_token(self.client_address[1]))
+
+            def do_GET(self) -> None:
+                status, data = stub._search(self.path, self.headers['Authorization'], self.client_address[1])
+                self._respond(status, data)
+
+            def _respond(self, status: HTTPStatus, data: dict[str, Any]) -> None:
+                content = json.dumps(data).encode()
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                # keep the test output clean
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def stub_fhir_server() -> Generator[StubFHIRServer]:
+    """
+    Fixture providing a local HTTP server standing in for the OAuth2 and FHIR servers.
+
+    Tests using this fixture need to allow connections to the local host (`@pytest.mark.allow_hosts(['127.0.0.1'])`).
+
+    Yields:
+        the running stub server
+    """
+    stub = StubFHIRServer()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture(scope='session')
+def private_key() -> str:
+    """
+    Fixture providing an RSA private key in PEM format for the PrivateKeyJWT authentication.
+
+    Returns:
+        the private key
+    """
+    return jwk.RSAKey.generate_key(2048).as_pem(private=True).decode()
+
+
+@pytest.fixture
+def stub_fhir_settings(stub_fhir_server: StubFHIRServer, private_key: str) -> FHIRConnectionSettings:
+    """
+    Fixture providing the settings to connect to the stub OAuth2 and FHIR servers.
+
+    Args:
+        stub_fhir_server: the running stub server
+        private_key: the private key of the client
+
+    Returns:
+        the connection settings
+    """
+    return FHIRConnectionSettings(
+        oauth_url=f'{stub_fhir_server.url}/oauth',
+        fhir_url=f'{stub_fhir_server.url}/fhir',
+        client_id='test-client-id',
+        private_key=private_key,
+    )
+
+
+@pytest.fixture(autouse=True)
+def _clear_fhir_connectors() -> Generator[None]:
+    """
+    Discard the shared FHIR connectors after each test to not share (mocked) connectors between tests.
+
+    Yields:
+        nothing
+    """
+    yield
+    clear_fhir_connectors()
@@ -5,8 +5,10 @@
 """Functions in this module provide the ability to communicate with other FHIR-enabled servers."""
 
 import datetime as dt
+import threading
 from datetime import datetime
 from typing import TYPE_CHECKING, Any, cast
+from urllib.parse import urlencode, urlsplit
 
 from django.utils import timezone
 
@@ -15,13 +17,19 @@ from authlib.integrations.requests_client import OAuth2Session
 from authlib.oauth2.rfc7523 import PrivateKeyJWT
 from fhir.resources.R4B.bundle import Bundle
 from fhir.resources.R4B.patient import Patient
+from requests.adapters import HTTPAdapter
+from requests.exceptions import InvalidURL
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator, Sequence
+
+    import requests
     from fhir.resources.R4B.allergyintolerance import AllergyIntolerance
     from fhir.resources.R4B.condition import Condition
     from fhir.resources.R4B.immunization import Immunization
     from fhir.resources.R4B.medicationrequest import MedicationRequest
     from fhir.resources.R4B.observation import Observation
+    from fhir.resources.R4B.resource import Resource
 
 SCOPES = [
     'system/Patient.read',
@@ -32,6 +40,12 @@ SCOPES = [
     'system/Immunization.read',
     'system/DiagnosticReport.read',
 ]
+#: Number of seconds before the expiry of an access token at which a new token is fetched
+TOKEN_EXPIRY_LEEWAY = 60
+#: Maximum number of pooled connections to the FHIR server kept open per connector
+CONNECTION_POOL_SIZE = 10
+#: Maximum number of seconds to wait for the FHIR server to connect and to send data for each request
+REQUEST_TIMEOUT = 10
 LOGGER = structlog.get_logger(__name__)
 
 
@@ -76,6 +90,32 @@ def _clean_last_updated(bundle: dict[str, Any]) -> dict[str, Any]:
     return bundle
 
 
+def _clean_codings(resource: dict[str, Any]) -> None:
+    """
+    Clean the codings of the code of a resource.
+
+    Args:
+        resource: the FHIR resource as a dictionary
+    """
+    for coding in resource.get('code', {}).get('coding', []):
+        _clean_coding(coding)
+
+
+def _clean_immunization_last_updated(resource: dict[str, Any]) -> None:
+    """
+    Replace the invalid year `-0001` in the timestamp of Immunization.meta.lastUpdated.
+
+    Args:
+        resource: the FHIR Immunization as a dictionary
+    """
+    if 'meta' in resource and 'lastUpdated' in resource['meta']:  # pragma: no cover
+        # sanitize invalid dates, assume that '-0001' means last year
+        # this should eventually be fixed at the source
+        resource['meta']['lastUpdated'] = resource['meta']['lastUpdated'].replace(
+            '-0001', str(datetime.now(tz=dt.UTC).year - 1)
+        )
+
+
 class FHIRConnector:
     """
     A FHIR connector to interact with a FHIR server using OAuth2 authentication.
@@ -85,7 +125,15 @@ class FHIRConnector:
     See: https://www.hl7.org/fhir/smart-app-launch/backend-services.html
     """
 
-    def __init__(self, oauth_url: str, fhir_url: str, client_id: str, private_key: str):
+    def __init__(
+        self,
+        oauth_url: str,
+        fhir_url: str,
+        client_id: str,
+        private_key: str,
+        *,
+        page_size: int | None = None,
+    ):
         """
         Initialize the FHIR connector and fetch the authentication token.
 
@@ -94,26 +142,77 @@ class FHIRConnector:
             fhir_url: FHIR API base URL
             client_id: OAuth2 client ID
             private_key: Private key in PEM format for PrivateKeyJWT authentication
+            page_size: number of resources per page requested from the FHIR server (`_count`),
+                the server's default if not specified
         """
         self.fhir_url = fhir_url
-        token_endpoint = f'{oauth_url}/token'
+        self.page_size = page_size
+        self.token_endpoint = f'{oauth_url}/token'
+        self._token_lock = threading.Lock()
 
         self.session = OAuth2Session(
             client_id=client_id,
             client_secret=private_key,
             scope=SCOPES,
             token_endpoint_auth_method=PrivateKeyJWT(
-                token_endpoint=token_endpoint,
+                token_endpoint=self.token_endpoint,
                 alg='RS384',
             ),
+            leeway=TOKEN_EXPIRY_LEEWAY,
         )
+        # keep connections to the OAuth2 and FHIR servers open to reuse them for subsequent requests
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=CONNECTION_POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._fetch_token()
+
+    def ensure_token(self) -> None:
+        """
+        Fetch a new authentication token if the current one expires soon.
+
+        The token is shared by all threads using the connector.
+        The lock ensures that only one of them fetches a new token.
+        """
+        with self._token_lock:
+            token = self.session.token
+
+            if not token or token.is_expired(leeway=TOKEN_EXPIRY_LEEWAY):
+                self._fetch_token()
 
-        LOGGER.debug('Fetching new token from OAuth URL at %s', token_endpoint)
+    def close(self) -> None:
+        """Close the pooled connections of the connector."""
+        self.session.close()
 
-        self.session.fetch_token(token_endpoint)
+    def _fetch_token(self) -> None:
+        """Fetch a new authentication token."""
+        LOGGER.debug('Fetching new token from OAuth URL at %s', self.token_endpoint)
+
+        self.session.fetch_token(self.token_endpoint)
 
         LOGGER.debug('Successfully fetched new token', extra=self.session.token)
 
+    def _get(self, url: str) -> requests.Response:
+        """
+        Send a GET request to the FHIR server with a valid authentication token.
+
+        Args:
+            url: the URL to request
+
+        Returns:
+            the successful response
+
+        Raises:
+            HTTPError: if the response has an error status code
+            Timeout: if the FHIR server does not respond within `REQUEST_TIMEOUT` seconds
+        """  # noqa: DOC502
+        self.ensure_token()
+
+        response = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+
+        return response
+
     def find_patient(self, identifier: str) -> Patient:
         """
         Find a patient by their identifier.
@@ -132,8 +231,7 @@ class FHIRConnector:
         """
         LOGGER.debug('Searching for patient with identifier %s', identifier)
 
-        response = self.session.get(f'{self.fhir_url}/Patient?identifier={identifier}')
-        response.raise_for_status()
+        response = self._get(f'{self.fhir_url}/Patient?identifier={identifier}')
 
         data = response.json()
 
@@ -145,159 +243,159 @@ class FHIRConnector:
 
         return Patient.model_validate(response.json()['entry'][0]['resource'])
 
-    def patient_conditions(self, uuid: str) -> list[Condition]:
+    def patient_conditions(self, uuid: str, *, elements: Sequence[str] | None = None) -> list[Condition]:
         """
         Retrieve all conditions for a patient.
 
         Args:
             uuid: the UUID of the patient
+            elements: the elements to retrieve for each resource, all elements if not specified
 
         Returns:
             the list of Condition resources
         """
         LOGGER.debug('Retrieving conditions for patient with UUID %s', uuid)
 
-        response = self.session.get(f'{self.fhir_url}/Condition?patient={uuid}')
-        response.raise_for_status()
-
-        data = response.json()
-
-        # sanitize some known data issues
-        # these should eventually be fixed at the source
-        _clean_last_updated(data)
-
-        for entry in data.get('entry', []):
-            resource = entry.get('resource', {})
-            for coding in resource.get('code', {}).get('coding', []):
-                _clean_coding(coding)
-
-        conditions_bundle = Bundle.model_validate(data)
         return [
-            cast('Condition', condition.resource) for condition in conditions_bundle.entry or [] if condition.resource
+            cast('Condition', resource)
+            for resource in self._search('Condition', uuid, elements=elements, clean_resource=_clean_codings)
         ]
 
-    def patient_medication_requests(self, uuid: str) -> list[MedicationRequest]:
+    def patient_medication_requests(
+        self,
+        uuid: str,
+        *,
+        elements: Sequence[str] | None = None,
+    ) -> list[MedicationRequest]:
         """
         Retrieve all medication requests for a patient.
 
         Args:
             uuid: the UUID of the patient
+            elements: the elements to retrieve for each resource, all elements if not specified
 
         Returns:
             the list of MedicationRequest resources
         """
         LOGGER.debug('Retrieving medication requests for patient with UUID %s', uuid)
 
-        response = self.session.get(f'{self.fhir_url}/MedicationRequest?patient={uuid}')
-        response.raise_for_status()
-
-        data = response.json()
-
-        # sanitize some known data issues
-        # these should eventually be fixed at the source
-        _clean_last_updated(data)
-
-        medications_bundle = Bundle.model_validate(data)
-
         return [
-            cast('MedicationRequest', medication.resource)
-            for medication in medications_bundle.entry or []
-            if medication.resource
+            cast('MedicationRequest', resource)
+            for resource in self._search('MedicationRequest', uuid, elements=elements)
         ]
 
-    def patient_allergies(self, uuid: str) -> list[AllergyIntolerance]:
+    def patient_allergies(self, uuid: str, *, elements: Sequence[str] | None = None) -> list[AllergyIntolerance]:
         """
         Retrieve all allergies for a patient.
 
         Args:
             uuid: the UUID of the patient
+            elements: the elements to retrieve for each resource, all elements if not specified
 
         Returns:
             the list of AllergyIntolerance resources
         """
         LOGGER.debug('Retrieving allergies for patient with UUID %s', uuid)
 
-        response = self.session.get(f'{self.fhir_url}/AllergyIntolerance?patient={uuid}')
-        response.raise_for_status()
-
-        data = response.json()
-
-        # sanitize some known data issues
-        # these should eventually be fixed at the source
-        _clean_last_updated(data)
-
-        for entry in data.get('entry', []):
-            resource = entry.get('resource', {})
-            for coding in resource.get('code', {}).get('coding', []):
-                _clean_coding(coding)
-
-        allergies_bundle = Bundle.model_validate(data)
         return [
-            cast('AllergyIntolerance', allergy.resource) for allergy in allergies_bundle.entry or [] if allergy.resource
+            cast('AllergyIntolerance', resource)
+            for resource in self._search('AllergyIntolerance', uuid, elements=elements, clean_resource=_clean_codings)
         ]
 
-    def patient_immunizations(self, uuid: str) -> list[Immunization]:
+    def patient_immunizations(self, uuid: str, *, elements: Sequence[str] | None = None) -> list[Immunization]:
         """
         Retrieve all immunizations for a patient.
 
         Args:
             uuid: the UUID of the patient
+            elements: the elements to retrieve for each resource, all elements if not specified
 
         Returns:
             the list of Immunization resources
         """
         LOGGER.debug('Retrieving immunizations for patient with UUID %s', uuid)
 
-        response = self.session.get(f'{self.fhir_url}/Immunization?patient={uuid}')
-        response.raise_for_status()
-
-        data = response.json()
-
-        # sanitize some known data issues
-        # these should eventually be fixed at the source
-        _clean_last_updated(data)
-
-        for entry in data.get('entry', []):
-            resource = entry.get('resource', {})
-            if 'meta' in resource and 'lastUpdated' in resource['meta']:  # pragma: no cover
-                # sanitize invalid dates, assume that '-0001' means last year
-                # this should eventually be fixed at the source
-                resource['meta']['lastUpdated'] = resource['meta']['lastUpdated'].replace(
-                    '-0001', str(datetime.now(tz=dt.UTC).year - 1)
-                )
-
-        immunizations_bundle = Bundle.model_validate(data)
-
         return [
-            cast('Immunization', immunization.resource)
-            for immunization in immunizations_bundle.entry or []
-            if immunization.resource
+            cast('Immunization', resource)
+            for resource in self._search(
+                'Immunization',
+                uuid,
+                elements=elements,
+                clean_resource=_clean_immunization_last_updated,
+            )
         ]
 
-    def patient_observations(self, uuid: str) -> list[Observation]:
+    def patient_observations(self, uuid: str, *, elements: Sequence[str] | None = None) -> list[Observation]:
         """
         Retrieve all observations for a patient.
 
         Args:
             uuid: the UUID of the patient
+            elements: the elements to retrieve for each resource, all elements if not specified
 
         Returns:
             the list of Observation resources
         """
         LOGGER.debug('Retrieving observations for patient with UUID %s', uuid)
 
-        response = self.session.get(f'{self.fhir_url}/Observation?patient={uuid}')
-        response.raise_for_status()
+        return [cast('Observation', resource) for resource in self._search('Observation', uuid, elements=elements)]
 
-        data = response.json()
+    def _search(
+        self,
+        resource_type: str,
+        uuid: str,
+        *,
+        elements: Sequence[str] | None = None,
+        clean_resource: Callable[[dict[str, Any]], None] | None = None,
+    ) -> Iterator[Resource]:
+        """
+        Search the resources of a given type for a patient page by page.
 
-        # sanitize some known data issues
-        # these should eventually be fixed at the source
-        _clean_last_updated(data)
+        The `next` links of the searchset bundles are followed until the last page.
+        Each page is sanitized and validated on its own and its resources are yielded
+        before the next page is requested, i.e., only one page is kept in memory at a time.
 
-        observations_bundle = Bundle.model_validate(data)
-        return [
-            cast('Observation', observation.resource)
-            for observation in observations_bundle.entry or []
-            if observation.resource
-        ]
+        Args:
+            resource_type: the FHIR resource type, e.g., `Condition`
+            uuid: the UUID of the patient
+            elements: the elements to retrieve for each resource, all elements if not specified
+            clean_resource: a function sanitizing known data issues of a resource (in its dictionary form)
+
+        Yields:
+            the resources of each page
+
+        Raises:
+            InvalidURL: if a `next` link points to a different server than the FHIR server
+        """
+        params = {'patient': uuid}
+
+        if self.page_size is not None:
+            params['_count'] = str(self.page_size)
+        if elements:
+            params['_elements'] = ','.join(elements)
+
+        url: str | None = f'{self.fhir_url}/{resource_type}?{urlencode(params, safe=",")}'
+        pages = 0
+
+        while url is not None:
+            data = self._get(url).json()
+            pages += 1
+
+            # sanitize some known data issues
+            # these should eventually be fixed at the source
+            _clean_last_updated(data)
+
+            if clean_resource is not None:
+                for entry in data.get('entry', []):
+                    clean_resource(entry.get('resource', {}))
+
+            bundle = Bundle.model_validate(data)
+            url = next((link.url for link in bundle.link or [] if link.relation == 'next'), None)
+
+            # the access token must not be sent to any other server
+            if url is not None and urlsplit(url)[:2] != urlsplit(self.fhir_url)[:2]:
+                raise InvalidURL(f'The next page of the {resource_type} bundle is not on the FHIR server: {url}')
+
+            yield from (entry.resource for entry in bundle.entry or [] if entry.resource)
+
+        LOGGER.debug('Retrieved %s page(s) of %s resources for patient with UUID %s', pages, resource_type, uuid)
@@ -3,6 +3,8 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
@@ -13,13 +15,16 @@ from authlib.integrations.requests_client import OAuth2Session
 from authlib.oauth2 import OAuth2Error
 from pydantic import ValidationError
 
-from opal.services.fhir.fhir import FHIRConnector, MultiplePatientsFoundError, PatientNotFoundError
+from opal.services.fhir.fhir import REQUEST_TIMEOUT, FHIRConnector, MultiplePatientsFoundError, PatientNotFoundError
 
 if TYPE_CHECKING:
     from unittest.mock import Mock
 
     from pytest_mock import MockerFixture
 
+    from ..conftest import StubFHIRServer
+    from ..utils import FHIRConnectionSettings
+
 
 class TestFHIRConnector:
     """Test cases for the FHIRConnector class."""
@@ -124,6 +129,38 @@ class TestFHIRConnector:
 
         mock_session.fetch_token.assert_called_once_with('https://example.com/oauth/token')
 
+    @pytest.mark.allow_hosts(['127.0.0.1'])
+    def test_ensure_token_valid(
+        self,
+        stub_fhir_server: StubFHIRServer,
+        stub_fhir_settings: FHIRConnectionSettings,
+    ) -> None:
+        """The token is not fetched again while it is valid."""
+        connector = FHIRConnector(**stub_fhir_settings.__dict__)
+
+        connector.ensure_token()
+
+        assert stub_fhir_server.token_requests == 1
+        assert connector.session.token['access_token'] == 'token-1'
+
+    @pytest.mark.allow_hosts(['127.0.0.1'])
+    def test_ensure_token_concurrent(
+        self,
+        stub_fhir_server: StubFHIRServer,
+        stub_fhir_settings: FHIRConnectionSettings,
+    ) -> None:
+        """An expired token is fetched only once when the connector is used by multiple threads at the same time."""
+        stub_fhir_server.add_bundle('Patient', self._load_fixture('patient.json'))
+        connector = FHIRConnector(**stub_fhir_settings.__dict__)
+        connector.session.token['expires_at'] = int(time.time()) - 1
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            patients = list(executor.map(connector.find_patient, ['test-identifier'] * 8))
+
+        assert len(patients) == 8
+        assert stub_fhir_server.token_requests == 2
+        assert len(stub_fhir_server.fhir_requests) == 8
+
     def test_find_patient(self, fhir_connector: FHIRConnector, mocker: MockerFixture) -> None:
         """Finding a patient by identifier returns the correct Patient resource."""
         patient_data = self._load_fixture('patient.json')
@@ -134,7 +171,8 @@ class TestFHIRConnector:
 
         assert patient.id == '3a9a1eae-efb7-11ef-9c0b-fa163e7f8dbb'
         fhir_connector.session.get.assert_called_once_with(
-            'https://example.com/fhir/Patient?identifier=test-identifier'
+            'https://example.com/fhir/Patient?identifier=test-identifier',
+            timeout=REQUEST_TIMEOUT,
         )
 
     def test_find_patient_not_found(self, fhir_connector: FHIRConnector, mocker: MockerFixture) -> None:
@@ -190,7 +228,8 @@ class TestFHIRConnector:
         assert conditions[0].id == '9ef97f51-133a-4214-a1c5-e673c608073a'
         assert conditions[1].id == '9ef97ff8-b075-48a9-864b-a10a435ff81a'
         fhir_connector.session.get.assert_called_once_with(
-            'https://example.com/fhir/Condition?patient=test-patient-uuid'
+            'https://example.com/fhir/Condition?patient=test-patient-uuid',
+            timeout=REQUEST_TIMEOUT,
         )
 
     def test_patient_conditions_empty(self, fhir_connector: FHIRConnector, mocker: MockerFixture) -> None:
@@ -248,7 +287,8 @@ class TestFHIRConnector:
         assert medication_requests[0].id == '9efb5312-c612-4dbd-9f1b-381d531f83d7'
         assert medication_requests[1].id == '9ef98091-6d03-4e5c-ae98-f7826824db88'
         fhir_connector.session.get.assert_called_once_with(
-            'https://example.com/fhir/MedicationRequest?patient=test-patient-uuid'
+            'https://example.com/fhir/MedicationRequest?patient=test-patient-uuid',
+            timeout=REQUEST_TIMEOUT,
         )
 
     def test_patient_medication_requests_empty(self, fhir_connector: FHIRConnector, mocker: MockerFixture) -> None:
@@ -303,7 +343,8 @@ class TestFHIRConnector:
         assert allergies[0].id == '9ef97779-4410-4ffb-a8b8-36ef546b2021'
         assert allergies[1].id == 'a80b225b-1fa4-11f0-b78d-fa163e91b78d'
         fhir_connector.session.get.assert_called_once_with(
-            'https://example.com/fhir/AllergyIntolerance?patient=test-patient-uuid'
+            'https://example.com/fhir/AllergyIntolerance?patient=test-patient-uuid',
+            timeout=REQUEST_TIMEOUT,
         )
 
     def test_patient_allergies_data_sanitization(self, fhir_connector: FHIRConnector, mocker: MockerFixture) -> None:
@@ -361,7 +402,8 @@ class TestFHIRConnector:
         assert immunizations[0].id == '9efb5312-a894-4f8f-9bb3-f2640e405247'
         assert immunizations[1].id == '9efb5312-a8ed-4454-b6ee-b79b731ff31a'
         fhir_connector.session.get.assert_called_once_with(
-            'https://example.com/fhir/Immunization?patient=test-patient-uuid'
+            'https://example.com/fhir/Immunization?patient=test-patient-uuid',
+            timeout=REQUEST_TIMEOUT,
         )
 
     def test_patient_immunizations_empty(self, fhir_connector: FHIRConnector, mocker: MockerFixture) -> None:
@@ -418,7 +460,8 @@ class TestFHIRConnector:
         assert observations[0].id == '59ace158-3be6-11f0-9645-fa163e09c13a'
         assert observations[1].id == '59acedd7-3be6-11f0-9645-fa163e09c13a'
         fhir_connector.session.get.assert_called_once_with(
-            'https://example.com/fhir/Observation?patient=test-patient-uuid'
+            'https://example.com/fhir/Observation?patient=test-patient-uuid',
+            timeout=REQUEST_TIMEOUT,
         )
 
     def test_patient_observations_no_category(self, fhir_connector: FHIRConnector, mocker: MockerFixture) -> None:
@@ -467,6 +510,90 @@ class TestFHIRConnector:
 
         assert len(observations) == 10
 
+    def test_patient_observations_pages(self, fhir_connector: FHIRConnector, mocker: MockerFixture) -> None:
+        """The next pages of the searchset bundle are retrieved until the last page."""
+        first_page = self._load_fixture('observations.json')
+        next_url = 'https://example.com/fhir/Observation?patient=test-patient-uuid&_getpagesoffset=6'
+        first_page['link'] = [
+            {'relation': 'self', 'url': 'https://example.com/fhir/Observation?patient=test-patient-uuid'},
+            {'relation': 'next', 'url': next_url},
+        ]
+        last_page = self._load_fixture('observations.json')
+        last_page['entry'] = first_page['entry'][6:]
+        first_page['entry'] = first_page['entry'][:6]
+        fhir_connector.session.get.side_effect = [
+            self._mock_response(mocker, first_page),
+            self._mock_response(mocker, last_page),
+        ]
+
+        observations = fhir_connector.patient_observations('test-patient-uuid')
+
+        assert len(observations) == 10
+        assert observations[0].id == '59ace158-3be6-11f0-9645-fa163e09c13a'
+        assert observations[8].id == 'a083c331-bd33-4372-8c4d-8c329d354607'
+        assert fhir_connector.session.get.call_args_list == [
+            mocker.call('https://example.com/fhir/Observation?patient=test-patient-uuid', timeout=REQUEST_TIMEOUT),
+            mocker.call(next_url, timeout=REQUEST_TIMEOUT),
+        ]
+
+    def test_patient_observations_pages_invalid_data(
+        self,
+        fhir_connector: FHIRConnector,
+        mocker: MockerFixture,
+    ) -> None:
+        """A ValidationError of a subsequent page refers to the entry within that page."""
+        first_page = self._load_fixture('observations.json')
+        first_page['link'] = [
+            {'relation': 'next', 'url': 'https://example.com/fhir/Observation?patient=test-patient-uuid&page=2'},
+        ]
+        last_page = self._load_fixture('observations.json')
+        last_page['entry'][1]['resource'].pop('status')
+        fhir_connector.session.get.side_effect = [
+            self._mock_response(mocker, first_page),
+            self._mock_response(mocker, last_page),
+        ]
+
+        with pytest.raises(ValidationError, match=r'entry.1.resource.status\n\s+Value for the field'):
+            fhir_connector.patient_observations('test-patient-uuid')
+
+    def test_patient_observations_next_page_other_server(
+        self,
+        fhir_connector: FHIRConnector,
+        mocker: MockerFixture,
+    ) -> None:
+        """A next page on a different server is not requested to not disclose the access token."""
+        observations_data = self._load_fixture('observations.json')
+        observations_data['link'] = [
+            {'relation': 'next', 'url': 'https://example.org/fhir/Observation?patient=test-patient-uuid&page=2'},
+        ]
+        fhir_connector.session.get.return_value = self._mock_response(mocker, observations_data)
+
+        with pytest.raises(requests.exceptions.InvalidURL, match='not on the FHIR server'):
+            fhir_connector.patient_observations('test-patient-uuid')
+
+        fhir_connector.session.get.assert_called_once()
+
+    def test_patient_conditions_page_size_and_elements(self, mocker: MockerFixture) -> None:
+        """The page size and the elements to retrieve are added to the search."""
+        mock_session = mocker.Mock(spec=OAuth2Session)
+        mocker.patch('opal.services.fhir.fhir.OAuth2Session', return_value=mock_session)
+        connector = FHIRConnector(
+            oauth_url='https://example.com/oauth',
+            fhir_url='https://example.com/fhir',
+            client_id='test_client',
+            private_key='test_key',
+            page_size=50,
+        )
+        mock_session.get.return_value = self._mock_response(mocker, self._load_fixture('conditions.json'))
+
+        conditions = connector.patient_conditions('test-patient-uuid', elements=['code', 'clinicalStatus'])
+
+        assert len(conditions) == 2
+        mock_session.get.assert_called_once_with(
+            'https://example.com/fhir/Condition?patient=test-patient-uuid&_count=50&_elements=code,clinicalStatus',
+            timeout=REQUEST_TIMEOUT,
+        )
+
     @pytest.mark.parametrize(
         'method_name',
         [
@@ -4,6 +4,8 @@
 
 import base64
 import json
+import time
+from http import HTTPStatus
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -18,6 +20,7 @@ from opal.services.fhir.fhir import FHIRConnector
 from opal.services.fhir.utils import (
     FHIRConnectionSettings,
     FHIRDataRetrievalError,
+    get_fhir_connector,
     jwe_sh_link_encrypt,
     retrieve_patient_summary,
 )
@@ -27,6 +30,8 @@ if TYPE_CHECKING:
 
     from pytest_mock import MockerFixture
 
+    from ..conftest import StubFHIRServer
+
 FHIR_SETTINGS = FHIRConnectionSettings(
     oauth_url='https://example.com/oauth2',
     fhir_url='https://example.com/fhir',
@@ -268,3 +273,141 @@ def test_retrieve_patient_summary_oauth2_error(mocker: MockerFixture) -> None:
             settings=FHIR_SETTINGS,
             identifier='test-identifier',
         )
+
+
+def test_get_fhir_connector_shared(mocker: MockerFixture) -> None:
+    """The same connector is returned for equal connection settings."""
+    mock_session = mocker.Mock(spec=OAuth2Session)
+    mock_oauth_class = mocker.patch('opal.services.fhir.fhir.OAuth2Session', return_value=mock_session)
+
+    connector = get_fhir_connector(FHIR_SETTINGS)
+    other_connector = get_fhir_connector(FHIRConnectionSettings(**FHIR_SETTINGS.__dict__))
+
+    assert connector is other_connector
+    mock_oauth_class.assert_called_once()
+    mock_session.fetch_token.assert_called_once()
+
+
+def test_get_fhir_connector_different_settings(mocker: MockerFixture) -> None:
+    """A separate connector is returned for different connection settings."""
+    mocker.patch('opal.services.fhir.fhir.OAuth2Session', return_value=mocker.Mock(spec=OAuth2Session))
+
+    connector = get_fhir_connector(FHIR_SETTINGS)
+    other_connector = get_fhir_connector(
+        FHIRConnectionSettings(**{**FHIR_SETTINGS.__dict__, 'client_id': 'other-client-id'}),
+    )
+
+    assert connector is not other_connector
+
+
+def test_get_fhir_connector_oauth2_error_not_cached(mocker: MockerFixture) -> None:
+    """A connector is not shared if fetching its token failed."""
+    mock_session = mocker.Mock(spec=OAuth2Session)
+    mock_session.fetch_token.side_effect = [OAuth2Error('Invalid client credentials'), None]
+    mocker.patch('opal.services.fhir.fhir.OAuth2Session', return_value=mock_session)
+
+    with pytest.raises(OAuth2Error):
+        get_fhir_connector(FHIR_SETTINGS)
+
+    assert get_fhir_connector(FHIR_SETTINGS) is not None
+    assert mock_session.fetch_token.call_count == 2
+
+
+def _add_patient_bundle(stub_fhir_server: StubFHIRServer) -> None:
+    with Path(__file__).parent.joinpath('fixtures').joinpath('patient.json').open(encoding='utf-8') as f:
+        stub_fhir_server.add_bundle('Patient', json.load(f))
+
+
+@pytest.mark.allow_hosts(['127.0.0.1'])
+def test_retrieve_patient_summary_reuses_token_and_connection(
+    stub_fhir_server: StubFHIRServer,
+    stub_fhir_settings: FHIRConnectionSettings,
+) -> None:
+    """Subsequent patient summaries reuse the access token and the connection to the servers."""
+    _add_patient_bundle(stub_fhir_server)
+    # keep all resource requests in flight at the same time so that each summary needs the same connections
+    empty_bundle = {'resourceType': 'Bundle', 'type': 'searchset'}
+    for resource_type in ['Condition', 'MedicationRequest', 'AllergyIntolerance', 'Observation', 'Immunization']:
+        stub_fhir_server.add_bundle(resource_type, empty_bundle, delay=0.2)
+
+    retrieve_patient_summary(settings=stub_fhir_settings, identifier='test-identifier')
+    # the resources are retrieved concurrently, so the first summary opens several connections
+    client_ports = set(stub_fhir_server.client_ports)
+    retrieve_patient_summary(settings=stub_fhir_settings, identifier='test-identifier')
+
+    assert stub_fhir_server.token_requests == 1
+    assert len(stub_fhir_server.fhir_requests) == 12
+    assert stub_fhir_server.client_ports == client_ports
+
+
+@pytest.mark.allow_hosts(['127.0.0.1'])
+def test_retrieve_patient_summary_token_refreshed(
+    stub_fhir_server: StubFHIRServer,
+    stub_fhir_settings: FHIRConnectionSettings,
+) -> None:
+    """A new access token is fetched once the shared token expires soon."""
+    _add_patient_bundle(stub_fhir_server)
+
+    retrieve_patient_summary(settings=stub_fhir_settings, identifier='test-identifier')
+    # let the token expire within the leeway
+    connector = get_fhir_connector(stub_fhir_settings)
+    connector.session.token['expires_at'] = int(time.time()) + 30
+
+    retrieve_patient_summary(settings=stub_fhir_settings, identifier='test-identifier')
+
+    assert stub_fhir_server.token_requests == 2
+    assert len(stub_fhir_server.fhir_requests) == 12
+
+
+@pytest.mark.allow_hosts(['127.0.0.1'])
+def test_retrieve_patient_summary_concurrent(
+    stub_fhir_server: StubFHIRServer,
+    stub_fhir_settings: FHIRConnectionSettings,
+) -> None:
+    """The resources of the patient are retrieved concurrently."""
+    _add_patient_bundle(stub_fhir_server)
+    empty_bundle = {'resourceType': 'Bundle', 'type': 'searchset'}
+    resource_types = ['Condition', 'MedicationRequest', 'AllergyIntolerance', 'Observation', 'Immunization']
+    for resource_type in resource_types:
+        stub_fhir_server.add_bundle(resource_type, empty_bundle, delay=0.5)
+
+    start = time.perf_counter()
+    retrieve_patient_summary(settings=stub_fhir_settings, identifier='test-identifier')
+    duration = time.perf_counter() - start
+
+    # sequential requests would take at least 2.5 seconds
+    assert duration < 1.5
+    assert len(stub_fhir_server.fhir_requests) == 6
+
+
+@pytest.mark.allow_hosts(['127.0.0.1'])
+def test_retrieve_patient_summary_resource_error(
+    stub_fhir_server: StubFHIRServer,
+    stub_fhir_settings: FHIRConnectionSettings,
+) -> None:
+    """An error retrieving one resource type is raised without waiting for the other requests."""
+    _add_patient_bundle(stub_fhir_server)
+    empty_bundle = {'resourceType': 'Bundle', 'type': 'searchset'}
+    stub_fhir_server.add_bundle('Condition', {}, status=HTTPStatus.INTERNAL_SERVER_ERROR)
+    stub_fhir_server.add_bundle('Observation', empty_bundle, delay=1)
+
+    start = time.perf_counter()
+    with pytest.raises(FHIRDataRetrievalError, match='Error retrieving data from FHIR server'):
+        retrieve_patient_summary(settings=stub_fhir_settings, identifier='test-identifier')
+
+    assert time.perf_counter() - start < 1
+
+
+@pytest.mark.allow_hosts(['127.0.0.1'])
+def test_retrieve_patient_summary_resource_timeout(
+    mocker: MockerFixture,
+    stub_fhir_server: StubFHIRServer,
+    stub_fhir_settings: FHIRConnectionSettings,
+) -> None:
+    """An error is raised if not all resources are retrieved in time."""
+    mocker.patch('opal.services.fhir.utils.RESOURCES_RETRIEVAL_TIMEOUT', 0.2)
+    _add_patient_bundle(stub_fhir_server)
+    stub_fhir_server.add_bundle('Observation', {'resourceType': 'Bundle', 'type': 'searchset'}, delay=1)
+
+    with pytest.raises(FHIRDataRetrievalError, match=r'Timed out retrieving data from FHIR server after 0\.2 seconds'):
+        retrieve_patient_summary(settings=stub_fhir_settings, identifier='test-identifier')
@@ -4,9 +4,12 @@
 
 """Utility functions for FHIR functionality, including building patient summaries and JWE encryption."""
 
+import contextvars
+import threading
 import uuid
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, NamedTuple
 
 import structlog
 from authlib.oauth2 import OAuth2Error
@@ -21,10 +24,18 @@ from .fhir import FHIRConnector, MultiplePatientsFoundError, PatientNotFoundErro
 
 if TYPE_CHECKING:
     import logging
-    from collections.abc import Sequence
+    from collections.abc import Callable, Sequence
+
+    from fhir.resources.R4B.allergyintolerance import AllergyIntolerance
+    from fhir.resources.R4B.condition import Condition
+    from fhir.resources.R4B.immunization import Immunization
+    from fhir.resources.R4B.medicationrequest import MedicationRequest
 
 LOGGER: logging.Logger = structlog.get_logger(__name__)
 
+#: Maximum number of seconds to wait for all resources of a patient to be retrieved from the FHIR server
+RESOURCES_RETRIEVAL_TIMEOUT = 30
+
 
 class FHIRDataRetrievalError(Exception):
     """Raised when there is an error retrieving data from the FHIR server."""
@@ -32,7 +43,7 @@ class FHIRDataRetrievalError(Exception):
     pass
 
 
-@dataclass
+@dataclass(frozen=True)
 class FHIRConnectionSettings:
     """
     Settings for connecting to a FHIR server via OAuth2.
@@ -41,12 +52,67 @@ class FHIRConnectionSettings:
     - fhir_url: FHIR API base URL
     - client_id: OAuth2 client ID
     - private_key: Private key in PEM format for PrivateKeyJWT authentication
+    - page_size: number of resources per page requested from the FHIR server, the server's default if not specified
     """
 
     oauth_url: str
     fhir_url: str
     client_id: str
     private_key: str
+    page_size: int | None = None
+
+
+class PatientResources(NamedTuple):
+    """The resources of a patient retrieved from the FHIR server to build their patient summary."""
+
+    conditions: list[Condition]
+    medication_requests: list[MedicationRequest]
+    allergies: list[AllergyIntolerance]
+    observations: list[Observation]
+    immunizations: list[Immunization]
+
+
+#: Connectors of this process by their connection settings, shared to reuse their tokens and connections
+_CONNECTORS: dict[FHIRConnectionSettings, FHIRConnector] = {}
+_CONNECTORS_LOCK = threading.Lock()
+
+
+def get_fhir_connector(settings: FHIRConnectionSettings) -> FHIRConnector:
+    """
+    Return the connector of this process for the given connection settings.
+
+    The connector is created (and an authentication token fetched) on first use.
+    Subsequent calls reuse its token until shortly before it expires and its pooled HTTP connections.
+
+    Args:
+        settings: the settings to use for connecting to the FHIR server
+
+    Returns:
+        the shared connector
+    """
+    with _CONNECTORS_LOCK:
+        connector = _CONNECTORS.get(settings)
+
+        if connector is None:
+            connector = FHIRConnector(
+                oauth_url=settings.oauth_url,
+                fhir_url=settings.fhir_url,
+                client_id=settings.client_id,
+                private_key=settings.private_key,
+                page_size=settings.page_size,
+            )
+            _CONNECTORS[settings] = connector
+
+    return connector
+
+
+def clear_fhir_connectors() -> None:
+    """Close and discard all connectors of this process."""
+    with _CONNECTORS_LOCK:
+        for connector in _CONNECTORS.values():
+            connector.close()
+
+        _CONNECTORS.clear()
 
 
 # https://docs.smarthealthit.org/smart-health-links/spec/#encrypting-and-decrypting-files
@@ -97,12 +163,7 @@ def retrieve_patient_summary(
     )
 
     try:
-        fhir = FHIRConnector(
-            oauth_url=settings.oauth_url,
-            fhir_url=settings.fhir_url,
-            client_id=settings.client_id,
-            private_key=settings.private_key,
-        )
+        fhir = get_fhir_connector(settings)
 
         patient = fhir.find_patient(identifier)
         patient_uuid = patient.id
@@ -110,11 +171,10 @@ def retrieve_patient_summary(
         if not patient_uuid:
             raise FHIRDataRetrievalError(f'Patient with identifier {identifier} has no ID')
 
-        conditions = fhir.patient_conditions(patient_uuid)
-        medication_requests = fhir.patient_medication_requests(patient_uuid)
-        allergies = fhir.patient_allergies(patient_uuid)
-        observations = fhir.patient_observations(patient_uuid)
-        immunizations = fhir.patient_immunizations(patient_uuid)
+        conditions, medication_requests, allergies, observations, immunizations = retrieve_patient_resources(
+            fhir,
+            patient_uuid,
+        )
 
         LOGGER.debug(
             'Retrieved data for patient %s: %d conditions, %d medication requests, %d allergies, %d observations, %d immunizations',
@@ -169,6 +229,52 @@ def retrieve_patient_summary(
         return ips_bundle.model_dump_json(indent=2), ips_uuid
 
 
+def retrieve_patient_resources(fhir: FHIRConnector, patient_uuid: str) -> PatientResources:
+    """
+    Retrieve the resources of a patient needed for their patient summary concurrently.
+
+    Each resource type is requested in its own thread so that the retrieval takes as long as the slowest request.
+    If one of the requests fails, the remaining requests are cancelled (if not started yet) and the error is raised.
+
+    Args:
+        fhir: the connector to the FHIR server
+        patient_uuid: the UUID of the patient on the FHIR server
+
+    Returns:
+        the resources of the patient
+
+    Raises:
+        FHIRDataRetrievalError: if not all resources are retrieved within `RESOURCES_RETRIEVAL_TIMEOUT` seconds
+    """
+    retrievals: list[Callable[[str], list[Any]]] = [
+        fhir.patient_conditions,
+        fhir.patient_medication_requests,
+        fhir.patient_allergies,
+        fhir.patient_observations,
+        fhir.patient_immunizations,
+    ]
+    executor = ThreadPoolExecutor(max_workers=len(retrievals), thread_name_prefix='fhir-retrieval')
+
+    try:
+        # run each retrieval in a copy of the current context to keep the bound log context
+        futures = [executor.submit(contextvars.copy_context().run, retrieve, patient_uuid) for retrieve in retrievals]
+        done, not_done = wait(futures, timeout=RESOURCES_RETRIEVAL_TIMEOUT, return_when=FIRST_EXCEPTION)
+
+        for future in done:
+            if (exc := future.exception()) is not None:
+                raise exc
+
+        if not_done:
+            raise FHIRDataRetrievalError(
+                f'Timed out retrieving data from FHIR server after {RESOURCES_RETRIEVAL_TIMEOUT} seconds'
+            )
+
+        return PatientResources(*(future.result() for future in futures))
+    finally:
+        # do not wait for requests that are still running after an error
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 def validate_observation(value: dict[str, Any]) -> Observation:
     """
     Validate that a dictionary is a valid FHIR `Observation` resource.
@@ -0,0 +1,446 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""
+Module providing the rendering of the charts of numeric questions in questionnaire PDF reports.
+
+Charts are either rasterized from plotly figures (`ChartFormat.RASTER`)
+or drawn directly onto the PDF using fpdf2's vector primitives (`ChartFormat.VECTOR`).
+
+Rendering a plotly figure to PNG goes through kaleido and a headless Chromium, which dominates the report generation.
+The rendered images are therefore cached in the Django cache by a hash of the question's answer series and layout,
+so that unchanged charts are reused across reports.
+The charts missing from the cache are exported in one batch by a long-lived kaleido server
+instead of starting a browser per chart.
+"""
+
+import hashlib
+import json
+import math
+import tempfile
+import threading
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from django.core.cache import cache
+
+import kaleido
+import pandas as pd
+import structlog
+from plotly import express as px
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from fpdf import FPDF
+    from plotly.graph_objects import Figure
+
+    from .questionnaire import Question
+
+LOGGER = structlog.get_logger()
+
+#: Prefix of the cache keys of the chart images
+CHART_CACHE_KEY_PREFIX = 'questionnaire-report-chart'
+#: Version of the chart layout, increase it when changing `build_numeric_question_chart` to invalidate cached images
+CHART_LAYOUT_VERSION = 1
+#: Number of seconds a chart image is kept in the cache
+CHART_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+#: Width of the chart images (in pixels)
+CHART_WIDTH = 810
+#: Height of the chart images (in pixels)
+CHART_HEIGHT = 310
+#: Margins of the plot area within a vector chart (left, top, right, bottom) (in pixels)
+VECTOR_CHART_PLOT_MARGINS = (80, 25, 40, 65)
+#: Maximum number of answer dates labelled on the x-axis of a vector chart
+VECTOR_CHART_MAX_X_TICKS = 8
+#: Colours of a vector chart matching plotly's `plotly_white` template
+VECTOR_CHART_LINE_COLOR = (99, 110, 250)
+VECTOR_CHART_GRID_COLOR = (235, 240, 248)
+VECTOR_CHART_TEXT_COLOR = (42, 63, 95)
+VECTOR_CHART_FONT = 'Helvetica'
+
+
+class ChartFormat(Enum):
+    """The formats in which the charts of numeric questions can be added to a questionnaire report."""
+
+    #: PNG image of a plotly figure rendered by a headless browser
+    RASTER = 'raster'
+    #: chart drawn directly onto the PDF
+    VECTOR = 'vector'
+
+
+def get_chart_cache_key(question: Question) -> str:
+    """
+    Return the cache key of the chart image of a numeric question.
+
+    The key is a hash of everything the chart is built from, i.e., the answer series and the layout.
+
+    Args:
+        question: the numeric question
+
+    Returns:
+        the cache key of the chart image
+    """
+    chart_input = json.dumps([
+        question.question_label,
+        question.min_value,
+        question.max_value,
+        [(timestamp.isoformat(), value) for timestamp, value in question.answers],
+        CHART_WIDTH,
+        CHART_HEIGHT,
+    ])
+    digest = hashlib.sha256(chart_input.encode()).hexdigest()
+
+    return f'{CHART_CACHE_KEY_PREFIX}:v{CHART_LAYOUT_VERSION}:{digest}'
+
+
+def build_numeric_question_chart(question: Question) -> Figure:
+    """
+    Build the line chart of the answers of a numeric question (e.g., `SLIDER`).
+
+    Args:
+        question: the numeric question to be visualized in a chart
+
+    Returns:
+        the chart figure
+    """
+    data_frame = pd.DataFrame(
+        {
+            'Last Updated': [answer[0] for answer in question.answers],
+            'Value': [int(answer[1]) for answer in question.answers],
+        },
+    )
+
+    chart_trace = px.line(
+        data_frame,
+        x=data_frame.iloc[:, 0],
+        y=data_frame.iloc[:, 1],
+        markers=True,
+        width=CHART_WIDTH,
+        height=CHART_HEIGHT,
+        text='Value',
+        template='plotly_white',
+    )
+    chart_trace.update_traces(
+        textposition='top center',
+        marker={'size': 10},
+        textfont={'size': 15, 'weight': 'bold'},
+    )
+
+    chart_trace.update_yaxes(
+        showgrid=True,
+    )
+    # Make sure we see the max and the min value of the markers
+    if question.max_value and question.min_value is not None:
+        chart_trace.for_each_yaxis(
+            lambda var: var.update({
+                'range': [
+                    0,
+                    question.max_value * 1.1,
+                ],
+            }),
+        )
+    chart_trace.update_layout(
+        yaxis_title=question.question_label,
+        xaxis_title=None,
+        margin={
+            'l': 40,
+            'r': 40,
+            't': 0,
+            'b': 0,
+        },
+        height=CHART_HEIGHT,  # Keep height fixed
+        xaxis={
+            'tickangle': 20,  # Better readability than flat
+        },
+    )
+
+    return chart_trace
+
+
+class ChartRenderer:
+    """
+    Long-lived renderer exporting plotly figures to PNG images.
+
+    The renderer starts kaleido's global server (one headless browser with `tabs` tabs) on first use
+    and keeps it running for the lifetime of the process.
+    Figures are exported in batches, rendered concurrently by the tabs of the browser.
+    """
+
+    def __init__(self, tabs: int = 2) -> None:
+        """
+        Initialize the renderer.
+
+        Args:
+            tabs: the number of browser tabs rendering figures concurrently
+        """
+        self.tabs = tabs
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self) -> None:
+        """Start the kaleido server if it is not running yet."""
+        with self._lock:
+            if not self._started:
+                LOGGER.debug('Starting the chart renderer with %d tabs', self.tabs)
+                kaleido.start_sync_server(n=self.tabs, silence_warnings=True)
+                self._started = True
+
+    def stop(self) -> None:
+        """Stop the kaleido server."""
+        with self._lock:
+            if self._started:
+                kaleido.stop_sync_server(silence_warnings=True)
+                self._started = False
+
+    def render(self, figures: Sequence[Figure]) -> list[bytes]:
+        """
+        Export the figures to PNG images in one batch.
+
+        Args:
+            figures: the figures to export
+
+        Returns:
+            the PNG images in the order of the figures
+        """
+        if not figures:
+            return []
+
+        self.start()
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [Path(directory) / f'chart-{index}.png' for index in range(len(figures))]
+            specs: list[dict[str, Any]] = [
+                {'fig': figure, 'path': path, 'opts': {'format': 'png'}}
+                for figure, path in zip(figures, paths, strict=True)
+            ]
+            # the server serializes the calls, the batch is distributed over its tabs
+            kaleido.write_fig_from_object_sync(specs)
+
+            return [path.read_bytes() for path in paths]
+
+
+#: The chart renderer shared by all reports generated by the process
+CHART_RENDERER = ChartRenderer()
+
+
+def render_question_charts(questions: Iterable[Question]) -> dict[str, bytes]:
+    """
+    Return the chart images of the numeric questions by their cache key.
+
+    Images are taken from the cache when available.
+    The missing images are rendered in one batch and added to the cache.
+
+    Args:
+        questions: the numeric questions
+
+    Returns:
+        the PNG image of each chart by its cache key (see `get_chart_cache_key`)
+    """
+    questions_by_key = {get_chart_cache_key(question): question for question in questions}
+    images: dict[str, bytes] = cache.get_many(questions_by_key)
+
+    missing_keys = [key for key in questions_by_key if key not in images]
+    LOGGER.debug('Questionnaire report charts: %d cached, %d to render', len(images), len(missing_keys))
+
+    if missing_keys:
+        figures = [build_numeric_question_chart(questions_by_key[key]) for key in missing_keys]
+        rendered_images = dict(zip(missing_keys, CHART_RENDERER.render(figures), strict=True))
+        cache.set_many(rendered_images, timeout=CHART_CACHE_TIMEOUT)
+        images.update(rendered_images)
+
+    return images
+
+
+def draw_numeric_question_chart(pdf: FPDF, question: Question, width: float) -> None:
+    """
+    Draw the line chart of the answers of a numeric question onto the PDF using vector primitives.
+
+    The chart has the same layout as the plotly figure (see `build_numeric_question_chart`) scaled to the given width.
+    It is drawn at the left margin below the current position, which is moved below the chart.
+
+    Args:
+        pdf: the PDF to draw the chart on
+        question: the numeric question to be visualized in a chart
+        width: the width of the chart (in the unit of the PDF)
+    """
+    height = CHART_HEIGHT * width / CHART_WIDTH
+    if pdf.will_page_break(height):
+        pdf.add_page()
+
+    chart = VectorChart(pdf, question, width)
+    with pdf.local_context():
+        chart.draw_axes()
+        chart.draw_series()
+
+    pdf.set_y(pdf.y + height)
+
+
+class VectorChart:
+    """Line chart of the answers of a numeric question drawn at the current position of a PDF."""
+
+    def __init__(self, pdf: FPDF, question: Question, width: float) -> None:
+        """
+        Compute the geometry of the chart.
+
+        Args:
+            pdf: the PDF to draw the chart on
+            question: the numeric question to be visualized in the chart
+            width: the width of the chart (in the unit of the PDF)
+        """
+        self.pdf = pdf
+        self.question = question
+        # sizes of the plotly layout are given in pixels
+        self.scale = width / CHART_WIDTH
+        # fpdf2 expects font sizes in points
+        self.font_scale = self.scale * pdf.k
+
+        left_margin, top_margin, right_margin, bottom_margin = VECTOR_CHART_PLOT_MARGINS
+        self.left = pdf.l_margin
+        self.plot_left = pdf.l_margin + left_margin * self.scale
+        self.plot_top = pdf.y + top_margin * self.scale
+        self.plot_right = pdf.l_margin + width - right_margin * self.scale
+        self.plot_bottom = pdf.y + (CHART_HEIGHT - bottom_margin) * self.scale
+
+        self.timestamps = [answer[0].timestamp() for answer in question.answers]
+        self.values = [int(answer[1]) for answer in question.answers]
+        self.x_range = _get_time_range(self.timestamps)
+        self.y_range = _get_value_range(question, self.values)
+
+    def to_x(self, timestamp: float) -> float:
+        """
+        Return the abscissa of a point in time on the PDF.
+
+        Args:
+            timestamp: the POSIX timestamp
+
+        Returns:
+            the abscissa within the plot area
+        """
+        low, high = self.x_range
+        return self.plot_left + (timestamp - low) / (high - low) * (self.plot_right - self.plot_left)
+
+    def to_y(self, value: float) -> float:
+        """
+        Return the ordinate of a value on the PDF.
+
+        Args:
+            value: the answer value
+
+        Returns:
+            the ordinate within the plot area
+        """
+        low, high = self.y_range
+        return self.plot_bottom - (value - low) / (high - low) * (self.plot_bottom - self.plot_top)
+
+    def draw_axes(self) -> None:
+        """Draw the gridlines, the tick labels and the title of the y-axis."""
+        pdf = self.pdf
+        pdf.set_text_color(*VECTOR_CHART_TEXT_COLOR)
+        pdf.set_draw_color(*VECTOR_CHART_GRID_COLOR)
+        pdf.set_line_width(self.scale)
+        pdf.set_font(VECTOR_CHART_FONT, size=12 * self.font_scale)
+
+        for tick in _get_value_ticks(*self.y_range):
+            tick_y = self.to_y(tick)
+            pdf.line(self.plot_left, tick_y, self.plot_right, tick_y)
+            label = f'{tick:g}'
+            pdf.text(self.plot_left - pdf.get_string_width(label) - 6 * self.scale, tick_y + pdf.font_size / 3, label)
+
+        # label at most a few answer dates, rotated clockwise like the plotly chart
+        tick_step = math.ceil(len(self.question.answers) / VECTOR_CHART_MAX_X_TICKS)
+        label_y = self.plot_bottom + 6 * self.scale + pdf.font_size
+        for timestamp, answer in zip(self.timestamps[::tick_step], self.question.answers[::tick_step], strict=True):
+            tick_x = self.to_x(timestamp)
+            pdf.line(tick_x, self.plot_top, tick_x, self.plot_bottom)
+            with pdf.rotation(-20, x=tick_x, y=label_y):
+                pdf.text(tick_x - pdf.font_size / 2, label_y, answer[0].strftime('%b %d, %Y'))
+
+        pdf.set_font(VECTOR_CHART_FONT, size=14 * self.font_scale)
+        title = self.question.question_label
+        title_x = self.left + 14 * self.scale + pdf.font_size / 2
+        title_y = (self.plot_top + self.plot_bottom + pdf.get_string_width(title)) / 2
+        with pdf.rotation(90, x=title_x, y=title_y):
+            pdf.text(title_x, title_y, title)
+
+    def draw_series(self) -> None:
+        """Draw the line of the answers with a marker and a value label for each answer."""
+        pdf = self.pdf
+        points = [
+            (self.to_x(timestamp), self.to_y(value))
+            for timestamp, value in zip(self.timestamps, self.values, strict=True)
+        ]
+        pdf.set_draw_color(*VECTOR_CHART_LINE_COLOR)
+        pdf.set_fill_color(*VECTOR_CHART_LINE_COLOR)
+        pdf.set_line_width(2 * self.scale)
+        if len(points) > 1:
+            pdf.polyline(points)
+
+        pdf.set_font(VECTOR_CHART_FONT, style='B', size=15 * self.font_scale)
+        marker_radius = 5 * self.scale
+        for (point_x, point_y), value in zip(points, self.values, strict=True):
+            pdf.circle(point_x, point_y, marker_radius, style='F')
+            label = str(value)
+            pdf.text(point_x - pdf.get_string_width(label) / 2, point_y - marker_radius - 4 * self.scale, label)
+
+
+def _get_time_range(timestamps: list[float]) -> tuple[float, float]:
+    """
+    Return the range of the x-axis with some padding so that the markers at the edges are fully visible.
+
+    Args:
+        timestamps: the POSIX timestamps of the answers
+
+    Returns:
+        the lower and upper bound of the x-axis
+    """
+    low, high = min(timestamps), max(timestamps)
+    # a single answer is centered within one day
+    padding = (high - low) * 0.05 or 12 * 60 * 60
+
+    return low - padding, high + padding
+
+
+def _get_value_range(question: Question, values: list[int]) -> tuple[float, float]:
+    """
+    Return the range of the y-axis.
+
+    The range is `0` to 110% of the question's maximum value if the question defines its range,
+    otherwise the range of the answer values with some padding.
+
+    Args:
+        question: the numeric question
+        values: the answer values
+
+    Returns:
+        the lower and upper bound of the y-axis
+    """
+    if question.max_value and question.min_value is not None:
+        return 0, question.max_value * 1.1
+
+    low, high = min(values), max(values)
+    padding = (high - low) * 0.1 or 1
+
+    return low - padding, high + padding
+
+
+def _get_value_ticks(low: float, high: float, count: int = 5) -> list[float]:
+    """
+    Return evenly spaced ticks with a "nice" step (1, 2, 2.5 or 5 times a power of ten) within a range.
+
+    Args:
+        low: the lower bound of the range
+        high: the upper bound of the range
+        count: the approximate number of ticks
+
+    Returns:
+        the ticks within the range
+    """
+    raw_step = (high - low) / count
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(factor * magnitude for factor in (1, 2, 2.5, 5, 10) if factor * magnitude >= raw_step)
+    first_tick = math.ceil(low / step) * step
+
+    return [first_tick + index * step for index in range(math.floor((high - first_tick) / step + 1e-9) + 1)]
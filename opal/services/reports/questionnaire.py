@@ -5,7 +5,6 @@
 """Module providing business logic for generating questionnaire PDF reports using FPDF2."""
 
 import io
-import math
 import re
 import types
 from enum import Enum
@@ -13,18 +12,19 @@ from typing import TYPE_CHECKING, NamedTuple
 
 from django.utils import timezone
 
-import pandas as pd
 from fpdf import FPDF, FPDF_VERSION, FontFace, FPDFException
 from fpdf.enums import Align, PageLabelStyle, TableBordersLayout
-from plotly import express as px
+from fpdf.outline import OutlineSection
+from fpdf.syntax import DestinationXYZ
 
+from . import charts
 from .base import FPDFCellDictType, FPDFMultiCellDictType, InstitutionData, PatientData
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
     from datetime import datetime
 
     from fpdf.fpdf import _Format, _Orientation
-    from fpdf.outline import OutlineSection
     from fpdf.transitions import Transition
 
 
@@ -93,12 +93,15 @@ TEXT_QUESTIONS_TABLE_HEADER = ('Date', 'Response')
 class QuestionnairePDF(FPDF):
     """Customized FPDF class that provides implementation for generating questionnaire PDF reports."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         institution_data: InstitutionData,
         patient_data: PatientData,
         questionnaire_data: list[QuestionnaireData],
         toc_pages: int | None = None,
+        *,
+        chart_images: Mapping[str, bytes] | None = None,
+        chart_format: charts.ChartFormat = charts.ChartFormat.RASTER,
     ) -> None:
         """
         Initialize a `QuestionnairePDF` instance for generating questionnaire reports.
@@ -113,10 +116,14 @@ class QuestionnairePDF(FPDF):
             patient_data: patient data required to generate the PDF report
             questionnaire_data: questionnaire data required to generate the PDF report
             toc_pages: number of pages required to generate the toc
+            chart_images: the rendered chart images of the numeric questions by their cache key,
+                rendered on initialization if not provided
+            chart_format: whether the charts of numeric questions are added as images or drawn as vector graphics
         """
         super().__init__()
         self.institution_data = institution_data
         self.questionnaire_data = questionnaire_data
+        self.patient_data = patient_data
         self.patient_name = f'{patient_data.patient_first_name} {patient_data.patient_last_name}'
         self.QUESTION_TYPE_HANDLERS = types.MappingProxyType(
             {
@@ -135,6 +142,10 @@ class QuestionnairePDF(FPDF):
             sites_and_mrns_list,
         )
         self.toc_pages = toc_pages if toc_pages is not None else self._calculate_toc_pages()
+        self.chart_format = chart_format
+        self.chart_images = (
+            chart_images if chart_images is not None else _render_chart_images(questionnaire_data, chart_format)
+        )
         self._set_report_metadata()
         self.set_auto_page_break(auto=True, margin=AUTO_PAGE_BREAK_BOTTOM_MARGIN)
         self.add_page()
@@ -325,13 +336,17 @@ class QuestionnairePDF(FPDF):
         self.set_producer(f'fpdf2 v{FPDF_VERSION}')
 
     def _calculate_toc_pages(self) -> int:
-        # Estimate how many pages the TOC will require based on the number of completed questionnaires.
-        first_page_count = 14
-        subsequent_page_count = 17
-        total_questionnaires = len(self.questionnaire_data)
-        if total_questionnaires <= first_page_count:
-            return 1
-        return math.ceil((total_questionnaires - first_page_count) / subsequent_page_count) + 1
+        """
+        Calculate how many pages the TOC requires.
+
+        The TOC only depends on the titles and dates of the questionnaires, not on their results.
+        It is laid out in a scratch document with the same header and first page,
+        which measures the height of its rows (e.g., wrapped long titles) at a fraction of the cost of the report.
+
+        Returns:
+            the number of pages required to render the TOC
+        """
+        return _ToCLayoutPDF(self.institution_data, self.patient_data, self.questionnaire_data).toc_pages
 
     def _draw_questionnaire_result(self) -> None:
         for index, data in enumerate(self.questionnaire_data):
@@ -362,15 +377,12 @@ class QuestionnairePDF(FPDF):
             handler = self.QUESTION_TYPE_HANDLERS.get(question_type, self._draw_text_answer_question)
             handler(question)
 
-    def _prepare_question_chart(self, question: Question) -> pd.DataFrame:
+    def _prepare_question_chart(self, question: Question) -> None:
         """
-        Prepare the question for the chart.
+        Prepare the page for the chart by drawing the question's title.
 
         Args:
             question: question that needs to be prepared
-
-        Returns:
-            DataFrame of the question's answer values
         """
         if self.will_page_break(50):  # Ensure the title and chart are on the same page
             self.add_page()
@@ -384,74 +396,24 @@ class QuestionnairePDF(FPDF):
             align=Align.L,
         )
         self.ln(5)
-        x_data = []
-        y_data = []
-        for answers in question.answers:
-            x_data.append(answers[0])
-            y_data.append(int(answers[1]))
-
-        return pd.DataFrame(
-            {
-                'Last Updated': x_data,
-                'Value': y_data,
-            },
-        )
 
     def _draw_chart_for_numeric_question(self, question: Question) -> None:
         """
-        Generate a chart for a numeric question (e.g., `SLIDER`) type.
+        Draw the chart for a numeric question (e.g., `SLIDER`) type.
+
+        The chart is either drawn as vector graphics or added as an image rendered in advance
+        (see `charts.render_question_charts`).
 
         Args:
             question: numeric question to be visualized in a chart
         """
-        data_frame = self._prepare_question_chart(question)
-
-        chart_trace = px.line(
-            data_frame,
-            x=data_frame.iloc[:, 0],
-            y=data_frame.iloc[:, 1],
-            markers=True,
-            width=810,
-            height=310,
-            text='Value',
-            template='plotly_white',
-        )
-        chart_trace.update_traces(
-            textposition='top center',
-            marker={'size': 10},
-            textfont={'size': 15, 'weight': 'bold'},
-        )
+        self._prepare_question_chart(question)
 
-        chart_trace.update_yaxes(
-            showgrid=True,
-        )
-        # Make sure we see the max and the min value of the markers
-        if question.max_value and question.min_value is not None:
-            chart_trace.for_each_yaxis(
-                lambda var: var.update({
-                    'range': [
-                        0,
-                        question.max_value * 1.1,
-                    ],
-                }),
-            )
-        chart_trace.update_layout(
-            yaxis_title=question.question_label,
-            xaxis_title=None,
-            margin={
-                'l': 40,
-                'r': 40,
-                't': 0,
-                'b': 0,
-            },
-            height=310,  # Keep height fixed
-            xaxis={
-                'tickangle': 20,  # Better readability than flat
-            },
-        )
-
-        image = io.BytesIO(chart_trace.to_image(format='PNG'))
-        self.image(image, w=self.epw, x=Align.R)
+        if self.chart_format == charts.ChartFormat.VECTOR:
+            charts.draw_numeric_question_chart(self, question, width=self.epw)
+        else:
+            image = io.BytesIO(self.chart_images[charts.get_chart_cache_key(question)])
+            self.image(image, w=self.epw, x=Align.R)
         self.ln(10)
 
     def _draw_text_answer_question(self, question: Question) -> None:
@@ -560,10 +522,84 @@ class QuestionnairePDF(FPDF):
         )
 
 
+class _ToCLayoutPDF(QuestionnairePDF):
+    """Scratch questionnaire PDF that only lays out the TOC to count the pages it requires."""
+
+    def __init__(
+        self,
+        institution_data: InstitutionData,
+        patient_data: PatientData,
+        questionnaire_data: list[QuestionnaireData],
+    ) -> None:
+        """
+        Lay out the TOC of a questionnaire report.
+
+        Args:
+            institution_data: institution data required to generate the PDF report
+            patient_data: patient data required to generate the PDF report
+            questionnaire_data: questionnaire data required to generate the PDF report
+        """
+        super().__init__(institution_data, patient_data, questionnaire_data, toc_pages=1, chart_images={})
+
+    def _generate(self) -> None:
+        """Render the first page and the TOC in place of its placeholder and count the pages of the TOC."""
+        self._draw_patient_name_site_and_barcode()
+        start_page = self.page
+        # the actual page numbers are not known yet, they are short enough not to affect the height of the rows
+        outline = [
+            OutlineSection(
+                name=data.questionnaire_title,
+                level=0,
+                page_number=start_page + index + 1,
+                dest=DestinationXYZ(start_page + index + 1, top=0),
+            )
+            for index, data in enumerate(self.questionnaire_data)
+        ]
+        self._render_toc_with_table(self, outline)
+        self.toc_pages = self.page - start_page + 1
+
+
+def _iter_numeric_questions(questionnaires: list[QuestionnaireData]) -> Iterator[Question]:
+    """
+    Return the numeric questions of the questionnaires, which are visualized in a chart.
+
+    Args:
+        questionnaires: the questionnaires of the report
+
+    Yields:
+        the numeric questions
+    """
+    for questionnaire in questionnaires:
+        for question in questionnaire.questions:
+            if QuestionType(question.question_type_id) == QuestionType.NUMERIC:
+                yield question
+
+
+def _render_chart_images(
+    questionnaires: list[QuestionnaireData],
+    chart_format: charts.ChartFormat,
+) -> dict[str, bytes]:
+    """
+    Render the chart images of the numeric questions if the charts are added as images.
+
+    Args:
+        questionnaires: the questionnaires of the report
+        chart_format: the format of the charts of the report
+
+    Returns:
+        the PNG image of each chart by its cache key, empty if the charts are drawn as vector graphics
+    """
+    if chart_format == charts.ChartFormat.VECTOR:
+        return {}
+
+    return charts.render_question_charts(_iter_numeric_questions(questionnaires))
+
+
 def generate_pdf(
     institution: InstitutionData,
     patient: PatientData,
     questionnaires: list[QuestionnaireData],
+    chart_format: charts.ChartFormat = charts.ChartFormat.RASTER,
 ) -> bytearray:
     """
     Create a questionnaire PDF report.
@@ -572,6 +608,7 @@ def generate_pdf(
         institution: institution data required to generate the PDF report
         patient: patient data required to generate the PDF report
         questionnaires: questionnaire list required to generate the PDF report
+        chart_format: whether the charts of numeric questions are added as images or drawn as vector graphics
 
     Returns:
         output of the generated questionnaire report after checking if the number
@@ -580,25 +617,45 @@ def generate_pdf(
     Raises:
         FPDFException: If any other errors occurs during the PDF generation
     """
+    # render the charts once, they are reused if the report needs to be generated a second time
+    chart_images = _render_chart_images(questionnaires, chart_format)
+
     try:
-        result = _generate_pdf(institution, patient, questionnaires)
+        result = _generate_pdf(
+            institution,
+            patient,
+            questionnaires,
+            chart_images=chart_images,
+            chart_format=chart_format,
+        )
     except FPDFException as exc:
+        # safeguard in case the number of pages of the TOC was calculated incorrectly
         error = str(exc)
         if 'ToC ended on page' in error:
             match = re.search(r'ToC ended on page (\d+) while it was expected to span exactly (\d+) pages', error)
             if match:
                 actual_pages = int(match.group(1))
-                return _generate_pdf(institution, patient, questionnaires, actual_pages)
+                return _generate_pdf(
+                    institution,
+                    patient,
+                    questionnaires,
+                    actual_pages,
+                    chart_images=chart_images,
+                    chart_format=chart_format,
+                )
         raise
 
     return result
 
 
-def _generate_pdf(
+def _generate_pdf(  # noqa: PLR0913
     institution: InstitutionData,
     patient: PatientData,
     questionnaires: list[QuestionnaireData],
     toc_pages: int | None = None,
+    *,
+    chart_images: Mapping[str, bytes] | None = None,
+    chart_format: charts.ChartFormat = charts.ChartFormat.RASTER,
 ) -> bytearray:
     """
     Create a questionnaire PDF report.
@@ -608,10 +665,19 @@ def _generate_pdf(
         patient: patient data required to generate the PDF report
         questionnaires: questionnaire list required to generate the PDF report
         toc_pages: number of pages required to generate the toc
+        chart_images: the rendered chart images of the numeric questions by their cache key
+        chart_format: whether the charts of numeric questions are added as images or drawn as vector graphics
 
     Returns:
         output of the generated questionnaire report
     """
-    pdf = QuestionnairePDF(institution, patient, questionnaires, toc_pages=toc_pages)
+    pdf = QuestionnairePDF(
+        institution,
+        patient,
+        questionnaires,
+        toc_pages=toc_pages,
+        chart_images=chart_images,
+        chart_format=chart_format,
+    )
 
     return pdf.output()
@@ -0,0 +1,178 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from django.core.cache import cache
+from django.utils import timezone
+
+import pytest
+from fpdf import FPDF
+
+from opal.services.reports import charts, questionnaire
+
+if TYPE_CHECKING:
+    from pytest_mock.plugin import MockerFixture
+
+NUMERIC_QUESTION = questionnaire.Question(
+    question_text='Question charts demo',
+    question_label='charts demo',
+    question_type_id=questionnaire.QuestionType.NUMERIC,
+    position=1,
+    min_value=5,
+    max_value=7,
+    polarity=0,
+    section_id=1,
+    answers=[
+        (datetime(2024, 10, 20, 14, 0, tzinfo=timezone.get_current_timezone()), '5'),
+        (datetime(2024, 10, 21, 14, 0, tzinfo=timezone.get_current_timezone()), '7'),
+    ],
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_chart_cache() -> None:
+    """Fixture clearing the cache to avoid chart images leaking between tests."""
+    cache.clear()
+
+
+def test_get_chart_cache_key_stable() -> None:
+    """Ensure questions with the same answer series and layout have the same cache key."""
+    other_question = NUMERIC_QUESTION._replace(question_text='Other text', position=2)
+
+    assert charts.get_chart_cache_key(NUMERIC_QUESTION) == charts.get_chart_cache_key(other_question)
+    assert charts.get_chart_cache_key(NUMERIC_QUESTION).startswith(
+        f'{charts.CHART_CACHE_KEY_PREFIX}:v{charts.CHART_LAYOUT_VERSION}:',
+    )
+
+
+def test_get_chart_cache_key_answers_changed() -> None:
+    """Ensure a new answer or a different layout changes the cache key."""
+    new_answer = (datetime(2024, 10, 22, 14, 0, tzinfo=timezone.get_current_timezone()), '6')
+    more_answers = NUMERIC_QUESTION._replace(answers=[*NUMERIC_QUESTION.answers, new_answer])
+    other_range = NUMERIC_QUESTION._replace(max_value=10)
+    other_label = NUMERIC_QUESTION._replace(question_label='other label')
+
+    keys = {
+        charts.get_chart_cache_key(question) for question in (NUMERIC_QUESTION, more_answers, other_range, other_label)
+    }
+
+    assert len(keys) == 4
+
+
+def test_build_numeric_question_chart() -> None:
+    """Ensure the chart has the fixed size and a y-axis range up to 110% of the maximum value."""
+    figure = charts.build_numeric_question_chart(NUMERIC_QUESTION)
+
+    assert figure.layout.width == charts.CHART_WIDTH
+    assert figure.layout.height == charts.CHART_HEIGHT
+    assert figure.layout.yaxis.range == pytest.approx((0, 7.7))
+    assert figure.layout.yaxis.title.text == 'charts demo'
+    assert list(figure.data[0].y) == [5, 7]
+
+
+def test_render_question_charts_cached(mocker: MockerFixture) -> None:
+    """Ensure the charts are rendered in one batch and taken from the cache afterwards."""
+    mock_render = mocker.patch.object(
+        charts.CHART_RENDERER,
+        'render',
+        side_effect=lambda figures: [f'image-{index}'.encode() for index in range(len(figures))],
+    )
+    other_question = NUMERIC_QUESTION._replace(max_value=10)
+    key = charts.get_chart_cache_key(NUMERIC_QUESTION)
+    other_key = charts.get_chart_cache_key(other_question)
+
+    images = charts.render_question_charts([NUMERIC_QUESTION, other_question, NUMERIC_QUESTION])
+
+    assert images == {key: b'image-0', other_key: b'image-1'}
+    mock_render.assert_called_once()
+    assert len(mock_render.call_args.args[0]) == 2
+
+    mock_render.reset_mock()
+    new_question = NUMERIC_QUESTION._replace(max_value=20)
+
+    images = charts.render_question_charts([NUMERIC_QUESTION, new_question])
+
+    assert images == {key: b'image-0', charts.get_chart_cache_key(new_question): b'image-0'}
+    # only the chart missing from the cache is rendered
+    mock_render.assert_called_once()
+    assert len(mock_render.call_args.args[0]) == 1
+
+
+def test_render_question_charts_no_questions(mocker: MockerFixture) -> None:
+    """Ensure nothing is rendered if there are no numeric questions."""
+    mock_render = mocker.patch.object(charts.CHART_RENDERER, 'render')
+
+    assert charts.render_question_charts([]) == {}
+    mock_render.assert_not_called()
+
+
+# Marking this slow since the test uses chromium
+@pytest.mark.slow
+# Allow hosts to make the test work for Windows, Linux and Unix-based environments
+@pytest.mark.allow_hosts(['127.0.0.1'])
+def test_chart_renderer_render() -> None:
+    """Ensure the renderer exports a batch of figures to PNG images."""
+    renderer = charts.ChartRenderer(tabs=1)
+    figures = [
+        charts.build_numeric_question_chart(NUMERIC_QUESTION),
+        charts.build_numeric_question_chart(NUMERIC_QUESTION._replace(max_value=10)),
+    ]
+
+    try:
+        images = renderer.render(figures)
+    finally:
+        renderer.stop()
+
+    assert len(images) == 2
+    assert all(image.startswith(b'\x89PNG') for image in images)
+    assert renderer.render([]) == []
+
+
+@pytest.mark.parametrize(
+    ('low', 'high', 'ticks'),
+    [
+        (0, 7.7, [0, 2, 4, 6]),
+        (0, 110, [0, 25, 50, 75, 100]),
+        (2, 4, [2, 2.5, 3, 3.5, 4]),
+        (-0.3, 3.3, [0, 1, 2, 3]),
+    ],
+)
+def test_get_value_ticks(low: float, high: float, ticks: list[float]) -> None:
+    """Ensure the ticks of the y-axis of a vector chart have a nice step within the range."""
+    assert charts._get_value_ticks(low, high) == pytest.approx(ticks)
+
+
+def test_vector_chart_value_range() -> None:
+    """Ensure the y-axis of a vector chart has the same range as the plotly chart."""
+    chart = charts.VectorChart(FPDF(), NUMERIC_QUESTION, width=190)
+
+    assert chart.y_range == pytest.approx((0, 7.7))
+    # the line of the answers is within the plot area
+    assert chart.plot_top < chart.to_y(7) < chart.to_y(5) < chart.plot_bottom
+    assert chart.plot_left < chart.to_x(chart.timestamps[0]) < chart.to_x(chart.timestamps[1]) < chart.plot_right
+
+
+def test_draw_numeric_question_chart() -> None:
+    """Ensure a vector chart is drawn with the same height as the chart image and moves the position below it."""
+    pdf = FPDF()
+    pdf.add_page()
+    start_y = pdf.y
+
+    charts.draw_numeric_question_chart(pdf, NUMERIC_QUESTION, width=pdf.epw)
+
+    assert pdf.y == pytest.approx(start_y + pdf.epw * charts.CHART_HEIGHT / charts.CHART_WIDTH)
+    assert pdf.page == 1
+
+
+def test_draw_numeric_question_chart_page_break() -> None:
+    """Ensure a vector chart is drawn on a new page if it does not fit on the current one."""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_y(pdf.h - 50)
+
+    charts.draw_numeric_question_chart(pdf, NUMERIC_QUESTION._replace(max_value=None), width=pdf.epw)
+
+    assert pdf.page == 2
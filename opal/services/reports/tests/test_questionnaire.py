@@ -6,12 +6,13 @@ from datetime import date, datetime
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+from django.core.cache import cache
 from django.utils import timezone
 
 import pytest
 from fpdf import FPDFException
 
-from opal.services.reports import questionnaire
+from opal.services.reports import charts, questionnaire
 from opal.services.reports.base import InstitutionData, PatientData
 
 if TYPE_CHECKING:
@@ -275,6 +276,12 @@ INSTITUTION_REPORT_DATA_WITH_NO_PAGE_BREAK = InstitutionData(
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_chart_cache() -> None:
+    """Fixture clearing the cache to avoid chart images leaking between tests."""
+    cache.clear()
+
+
 def _create_generated_report_data(status: HTTPStatus) -> dict[str, dict[str, str]]:
     """
     Create mock `dict` response on the `report` HTTP POST request.
@@ -348,8 +355,8 @@ def test_generate_pdf_multiple_pages_with_long_name(mocker: MockerFixture) -> No
     """
     Ensure that the pdf is correctly generated with the toc being multiple pages.
 
-    Make sure the calculation fails and _generate_pdf gets called a second time to retrieves
-    the right number of pages for the TOC.
+    Make sure the number of pages of the TOC is calculated in advance from the height of its rows
+    so that _generate_pdf only gets called once.
     """
     mock_generate = mocker.spy(questionnaire, '_generate_pdf')
     # 14 with short name fit on one ToC page
@@ -371,10 +378,58 @@ def test_generate_pdf_multiple_pages_with_long_name(mocker: MockerFixture) -> No
     assert isinstance(pdf_bytes, bytearray), 'Output'
     assert pdf_bytes, 'PDF should not be empty'
 
-    mock_generate.assert_has_calls([
-        mocker.call(institution_data, patient_data, data),
-        mocker.call(institution_data, patient_data, data, 2),
-    ])
+    mock_generate.assert_called_once_with(
+        institution_data,
+        patient_data,
+        data,
+        chart_images={},
+        chart_format=charts.ChartFormat.RASTER,
+    )
+
+
+@pytest.mark.parametrize(
+    ('short_count', 'long_count', 'toc_pages'),
+    [
+        (0, 0, 1),
+        (14, 0, 1),
+        (15, 0, 2),
+        (13, 1, 2),
+        (0, 31, 4),
+        (20, 40, 7),
+        pytest.param(75, 75, 14, marks=pytest.mark.slow),
+    ],
+)
+def test_generate_pdf_single_pass(mocker: MockerFixture, short_count: int, long_count: int, toc_pages: int) -> None:
+    """Ensure reports with synthetic questionnaire lists of different sizes are generated in a single pass."""
+    mock_generate = mocker.spy(questionnaire, '_generate_pdf')
+    mock_toc_layout = mocker.spy(questionnaire._ToCLayoutPDF, '_generate')
+    data = [QUESTIONNAIRE_REPORT_DATA_SHORT_NICKNAME for _ in range(short_count)]
+    data += [QUESTIONNAIRE_REPORT_DATA_LONG_NICKNAME for _ in range(long_count)]
+
+    pdf_bytes = questionnaire.generate_pdf(
+        INSTITUTION_REPORT_DATA_WITH_NO_PAGE_BREAK,
+        PATIENT_REPORT_DATA_WITH_NO_PAGE_BREAK,
+        data,
+    )
+    content = pdf_bytes.decode('latin1')
+
+    mock_generate.assert_called_once()
+    mock_toc_layout.assert_called_once()
+    # one page per questionnaire with one text question each
+    assert content.count('/Type /Page\n') == toc_pages + max(len(data), 1)
+
+
+def test_toc_layout_pages() -> None:
+    """Ensure the number of pages of the TOC is calculated from the height of its rows."""
+    institution_data = INSTITUTION_REPORT_DATA_WITH_NO_PAGE_BREAK
+    patient_data = PATIENT_REPORT_DATA_WITH_NO_PAGE_BREAK
+    short_names = [QUESTIONNAIRE_REPORT_DATA_SHORT_NICKNAME for _ in range(14)]
+    long_names = [QUESTIONNAIRE_REPORT_DATA_LONG_NICKNAME for _ in range(14)]
+
+    assert questionnaire._ToCLayoutPDF(institution_data, patient_data, []).toc_pages == 1
+    assert questionnaire._ToCLayoutPDF(institution_data, patient_data, short_names).toc_pages == 1
+    # long names wrap and need more space than short names
+    assert questionnaire._ToCLayoutPDF(institution_data, patient_data, long_names).toc_pages == 2
 
 
 def test_generate_pdf_empty_list() -> None:
@@ -464,3 +519,47 @@ def test_draw_text_answer_and_charts_question_page_break(mocker: MockerFixture)
     assert prepare_chart.call_count == 3
     assert draw_text_answer.call_count == 3
     assert add_page.call_count == 4
+
+
+def test_generate_pdf_charts_rendered_once(mocker: MockerFixture) -> None:
+    """Ensure the charts of a report are rendered in one batch."""
+    mock_render = mocker.patch.object(
+        charts.CHART_RENDERER,
+        'render',
+        side_effect=lambda figures: [LOGO_PATH.read_bytes() for _ in figures],
+    )
+    mock_generate = mocker.spy(questionnaire, '_generate_pdf')
+    data = [QUESTIONNAIRE_REPORT_DATA_WITH_CHARTS, QUESTIONNAIRE_REPORT_DATA_WITH_MULTIPLE_CHARTS]
+
+    pdf_bytes = questionnaire.generate_pdf(
+        INSTITUTION_REPORT_DATA_WITH_NO_PAGE_BREAK,
+        PATIENT_REPORT_DATA_WITH_NO_PAGE_BREAK,
+        data,
+    )
+
+    assert pdf_bytes
+    mock_generate.assert_called_once()
+    # the charts with the same answers and layout are rendered once
+    mock_render.assert_called_once()
+    assert len(mock_render.call_args.args[0]) == 3
+
+
+def test_generate_pdf_vector_charts(mocker: MockerFixture) -> None:
+    """Ensure the charts are drawn as vector graphics without rendering any images."""
+    mock_render = mocker.patch.object(charts.CHART_RENDERER, 'render')
+    mock_image = mocker.spy(questionnaire.QuestionnairePDF, 'image')
+    mock_draw_chart = mocker.spy(charts, 'draw_numeric_question_chart')
+
+    pdf_bytes = questionnaire.generate_pdf(
+        INSTITUTION_REPORT_DATA_WITH_NO_PAGE_BREAK,
+        PATIENT_REPORT_DATA_WITH_NO_PAGE_BREAK,
+        [QUESTIONNAIRE_REPORT_DATA_WITH_MULTIPLE_CHARTS],
+        chart_format=charts.ChartFormat.VECTOR,
+    )
+
+    assert pdf_bytes, 'PDF should not be empty'
+    mock_render.assert_not_called()
+    assert mock_draw_chart.call_count == 3
+    # only the institution logo of the header is an image
+    logo_path = str(INSTITUTION_REPORT_DATA_WITH_NO_PAGE_BREAK.institution_logo_path)
+    assert all(call.args[1] == logo_path for call in mock_image.call_args_list)
@@ -6,7 +6,16 @@
 
 from django.contrib import admin
 
-from .models import DailyPatientDataReceived, DailyUserAppActivity, DailyUserPatientActivity
+from .models import (
+    DailyPatientDataReceived,
+    DailyUsageStatisticsWatermark,
+    DailyUserAppActivity,
+    DailyUserPatientActivity,
+    PatientDataReceivedRollup,
+    UsageStatisticsRollup,
+    UserAppActivityRollup,
+    UserPatientActivityRollup,
+)
 
 
 @admin.register(DailyUserAppActivity)
@@ -65,3 +74,72 @@ class DailyPatientDataReceivedAdmin(admin.ModelAdmin[DailyPatientDataReceived]):
         'labs_received',
         'action_date',
     ]
+
+
+@admin.register(DailyUsageStatisticsWatermark)
+class DailyUsageStatisticsWatermarkAdmin(admin.ModelAdmin[DailyUsageStatisticsWatermark]):
+    """The admin class for `DailyUsageStatisticsWatermark` models."""
+
+    list_display = [
+        '__str__',
+        'action_date',
+        'populated_at',
+    ]
+
+
+@admin.register(UsageStatisticsRollup)
+class UsageStatisticsRollupAdmin(admin.ModelAdmin[UsageStatisticsRollup]):
+    """The admin class for `UsageStatisticsRollup` models."""
+
+    list_display = [
+        '__str__',
+        'period',
+        'period_start',
+        'updated_at',
+    ]
+    list_filter = ['period']
+
+
+@admin.register(UserAppActivityRollup)
+class UserAppActivityRollupAdmin(admin.ModelAdmin[UserAppActivityRollup]):
+    """The admin class for `UserAppActivityRollup` models."""
+
+    list_display = [
+        '__str__',
+        'count_logins',
+        'count_feedback',
+        'count_update_security_answers',
+        'count_update_passwords',
+        'count_update_language',
+        'count_device_ios',
+        'count_device_android',
+        'count_device_browser',
+    ]
+
+
+@admin.register(UserPatientActivityRollup)
+class UserPatientActivityRollupAdmin(admin.ModelAdmin[UserPatientActivityRollup]):
+    """The admin class for `UserPatientActivityRollup` models."""
+
+    list_display = [
+        '__str__',
+        'count_checkins',
+        'count_documents',
+        'count_educational_materials',
+        'count_questionnaires_complete',
+        'count_labs',
+    ]
+
+
+@admin.register(PatientDataReceivedRollup)
+class PatientDataReceivedRollupAdmin(admin.ModelAdmin[PatientDataReceivedRollup]):
+    """The admin class for `PatientDataReceivedRollup` models."""
+
+    list_display = [
+        '__str__',
+        'appointments_received',
+        'documents_received',
+        'educational_materials_received',
+        'questionnaires_received',
+        'labs_received',
+    ]
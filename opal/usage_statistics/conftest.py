@@ -6,6 +6,7 @@
 
 import datetime as dt
 
+from django.core.cache import cache
 from django.utils import timezone
 
 import pytest
@@ -15,6 +16,12 @@ from opal.usage_statistics.forms import GroupUsageStatisticsForm, IndividualUsag
 from .common import GroupByComponent, GroupReportType
 
 
+@pytest.fixture(autouse=True)
+def clear_report_cache() -> None:
+    """Fixture clearing the cache to avoid reports and counters leaking between tests."""
+    cache.clear()
+
+
 @pytest.fixture
 def group_usage_stats_form() -> GroupUsageStatisticsForm:
     """
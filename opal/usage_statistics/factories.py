@@ -73,3 +73,72 @@ class DailyPatientDataReceived(DjangoModelFactory[models.DailyPatientDataReceive
 
     class Meta:
         model = models.DailyPatientDataReceived
+
+
+class DailyUsageStatisticsWatermark(DjangoModelFactory[models.DailyUsageStatisticsWatermark]):
+    """Model factory to create [opal.usage_statistics.models.DailyUsageStatisticsWatermark][] models."""
+
+    action_date = lazy_attribute(lambda _x: timezone.now().date() - dt.timedelta(days=1))
+
+    class Meta:
+        model = models.DailyUsageStatisticsWatermark
+        django_get_or_create = ('action_date',)
+
+
+class UsageStatisticsRollup(DjangoModelFactory[models.UsageStatisticsRollup]):
+    """Model factory to create [opal.usage_statistics.models.UsageStatisticsRollup][] models."""
+
+    period = models.RollupPeriod.MONTH
+    period_start = lazy_attribute(lambda _x: timezone.now().date().replace(day=1))
+
+    class Meta:
+        model = models.UsageStatisticsRollup
+        django_get_or_create = ('period', 'period_start')
+
+
+class UserAppActivityRollup(DjangoModelFactory[models.UserAppActivityRollup]):
+    """Model factory to create [opal.usage_statistics.models.UserAppActivityRollup][] models."""
+
+    rollup = factory.SubFactory(UsageStatisticsRollup)
+    action_by_user = factory.SubFactory(Caregiver)
+    count_logins = factory.Faker('pyint', min_value=0, max_value=100)
+    count_feedback = factory.Faker('pyint', min_value=0, max_value=10)
+    count_update_security_answers = factory.Faker('pyint', min_value=0, max_value=10)
+    count_update_passwords = factory.Faker('pyint', min_value=0, max_value=10)
+    count_update_language = factory.Faker('pyint', min_value=0, max_value=10)
+    count_device_ios = factory.Faker('pyint', min_value=0, max_value=10)
+    count_device_android = factory.Faker('pyint', min_value=0, max_value=10)
+    count_device_browser = factory.Faker('pyint', min_value=0, max_value=10)
+
+    class Meta:
+        model = models.UserAppActivityRollup
+
+
+class UserPatientActivityRollup(DjangoModelFactory[models.UserPatientActivityRollup]):
+    """Model factory to create [opal.usage_statistics.models.UserPatientActivityRollup][] models."""
+
+    rollup = factory.SubFactory(UsageStatisticsRollup)
+    patient = factory.SubFactory(Patient)
+    count_checkins = factory.Faker('pyint', min_value=0, max_value=10)
+    count_documents = factory.Faker('pyint', min_value=0, max_value=50)
+    count_educational_materials = factory.Faker('pyint', min_value=0, max_value=50)
+    count_questionnaires_complete = factory.Faker('pyint', min_value=0, max_value=50)
+    count_labs = factory.Faker('pyint', min_value=0, max_value=100)
+
+    class Meta:
+        model = models.UserPatientActivityRollup
+
+
+class PatientDataReceivedRollup(DjangoModelFactory[models.PatientDataReceivedRollup]):
+    """Model factory to create [opal.usage_statistics.models.PatientDataReceivedRollup][] models."""
+
+    rollup = factory.SubFactory(UsageStatisticsRollup)
+    patient = factory.SubFactory(Patient)
+    appointments_received = factory.Faker('pyint', min_value=0, max_value=50)
+    documents_received = factory.Faker('pyint', min_value=0, max_value=100)
+    educational_materials_received = factory.Faker('pyint', min_value=0, max_value=100)
+    questionnaires_received = factory.Faker('pyint', min_value=0, max_value=100)
+    labs_received = factory.Faker('pyint', min_value=0, max_value=500)
+
+    class Meta:
+        model = models.PatientDataReceivedRollup
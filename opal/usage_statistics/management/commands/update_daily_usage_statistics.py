@@ -5,30 +5,56 @@
 """Command for populating the application activity statistics to the statistics models on daily basis."""
 
 import datetime as dt
-from typing import Any
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandParser
-from django.db import models, transaction
+from django.db import connections, models, transaction
 from django.utils import timezone
 
+import structlog
+
 from opal.legacy import models as legacy_models
 from opal.patients.models import Patient, Relationship, RelationshipStatus
 from opal.usage_statistics import utils as stats_utils
-from opal.usage_statistics.models import DailyPatientDataReceived, DailyUserAppActivity, DailyUserPatientActivity
+from opal.usage_statistics.models import (
+    DailyPatientDataReceived,
+    DailyUsageStatisticsWatermark,
+    DailyUserAppActivity,
+    DailyUserPatientActivity,
+    UsageStatisticsRollup,
+)
 from opal.users.models import User
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+LOGGER = structlog.get_logger()
+
+#: Function extracting the statistics records of one model for a given time period
+type Extraction = Callable[[dt.datetime, dt.datetime], Sequence[models.Model]]
+
+#: Supported strategies for aggregating the patients' received data statistics
+RECEIVED_DATA_STRATEGIES = ('grouped', 'subquery')
+
 
 class Command(BaseCommand):
     """
     Command to update the daily app activity statistics per user and patient.
 
     The command populates `DailyUserAppActivity`, `DailyUserPatientActivity` and `DailyPatientDataReceived` models.
+
+    Every complete day that has been populated is recorded in the `DailyUsageStatisticsWatermark` model.
+    The watermarks allow backfilling a range of missed days in one run (see `--from` and `--to`).
     """
 
     help = (
         'Populate the daily app activity statistics per user and patient from PatientActivityLog'
         + '\nBy default the command calculates the statistics for the complete previous day'
+        + '\nUse --from (and optionally --to) to backfill all days of a date range that are not populated yet'
     )
 
     def add_arguments(self, parser: CommandParser) -> None:
@@ -50,8 +76,39 @@ class Command(BaseCommand):
             default=False,
             help='Calculate the usage statistics for the current day between midnight and now (default: false)',
         )
+        parser.add_argument(
+            '--from',
+            dest='from_date',
+            type=dt.date.fromisoformat,
+            default=None,
+            help='Backfill the usage statistics starting from this date (inclusive, format: YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--to',
+            dest='to_date',
+            type=dt.date.fromisoformat,
+            default=None,
+            help='Backfill the usage statistics up to this date (inclusive, format: YYYY-MM-DD, default: yesterday)',
+        )
+        parser.add_argument(
+            '--received-data-strategy',
+            choices=RECEIVED_DATA_STRATEGIES,
+            default='grouped',
+            help=(
+                'How the patients received data statistics are aggregated: one grouped query per data category'
+                + ' or correlated subqueries per patient (default: grouped)'
+            ),
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help=(
+                'Number of threads extracting the user activities, user-patient activities and received data'
+                + ' concurrently, each with its own DB connections (default: 1, i.e., sequentially)'
+            ),
+        )
 
-    @transaction.atomic
     def handle(self, *args: Any, **options: Any) -> None:
         """
         Populate the daily application activities to the statistics models.
@@ -61,10 +118,30 @@ class Command(BaseCommand):
 
         By default, the command calculates the usage statistics for the previous complete day (e.g., 00:00:00-23:59:59).
 
+        In backfill mode (`--from`/`--to`), every day of the range that has not been populated yet
+        is calculated and committed separately.
+        Days that are already populated are skipped, which allows to resume an interrupted backfill.
+
         Args:
             args: input arguments
             options:  additional keyword arguments
         """
+        self.received_data_strategy = options['received_data_strategy']
+        self.workers = options['workers']
+
+        if options['from_date'] is not None or options['to_date'] is not None:
+            self._handle_backfill(options)
+        else:
+            self._handle_single_day(options)
+
+    @transaction.atomic
+    def _handle_single_day(self, options: dict[str, Any]) -> None:
+        """
+        Populate the usage statistics of the previous day (or the current day with `--today`).
+
+        Args:
+            options: the command's options
+        """
         # Convenient CL argument for testing; it does not work in production environment
         if options['force_delete'] and self._delete_stored_statistics() is not True:
             return
@@ -77,52 +154,234 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('Calculating usage statistics for today'))
             days_delta = 0
 
+        action_date = (timezone.now() - dt.timedelta(days=days_delta)).date()
+
+        self._populate_daily_statistics(action_date)
+
+        # the current day is not complete yet, only complete days are marked as populated
+        # (updating the watermark also invalidates the cached reports that include the day)
+        if not options['today']:
+            DailyUsageStatisticsWatermark.objects.update_or_create(action_date=action_date)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Successfully populated daily statistics data',
+            )
+        )
+
+    def _handle_backfill(self, options: dict[str, Any]) -> None:
+        """
+        Populate the usage statistics for every day of the requested date range that is not populated yet.
+
+        Each day is populated in its own transaction together with its watermark.
+        If the backfill is interrupted, the days that were committed are skipped when it is run again.
+
+        Args:
+            options: the command's options
+        """
+        yesterday = timezone.now().date() - dt.timedelta(days=1)
+        from_date: dt.date | None = options['from_date']
+        to_date: dt.date = options['to_date'] or yesterday
+
+        if from_date is None:
+            self.stderr.write(self.style.ERROR('The --from option is required for backfilling usage statistics'))
+            return
+
+        if options['today']:
+            self.stderr.write(self.style.ERROR('The --today option cannot be combined with --from/--to'))
+            return
+
+        if from_date > to_date or to_date > yesterday:
+            self.stderr.write(
+                self.style.ERROR(
+                    f'Invalid backfill range {from_date} - {to_date}; only complete days up to {yesterday} are allowed',
+                ),
+            )
+            return
+
+        # Convenient CL argument for testing; it does not work in production environment
+        if options['force_delete'] and self._delete_stored_statistics() is not True:
+            return
+
+        watermarks = DailyUsageStatisticsWatermark.objects.filter(action_date__range=(from_date, to_date))
+        populated_dates = set(watermarks.values_list('action_date', flat=True))
+        populated_count = 0
+        skipped_count = 0
+        action_date = from_date
+
+        while action_date <= to_date:
+            if action_date in populated_dates:
+                skipped_count += 1
+            elif self._has_stored_statistics(action_date):
+                # the day was populated before watermarks were recorded
+                DailyUsageStatisticsWatermark.objects.get_or_create(action_date=action_date)
+                skipped_count += 1
+            else:
+                with transaction.atomic():
+                    self._populate_daily_statistics(action_date)
+                    DailyUsageStatisticsWatermark.objects.create(action_date=action_date)
+
+                populated_count += 1
+                self.stdout.write(f'Populated daily statistics data for {action_date.isoformat()}')
+
+            action_date += dt.timedelta(days=1)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully backfilled daily statistics data: {populated_count} day(s) populated,'
+                + f' {skipped_count} day(s) already populated',
+            )
+        )
+
+    def _populate_daily_statistics(self, action_date: dt.date) -> None:
+        """
+        Populate all the usage statistics models for the given day.
+
+        Args:
+            action_date: the day for which the statistics are calculated
+        """
         # NOTE: timezone.now() returns a datetime in UTC timezone.
         # It must be converted to the local timezone since the dates stored in the legacy DB are not UTC.
-        # Set the default query time period for the previous complete day (e.g., between 00:00:00 and 23:59:59)
+        # Set the query time period for the complete day (e.g., between 00:00:00 and 23:59:59)
         start_datetime_period = dt.datetime.combine(
-            timezone.now() - dt.timedelta(days=days_delta),
+            action_date,
             dt.datetime.min.time(),
             tzinfo=timezone.get_current_timezone(),
         )
         end_datetime_period = dt.datetime.combine(
-            start_datetime_period,
+            action_date,
             dt.datetime.max.time(),
             tzinfo=timezone.get_current_timezone(),
         )
 
-        self._populate_user_app_activities(
-            start_datetime_period=start_datetime_period,
-            end_datetime_period=end_datetime_period,
-        )
+        extractions: dict[type[models.Model], Extraction] = {
+            DailyUserAppActivity: self._extract_user_app_activities,
+            DailyUserPatientActivity: self._extract_user_patient_app_activities,
+            DailyPatientDataReceived: self._extract_patient_received_data,
+        }
+
+        if self.workers > 1:
+            # Each extraction runs in its own thread and therefore uses its own DB connections
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {
+                    model: executor.submit(
+                        self._run_extraction_in_thread,
+                        model.__name__,
+                        extract,
+                        start_datetime_period,
+                        end_datetime_period,
+                    )
+                    for model, extract in extractions.items()
+                }
+                results = {model: future.result() for model, future in futures.items()}
+        else:
+            results = {
+                model: self._run_extraction(model.__name__, extract, start_datetime_period, end_datetime_period)
+                for model, extract in extractions.items()
+            }
+
+        # Store all statistics records at the end so that either all or none of them are stored for the day
+        with transaction.atomic():
+            for model, records in results.items():
+                stage_start = time.perf_counter()
+                model._default_manager.bulk_create(records)
+                LOGGER.info(
+                    'Stored %s %s records in %.3f seconds',
+                    len(records),
+                    model.__name__,
+                    time.perf_counter() - stage_start,
+                )
 
-        self._populate_user_patient_app_activities(
-            start_datetime_period=start_datetime_period,
-            end_datetime_period=end_datetime_period,
-        )
+            stage_start = time.perf_counter()
+            stats_utils.update_statistics_rollups(action_date)
+            LOGGER.info('Refreshed usage statistics rollups in %.3f seconds', time.perf_counter() - stage_start)
 
-        self._populate_patient_received_data(
-            start_datetime_period=start_datetime_period,
-            end_datetime_period=end_datetime_period,
+    def _run_extraction(
+        self,
+        stage: str,
+        extract: Extraction,
+        start_datetime_period: dt.datetime,
+        end_datetime_period: dt.datetime,
+    ) -> Sequence[models.Model]:
+        """
+        Run one extraction stage and log its wall-clock time.
+
+        Args:
+            stage: the name of the extraction stage
+            extract: the function extracting the statistics records
+            start_datetime_period: the beginning of the time period of the statistics being extracted
+            end_datetime_period: the end of the time period of the statistics being extracted
+
+        Returns:
+            the extracted statistics records
+        """
+        stage_start = time.perf_counter()
+        records = extract(start_datetime_period, end_datetime_period)
+        LOGGER.info(
+            'Extracted %s %s records in %.3f seconds',
+            len(records),
+            stage,
+            time.perf_counter() - stage_start,
         )
 
-        self.stdout.write(
-            self.style.SUCCESS(
-                'Successfully populated daily statistics data',
-            )
+        return records
+
+    def _run_extraction_in_thread(
+        self,
+        stage: str,
+        extract: Extraction,
+        start_datetime_period: dt.datetime,
+        end_datetime_period: dt.datetime,
+    ) -> Sequence[models.Model]:
+        """
+        Run one extraction stage in a worker thread.
+
+        Django opens separate DB connections per thread, they are closed once the extraction is done.
+
+        Args:
+            stage: the name of the extraction stage
+            extract: the function extracting the statistics records
+            start_datetime_period: the beginning of the time period of the statistics being extracted
+            end_datetime_period: the end of the time period of the statistics being extracted
+
+        Returns:
+            the extracted statistics records
+        """
+        try:
+            return self._run_extraction(stage, extract, start_datetime_period, end_datetime_period)
+        finally:
+            connections.close_all()
+
+    def _has_stored_statistics(self, action_date: dt.date) -> bool:
+        """
+        Check whether any usage statistics records are already stored for the given day.
+
+        Args:
+            action_date: the day to check
+
+        Returns:
+            True, if at least one of the statistics models contains records for the day, False otherwise
+        """
+        return (
+            DailyUserAppActivity.objects.filter(action_date=action_date).exists()
+            or DailyUserPatientActivity.objects.filter(action_date=action_date).exists()
+            or DailyPatientDataReceived.objects.filter(action_date=action_date).exists()
         )
 
-    def _populate_user_app_activities(
+    def _extract_user_app_activities(
         self,
         start_datetime_period: dt.datetime,
         end_datetime_period: dt.datetime,
-    ) -> None:
+    ) -> list[DailyUserAppActivity]:
         """
-        Create daily users' application activity statistics records in `DailyUserAppActivity` model.
+        Extract daily users' application activity statistics records for the `DailyUserAppActivity` model.
 
         Args:
             start_datetime_period: the beginning of the time period of users' app activities being extracted
             end_datetime_period: the end of the time period of users' app activities being extracted
+
+        Returns:
+            the unsaved `DailyUserAppActivity` records
         """
         users = User.objects.values('id', 'username')
         users_dict = {user['username']: user['id'] for user in users}
@@ -132,25 +391,28 @@ class Command(BaseCommand):
             end_datetime_period=end_datetime_period,
         )
 
-        DailyUserAppActivity.objects.bulk_create(
+        return [
             DailyUserAppActivity(
                 action_by_user_id=users_dict[activity.pop('username')],
                 **activity,
             )
             for activity in activities
-        )
+        ]
 
-    def _populate_user_patient_app_activities(
+    def _extract_user_patient_app_activities(
         self,
         start_datetime_period: dt.datetime,
         end_datetime_period: dt.datetime,
-    ) -> None:
+    ) -> list[DailyUserPatientActivity]:
         """
-        Create daily user-patient application activity statistics records in `DailyUserPatientActivity` model.
+        Extract daily user-patient application activity statistics records for the `DailyUserPatientActivity` model.
 
         Args:
             start_datetime_period: the beginning of the time period of patients' app activities being extracted
             end_datetime_period: the end of the time period of patients' app activities being extracted
+
+        Returns:
+            the unsaved `DailyUserPatientActivity` records
         """
         activities = legacy_models.LegacyPatientActivityLog.objects.get_aggregated_patient_app_activities(
             start_datetime_period=start_datetime_period,
@@ -193,46 +455,56 @@ class Command(BaseCommand):
 
         relationships_dict = stats_utils.RelationshipMapping(relationships)
 
-        patient_activities_list = stats_utils.annotate_patient_activities(
+        return stats_utils.annotate_patient_activities(
             activities,
             relationships_dict,
         )
 
-        DailyUserPatientActivity.objects.bulk_create(patient_activities_list)
-
-    def _populate_patient_received_data(
+    def _extract_patient_received_data(
         self,
         start_datetime_period: dt.datetime,
         end_datetime_period: dt.datetime,
-    ) -> None:
+    ) -> list[DailyPatientDataReceived]:
         """
-        Create daily patients' received data statistics records in `DailyPatientDataReceived` model.
+        Extract daily patients' received data statistics records for the `DailyPatientDataReceived` model.
 
         Args:
             start_datetime_period: the beginning of the time period of received data statistics being extracted
             end_datetime_period: the end of the time period of received data statistics being extracted
+
+        Returns:
+            the unsaved `DailyPatientDataReceived` records
         """
-        received_data = stats_utils.get_aggregated_patient_received_data(
-            start_datetime_period=start_datetime_period,
-            end_datetime_period=end_datetime_period,
-        )
+        received_data: Iterable[dict[str, Any]]
+
+        if self.received_data_strategy == 'subquery':
+            received_data = stats_utils.get_aggregated_patient_received_data(
+                start_datetime_period=start_datetime_period,
+                end_datetime_period=end_datetime_period,
+            )
+        else:
+            received_data = stats_utils.get_grouped_patient_received_data(
+                start_datetime_period=start_datetime_period,
+                end_datetime_period=end_datetime_period,
+            )
         patients = Patient.objects.values('id', 'legacy_id')
         patients_dict = {patient['legacy_id']: patient['id'] for patient in patients}
 
-        DailyPatientDataReceived.objects.bulk_create(
+        return [
             DailyPatientDataReceived(
                 patient_id=patients_dict[data.pop('patient')],
                 **data,
             )
             for data in received_data
-        )
+        ]
 
     def _delete_stored_statistics(self) -> bool:
         """
         Delete daily application activity statistics data.
 
-        The records are deleted from the `DailyUserAppActivity`, `DailyUserPatientActivity`
-        an `DailyPatientDataReceived` models.
+        The records are deleted from the `DailyUserAppActivity`, `DailyUserPatientActivity`,
+        `DailyPatientDataReceived`, `DailyUsageStatisticsWatermark` and `UsageStatisticsRollup` models
+        (including the rollup records).
 
         Returns:
             True, if the records were deleted, False otherwise
@@ -257,5 +529,7 @@ class Command(BaseCommand):
         DailyUserAppActivity.objects.all().delete()
         DailyUserPatientActivity.objects.all().delete()
         DailyPatientDataReceived.objects.all().delete()
+        DailyUsageStatisticsWatermark.objects.all().delete()
+        UsageStatisticsRollup.objects.all().delete()
 
         return True
@@ -0,0 +1,29 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Add the `DailyUsageStatisticsWatermark` model to keep track of the populated days."""
+
+    dependencies = [
+        ('usage_statistics', '0004_alter_dailypatientdatareceived_last_appointment_received_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUsageStatisticsWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action_date', models.DateField(unique=True, verbose_name='Action Date')),
+                ('populated_at', models.DateTimeField(auto_now=True, verbose_name='Populated At')),
+            ],
+            options={
+                'verbose_name': 'Daily Usage Statistics Watermark',
+                'verbose_name_plural': 'Daily Usage Statistics Watermarks',
+                'ordering': ['action_date'],
+            },
+        ),
+    ]
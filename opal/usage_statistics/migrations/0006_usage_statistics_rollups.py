@@ -0,0 +1,345 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+from typing import TYPE_CHECKING
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncMonth, TruncYear
+
+if TYPE_CHECKING:
+    from django.apps.registry import Apps
+    from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+
+#: The daily statistics models with their rollup model, the field the rollup is keyed by and the rolled up counts
+ROLLUP_SOURCES = (
+    (
+        'DailyUserAppActivity',
+        'UserAppActivityRollup',
+        'action_by_user_id',
+        (
+            'count_logins',
+            'count_feedback',
+            'count_update_security_answers',
+            'count_update_passwords',
+            'count_update_language',
+            'count_device_ios',
+            'count_device_android',
+            'count_device_browser',
+        ),
+    ),
+    (
+        'DailyUserPatientActivity',
+        'UserPatientActivityRollup',
+        'patient_id',
+        (
+            'count_checkins',
+            'count_documents',
+            'count_educational_materials',
+            'count_questionnaires_complete',
+            'count_labs',
+        ),
+    ),
+    (
+        'DailyPatientDataReceived',
+        'PatientDataReceivedRollup',
+        'patient_id',
+        (
+            'appointments_received',
+            'documents_received',
+            'educational_materials_received',
+            'questionnaires_received',
+            'labs_received',
+        ),
+    ),
+)
+
+
+def build_rollups(apps: Apps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    """Roll up the existing daily usage statistics records per month and per year."""
+    UsageStatisticsRollup = apps.get_model('usage_statistics', 'UsageStatisticsRollup')
+
+    for period, trunc in (('MONTH', TruncMonth), ('YEAR', TruncYear)):
+        rollups = {}
+
+        for daily_model_name, rollup_model_name, key_field, count_fields in ROLLUP_SOURCES:
+            DailyModel = apps.get_model('usage_statistics', daily_model_name)
+            RollupModel = apps.get_model('usage_statistics', rollup_model_name)
+            rows = (
+                DailyModel.objects
+                .annotate(period_start=trunc('action_date'))
+                .values('period_start', key_field)
+                .annotate(**{f'total_{field}': models.Sum(field) for field in count_fields})
+                .order_by()
+            )
+            records = []
+
+            for row in rows:
+                period_start = row['period_start']
+
+                if period_start not in rollups:
+                    rollups[period_start], _ = UsageStatisticsRollup.objects.get_or_create(
+                        period=period,
+                        period_start=period_start,
+                    )
+
+                records.append(
+                    RollupModel(
+                        rollup=rollups[period_start],
+                        **{key_field: row[key_field]},
+                        **{field: row[f'total_{field}'] for field in count_fields},
+                    ),
+                )
+
+            RollupModel.objects.bulk_create(records, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    """Add monthly and yearly rollups of the daily usage statistics and build them from the existing records."""
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('patients', '0025_add_lab_result_delay_fields'),
+        ('usage_statistics', '0005_dailyusagestatisticswatermark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsageStatisticsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'period',
+                    models.CharField(
+                        choices=[('MONTH', 'Month'), ('YEAR', 'Year')], max_length=5, verbose_name='Period'
+                    ),
+                ),
+                ('period_start', models.DateField(verbose_name='Period Start')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'Usage Statistics Rollup',
+                'verbose_name_plural': 'Usage Statistics Rollups',
+                'ordering': ['period', 'period_start'],
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('period', 'period_start'), name='usage_statistics_usagestatisticsrollup_unique_period'
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserAppActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'count_logins',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Count Logins'
+                    ),
+                ),
+                (
+                    'count_feedback',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Count Feedbacks'
+                    ),
+                ),
+                (
+                    'count_update_security_answers',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)],
+                        verbose_name='Count Security Answer Updates',
+                    ),
+                ),
+                (
+                    'count_update_passwords',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Count Password Updates'
+                    ),
+                ),
+                (
+                    'count_update_language',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Count Language Updates'
+                    ),
+                ),
+                (
+                    'count_device_ios',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='IOS Devices'
+                    ),
+                ),
+                (
+                    'count_device_android',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Android Devices'
+                    ),
+                ),
+                (
+                    'count_device_browser',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Browser Devices'
+                    ),
+                ),
+                (
+                    'rollup',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='user_app_activities',
+                        to='usage_statistics.usagestatisticsrollup',
+                        verbose_name='Rollup',
+                    ),
+                ),
+                (
+                    'action_by_user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='user_app_activity_rollups',
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='User who triggered this action',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'User App Activity Rollup',
+                'verbose_name_plural': 'User App Activity Rollups',
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('rollup', 'action_by_user'), name='usage_statistics_userappactivityrollup_unique_user'
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserPatientActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'count_checkins',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Count Checkins'
+                    ),
+                ),
+                (
+                    'count_documents',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Count Documents'
+                    ),
+                ),
+                (
+                    'count_educational_materials',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)],
+                        verbose_name='Count Educational Materials',
+                    ),
+                ),
+                (
+                    'count_questionnaires_complete',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Count Questionnaires'
+                    ),
+                ),
+                (
+                    'count_labs',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Count Labs'
+                    ),
+                ),
+                (
+                    'rollup',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='user_patient_activities',
+                        to='usage_statistics.usagestatisticsrollup',
+                        verbose_name='Rollup',
+                    ),
+                ),
+                (
+                    'patient',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='user_patient_activity_rollups',
+                        to='patients.patient',
+                        verbose_name='Patient',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'User Patient Activity Rollup',
+                'verbose_name_plural': 'User Patient Activity Rollups',
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('rollup', 'patient'), name='usage_statistics_userpatientactivityrollup_unique_patient'
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='PatientDataReceivedRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'appointments_received',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Appointments Received'
+                    ),
+                ),
+                (
+                    'documents_received',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Documents Received'
+                    ),
+                ),
+                (
+                    'educational_materials_received',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)],
+                        verbose_name='Educational Materials Received',
+                    ),
+                ),
+                (
+                    'questionnaires_received',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Questionnaires Received'
+                    ),
+                ),
+                (
+                    'labs_received',
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)], verbose_name='Labs Received'
+                    ),
+                ),
+                (
+                    'rollup',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='patient_data_received',
+                        to='usage_statistics.usagestatisticsrollup',
+                        verbose_name='Rollup',
+                    ),
+                ),
+                (
+                    'patient',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='data_received_rollups',
+                        to='patients.patient',
+                        verbose_name='Patient',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Patient Data Received Rollup',
+                'verbose_name_plural': 'Patient Data Received Rollups',
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('rollup', 'patient'), name='usage_statistics_patientdatareceivedrollup_unique_patient'
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_rollups, reverse_code=migrations.RunPython.noop),
+    ]
@@ -229,3 +229,280 @@ class DailyPatientDataReceived(models.Model):
             patient=str(self.patient),
             action_date=self.action_date.strftime('%Y-%m-%d'),
         )
+
+
+class DailyUsageStatisticsWatermark(models.Model):
+    """
+    Watermark of a day for which the daily usage statistics were fully populated.
+
+    One record per day (Maximum). A day is only marked once all its statistics records have been committed.
+    """
+
+    action_date = models.DateField(
+        verbose_name=_('Action Date'),
+        unique=True,
+    )
+    populated_at = models.DateTimeField(
+        verbose_name=_('Populated At'),
+        auto_now=True,
+    )
+
+    class Meta:
+        ordering = ['action_date']
+        verbose_name = _('Daily Usage Statistics Watermark')
+        verbose_name_plural = _('Daily Usage Statistics Watermarks')
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the watermark.
+
+        Returns:
+            String representing the watermark.
+        """
+        return 'Usage statistics populated for {action_date}'.format(
+            action_date=self.action_date.strftime('%Y-%m-%d'),
+        )
+
+
+class RollupPeriod(models.TextChoices):
+    """The periods for which the daily usage statistics are rolled up."""
+
+    MONTH = 'MONTH', _('Month')
+    YEAR = 'YEAR', _('Year')
+
+
+class UsageStatisticsRollup(models.Model):
+    """
+    A month or year for which the daily usage statistics have been rolled up.
+
+    The rollup records of the period are linked to this record.
+    They are only used for reports if this record exists, otherwise the reports fall back to the daily records.
+    """
+
+    period = models.CharField(
+        verbose_name=_('Period'),
+        max_length=5,
+        choices=RollupPeriod.choices,
+    )
+    period_start = models.DateField(
+        verbose_name=_('Period Start'),
+    )
+    updated_at = models.DateTimeField(
+        verbose_name=_('Updated At'),
+        auto_now=True,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='%(app_label)s_%(class)s_unique_period',
+                fields=['period', 'period_start'],
+            ),
+        ]
+        ordering = ['period', 'period_start']
+        verbose_name = _('Usage Statistics Rollup')
+        verbose_name_plural = _('Usage Statistics Rollups')
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the rollup period.
+
+        Returns:
+            String representing the rollup period.
+        """
+        return '{period} rollup starting on {period_start}'.format(
+            period=self.get_period_display(),
+            period_start=self.period_start.strftime('%Y-%m-%d'),
+        )
+
+
+class UserAppActivityRollup(models.Model):
+    """
+    Application (non-chart) activity per user for a month or a year.
+
+    Aggregated from the `DailyUserAppActivity` records. One record per user per rollup period (Maximum).
+    """
+
+    rollup = models.ForeignKey(
+        verbose_name=_('Rollup'),
+        to=UsageStatisticsRollup,
+        on_delete=models.CASCADE,
+        related_name='user_app_activities',
+    )
+    action_by_user = models.ForeignKey(
+        verbose_name=_('User who triggered this action'),
+        to=User,
+        on_delete=models.CASCADE,
+        related_name='user_app_activity_rollups',
+    )
+    count_logins = models.PositiveIntegerField(
+        verbose_name=_('Count Logins'),
+        validators=[MinValueValidator(0)],
+    )
+    count_feedback = models.PositiveIntegerField(
+        verbose_name=_('Count Feedbacks'),
+        validators=[MinValueValidator(0)],
+    )
+    count_update_security_answers = models.PositiveIntegerField(
+        verbose_name=_('Count Security Answer Updates'),
+        validators=[MinValueValidator(0)],
+    )
+    count_update_passwords = models.PositiveIntegerField(
+        verbose_name=_('Count Password Updates'),
+        validators=[MinValueValidator(0)],
+    )
+    count_update_language = models.PositiveIntegerField(
+        verbose_name=_('Count Language Updates'),
+        validators=[MinValueValidator(0)],
+    )
+    count_device_ios = models.PositiveIntegerField(
+        verbose_name=_('IOS Devices'),
+        validators=[MinValueValidator(0)],
+    )
+    count_device_android = models.PositiveIntegerField(
+        verbose_name=_('Android Devices'),
+        validators=[MinValueValidator(0)],
+    )
+    count_device_browser = models.PositiveIntegerField(
+        verbose_name=_('Browser Devices'),
+        validators=[MinValueValidator(0)],
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='%(app_label)s_%(class)s_unique_user',
+                fields=['rollup', 'action_by_user'],
+            ),
+        ]
+        verbose_name = _('User App Activity Rollup')
+        verbose_name_plural = _('User App Activity Rollups')
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the rolled up activity.
+
+        Returns:
+            String representing the rolled up activity.
+        """
+        return f'{self.rollup}: activity by {self.action_by_user.first_name}, {self.action_by_user.last_name}'
+
+
+class UserPatientActivityRollup(models.Model):
+    """
+    Application activity by users on behalf of a patient for a month or a year.
+
+    Aggregated from the `DailyUserPatientActivity` records. One record per patient per rollup period (Maximum).
+    """
+
+    rollup = models.ForeignKey(
+        verbose_name=_('Rollup'),
+        to=UsageStatisticsRollup,
+        on_delete=models.CASCADE,
+        related_name='user_patient_activities',
+    )
+    patient = models.ForeignKey(
+        verbose_name=_('Patient'),
+        to=Patient,
+        on_delete=models.CASCADE,
+        related_name='user_patient_activity_rollups',
+    )
+    count_checkins = models.PositiveIntegerField(
+        verbose_name=_('Count Checkins'),
+        validators=[MinValueValidator(0)],
+    )
+    count_documents = models.PositiveIntegerField(
+        verbose_name=_('Count Documents'),
+        validators=[MinValueValidator(0)],
+    )
+    count_educational_materials = models.PositiveIntegerField(
+        verbose_name=_('Count Educational Materials'),
+        validators=[MinValueValidator(0)],
+    )
+    count_questionnaires_complete = models.PositiveIntegerField(
+        verbose_name=_('Count Questionnaires'),
+        validators=[MinValueValidator(0)],
+    )
+    count_labs = models.PositiveIntegerField(
+        verbose_name=_('Count Labs'),
+        validators=[MinValueValidator(0)],
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='%(app_label)s_%(class)s_unique_patient',
+                fields=['rollup', 'patient'],
+            ),
+        ]
+        verbose_name = _('User Patient Activity Rollup')
+        verbose_name_plural = _('User Patient Activity Rollups')
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the rolled up activity.
+
+        Returns:
+            String representing the rolled up activity.
+        """
+        return f'{self.rollup}: activity on behalf of patient {self.patient}'
+
+
+class PatientDataReceivedRollup(models.Model):
+    """
+    Statistics of the data sent to a patient for a month or a year.
+
+    Aggregated from the `DailyPatientDataReceived` records. One record per patient per rollup period (Maximum).
+    """
+
+    rollup = models.ForeignKey(
+        verbose_name=_('Rollup'),
+        to=UsageStatisticsRollup,
+        on_delete=models.CASCADE,
+        related_name='patient_data_received',
+    )
+    patient = models.ForeignKey(
+        verbose_name=_('Patient'),
+        to=Patient,
+        on_delete=models.CASCADE,
+        related_name='data_received_rollups',
+    )
+    appointments_received = models.PositiveIntegerField(
+        verbose_name=_('Appointments Received'),
+        validators=[MinValueValidator(0)],
+    )
+    documents_received = models.PositiveIntegerField(
+        verbose_name=_('Documents Received'),
+        validators=[MinValueValidator(0)],
+    )
+    educational_materials_received = models.PositiveIntegerField(
+        verbose_name=_('Educational Materials Received'),
+        validators=[MinValueValidator(0)],
+    )
+    questionnaires_received = models.PositiveIntegerField(
+        verbose_name=_('Questionnaires Received'),
+        validators=[MinValueValidator(0)],
+    )
+    labs_received = models.PositiveIntegerField(
+        verbose_name=_('Labs Received'),
+        validators=[MinValueValidator(0)],
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='%(app_label)s_%(class)s_unique_patient',
+                fields=['rollup', 'patient'],
+            ),
+        ]
+        verbose_name = _('Patient Data Received Rollup')
+        verbose_name_plural = _('Patient Data Received Rollups')
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the rolled up data received for a patient.
+
+        Returns:
+            String representing the rolled up patient data received.
+        """
+        return f'{self.rollup}: data received by {self.patient}'
@@ -6,6 +6,7 @@
 
 import datetime as dt
 from collections import Counter
+from operator import itemgetter
 from typing import TYPE_CHECKING, Any, cast
 
 from django.conf import settings
@@ -18,7 +19,15 @@ from opal.patients import models as patients_models
 from opal.users import models as users_models
 
 from .common import GroupByComponent
-from .models import DailyPatientDataReceived, DailyUserAppActivity, DailyUserPatientActivity
+from .models import (
+    DailyPatientDataReceived,
+    DailyUserAppActivity,
+    DailyUserPatientActivity,
+    PatientDataReceivedRollup,
+    UsageStatisticsRollup,
+    UserAppActivityRollup,
+    UserPatientActivityRollup,
+)
 
 if TYPE_CHECKING:
     from opal.core.utils import RowData
@@ -282,25 +291,17 @@ def fetch_logins_summary(
     Returns:
         grouped logins summary for a given time period
     """
-    queryset = DailyUserAppActivity.objects.filter(
-        action_date__gte=start_date,
-        action_date__lte=end_date,
-    )
-
-    queryset = _annotate_queryset_with_grouping_field(queryset, 'action_date', group_by)
-    group_field = group_by.name.lower()
-
-    return list(
-        queryset
-        .values(
-            group_field,
-        )
-        .annotate(
-            total_logins=models.Sum('count_logins'),
-            unique_user_logins=models.Count('action_by_user', distinct=True),
-            avg_logins_per_user=models.F('total_logins') / models.F('unique_user_logins'),
-        )
-        .order_by(f'-{group_field}'),
+    return _fetch_grouped_statistics_summary(
+        daily_model=DailyUserAppActivity,
+        rollup_model=UserAppActivityRollup,
+        start_date=start_date,
+        end_date=end_date,
+        annotated_summary_fields={
+            'total_logins': models.Sum('count_logins'),
+            'unique_user_logins': models.Count('action_by_user', distinct=True),
+            'avg_logins_per_user': models.F('total_logins') / models.F('unique_user_logins'),
+        },
+        group_by=group_by,
     )
 
 
@@ -320,27 +321,19 @@ def fetch_users_clicks_summary(
     Returns:
         grouped users' clicks summary for a given time period
     """
-    queryset = DailyUserAppActivity.objects.filter(
-        action_date__gte=start_date,
-        action_date__lte=end_date,
-    )
-
-    queryset = _annotate_queryset_with_grouping_field(queryset, 'action_date', group_by)
-    group_field = group_by.name.lower()
-
     # TODO: QSCCD-2173 - add count of the announcement clicks
-    return list(
-        queryset
-        .values(
-            group_field,
-        )
-        .annotate(
-            login_count=models.Sum('count_logins'),
-            feedback_count=models.Sum('count_feedback'),
-            update_security_answers_count=models.Sum('count_update_security_answers'),
-            update_passwords_count=models.Sum('count_update_passwords'),
-        )
-        .order_by(f'-{group_field}'),
+    return _fetch_grouped_statistics_summary(
+        daily_model=DailyUserAppActivity,
+        rollup_model=UserAppActivityRollup,
+        start_date=start_date,
+        end_date=end_date,
+        annotated_summary_fields={
+            'login_count': models.Sum('count_logins'),
+            'feedback_count': models.Sum('count_feedback'),
+            'update_security_answers_count': models.Sum('count_update_security_answers'),
+            'update_passwords_count': models.Sum('count_update_passwords'),
+        },
+        group_by=group_by,
     )
 
 
@@ -360,27 +353,19 @@ def fetch_user_patient_clicks_summary(
     Returns:
         grouped patients' clicks summary for a given time period
     """
-    queryset = DailyUserPatientActivity.objects.filter(
-        action_date__gte=start_date,
-        action_date__lte=end_date,
-    )
-
-    queryset = _annotate_queryset_with_grouping_field(queryset, 'action_date', group_by)
-    group_field = group_by.name.lower()
-
-    return list(
-        queryset
-        .values(
-            group_field,
-        )
-        .annotate(
-            checkins_count=models.Sum('count_checkins'),
-            documents_count=models.Sum('count_documents'),
-            educational_materials_count=models.Sum('count_educational_materials'),
-            completed_questionnaires_count=models.Sum('count_questionnaires_complete'),
-            labs_count=models.Sum('count_labs'),
-        )
-        .order_by(f'-{group_field}'),
+    return _fetch_grouped_statistics_summary(
+        daily_model=DailyUserPatientActivity,
+        rollup_model=UserPatientActivityRollup,
+        start_date=start_date,
+        end_date=end_date,
+        annotated_summary_fields={
+            'checkins_count': models.Sum('count_checkins'),
+            'documents_count': models.Sum('count_documents'),
+            'educational_materials_count': models.Sum('count_educational_materials'),
+            'completed_questionnaires_count': models.Sum('count_questionnaires_complete'),
+            'labs_count': models.Sum('count_labs'),
+        },
+        group_by=group_by,
     )
 
 
@@ -600,9 +585,28 @@ def fetch_labs_summary_per_patient(
     Returns:
         individual lab results statistics (per patient).
     """
+    return list(query_labs_summary_per_patient(start_date, end_date))
+
+
+def query_labs_summary_per_patient(
+    start_date: dt.date,
+    end_date: dt.date,
+) -> models.QuerySet[DailyPatientDataReceived, dict[str, Any]]:
+    """
+    Build the (lazy) queryset of the individual received lab results statistics.
+
+    See `fetch_labs_summary_per_patient()` for details.
+
+    Args:
+        start_date: the starting date of the time period for lab statistics (inclusive).
+        end_date: the ending date of the time period for lab statistics (inclusive).
+
+    Returns:
+        queryset of the individual lab results statistics (per patient).
+    """
     # TODO: update the query using `lab_groups_received` statistic field once QSCCD-2209 is implemented.
     # Update query should include `total_lab_groups_received` and `average_labs_per_test_group`.
-    return list(
+    return (
         DailyPatientDataReceived.objects
         .filter(
             action_date__gte=start_date,
@@ -618,7 +622,7 @@ def fetch_labs_summary_per_patient(
             # average_labs_per_test_group=models.F('total_labs_received')    noqa: E800
             # / models.F('total_lab_groups_received'),  noqa: E800
         )
-        .order_by('patient_ser_num'),
+        .order_by('patient_ser_num')
     )
 
 
@@ -638,7 +642,26 @@ def fetch_logins_summary_per_user(
     Returns:
         individual login statistics (per user).
     """
-    return list(
+    return list(query_logins_summary_per_user(start_date, end_date))
+
+
+def query_logins_summary_per_user(
+    start_date: dt.date,
+    end_date: dt.date,
+) -> models.QuerySet[DailyUserAppActivity, dict[str, Any]]:
+    """
+    Build the (lazy) queryset of the individual user login statistics.
+
+    See `fetch_logins_summary_per_user()` for details.
+
+    Args:
+        start_date: the starting date of the time period for the user login stats (inclusive).
+        end_date: the ending date of the time period for the user login stats (inclusive).
+
+    Returns:
+        queryset of the individual login statistics (per user).
+    """
+    return (
         DailyUserAppActivity.objects
         .filter(
             action_date__gte=start_date,
@@ -657,7 +680,7 @@ def fetch_logins_summary_per_user(
             'total_logins',
             'avg_logins_per_day',
         )
-        .order_by('user_id'),
+        .order_by('user_id')
     )
 
 
@@ -678,6 +701,25 @@ def fetch_patient_demographic_diagnosis_summary(
     Returns:
         demographic information and latest diagnosis per patient.
     """
+    return list(query_patient_demographic_diagnosis_summary(start_date, end_date))
+
+
+def query_patient_demographic_diagnosis_summary(
+    start_date: dt.date,
+    end_date: dt.date,
+) -> models.QuerySet[legacy_models.LegacyPatientControl, dict[str, Any]]:
+    """
+    Build the (lazy) queryset of the demographic statistics and the latest diagnosis for each individual patient.
+
+    See `fetch_patient_demographic_diagnosis_summary()` for details.
+
+    Args:
+        start_date: the starting date of the time period for the demographic stats (inclusive).
+        end_date: the ending date of the time period for the demographic stats (inclusive).
+
+    Returns:
+        queryset of the demographic information and latest diagnosis per patient.
+    """
     # TODO: QSCCD-2254 - update the query when Diagnosis model is implemented in django-backend
     latest_diagnosis_sernum_list = (
         legacy_models.LegacyDiagnosis.objects
@@ -700,7 +742,7 @@ def fetch_patient_demographic_diagnosis_summary(
             flat=True,
         )
     )
-    demographics_and_diagnosis = (
+    return (
         legacy_models.LegacyPatientControl.objects
         .filter(
             models.Q(patient__legacydiagnosis__diagnosis_ser_num__in=latest_diagnosis_sernum_list)
@@ -732,8 +774,6 @@ def fetch_patient_demographic_diagnosis_summary(
         )
     )
 
-    return list(demographics_and_diagnosis)
-
 
 def _fetch_received_medical_records_summary(
     start_date: dt.date,
@@ -762,26 +802,193 @@ def _fetch_received_medical_records_summary(
     Returns:
         grouped received medical records summary for a given time period
     """
-    queryset = DailyPatientDataReceived.objects.filter(
-        action_date__gte=start_date,
-        action_date__lte=end_date,
-        **filters,
+    return _fetch_grouped_statistics_summary(
+        daily_model=DailyPatientDataReceived,
+        rollup_model=PatientDataReceivedRollup,
+        start_date=start_date,
+        end_date=end_date,
+        annotated_summary_fields=annotated_summary_fields,
+        group_by=group_by,
+        filters=filters,
     )
 
-    queryset = _annotate_queryset_with_grouping_field(queryset, 'action_date', group_by)
+
+def _fetch_grouped_statistics_summary(  # noqa: PLR0913, PLR0917
+    daily_model: type[models.Model],
+    rollup_model: type[models.Model],
+    start_date: dt.date,
+    end_date: dt.date,
+    annotated_summary_fields: dict[str, Any],
+    group_by: GroupByComponent,
+    filters: dict[str, models.Expression] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Fetch a grouped statistics summary from the daily statistics model and its monthly/yearly rollups.
+
+    When grouping by month or year, the periods that are completely within the date range and
+    that have been rolled up are read from the rollup model.
+    The remaining periods (e.g., the partial periods at the edges of the date range) are read from the daily model.
+    Each group is computed from a single source, which keeps distinct counts per group correct.
+
+    The rollup models use the same field names as the daily models,
+    i.e., the same filters and summary fields apply to both.
+
+    Args:
+        daily_model: the daily statistics model with an `action_date` field
+        rollup_model: the rollup model of the daily statistics model
+        start_date: the beginning of the time period of the summary (inclusive)
+        end_date: the end of the time period of the summary (inclusive)
+        annotated_summary_fields: annotation fields with the statistics/summary aggregation
+        group_by: the date component to group by
+        filters: additional filters on the statistics records
+
+    Returns:
+        grouped statistics summary for a given time period, ordered by the group (descending)
+    """
+    filters = filters or {}
     group_field = group_by.name.lower()
 
-    return list(
-        queryset
-        .values(
-            group_field,
+    if group_by == GroupByComponent.DAY:
+        rollup_period_starts: list[dt.date] = []
+        daily_ranges = [(start_date, end_date)]
+    else:
+        rollup_period_starts, daily_ranges = split_range_by_rollups(start_date, end_date, group_by)
+
+    summary: list[dict[str, Any]] = []
+
+    if rollup_period_starts:
+        summary.extend(
+            rollup_model._default_manager
+            .filter(
+                rollup__period=group_by.name,
+                rollup__period_start__in=rollup_period_starts,
+                **filters,
+            )
+            .values(
+                **{group_field: models.F('rollup__period_start')},
+            )
+            .annotate(
+                **annotated_summary_fields,
+            )
+            .order_by(f'-{group_field}'),
         )
-        .annotate(
-            **annotated_summary_fields,
+
+    if daily_ranges:
+        date_filter = models.Q()
+
+        for range_start, range_end in daily_ranges:
+            date_filter |= models.Q(action_date__gte=range_start, action_date__lte=range_end)
+
+        queryset = daily_model._default_manager.filter(date_filter, **filters)
+        queryset = _annotate_queryset_with_grouping_field(queryset, 'action_date', group_by)
+
+        summary.extend(
+            queryset
+            .values(
+                group_field,
+            )
+            .annotate(
+                **annotated_summary_fields,
+            )
+            .order_by(f'-{group_field}'),
         )
-        .order_by(f'-{group_field}'),
+
+    return sorted(summary, key=itemgetter(group_field), reverse=True)
+
+
+def get_period_start(date: dt.date, group_by: GroupByComponent) -> dt.date:
+    """
+    Return the first day of the month or year that includes the given date.
+
+    Args:
+        date: the date within the period
+        group_by: the period type (month or year); any other component returns the date itself
+
+    Returns:
+        the first day of the period
+    """
+    if group_by == GroupByComponent.YEAR:
+        return date.replace(month=1, day=1)
+
+    if group_by == GroupByComponent.MONTH:
+        return date.replace(day=1)
+
+    return date
+
+
+def get_period_end(period_start: dt.date, group_by: GroupByComponent) -> dt.date:
+    """
+    Return the last day of the month or year starting on the given date.
+
+    Args:
+        period_start: the first day of the period
+        group_by: the period type (month or year); any other component returns the date itself
+
+    Returns:
+        the last day of the period
+    """
+    if group_by == GroupByComponent.YEAR:
+        return period_start.replace(month=12, day=31)
+
+    if group_by == GroupByComponent.MONTH:
+        next_month = (period_start.replace(day=1) + dt.timedelta(days=32)).replace(day=1)
+        return next_month - dt.timedelta(days=1)
+
+    return period_start
+
+
+def split_range_by_rollups(
+    start_date: dt.date,
+    end_date: dt.date,
+    group_by: GroupByComponent,
+) -> tuple[list[dt.date], list[tuple[dt.date, dt.date]]]:
+    """
+    Split a date range into the rolled up periods and the date ranges that need to be read from the daily records.
+
+    Only the periods that are completely within the date range and that have a `UsageStatisticsRollup` are used.
+
+    Args:
+        start_date: the beginning of the date range (inclusive)
+        end_date: the end of the date range (inclusive)
+        group_by: the period type (month or year)
+
+    Returns:
+        the start dates of the rolled up periods and the remaining date ranges (inclusive)
+    """
+    one_day = dt.timedelta(days=1)
+    period_start = get_period_start(start_date, group_by)
+
+    # skip the partial period at the beginning of the range
+    if period_start < start_date:
+        period_start = get_period_end(period_start, group_by) + one_day
+
+    full_period_starts = []
+
+    while get_period_end(period_start, group_by) <= end_date:
+        full_period_starts.append(period_start)
+        period_start = get_period_end(period_start, group_by) + one_day
+
+    rollup_period_starts = sorted(
+        UsageStatisticsRollup.objects.filter(
+            period=group_by.name,
+            period_start__in=full_period_starts,
+        ).values_list('period_start', flat=True),
     )
 
+    daily_ranges = []
+    range_start = start_date
+
+    for rollup_period_start in rollup_period_starts:
+        if range_start < rollup_period_start:
+            daily_ranges.append((range_start, rollup_period_start - one_day))
+
+        range_start = get_period_end(rollup_period_start, group_by) + one_day
+
+    if range_start <= end_date:
+        daily_ranges.append((range_start, end_date))
+
+    return rollup_period_starts, daily_ranges
+
 
 def _annotate_queryset_with_grouping_field[ModelType: models.Model](
     queryset: models.QuerySet[ModelType],
@@ -0,0 +1,174 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""
+Cache of the usage statistics reports.
+
+The statistics of past days do not change once the daily usage statistics have been populated.
+The reports of past date ranges that are built from the daily usage statistics only
+are therefore cached by report type, date range and grouping.
+Reports that read the current state of other models (e.g., the summary report's registration codes and caregivers)
+are not cached since the watermarks do not cover changes to these models.
+
+Every cached report is stored with a stamp of the `DailyUsageStatisticsWatermark` records of its date range.
+When the `update_daily_usage_statistics` command (re-)populates a day, it (re-)creates the watermark of that day,
+which invalidates all cached reports with a date range that includes that day.
+Since the command runs in a separate process, the invalidation is carried by the database
+rather than by deleting cache entries.
+"""
+
+import datetime as dt
+from typing import TYPE_CHECKING, Any
+
+from django.core.cache import cache
+from django.db import models
+from django.utils import timezone
+
+import structlog
+
+from .common import GroupReportType
+from .models import DailyUsageStatisticsWatermark
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from opal.core.utils import WorkbookData
+
+    from .common import GroupByComponent
+
+LOGGER = structlog.get_logger()
+
+#: Prefix of the cache keys of the usage statistics reports
+REPORT_CACHE_PREFIX = 'usage_statistics:report'
+#: Number of seconds a report is kept in the cache
+REPORT_CACHE_TIMEOUT = 60 * 60 * 24
+#: Types of the reports that are built from the daily usage statistics only and can therefore be cached
+CACHED_REPORT_TYPES = frozenset({
+    GroupReportType.RECEIVED_DATA_REPORT.name,
+    GroupReportType.APP_ACTIVITY_REPORT.name,
+})
+#: Cache key of the counter of the reports served from the cache
+REPORT_CACHE_HITS_KEY = f'{REPORT_CACHE_PREFIX}:hits'
+#: Cache key of the counter of the reports that had to be queried
+REPORT_CACHE_MISSES_KEY = f'{REPORT_CACHE_PREFIX}:misses'
+
+type ReportStamp = tuple[dt.datetime | None, int]
+
+
+def get_report(
+    report_type: str,
+    start_date: dt.date,
+    end_date: dt.date,
+    group_by: GroupByComponent | None,
+    fetch_report: Callable[[], WorkbookData],
+) -> WorkbookData:
+    """
+    Return the report from the cache or fetch and cache it.
+
+    Reports with a date range that includes the current day are not cached
+    since the statistics of the current day are not final.
+    Reports of other types than the `CACHED_REPORT_TYPES` are always fetched.
+
+    Args:
+        report_type: the type of the report (e.g., the name of the `GroupReportType`)
+        start_date: the beginning of the time period of the report (inclusive)
+        end_date: the end of the time period of the report (inclusive)
+        group_by: the date component the report is grouped by, if any
+        fetch_report: the function querying the report
+
+    Returns:
+        the cached or the newly fetched report
+    """
+    if report_type not in CACHED_REPORT_TYPES or end_date >= timezone.now().date():
+        return fetch_report()
+
+    key = _get_report_key(report_type, start_date, end_date, group_by)
+    stamp = _get_report_stamp(start_date, end_date)
+    cached_entry: tuple[ReportStamp, WorkbookData] | None = cache.get(key)
+
+    if cached_entry is not None and cached_entry[0] == stamp:
+        _increment_counter(REPORT_CACHE_HITS_KEY)
+        LOGGER.debug('Usage statistics report cache hit for %s', key)
+        return cached_entry[1]
+
+    _increment_counter(REPORT_CACHE_MISSES_KEY)
+    LOGGER.debug('Usage statistics report cache miss for %s', key)
+    report = fetch_report()
+    cache.set(key, (stamp, report), REPORT_CACHE_TIMEOUT)
+
+    return report
+
+
+def get_report_cache_statistics() -> dict[str, int]:
+    """
+    Return the number of reports served from the cache (hits) and the number of reports queried (misses).
+
+    Returns:
+        the hit and miss counters of the report cache
+    """
+    counters: dict[str, Any] = cache.get_many([REPORT_CACHE_HITS_KEY, REPORT_CACHE_MISSES_KEY])
+
+    return {
+        'hits': counters.get(REPORT_CACHE_HITS_KEY, 0),
+        'misses': counters.get(REPORT_CACHE_MISSES_KEY, 0),
+    }
+
+
+def _get_report_key(
+    report_type: str,
+    start_date: dt.date,
+    end_date: dt.date,
+    group_by: GroupByComponent | None,
+) -> str:
+    """
+    Build the cache key of a report.
+
+    Args:
+        report_type: the type of the report
+        start_date: the beginning of the time period of the report (inclusive)
+        end_date: the end of the time period of the report (inclusive)
+        group_by: the date component the report is grouped by, if any
+
+    Returns:
+        the cache key of the report
+    """
+    group_by_name = group_by.name if group_by else 'NONE'
+
+    return f'{REPORT_CACHE_PREFIX}:{report_type}:{start_date.isoformat()}:{end_date.isoformat()}:{group_by_name}'
+
+
+def _get_report_stamp(start_date: dt.date, end_date: dt.date) -> ReportStamp:
+    """
+    Return the stamp of the populated daily usage statistics of a date range.
+
+    The stamp changes whenever a day within the date range is populated again or its statistics are deleted.
+
+    Args:
+        start_date: the beginning of the date range (inclusive)
+        end_date: the end of the date range (inclusive)
+
+    Returns:
+        the latest population time and the number of populated days within the date range
+    """
+    watermarks = DailyUsageStatisticsWatermark.objects.filter(
+        action_date__gte=start_date,
+        action_date__lte=end_date,
+    ).aggregate(
+        populated_at=models.Max('populated_at'),
+        populated_days=models.Count('id'),
+    )
+
+    return watermarks['populated_at'], watermarks['populated_days']
+
+
+def _increment_counter(key: str) -> None:
+    """
+    Increment a counter of the report cache.
+
+    Args:
+        key: the cache key of the counter
+    """
+    # the counters are kept until they are explicitly cleared
+    cache.add(key, 0, timeout=None)
+    cache.incr(key)
@@ -4,7 +4,9 @@
 
 import datetime as dt
 import json
+from typing import TYPE_CHECKING, Any
 
+from django.db import connections
 from django.utils import timezone
 
 import pytest
@@ -17,7 +19,19 @@ from opal.legacy import models as legacy_models
 from opal.patients import factories as patient_factories
 from opal.patients import models as patient_models
 from opal.usage_statistics import factories as statistics_factory
-from opal.usage_statistics.models import DailyPatientDataReceived, DailyUserAppActivity, DailyUserPatientActivity
+from opal.usage_statistics.models import (
+    DailyPatientDataReceived,
+    DailyUsageStatisticsWatermark,
+    DailyUserAppActivity,
+    DailyUserPatientActivity,
+    RollupPeriod,
+    UsageStatisticsRollup,
+    UserAppActivityRollup,
+)
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+    from structlog.testing import LogCapture
 
 pytestmark = pytest.mark.django_db(databases=['default', 'legacy'])
 
@@ -109,6 +123,260 @@ class TestDailyUsageStatisticsUpdate(CommandTestMixin):
         stdout, _stderr = self._call_command('update_daily_usage_statistics', '--force-delete')
         assert stdout == 'Existing usage statistics data cannot be deleted in production environment\n'
 
+    def test_previous_day_records_watermark(self) -> None:
+        """Ensure that the command marks the previous day as populated."""
+        self._call_command('update_daily_usage_statistics')
+
+        previous_day = timezone.now().date() - dt.timedelta(days=1)
+        assert DailyUsageStatisticsWatermark.objects.filter(action_date=previous_day).exists()
+
+    def test_current_day_no_watermark(self) -> None:
+        """Ensure that the command does not mark the incomplete current day as populated."""
+        self._call_command('update_daily_usage_statistics', '--today')
+
+        assert DailyUsageStatisticsWatermark.objects.count() == 0
+
+    def test_received_data_subquery_strategy(self) -> None:
+        """Ensure that the command can populate the received data statistics with the subquery strategy."""
+        patient = legacy_factories.LegacyPatientFactory.create()
+        legacy_factories.LegacyPatientControlFactory.create(patient=patient)
+        django_patient = patient_factories.Patient.create(legacy_id=patient.patientsernum)
+        legacy_factories.LegacyDocumentFactory.create(
+            patientsernum=patient,
+            dateadded=timezone.now() - dt.timedelta(days=1),
+        )
+
+        stdout, _stderr = self._call_command('update_daily_usage_statistics', '--received-data-strategy', 'subquery')
+
+        assert stdout == 'Successfully populated daily statistics data\n'
+        received_data = DailyPatientDataReceived.objects.get()
+        assert received_data.patient == django_patient
+        assert received_data.documents_received == 1
+
+    def test_stage_timings_logged(self, structlog_output: LogCapture) -> None:
+        """Ensure that the command logs the number of records and the time of every stage."""
+        caregiver = caregiver_factories.CaregiverProfile.create()
+        self._create_log_record(username=caregiver.user.username)
+
+        self._call_command('update_daily_usage_statistics')
+
+        logs = [entry['event'] for entry in structlog_output.entries]
+        assert len(logs) == 7
+        assert logs[0].startswith('Extracted 1 DailyUserAppActivity records in ')
+        assert logs[1].startswith('Extracted 0 DailyUserPatientActivity records in ')
+        assert logs[2].startswith('Extracted 0 DailyPatientDataReceived records in ')
+        assert logs[3].startswith('Stored 1 DailyUserAppActivity records in ')
+        assert logs[4].startswith('Stored 0 DailyUserPatientActivity records in ')
+        assert logs[5].startswith('Stored 0 DailyPatientDataReceived records in ')
+        assert logs[6].startswith('Refreshed usage statistics rollups in ')
+
+    def test_rollups_refreshed(self) -> None:
+        """Ensure that the command refreshes the month and year rollups of the populated day."""
+        caregiver = caregiver_factories.CaregiverProfile.create()
+        self._create_log_record(username=caregiver.user.username)
+        action_date = timezone.now().date() - dt.timedelta(days=1)
+
+        self._call_command('update_daily_usage_statistics')
+
+        rollups = UsageStatisticsRollup.objects.values_list('period', 'period_start')
+        assert set(rollups) == {
+            (RollupPeriod.MONTH, action_date.replace(day=1)),
+            (RollupPeriod.YEAR, action_date.replace(month=1, day=1)),
+        }
+        assert UserAppActivityRollup.objects.filter(action_by_user=caregiver.user).count() == 2
+
+    @pytest.mark.django_db(databases=['default', 'legacy'], transaction=True, serialized_rollback=True)
+    def test_workers_extract_concurrently(self, mocker: MockerFixture) -> None:
+        """Ensure that the extractions run in worker threads store the same statistics as a sequential run."""
+        # the worker threads use their own DB connections which only see committed data
+        legacy_patient = legacy_factories.LegacyPatientFactory.create()
+        legacy_factories.LegacyPatientControlFactory.create(patient=legacy_patient)
+        legacy_factories.LegacyDocumentFactory.create(
+            patientsernum=legacy_patient,
+            dateadded=timezone.now() - dt.timedelta(days=1),
+        )
+        relationship = patient_factories.Relationship.create(
+            type=patient_factories.RelationshipType.create(role_type=patient_models.RoleType.SELF),
+            patient=patient_factories.Patient.create(legacy_id=legacy_patient.patientsernum),
+            status=patient_models.RelationshipStatus.CONFIRMED,
+        )
+        username = relationship.caregiver.user.username
+        self._create_log_record(username=username)
+        self._create_log_record(
+            request='Checkin',
+            parameters='OMITTED',
+            target_patient_id=legacy_patient.patientsernum,
+            username=username,
+        )
+        self._create_log_record(
+            request='DocumentContent',
+            parameters=json.dumps(['1']),
+            target_patient_id=legacy_patient.patientsernum,
+            username=username,
+        )
+
+        self._call_command('update_daily_usage_statistics', '--workers', '1')
+        sequential_statistics = self._get_stored_statistics()
+
+        DailyUserAppActivity.objects.all().delete()
+        DailyUserPatientActivity.objects.all().delete()
+        DailyPatientDataReceived.objects.all().delete()
+        UsageStatisticsRollup.objects.all().delete()
+        spy_close_all = mocker.spy(connections, 'close_all')
+
+        stdout, _stderr = self._call_command('update_daily_usage_statistics', '--workers', '3')
+
+        assert stdout == 'Successfully populated daily statistics data\n'
+        # every worker closes its own DB connections once its extraction is done
+        assert spy_close_all.call_count == 3
+        assert all(sequential_statistics.values())
+        assert self._get_stored_statistics() == sequential_statistics
+
+    # tests for backfilling multiple days
+
+    def test_backfill_populates_each_day(self) -> None:
+        """Ensure that the backfill mode populates every day of the range separately."""
+        caregiver = caregiver_factories.CaregiverProfile.create()
+        self._create_log_record(username=caregiver.user.username, days_delta=1)
+        self._create_log_record(username=caregiver.user.username, days_delta=3)
+        # outside of the range
+        self._create_log_record(username=caregiver.user.username, days_delta=5)
+        current_day = timezone.now().date()
+
+        stdout, _stderr = self._call_command(
+            'update_daily_usage_statistics',
+            '--from',
+            (current_day - dt.timedelta(days=3)).isoformat(),
+        )
+
+        assert stdout.splitlines()[-1] == (
+            'Successfully backfilled daily statistics data: 3 day(s) populated, 0 day(s) already populated'
+        )
+        assert DailyUsageStatisticsWatermark.objects.count() == 3
+        assert list(DailyUserAppActivity.objects.order_by('action_date').values_list('action_date', flat=True)) == [
+            current_day - dt.timedelta(days=3),
+            current_day - dt.timedelta(days=1),
+        ]
+
+    def test_backfill_skips_populated_days(self) -> None:
+        """Ensure that the backfill mode skips days that are already populated."""
+        caregiver = caregiver_factories.CaregiverProfile.create()
+        self._create_log_record(username=caregiver.user.username, days_delta=1)
+        self._create_log_record(username=caregiver.user.username, days_delta=2)
+        current_day = timezone.now().date()
+        statistics_factory.DailyUsageStatisticsWatermark.create(action_date=current_day - dt.timedelta(days=1))
+
+        stdout, _stderr = self._call_command(
+            'update_daily_usage_statistics',
+            '--from',
+            (current_day - dt.timedelta(days=2)).isoformat(),
+            '--to',
+            (current_day - dt.timedelta(days=1)).isoformat(),
+        )
+
+        assert stdout.splitlines()[-1] == (
+            'Successfully backfilled daily statistics data: 1 day(s) populated, 1 day(s) already populated'
+        )
+        assert DailyUserAppActivity.objects.count() == 1
+        assert DailyUserAppActivity.objects.get().action_date == current_day - dt.timedelta(days=2)
+
+    def test_backfill_adopts_days_without_watermark(self) -> None:
+        """Ensure that the backfill mode does not duplicate days populated before watermarks existed."""
+        previous_day = timezone.now().date() - dt.timedelta(days=1)
+        statistics_factory.DailyUserAppActivity.create(action_date=previous_day)
+
+        stdout, _stderr = self._call_command(
+            'update_daily_usage_statistics',
+            '--from',
+            previous_day.isoformat(),
+        )
+
+        assert stdout == (
+            'Successfully backfilled daily statistics data: 0 day(s) populated, 1 day(s) already populated\n'
+        )
+        assert DailyUserAppActivity.objects.count() == 1
+        assert DailyUsageStatisticsWatermark.objects.filter(action_date=previous_day).exists()
+
+    def test_backfill_resumes_after_failure(self, mocker: MockerFixture) -> None:
+        """Ensure that days committed before a failure are kept and skipped when the backfill is resumed."""
+        caregiver = caregiver_factories.CaregiverProfile.create()
+        self._create_log_record(username=caregiver.user.username, days_delta=1)
+        self._create_log_record(username=caregiver.user.username, days_delta=2)
+        current_day = timezone.now().date()
+        from_date = (current_day - dt.timedelta(days=2)).isoformat()
+        get_activities = legacy_models.LegacyPatientActivityLog.objects.get_aggregated_user_app_activities
+
+        def _get_activities_failing_on_last_day(
+            start_datetime_period: dt.datetime,
+            end_datetime_period: dt.datetime,
+        ) -> Any:
+            if start_datetime_period.date() == current_day - dt.timedelta(days=1):
+                raise RuntimeError('connection lost')
+
+            return get_activities(
+                start_datetime_period=start_datetime_period,
+                end_datetime_period=end_datetime_period,
+            )
+
+        mock_activities = mocker.patch.object(
+            legacy_models.LegacyPatientActivityLog.objects,
+            'get_aggregated_user_app_activities',
+            side_effect=_get_activities_failing_on_last_day,
+        )
+
+        with pytest.raises(RuntimeError, match='connection lost'):
+            self._call_command('update_daily_usage_statistics', '--from', from_date)
+
+        assert list(DailyUsageStatisticsWatermark.objects.values_list('action_date', flat=True)) == [
+            current_day - dt.timedelta(days=2),
+        ]
+        assert DailyUserAppActivity.objects.count() == 1
+
+        mocker.stop(mock_activities)
+        stdout, _stderr = self._call_command('update_daily_usage_statistics', '--from', from_date)
+
+        assert stdout.splitlines()[-1] == (
+            'Successfully backfilled daily statistics data: 1 day(s) populated, 1 day(s) already populated'
+        )
+        assert DailyUserAppActivity.objects.count() == 2
+
+    def test_backfill_invalid_range(self) -> None:
+        """Ensure that the backfill mode rejects ranges that include incomplete days."""
+        current_day = timezone.now().date()
+
+        stdout, stderr = self._call_command(
+            'update_daily_usage_statistics',
+            '--from',
+            (current_day - dt.timedelta(days=1)).isoformat(),
+            '--to',
+            current_day.isoformat(),
+        )
+
+        assert not stdout
+        assert 'Invalid backfill range' in stderr
+        assert DailyUsageStatisticsWatermark.objects.count() == 0
+
+    def test_backfill_requires_from(self) -> None:
+        """Ensure that the backfill mode requires the start of the range."""
+        previous_day = timezone.now().date() - dt.timedelta(days=1)
+
+        _stdout, stderr = self._call_command('update_daily_usage_statistics', '--to', previous_day.isoformat())
+
+        assert stderr == 'The --from option is required for backfilling usage statistics\n'
+
+    def test_backfill_today_not_allowed(self) -> None:
+        """Ensure that the backfill mode cannot be combined with the today option."""
+        previous_day = timezone.now().date() - dt.timedelta(days=1)
+
+        _stdout, stderr = self._call_command(
+            'update_daily_usage_statistics',
+            '--from',
+            previous_day.isoformat(),
+            '--today',
+        )
+
+        assert stderr == 'The --today option cannot be combined with --from/--to\n'
+
     # tests for populating user app activities
 
     def test_populate_previous_day_user_statistics(self) -> None:
@@ -3334,6 +3602,28 @@ class TestDailyUsageStatisticsUpdate(CommandTestMixin):
         assert lisa_received_data
         assert lisa_received_data.labs_received == 0
 
+    def _get_stored_statistics(self) -> dict[str, list[dict[str, Any]]]:
+        """
+        Get the stored daily statistics records without their primary keys.
+
+        Returns:
+            the field values of the stored records of each daily statistics model
+        """
+        return {
+            'app_activities': [
+                {field: value for field, value in values.items() if field != 'id'}
+                for values in DailyUserAppActivity.objects.order_by('action_by_user').values()
+            ],
+            'patient_activities': [
+                {field: value for field, value in values.items() if field != 'id'}
+                for values in DailyUserPatientActivity.objects.order_by('user_relationship_to_patient').values()
+            ],
+            'received_data': [
+                {field: value for field, value in values.items() if field != 'id'}
+                for values in DailyPatientDataReceived.objects.order_by('patient').values()
+            ],
+        }
+
     def _create_log_record(
         self,
         request: str = 'Log',
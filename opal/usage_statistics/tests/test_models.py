@@ -2,6 +2,9 @@
 #
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
+import datetime as dt
+
+from django.db import IntegrityError
 from django.utils import timezone
 
 import pytest
@@ -10,7 +13,17 @@ from opal.patients.factories import Patient, Relationship
 from opal.users.factories import Caregiver
 
 from .. import factories
-from ..models import DailyPatientDataReceived, DailyUserAppActivity, DailyUserPatientActivity
+from ..models import (
+    DailyPatientDataReceived,
+    DailyUsageStatisticsWatermark,
+    DailyUserAppActivity,
+    DailyUserPatientActivity,
+    PatientDataReceivedRollup,
+    RollupPeriod,
+    UsageStatisticsRollup,
+    UserAppActivityRollup,
+    UserPatientActivityRollup,
+)
 
 pytestmark = pytest.mark.django_db()
 
@@ -123,3 +136,75 @@ def test_daily_patient_data_received_multiple_per_patient() -> None:
     factories.DailyPatientDataReceived.create(patient=patient)
 
     assert DailyPatientDataReceived.objects.count() == 2
+
+
+def test_daily_usage_statistics_watermark_factory() -> None:
+    """Ensure the `DailyUsageStatisticsWatermark` factory creates a valid model."""
+    watermark = factories.DailyUsageStatisticsWatermark.create()
+
+    watermark.full_clean()
+
+
+def test_daily_usage_statistics_watermark_str() -> None:
+    """Ensure the `__str__` method is defined for the `DailyUsageStatisticsWatermark` model."""
+    watermark = DailyUsageStatisticsWatermark(action_date=timezone.now().date())
+
+    assert str(watermark) == 'Usage statistics populated for {action_date}'.format(
+        action_date=watermark.action_date.strftime('%Y-%m-%d'),
+    )
+
+
+def test_daily_usage_statistics_watermark_unique_action_date() -> None:
+    """Ensure only one `DailyUsageStatisticsWatermark` can exist per day."""
+    action_date = timezone.now().date()
+    factories.DailyUsageStatisticsWatermark.create(action_date=action_date)
+
+    with pytest.raises(IntegrityError):
+        DailyUsageStatisticsWatermark.objects.create(action_date=action_date)
+
+
+def test_usage_statistics_rollup_factories() -> None:
+    """Ensure the rollup factories create valid models."""
+    rollup = factories.UsageStatisticsRollup.create()
+
+    rollup.full_clean()
+    factories.UserAppActivityRollup.create(rollup=rollup).full_clean()
+    factories.UserPatientActivityRollup.create(rollup=rollup).full_clean()
+    factories.PatientDataReceivedRollup.create(rollup=rollup).full_clean()
+
+
+def test_usage_statistics_rollup_str() -> None:
+    """Ensure the `__str__` method is defined for the `UsageStatisticsRollup` model."""
+    rollup = UsageStatisticsRollup(period=RollupPeriod.YEAR, period_start=dt.date(2025, 1, 1))
+
+    assert str(rollup) == 'Year rollup starting on 2025-01-01'
+
+
+def test_usage_statistics_rollup_unique_period() -> None:
+    """Ensure only one `UsageStatisticsRollup` can exist per period."""
+    factories.UsageStatisticsRollup.create(period=RollupPeriod.MONTH, period_start=dt.date(2025, 2, 1))
+
+    with pytest.raises(IntegrityError):
+        UsageStatisticsRollup.objects.create(period=RollupPeriod.MONTH, period_start=dt.date(2025, 2, 1))
+
+
+def test_user_app_activity_rollup_unique_user() -> None:
+    """Ensure only one `UserAppActivityRollup` can exist per user and rollup period."""
+    rollup = factories.UserAppActivityRollup.create()
+
+    with pytest.raises(IntegrityError):
+        factories.UserAppActivityRollup.create(rollup=rollup.rollup, action_by_user=rollup.action_by_user)
+
+
+def test_usage_statistics_rollup_delete_cascades() -> None:
+    """Ensure the rollup records are deleted together with their rollup period."""
+    rollup = factories.UsageStatisticsRollup.create()
+    factories.UserAppActivityRollup.create(rollup=rollup)
+    factories.UserPatientActivityRollup.create(rollup=rollup)
+    factories.PatientDataReceivedRollup.create(rollup=rollup)
+
+    rollup.delete()
+
+    assert UserAppActivityRollup.objects.count() == 0
+    assert UserPatientActivityRollup.objects.count() == 0
+    assert PatientDataReceivedRollup.objects.count() == 0
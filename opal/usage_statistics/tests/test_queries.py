@@ -17,6 +17,7 @@ from opal.patients import models as patient_models
 from opal.usage_statistics import factories as stats_factories
 from opal.usage_statistics import models as stats_models
 from opal.usage_statistics import queries as stats_queries
+from opal.usage_statistics import utils as stats_utils
 
 from ..common import GroupByComponent
 
@@ -1101,6 +1102,160 @@ def test_fetch_logins_summary_by_year() -> None:
     ]
 
 
+def test_fetch_logins_summary_by_month_uses_rollups() -> None:
+    """Ensure fetch_logins_summary() reads the rolled up months and the partial months from the daily records."""
+    marge_caregiver = caregiver_factories.CaregiverProfile.create(user__username='marge', legacy_id=1)
+    homer_caregiver = caregiver_factories.CaregiverProfile.create(user__username='homer', legacy_id=2)
+    stats_factories.DailyUserAppActivity.create(
+        action_by_user=marge_caregiver.user,
+        count_logins=3,
+        action_date=dt.date(2024, 5, 5),
+    )
+    stats_factories.DailyUserAppActivity.create(
+        action_by_user=marge_caregiver.user,
+        count_logins=5,
+        action_date=dt.date(2024, 4, 4),
+    )
+    stats_factories.DailyUserAppActivity.create(
+        action_by_user=marge_caregiver.user,
+        count_logins=2,
+        action_date=dt.date(2024, 4, 20),
+    )
+    stats_factories.DailyUserAppActivity.create(
+        action_by_user=homer_caregiver.user,
+        count_logins=1,
+        action_date=dt.date(2024, 4, 30),
+    )
+    stats_utils.update_statistics_rollups(dt.date(2024, 4, 4))
+    stats_utils.update_statistics_rollups(dt.date(2024, 5, 5))
+    # the rolled up April is read from the rollups
+    stats_models.DailyUserAppActivity.objects.filter(action_date__month=4).delete()
+
+    logins_summary = stats_queries.fetch_logins_summary(
+        start_date=dt.date(2024, 4, 1),
+        end_date=dt.date(2024, 5, 5),
+        group_by=GroupByComponent.MONTH,
+    )
+
+    assert logins_summary == [
+        {
+            'month': dt.date(2024, 5, 1),
+            'total_logins': 3,
+            'unique_user_logins': 1,
+            'avg_logins_per_user': 3.0,
+        },
+        {
+            'month': dt.date(2024, 4, 1),
+            'total_logins': 8,
+            'unique_user_logins': 2,
+            'avg_logins_per_user': 4.0,
+        },
+    ]
+
+
+def test_fetch_logins_summary_by_month_partial_rolled_up_month() -> None:
+    """Ensure a rolled up month that is only partially within the date range is read from the daily records."""
+    caregiver = caregiver_factories.CaregiverProfile.create()
+    stats_factories.DailyUserAppActivity.create(
+        action_by_user=caregiver.user,
+        count_logins=3,
+        action_date=dt.date(2024, 4, 4),
+    )
+    stats_factories.DailyUserAppActivity.create(
+        action_by_user=caregiver.user,
+        count_logins=5,
+        action_date=dt.date(2024, 4, 20),
+    )
+    stats_utils.update_statistics_rollups(dt.date(2024, 4, 4))
+
+    logins_summary = stats_queries.fetch_logins_summary(
+        start_date=dt.date(2024, 4, 10),
+        end_date=dt.date(2024, 4, 30),
+        group_by=GroupByComponent.MONTH,
+    )
+
+    assert logins_summary == [
+        {
+            'month': dt.date(2024, 4, 1),
+            'total_logins': 5,
+            'unique_user_logins': 1,
+            'avg_logins_per_user': 5.0,
+        },
+    ]
+
+
+def test_received_labs_summary_by_year_uses_rollups() -> None:
+    """Ensure the received data summaries apply their filters to the rolled up records."""
+    patient = patient_factories.Patient.create(ramq='TEST01161973')
+    other_patient = patient_factories.Patient.create(ramq='TEST01161974')
+    stats_factories.DailyPatientDataReceived.create(
+        patient=patient,
+        labs_received=5,
+        action_date=dt.date(2023, 3, 3),
+    )
+    stats_factories.DailyPatientDataReceived.create(
+        patient=patient,
+        labs_received=3,
+        action_date=dt.date(2023, 7, 7),
+    )
+    stats_factories.DailyPatientDataReceived.create(
+        patient=other_patient,
+        labs_received=0,
+        action_date=dt.date(2023, 7, 7),
+    )
+    stats_utils.update_statistics_rollups(dt.date(2023, 3, 3))
+    stats_utils.update_statistics_rollups(dt.date(2023, 7, 7))
+    stats_models.DailyPatientDataReceived.objects.all().delete()
+
+    labs_summary = stats_queries.fetch_received_labs_summary(
+        start_date=dt.date(2023, 1, 1),
+        end_date=dt.date(2023, 12, 31),
+        group_by=GroupByComponent.YEAR,
+    )
+
+    assert labs_summary == [
+        {
+            'year': dt.date(2023, 1, 1),
+            'total_received_labs': 8,
+            'total_unique_patients': 1,
+            'avg_received_labs_per_patient': 8.0,
+        },
+    ]
+
+
+def test_split_range_by_rollups() -> None:
+    """Ensure only the rolled up periods completely within the date range are used."""
+    stats_factories.UsageStatisticsRollup.create(
+        period=stats_models.RollupPeriod.MONTH, period_start=dt.date(2024, 1, 1)
+    )
+    stats_factories.UsageStatisticsRollup.create(
+        period=stats_models.RollupPeriod.MONTH, period_start=dt.date(2024, 3, 1)
+    )
+    stats_factories.UsageStatisticsRollup.create(
+        period=stats_models.RollupPeriod.MONTH, period_start=dt.date(2024, 5, 1)
+    )
+
+    rollup_period_starts, daily_ranges = stats_queries.split_range_by_rollups(
+        dt.date(2024, 1, 15),
+        dt.date(2024, 5, 30),
+        GroupByComponent.MONTH,
+    )
+
+    assert rollup_period_starts == [dt.date(2024, 3, 1)]
+    assert daily_ranges == [
+        (dt.date(2024, 1, 15), dt.date(2024, 2, 29)),
+        (dt.date(2024, 4, 1), dt.date(2024, 5, 30)),
+    ]
+
+
+def test_get_period_end() -> None:
+    """Ensure the last day of a month or year is returned."""
+    assert stats_queries.get_period_end(dt.date(2024, 2, 1), GroupByComponent.MONTH) == dt.date(2024, 2, 29)
+    assert stats_queries.get_period_end(dt.date(2024, 12, 1), GroupByComponent.MONTH) == dt.date(2024, 12, 31)
+    assert stats_queries.get_period_end(dt.date(2024, 1, 1), GroupByComponent.YEAR) == dt.date(2024, 12, 31)
+    assert stats_queries.get_period_end(dt.date(2024, 1, 5), GroupByComponent.DAY) == dt.date(2024, 1, 5)
+
+
 def test_empty_users_clicks_summary() -> None:
     """Ensure fetch_users_clicks_summary() query can return an empty result without errors."""
     users_clicks_summary = stats_queries.fetch_users_clicks_summary(
@@ -0,0 +1,109 @@
+# SPDX-FileCopyrightText: Copyright (C) 2026 Opal Health Informatics Group at the Research Institute of the McGill University Health Centre <john.kildea@mcgill.ca>
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+import datetime as dt
+from typing import TYPE_CHECKING
+
+from django.utils import timezone
+
+import pytest
+
+from opal.usage_statistics import factories as stats_factories
+from opal.usage_statistics import report_cache
+
+from ..common import GroupByComponent
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+pytestmark = pytest.mark.django_db()
+
+START_DATE = dt.date(2024, 5, 1)
+END_DATE = dt.date(2024, 5, 31)
+
+
+def test_get_report_cache_miss_and_hit(mocker: MockerFixture) -> None:
+    """Ensure that a report is only fetched once for the same parameters."""
+    fetch_report = mocker.MagicMock(return_value={'summary': [{'total': 1}]})
+
+    first_report = report_cache.get_report(
+        'APP_ACTIVITY_REPORT', START_DATE, END_DATE, GroupByComponent.DAY, fetch_report
+    )
+    second_report = report_cache.get_report(
+        'APP_ACTIVITY_REPORT', START_DATE, END_DATE, GroupByComponent.DAY, fetch_report
+    )
+
+    assert first_report == second_report == {'summary': [{'total': 1}]}
+    fetch_report.assert_called_once()
+    assert report_cache.get_report_cache_statistics() == {'hits': 1, 'misses': 1}
+
+
+def test_get_report_key_parameters(mocker: MockerFixture) -> None:
+    """Ensure that reports with different parameters are cached separately."""
+    fetch_report = mocker.MagicMock(return_value={})
+
+    report_cache.get_report('APP_ACTIVITY_REPORT', START_DATE, END_DATE, GroupByComponent.DAY, fetch_report)
+    report_cache.get_report('APP_ACTIVITY_REPORT', START_DATE, END_DATE, GroupByComponent.MONTH, fetch_report)
+    report_cache.get_report('RECEIVED_DATA_REPORT', START_DATE, END_DATE, GroupByComponent.DAY, fetch_report)
+    report_cache.get_report('APP_ACTIVITY_REPORT', START_DATE, END_DATE - dt.timedelta(days=1), None, fetch_report)
+
+    assert fetch_report.call_count == 4
+    assert report_cache.get_report_cache_statistics() == {'hits': 0, 'misses': 4}
+
+
+def test_get_report_summary_not_cached(mocker: MockerFixture) -> None:
+    """Ensure that the summary report is always fetched since it reads the current state of other models."""
+    fetch_report = mocker.MagicMock(return_value={})
+
+    report_cache.get_report('SUMMARY_REPORT', START_DATE, END_DATE, GroupByComponent.DAY, fetch_report)
+    report_cache.get_report('SUMMARY_REPORT', START_DATE, END_DATE, GroupByComponent.DAY, fetch_report)
+
+    assert fetch_report.call_count == 2
+    assert report_cache.get_report_cache_statistics() == {'hits': 0, 'misses': 0}
+
+
+def test_get_report_current_day_not_cached(mocker: MockerFixture) -> None:
+    """Ensure that reports including the current day are always fetched."""
+    fetch_report = mocker.MagicMock(return_value={})
+    today = timezone.now().date()
+
+    report_cache.get_report('APP_ACTIVITY_REPORT', START_DATE, today, GroupByComponent.DAY, fetch_report)
+    report_cache.get_report('APP_ACTIVITY_REPORT', START_DATE, today, GroupByComponent.DAY, fetch_report)
+
+    assert fetch_report.call_count == 2
+    assert report_cache.get_report_cache_statistics() == {'hits': 0, 'misses': 0}
+
+
+def test_get_report_invalidated_by_populated_day(mocker: MockerFixture) -> None:
+    """Ensure that populating a day within the date range invalidates the cached report."""
+    fetch_report = mocker.MagicMock(return_value={})
+    report_cache.get_report('APP_ACTIVITY_REPORT', START_DATE, END_DATE, GroupByComponent.DAY, fetch_report)
+
+    stats_factories.DailyUsageStatisticsWatermark.create(action_date=dt.date(2024, 5, 15))
+    report_cache.get_report('APP_ACTIVITY_REPORT', START_DATE, END_DATE, GroupByComponent.DAY, fetch_report)
+
+    assert fetch_report.call_count == 2
+
+
+def test_get_report_invalidated_by_repopulated_day(mocker: MockerFixture) -> None:
+    """Ensure that populating a day again invalidates the cached report."""
+    fetch_report = mocker.MagicMock(return_value={})
+    watermark = stats_factories.DailyUsageStatisticsWatermark.create(action_date=dt.date(2024, 5, 15))
+    report_cache.get_report('APP_ACTIVITY_REPORT', START_DATE, END_DATE, GroupByComponent.DAY, fetch_report)
+
+    watermark.save()
+    report_cache.get_report('APP_ACTIVITY_REPORT', START_DATE, END_DATE, GroupByComponent.DAY, fetch_report)
+
+    assert fetch_report.call_count == 2
+
+
+def test_get_report_not_invalidated_by_other_day(mocker: MockerFixture) -> None:
+    """Ensure that populating a day outside of the date range keeps the cached report."""
+    fetch_report = mocker.MagicMock(return_value={})
+    report_cache.get_report('APP_ACTIVITY_REPORT', START_DATE, END_DATE, GroupByComponent.DAY, fetch_report)
+
+    stats_factories.DailyUsageStatisticsWatermark.create(action_date=dt.date(2024, 6, 1))
+    report_cache.get_report('APP_ACTIVITY_REPORT', START_DATE, END_DATE, GroupByComponent.DAY, fetch_report)
+
+    fetch_report.assert_called_once()
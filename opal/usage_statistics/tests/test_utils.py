@@ -3,6 +3,7 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
 import datetime as dt
+from operator import itemgetter
 from typing import TYPE_CHECKING, Any
 
 from django.db import models
@@ -939,6 +940,125 @@ def test_aggregated_patient_received_data_received_lab_statistics() -> None:
     assert received_data.filter(patient=homer)[0]['labs_received'] == 1
 
 
+def test_grouped_patient_received_data_with_no_statistics() -> None:
+    """Ensure that get_grouped_patient_received_data function does not fail when there is no statistics."""
+    start_datetime_period, end_datetime_period = _previous_day_period()
+
+    assert not stats_utils.get_grouped_patient_received_data(start_datetime_period, end_datetime_period)
+
+
+def test_grouped_patient_received_data_patient_without_data() -> None:
+    """Ensure that get_grouped_patient_received_data returns empty statistics for patients without data."""
+    patient = legacy_factories.LegacyPatientFactory.create()
+    legacy_factories.LegacyPatientControlFactory.create(patient=patient)
+    start_datetime_period, end_datetime_period = _previous_day_period()
+
+    assert stats_utils.get_grouped_patient_received_data(start_datetime_period, end_datetime_period) == [
+        {
+            'patient': patient.patientsernum,
+            'last_appointment_received': None,
+            'next_appointment': None,
+            'appointments_received': 0,
+            'last_document_received': None,
+            'documents_received': 0,
+            'last_educational_material_received': None,
+            'educational_materials_received': 0,
+            'last_questionnaire_received': None,
+            'questionnaires_received': 0,
+            'last_lab_received': None,
+            'labs_received': 0,
+            'action_date': start_datetime_period.date(),
+        },
+    ]
+
+
+def test_grouped_patient_received_data_matches_subqueries() -> None:
+    """Ensure that get_grouped_patient_received_data returns the same records as the subquery version."""
+    marge = legacy_factories.LegacyPatientFactory.create()
+    legacy_factories.LegacyPatientControlFactory.create(patient=marge)
+    homer = legacy_factories.LegacyPatientFactory.create(
+        patientsernum=52,
+        first_name='Homer',
+        email='homer@simpson.com',
+    )
+    legacy_factories.LegacyPatientControlFactory.create(patient=homer)
+    # patient without patient control record is not included
+    bart = legacy_factories.LegacyPatientFactory.create(
+        patientsernum=53,
+        first_name='Bart',
+        email='bart@simpson.com',
+    )
+    now = timezone.now()
+    previous_day = now - dt.timedelta(days=1)
+
+    for patient in (marge, homer, bart):
+        legacy_factories.LegacyAppointmentFactory.create(
+            patientsernum=patient,
+            date_added=now - dt.timedelta(days=3),
+            scheduledstarttime=now - dt.timedelta(days=2),
+            status='Completed',
+            state='Closed',
+        )
+        legacy_factories.LegacyAppointmentFactory.create(
+            patientsernum=patient,
+            date_added=previous_day,
+            scheduledstarttime=now + dt.timedelta(days=3),
+            state='Active',
+            status='Open',
+        )
+        legacy_factories.LegacyDocumentFactory.create(patientsernum=patient, dateadded=previous_day)
+        legacy_factories.LegacyDocumentFactory.create(patientsernum=patient, dateadded=now)
+        legacy_factories.LegacyPatientTestResultFactory.create(patient_ser_num=patient, date_added=previous_day)
+
+    legacy_factories.LegacyAppointmentFactory.create(
+        patientsernum=marge,
+        date_added=previous_day,
+        scheduledstarttime=now + dt.timedelta(days=1),
+        state='Active',
+        status='Open',
+    )
+    legacy_factories.LegacyEducationalMaterialFactory.create(patientsernum=marge, date_added=previous_day)
+    legacy_factories.LegacyEducationalMaterialFactory.create(
+        patientsernum=homer,
+        date_added=now - dt.timedelta(days=5),
+    )
+    legacy_factories.LegacyQuestionnaireFactory.create(patientsernum=homer, date_added=previous_day)
+    legacy_factories.LegacyPatientTestResultFactory.create(patient_ser_num=marge, date_added=previous_day)
+    legacy_factories.LegacyPatientTestResultFactory.create(
+        patient_ser_num=homer,
+        date_added=now - dt.timedelta(days=2),
+    )
+
+    start_datetime_period, end_datetime_period = _previous_day_period()
+
+    subquery_data = list(stats_utils.get_aggregated_patient_received_data(start_datetime_period, end_datetime_period))
+    grouped_data = stats_utils.get_grouped_patient_received_data(start_datetime_period, end_datetime_period)
+
+    assert len(grouped_data) == 2
+    assert sorted(grouped_data, key=itemgetter('patient')) == sorted(subquery_data, key=itemgetter('patient'))
+
+
+def _previous_day_period() -> tuple[dt.datetime, dt.datetime]:
+    """
+    Build the time period of the complete previous day.
+
+    Returns:
+        the beginning and the end of the previous day
+    """
+    start_datetime_period = dt.datetime.combine(
+        timezone.now() - dt.timedelta(days=1),
+        dt.datetime.min.time(),
+        tzinfo=timezone.get_current_timezone(),
+    )
+    end_datetime_period = dt.datetime.combine(
+        start_datetime_period,
+        dt.datetime.max.time(),
+        tzinfo=timezone.get_current_timezone(),
+    )
+
+    return start_datetime_period, end_datetime_period
+
+
 def _fetch_annotated_relationships() -> models.QuerySet[patient_models.Relationship, dict[str, Any]]:
     """
     Fetch annotated relationships queryset used in the `RelationshipMapping`.
@@ -987,6 +1107,57 @@ def test_export_data_empty_data(tmp_path: Path) -> None:
         stats_utils.export_data([], file_path)
 
 
+def test_update_statistics_rollups() -> None:
+    """Ensure the month and the year of the given day are rolled up per user and per patient."""
+    caregiver = caregiver_factories.CaregiverProfile.create()
+    patient = patient_factories.Patient.create()
+    stats_factories.DailyUserAppActivity.create(
+        action_by_user=caregiver.user, count_logins=2, action_date=dt.date(2024, 4, 4)
+    )
+    stats_factories.DailyUserAppActivity.create(
+        action_by_user=caregiver.user, count_logins=3, action_date=dt.date(2024, 4, 5)
+    )
+    stats_factories.DailyUserAppActivity.create(
+        action_by_user=caregiver.user, count_logins=7, action_date=dt.date(2024, 6, 1)
+    )
+    stats_factories.DailyUserPatientActivity.create(patient=patient, count_labs=4, action_date=dt.date(2024, 4, 4))
+    stats_factories.DailyPatientDataReceived.create(patient=patient, labs_received=6, action_date=dt.date(2024, 4, 4))
+
+    stats_utils.update_statistics_rollups(dt.date(2024, 4, 4))
+
+    month_rollup = stats_models.UsageStatisticsRollup.objects.get(
+        period=stats_models.RollupPeriod.MONTH,
+        period_start=dt.date(2024, 4, 1),
+    )
+    year_rollup = stats_models.UsageStatisticsRollup.objects.get(
+        period=stats_models.RollupPeriod.YEAR,
+        period_start=dt.date(2024, 1, 1),
+    )
+    assert month_rollup.user_app_activities.get(action_by_user=caregiver.user).count_logins == 5
+    assert month_rollup.user_patient_activities.get(patient=patient).count_labs == 4
+    assert month_rollup.patient_data_received.get(patient=patient).labs_received == 6
+    # the year includes the daily records of the months that are not rolled up
+    assert year_rollup.user_app_activities.get(action_by_user=caregiver.user).count_logins == 12
+
+
+def test_update_statistics_rollups_replaces_records() -> None:
+    """Ensure refreshing a rollup replaces its previous records."""
+    caregiver = caregiver_factories.CaregiverProfile.create()
+    stats_factories.DailyUserAppActivity.create(
+        action_by_user=caregiver.user, count_logins=2, action_date=dt.date(2024, 4, 4)
+    )
+    stats_utils.update_statistics_rollups(dt.date(2024, 4, 4))
+    stats_factories.DailyUserAppActivity.create(
+        action_by_user=caregiver.user, count_logins=3, action_date=dt.date(2024, 4, 5)
+    )
+
+    stats_utils.update_statistics_rollups(dt.date(2024, 4, 5))
+
+    assert stats_models.UsageStatisticsRollup.objects.count() == 2
+    assert stats_models.UserAppActivityRollup.objects.count() == 2
+    assert set(stats_models.UserAppActivityRollup.objects.values_list('count_logins', flat=True)) == {5}
+
+
 def test_export_data_simple_dictionary(tmp_path: Path) -> None:
     """Ensure the export function handle the input in form of dictionary."""
     file_path = tmp_path / 'test_dict.csv'
@@ -9,7 +9,7 @@ import zipfile
 from http import HTTPStatus
 from typing import TYPE_CHECKING, Any, cast
 
-from django.http import FileResponse
+from django.http import StreamingHttpResponse
 from django.http.response import HttpResponseBadRequest
 from django.urls.base import reverse
 from django.utils import timezone
@@ -727,7 +727,7 @@ def test_usage_stats_group_reports_empty_csvs(
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert isinstance(response, FileResponse)
+    assert isinstance(response, StreamingHttpResponse)
     assert response['Content-Type'] == 'application/zip'
 
     # Collect chunks from the streaming_content into a buffer
@@ -797,7 +797,7 @@ def test_usage_stats_group_reports_csvs_with_data(
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert isinstance(response, FileResponse)
+    assert isinstance(response, StreamingHttpResponse)
     assert response['Content-Type'] == 'application/zip'
 
     # Collect chunks from the streaming_content into a buffer
@@ -886,7 +886,7 @@ def test_usage_stats_group_reports_empty_xlsx(
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert isinstance(response, FileResponse)
+    assert isinstance(response, StreamingHttpResponse)
     assert response['Content-Type'] == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
     # Collect chunks from the streaming_content into a buffer
@@ -957,7 +957,7 @@ def test_usage_stats_group_reports_xlsx_with_data(
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert isinstance(response, FileResponse)
+    assert isinstance(response, StreamingHttpResponse)
     assert response['Content-Type'] == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
     # Collect chunks from the streaming_content into a buffer
@@ -1026,7 +1026,7 @@ def test_usage_stats_individual_reports_empty_csvs(
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert isinstance(response, FileResponse)
+    assert isinstance(response, StreamingHttpResponse)
     assert response['Content-Type'] == 'application/zip'
 
     # Collect chunks from the streaming_content into a buffer
@@ -1086,7 +1086,7 @@ def test_usage_stats_individual_reports_expected_csvs(
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert isinstance(response, FileResponse)
+    assert isinstance(response, StreamingHttpResponse)
     assert response['Content-Type'] == 'application/zip'
 
     # Collect chunks from the streaming_content into a buffer
@@ -1160,7 +1160,7 @@ def test_usage_stats_individual_reports_empty_xlsx(
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert isinstance(response, FileResponse)
+    assert isinstance(response, StreamingHttpResponse)
     assert response['Content-Type'] == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
     # Collect chunks from the streaming_content into a buffer
@@ -1221,7 +1221,7 @@ def test_usage_stats_individual_reports_expected_xlsx_data(
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert isinstance(response, FileResponse)
+    assert isinstance(response, StreamingHttpResponse)
     assert response['Content-Type'] == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
     individual_summary_report_expected_contents = _create_individual_summary_report_expected_contents()
@@ -1285,6 +1285,39 @@ def test_usage_stats_individual_reports_expected_xlsx_data(
         )
 
 
+def test_usage_stats_group_reports_downloads_served_from_cache(
+    client: Client,
+    admin_user: User,
+    mocker: MockerFixture,
+) -> None:
+    """Ensure that downloading a past group report in another format does not query the statistics again."""
+    client.force_login(user=admin_user)
+    mock_query = mocker.MagicMock(return_value={'summary': [{'total': 1}]})
+    mocker.patch(
+        'opal.usage_statistics.views.GROUP_STATISTICS_QUERIES',
+        {GroupReportType.APP_ACTIVITY_REPORT.name: mock_query},
+    )
+    form_data = {
+        'start_date': timezone.now().date() - dt.timedelta(days=7),
+        'end_date': timezone.now().date() - dt.timedelta(days=1),
+        'group_by': GroupByComponent.DAY.name,
+        'report_type': GroupReportType.APP_ACTIVITY_REPORT.name,
+    }
+    url = reverse('usage-statistics:reports-group-export')
+
+    csv_response = client.post(url, data=form_data | {'download_csv': ['Download CSV']})
+    xlsx_response = client.post(url, data=form_data | {'download_xlsx': ['Download XLSX']})
+
+    assert csv_response.status_code == HTTPStatus.OK
+    assert xlsx_response.status_code == HTTPStatus.OK
+    mock_query.assert_called_once()
+
+    response = client.get(url)
+
+    assert response.context['report_cache_statistics'] == {'hits': 1, 'misses': 1}
+    assertContains(response, 'Cached reports: 1 hits, 1 misses')
+
+
 def _create_registration_records(mocker: MockerFixture) -> None:
     """
     Create registration records for 4 patients.
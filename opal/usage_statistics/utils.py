@@ -11,14 +11,24 @@ from django.db import models
 
 import pandas as pd
 
-from opal.core.utils import SheetData, WorkbookData
+from opal.core.utils import RowData, SheetData, WorkbookData
 from opal.legacy import models as legacy_models
-from opal.usage_statistics.models import DailyUserPatientActivity
+from opal.usage_statistics.models import (
+    DailyPatientDataReceived,
+    DailyUserAppActivity,
+    DailyUserPatientActivity,
+    PatientDataReceivedRollup,
+    RollupPeriod,
+    UsageStatisticsRollup,
+    UserAppActivityRollup,
+    UserPatientActivityRollup,
+)
 
 from . import queries
 
 if TYPE_CHECKING:
     import datetime as dt
+    from collections.abc import Iterator
     from pathlib import Path
 
     from opal.patients.models import Relationship
@@ -27,6 +37,52 @@ if TYPE_CHECKING:
 UsageStatisticsData = SheetData
 ReportData = WorkbookData
 
+#: Number of rows fetched from the database at once when streaming the individual reports
+INDIVIDUAL_REPORT_CHUNK_SIZE = 2000
+
+#: The daily statistics models with their rollup model, the field the rollup is keyed by and the rolled up counts
+ROLLUP_SOURCES: tuple[tuple[type[models.Model], type[models.Model], str, tuple[str, ...]], ...] = (
+    (
+        DailyUserAppActivity,
+        UserAppActivityRollup,
+        'action_by_user_id',
+        (
+            'count_logins',
+            'count_feedback',
+            'count_update_security_answers',
+            'count_update_passwords',
+            'count_update_language',
+            'count_device_ios',
+            'count_device_android',
+            'count_device_browser',
+        ),
+    ),
+    (
+        DailyUserPatientActivity,
+        UserPatientActivityRollup,
+        'patient_id',
+        (
+            'count_checkins',
+            'count_documents',
+            'count_educational_materials',
+            'count_questionnaires_complete',
+            'count_labs',
+        ),
+    ),
+    (
+        DailyPatientDataReceived,
+        PatientDataReceivedRollup,
+        'patient_id',
+        (
+            'appointments_received',
+            'documents_received',
+            'educational_materials_received',
+            'questionnaires_received',
+            'labs_received',
+        ),
+    ),
+)
+
 
 class RelationshipMapping(UserDict[str, Any]):
     """Custom patient-user relationship mapping."""
@@ -304,6 +360,249 @@ def get_aggregated_patient_received_data(
     )
 
 
+def get_grouped_patient_received_data(
+    start_datetime_period: dt.datetime,
+    end_datetime_period: dt.datetime,
+) -> list[dict[str, Any]]:
+    """
+    Retrieve aggregated patients' received data statistics for a given time period using grouped queries.
+
+    Produces the same records as `get_aggregated_patient_received_data`.
+    Instead of annotating every `LegacyPatientControl` record with correlated subqueries,
+    every data category is aggregated once with a single `GROUP BY` query over all patients.
+    The per-category results are then merged per patient.
+
+    NOTE: The legacy datetime fields are stored in the EST time zone format
+    (e.g., zoneinfo.ZoneInfo(key=EST5EDT))), while managed Django models store datetimes in the
+    UTC format. Both are time zone aware.
+
+    Args:
+        start_datetime_period: the beginning of the time period of app activities being extracted
+        end_datetime_period: the end of the time period of app activities being extracted
+
+    Returns:
+        received data statistics records, one per `LegacyPatientControl` patient
+    """
+    date_added_range = (start_datetime_period, end_datetime_period)
+    # NOTE! The action_date indicates the date when the patients' data were received.
+    # It is not the date when the activity statistics were populated.
+    action_date = start_datetime_period.date()
+
+    received_data: dict[int, dict[str, Any]] = {
+        patient_id: {
+            'patient': patient_id,
+            'last_appointment_received': None,
+            'next_appointment': None,
+            'appointments_received': 0,
+            'last_document_received': None,
+            'documents_received': 0,
+            'last_educational_material_received': None,
+            'educational_materials_received': 0,
+            'last_questionnaire_received': None,
+            'questionnaires_received': 0,
+            'last_lab_received': None,
+            'labs_received': 0,
+            'action_date': action_date,
+        }
+        for patient_id in legacy_models.LegacyPatientControl.objects.values_list('patient', flat=True)
+    }
+
+    # The most recent appointment before the end of the range, the closest open/active appointment
+    # after the end of the range and the number of appointments received in the range (see subquery version).
+    appointments = (
+        legacy_models.LegacyAppointment.objects
+        .values(
+            patient_id=models.F('patientsernum'),
+        )
+        .annotate(
+            last_appointment_received=models.Max(
+                'scheduledstarttime',
+                filter=models.Q(scheduledstarttime__lt=end_datetime_period),
+            ),
+            next_appointment=models.Min(
+                'scheduledstarttime',
+                filter=models.Q(state='Active', status='Open', scheduledstarttime__gt=end_datetime_period),
+            ),
+            appointments_received=models.Count(
+                'appointmentsernum',
+                filter=models.Q(date_added__range=date_added_range),
+            ),
+        )
+        .order_by()
+    )
+    _merge_grouped_received_data(received_data, appointments)
+
+    # The latest received record before the end of the range and the number of records received in the range
+    # for the remaining categories: (model, patient field, date field, primary key field, last field, count field)
+    categories: list[tuple[type[models.Model], str, str, str, str, str]] = [
+        (
+            legacy_models.LegacyDocument,
+            'patientsernum',
+            'dateadded',
+            'documentsernum',
+            'last_document_received',
+            'documents_received',
+        ),
+        (
+            legacy_models.LegacyEducationalMaterial,
+            'patientsernum',
+            'date_added',
+            'educationalmaterialsernum',
+            'last_educational_material_received',
+            'educational_materials_received',
+        ),
+        (
+            legacy_models.LegacyQuestionnaire,
+            'patientsernum',
+            'date_added',
+            'questionnairesernum',
+            'last_questionnaire_received',
+            'questionnaires_received',
+        ),
+        # TODO: QSCCD-2209 - add a lab_groups_received count that shows how many "complete lab groups" were received.
+        (
+            legacy_models.LegacyPatientTestResult,
+            'patient_ser_num',
+            'date_added',
+            'patient_test_result_ser_num',
+            'last_lab_received',
+            'labs_received',
+        ),
+    ]
+
+    for model, patient_field, date_field, pk_field, last_field, count_field in categories:
+        grouped_data = (
+            model._default_manager
+            .filter(**{f'{date_field}__lte': end_datetime_period})
+            .values(
+                patient_id=models.F(patient_field),
+            )
+            .annotate(**{
+                last_field: models.Max(date_field, filter=models.Q(**{f'{date_field}__lt': end_datetime_period})),
+                count_field: models.Count(pk_field, filter=models.Q(**{f'{date_field}__range': date_added_range})),
+            })
+            .order_by()
+        )
+        _merge_grouped_received_data(received_data, grouped_data)
+
+    return list(received_data.values())
+
+
+def _merge_grouped_received_data(
+    received_data: dict[int, dict[str, Any]],
+    grouped_data: models.QuerySet[Any, dict[str, Any]],
+) -> None:
+    """
+    Merge aggregated per-patient values of one data category into the received data records.
+
+    Patients without a received data record (i.e., not in `LegacyPatientControl`) are ignored.
+
+    Args:
+        received_data: the received data records keyed by the legacy patient ID
+        grouped_data: the aggregated values of one category, one record per patient
+    """
+    for row in grouped_data:
+        patient_data = received_data.get(row.pop('patient_id'))
+
+        if patient_data is not None:
+            patient_data.update(row)
+
+
+def update_statistics_rollups(action_date: dt.date) -> None:
+    """
+    Refresh the monthly and yearly usage statistics rollups of the periods that include the given day.
+
+    The month is re-aggregated from its daily statistics records.
+    The year is re-aggregated from its month rollups and the daily records of the months without a rollup.
+
+    Args:
+        action_date: the day whose statistics records were added or changed
+    """
+    for group_by in (queries.GroupByComponent.MONTH, queries.GroupByComponent.YEAR):
+        period_start = queries.get_period_start(action_date, group_by)
+        rollup, _ = UsageStatisticsRollup.objects.update_or_create(
+            period=RollupPeriod[group_by.name],
+            period_start=period_start,
+        )
+
+        for daily_model, rollup_model, key_field, count_fields in ROLLUP_SOURCES:
+            rollup_model._default_manager.filter(rollup=rollup).delete()
+            totals = _aggregate_rollup_totals(
+                daily_model,
+                rollup_model,
+                key_field,
+                count_fields,
+                period_start,
+                group_by,
+            )
+            rollup_model._default_manager.bulk_create(
+                rollup_model(rollup=rollup, **{key_field: key}, **counts) for key, counts in totals.items()
+            )
+
+
+def _aggregate_rollup_totals(  # noqa: PLR0913, PLR0917
+    daily_model: type[models.Model],
+    rollup_model: type[models.Model],
+    key_field: str,
+    count_fields: tuple[str, ...],
+    period_start: dt.date,
+    group_by: queries.GroupByComponent,
+) -> dict[int, dict[str, int]]:
+    """
+    Aggregate the statistics counts of a month or a year per user/patient.
+
+    A year is aggregated from the existing month rollups and the daily records of the months without a rollup.
+
+    Args:
+        daily_model: the daily statistics model
+        rollup_model: the rollup model of the daily statistics model
+        key_field: the field the counts are aggregated by (e.g., the user or patient ID)
+        count_fields: the count fields to sum up
+        period_start: the first day of the period
+        group_by: the period type (month or year)
+
+    Returns:
+        the summed up counts keyed by the `key_field` value
+    """
+    period_end = queries.get_period_end(period_start, group_by)
+    sums = {f'total_{field}': models.Sum(field) for field in count_fields}
+    querysets: list[models.QuerySet[Any]] = []
+
+    if group_by == queries.GroupByComponent.YEAR:
+        month_starts, daily_ranges = queries.split_range_by_rollups(
+            period_start,
+            period_end,
+            queries.GroupByComponent.MONTH,
+        )
+        querysets.append(
+            rollup_model._default_manager.filter(
+                rollup__period=RollupPeriod.MONTH,
+                rollup__period_start__in=month_starts,
+            ),
+        )
+    else:
+        daily_ranges = [(period_start, period_end)]
+
+    if daily_ranges:
+        date_filter = models.Q()
+
+        for range_start, range_end in daily_ranges:
+            date_filter |= models.Q(action_date__gte=range_start, action_date__lte=range_end)
+
+        querysets.append(daily_model._default_manager.filter(date_filter))
+
+    totals: dict[int, dict[str, int]] = {}
+
+    for queryset in querysets:
+        for row in queryset.values(key_field).annotate(**sums).order_by():
+            counts = totals.setdefault(row[key_field], dict.fromkeys(count_fields, 0))
+
+            for field in count_fields:
+                counts[field] += row[f'total_{field}']
+
+    return totals
+
+
 def export_data(
     data_set: list[dict[str, Any]] | dict[str, Any],
     file_path: Path,
@@ -433,6 +732,40 @@ def get_app_activity_report(
     }
 
 
+def iter_individual_report(
+    start_date: dt.date,
+    end_date: dt.date,
+) -> dict[str, Iterator[RowData]]:
+    """
+    Fetch individual usage statistics report lazily.
+
+    The statistics include the lab results per patient, the logins per user and the demographics per patient.
+    The rows of every sheet are only fetched from the database when the sheet is iterated,
+    in chunks of `INDIVIDUAL_REPORT_CHUNK_SIZE` rows, which allows to stream reports of any size.
+
+    Args:
+        start_date: the beginning of the time period of the individual usage statistics (inclusive).
+        end_date: the end of the time period of the individual usage statistics (inclusive).
+
+    Returns:
+        the lazily fetched rows of the individual usage statistics per sheet.
+    """
+    return {
+        'labs_summary_per_patient': queries.query_labs_summary_per_patient(
+            start_date,
+            end_date,
+        ).iterator(chunk_size=INDIVIDUAL_REPORT_CHUNK_SIZE),
+        'logins_summary_per_user': queries.query_logins_summary_per_user(
+            start_date,
+            end_date,
+        ).iterator(chunk_size=INDIVIDUAL_REPORT_CHUNK_SIZE),
+        'patient_demographic_diagnosis_summary': queries.query_patient_demographic_diagnosis_summary(
+            start_date,
+            end_date,
+        ).iterator(chunk_size=INDIVIDUAL_REPORT_CHUNK_SIZE),
+    }
+
+
 def _convert_to_naive(datetime: pd.Timestamp) -> pd.Timestamp:
     """
     Clean the time zone info of the input datetime data if it exists.
@@ -4,23 +4,26 @@
 
 """This module provides views for the usage statistics application."""
 
-from io import BytesIO
+from functools import partial
 from types import MappingProxyType
-from typing import Final
+from typing import TYPE_CHECKING, Any, Final
 
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.forms import Form
-from django.http import FileResponse
+from django.http import StreamingHttpResponse
 from django.http.response import HttpResponse, HttpResponseBadRequest
 from django.utils.translation import gettext_lazy as _
 from django.views import generic
 
-from opal.core.utils import create_zip, dict_to_csv, dict_to_xlsx
+from opal.core.utils import StreamingSheetData, iter_csv, iter_xlsx, iter_zip
 from opal.usage_statistics import forms
 
-from . import constants, queries, utils
+from . import constants, report_cache, utils
 from .common import GroupByComponent, GroupReportType
 
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
 GROUP_STATISTICS_QUERIES: Final = MappingProxyType({
     GroupReportType.SUMMARY_REPORT.name: utils.get_summary_report,
     GroupReportType.RECEIVED_DATA_REPORT.name: utils.get_received_data_report,
@@ -49,9 +52,24 @@ class SuperUserPermissionsFormViewMixin(UserPassesTestMixin, generic.FormView[Fo
 class DownloadFormMixin(generic.FormView[Form]):
     """`FormView` mixin that handles the downloading process of the requesting data in CSV or XLSX format."""
 
-    data: utils.ReportData = {}
+    data: Mapping[str, StreamingSheetData] = {}
+
+    def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
+        """
+        Add the hit and miss counters of the report cache to the context.
+
+        Args:
+            kwargs: additional keyword arguments
+
+        Returns:
+            the context data
+        """
+        context = super().get_context_data(**kwargs)
+        context['report_cache_statistics'] = report_cache.get_report_cache_statistics()
+
+        return context
 
-    def process_download(self) -> HttpResponseBadRequest | FileResponse:
+    def process_download(self) -> HttpResponseBadRequest | StreamingHttpResponse:
         """
         Handle a valid form for downloading data in CSV or XLSX format.
 
@@ -69,40 +87,36 @@ class DownloadFormMixin(generic.FormView[Form]):
 
         return HttpResponseBadRequest(_('No valid download option selected.'))
 
-    def download_csv(self) -> FileResponse:
+    def download_csv(self) -> StreamingHttpResponse:
         """
         Generate and return the requesting data in a CSV file.
 
+        The CSV files are generated and compressed while the response is streamed.
+
         Returns:
             streaming HTTP response containing a ZIP file with the requested data in a CSV format.
         """
-        csv_files = {}
-
-        for name, data in self.data.items():
-            filename = f'{name}.csv'
-            csv_files[filename] = dict_to_csv(data)
-
-        zip_file = create_zip(csv_files)
+        csv_files = ((f'{name}.csv', iter_csv(data)) for name, data in self.data.items())
 
-        return FileResponse(
-            BytesIO(zip_file),
-            as_attachment=True,
+        return StreamingHttpResponse(
+            iter_zip(csv_files),
             content_type='application/zip',
+            headers={'Content-Disposition': 'attachment'},
         )
 
-    def download_xlsx(self) -> FileResponse:
+    def download_xlsx(self) -> StreamingHttpResponse:
         """
         Generate and return the requesting data in an XLSX file.
 
+        The rows are written to the XLSX file in write-only mode before the file is streamed.
+
         Returns:
             streaming HTTP response containing the requested data in an XLSX format.
         """
-        xlsx_file = dict_to_xlsx(self.data)
-
-        return FileResponse(
-            BytesIO(xlsx_file),
-            as_attachment=True,
+        return StreamingHttpResponse(
+            iter_xlsx(self.data.items()),
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            headers={'Content-Disposition': 'attachment'},
         )
 
 
@@ -112,9 +126,9 @@ class GroupUsageStatisticsView(SuperUserPermissionsFormViewMixin, DownloadFormMi
     form_class = forms.GroupUsageStatisticsForm
     template_name = 'usage_statistics/reports/export_form.html'
 
-    # Note: HttpResponse and FileResponse share the same superclass (HttpResponseBase).
+    # Note: HttpResponse and StreamingHttpResponse share the same superclass (HttpResponseBase).
     # See: https://github.com/typeddjango/django-stubs/issues/720
-    def form_valid(self, form: Form) -> HttpResponse | FileResponse:  # type: ignore[override]
+    def form_valid(self, form: Form) -> HttpResponse | StreamingHttpResponse:  # type: ignore[override]
         """
         Handle a valid group usage statistics form.
 
@@ -125,11 +139,17 @@ class GroupUsageStatisticsView(SuperUserPermissionsFormViewMixin, DownloadFormMi
             streaming HTTP response containing the data in CSV or XLSX format.
         """
         report_type = form.cleaned_data['report_type']
+        start_date = form.cleaned_data['start_date']
+        end_date = form.cleaned_data['end_date']
+        group_by = GroupByComponent[form.cleaned_data['group_by']]
         group_report_query = GROUP_STATISTICS_QUERIES[report_type]
-        self.data = group_report_query(
-            form.cleaned_data['start_date'],
-            form.cleaned_data['end_date'],
-            GroupByComponent[form.cleaned_data['group_by']],
+        # downloading the same past report in another format is served from the cache (see `CACHED_REPORT_TYPES`)
+        self.data = report_cache.get_report(
+            report_type,
+            start_date,
+            end_date,
+            group_by,
+            partial(group_report_query, start_date, end_date, group_by),
         )
         return self.process_download()
 
@@ -140,9 +160,9 @@ class IndividualUsageStatisticsView(SuperUserPermissionsFormViewMixin, DownloadF
     form_class = forms.IndividualUsageStatisticsForm
     template_name = 'usage_statistics/reports/export_form.html'
 
-    # Note: HttpResponse and FileResponse share the same superclass (HttpResponseBase).
+    # Note: HttpResponse and StreamingHttpResponse share the same superclass (HttpResponseBase).
     # See: https://github.com/typeddjango/django-stubs/issues/720
-    def form_valid(self, form: Form) -> HttpResponse | FileResponse:  # type: ignore[override]
+    def form_valid(self, form: Form) -> HttpResponse | StreamingHttpResponse:  # type: ignore[override]
         """
         Handle a valid individual usage statistics form.
 
@@ -152,14 +172,10 @@ class IndividualUsageStatisticsView(SuperUserPermissionsFormViewMixin, DownloadF
         Returns:
             streaming HTTP response containing the data in CSV or XLSX format.
         """
-        start_date = form.cleaned_data['start_date']
-        end_date = form.cleaned_data['end_date']
-        self.data = {
-            'labs_summary_per_patient': queries.fetch_labs_summary_per_patient(start_date, end_date),
-            'logins_summary_per_user': queries.fetch_logins_summary_per_user(start_date, end_date),
-            'patient_demographic_diagnosis_summary': queries.fetch_patient_demographic_diagnosis_summary(
-                start_date,
-                end_date,
-            ),
-        }
+        # the individual reports are not cached since they can be large,
+        # their rows are streamed from the database instead
+        self.data = utils.iter_individual_report(
+            form.cleaned_data['start_date'],
+            form.cleaned_data['end_date'],
+        )
         return self.process_download()